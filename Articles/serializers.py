@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Article, ArticleAttachment, Comment, ArticleLike, ArticleBookmark, ArticleRead
 from Authentication.serializers import CustomUserSerializer as UserSerializer
+from comrade.counters import PendingCountersMixin
 
 class ArticleAttachmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,7 +22,7 @@ class CommentSerializer(serializers.ModelSerializer):
             return CommentSerializer(obj.replies.all(), many=True).data
         return []
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(PendingCountersMixin, serializers.ModelSerializer):
     author = serializers.SerializerMethodField() # Custom user logic if needed, or just nested
     attachments = ArticleAttachmentSerializer(many=True, read_only=True)
     is_liked = serializers.SerializerMethodField()
@@ -29,6 +30,7 @@ class ArticleSerializer(serializers.ModelSerializer):
     has_read = serializers.SerializerMethodField()
     likes_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
+    pending_counters = ('views_count',)
 
     class Meta:
         model = Article
@@ -0,0 +1,60 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+
+from Articles.models import Article
+from comrade import counters
+
+User = get_user_model()
+
+
+class ViewCounterTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            email='author@test.com', password='testpass123',
+            first_name='Art', last_name='Author'
+        )
+        self.article = Article.objects.create(author=self.author, title='Hot', content='...', status='published')
+        self.addCleanup(counters.flush)
+
+    def test_concurrent_views_are_all_counted(self):
+        threads, views = 16, 250
+        stop = threading.Event()
+        start = threading.Barrier(threads + 1)
+
+        def viewer():
+            start.wait()
+            for _ in range(views):
+                counters.incr(self.article, 'views_count')
+
+        def flusher():
+            # Flushes race the increments
+            start.wait()
+            while not stop.is_set():
+                counters.flush()
+            connection.close()
+
+        workers = [threading.Thread(target=viewer) for _ in range(threads)]
+        flushing = threading.Thread(target=flusher)
+        for thread in [*workers, flushing]:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        stop.set()
+        flushing.join()
+
+        counters.flush()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views_count, threads * views)
+        self.assertEqual(counters.value(self.article, 'views_count'), threads * views)
+
+    def test_retrieve_reads_its_own_write(self):
+        response = self.client.get(f'/api/articles/{self.article.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['views_count'], 1)
+        self.assertEqual(Article.objects.get(pk=self.article.pk).views_count, 0)
+
+        counters.flush()
+        self.assertEqual(Article.objects.get(pk=self.article.pk).views_count, 1)
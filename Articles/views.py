@@ -2,6 +2,7 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
+from comrade import counters
 from .models import Article, ArticleAttachment, Comment, ArticleLike, ArticleBookmark
 from .serializers import ArticleSerializer, CommentSerializer
 from django.db.models import Q
@@ -77,9 +78,8 @@ class ArticleViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment view count
-        instance.views_count += 1
-        instance.save()
+        # Buffered; the serializer adds the pending delta
+        counters.incr(instance, 'views_count')
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -14,6 +14,8 @@ from django.utils import timezone
 from datetime import timedelta
 import logging
 
+from Authentication.search import search_users
+
 logger = logging.getLogger(__name__)
 CustomUser = get_user_model()
 
@@ -144,11 +146,7 @@ class AdminUserManagementView(APIView):
         # Search
         search = request.query_params.get('search', '')
         if search:
-            queryset = queryset.filter(
-                Q(email__icontains=search) |
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search)
-            )
+            queryset = search_users(search, queryset).order_by('-search_rank', '-date_joined')
 
         # Filter by role
         role = request.query_params.get('role', '')
@@ -8,3 +8,7 @@ class AuthenticationConfig(AppConfig):
     def ready(self):
         """Import signals to register receivers"""
         import Authentication.signals  # noqa
+        
+        from comrade.media import register
+        from Authentication.models import UserProfile
+        register(UserProfile, 'avatar', derivatives_field='avatar_derivatives', placeholder_field='avatar_placeholder')
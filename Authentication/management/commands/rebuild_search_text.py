@@ -0,0 +1,18 @@
+"""
+Management command to rebuild CustomUser.search_text.
+save() keeps the column current; run this after QuerySet.update() or
+bulk_update() changed names, usernames or emails. The SQLite FTS index
+follows through its triggers.
+"""
+from django.core.management.base import BaseCommand
+
+from Authentication.models import CustomUser
+from Authentication.search import rebuild_search_text
+
+
+class Command(BaseCommand):
+    help = 'Recompute the normalized user search column for every user'
+
+    def handle(self, *args, **options):
+        changed = rebuild_search_text(CustomUser)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search text for {changed} users'))
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+from Authentication.search import create_search_index, drop_search_index, rebuild_search_text
+
+
+def backfill_search_text(apps, schema_editor):
+    rebuild_search_text(apps.get_model('Authentication', 'CustomUser'))
+
+
+def forwards_index(apps, schema_editor):
+    create_search_index(schema_editor)
+
+
+def backwards_index(apps, schema_editor):
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Authentication", "0011_customuser_username_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="search_text",
+            field=models.CharField(blank=True, db_index=True, default="", editable=False, max_length=700),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(forwards_index, backwards_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Authentication", "0012_customuser_search_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="avatar_derivatives",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="avatar_placeholder",
+            field=models.TextField(blank=True),
+        ),
+    ]
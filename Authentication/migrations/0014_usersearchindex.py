@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+import Authentication.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Authentication", "0013_userprofile_avatar_derivatives_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserSearchIndex",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("search_text", Authentication.search.FullTextField()),
+            ],
+            options={
+                "db_table": "Authentication_customuser_fts",
+                "managed": False,
+            },
+        ),
+    ]
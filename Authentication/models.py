@@ -4,6 +4,7 @@ from Institution.models import Institution, InstBranch
 from Organisation.models import Organisation, OrgBranch
 from django.contrib.auth.models import BaseUserManager
 from datetime import datetime
+from Authentication.search import build_search_text, FTS_TABLE, FullTextField, SEARCH_FIELDS
 
 
 USER_TYPE = (
@@ -118,6 +119,9 @@ class CustomUser(AbstractUser):
     preferred_currency = models.CharField(max_length=3, default='USD')  # ISO 4217
     preferred_language = models.CharField(max_length=10, default='en')  # BCP 47 (e.g. 'en', 'sw', 'fr')
 
+    # Normalized "first last username email" for indexed user search (see Authentication/search.py)
+    search_text = models.CharField(max_length=700, blank=True, default='', db_index=True, editable=False)
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
 
@@ -127,6 +131,10 @@ class CustomUser(AbstractUser):
         # Auto-generate username from first_name + last_name if not set
         if not self.username:
             self.username = self._generate_unique_username()
+        self.search_text = build_search_text(*(getattr(self, f) for f in SEARCH_FIELDS))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(SEARCH_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | {'search_text'}
         super().save(*args, **kwargs)
 
     def _generate_unique_username(self):
@@ -154,6 +162,23 @@ class CustomUser(AbstractUser):
         ]
 
 
+class UserSearchIndex(models.Model):
+    """
+    The SQLite FTS5 table over CustomUser.search_text, joined by search_users().
+    Created and kept in sync by triggers (Authentication/search.py); it does
+    not exist on other backends.
+    """
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.DO_NOTHING, primary_key=True,
+        db_column='rowid', related_name='search_index',
+    )
+    search_text = FullTextField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
 class Student(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
     admission_number = models.CharField(max_length=100, unique=True, primary_key=True)
@@ -481,6 +506,9 @@ class UserProfile(models.Model):
     # Images
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
     cover_image = models.ImageField(upload_to='covers/', null=True, blank=True)
+    # Avatar WebP sizes and blur-up placeholder (see comrade/media.py)
+    avatar_derivatives = models.JSONField(default=dict, blank=True)
+    avatar_placeholder = models.TextField(blank=True)
     
     # Profile Info
     bio = models.TextField(max_length=500, blank=True)
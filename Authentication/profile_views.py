@@ -523,14 +523,12 @@ class UserSearchView(APIView):
         if len(query) < 1:
             return Response([])
         
-        from django.db.models import Q
-        
-        users = CustomUser.objects.filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query) |
-            Q(username__icontains=query)
-        ).exclude(id=request.user.id).filter(is_active=True)[:20]
+        from Authentication.search import search_users
+        
+        candidates = CustomUser.objects.filter(is_active=True).exclude(id=request.user.id)
+        users = search_users(query, candidates).select_related(
+            'user_profile'
+        ).order_by('-search_rank', 'id')[:20]
         
         results = []
         for u in users:
@@ -0,0 +1,204 @@
+"""
+User Search Index
+Normalized search column for CustomUser with a backend-specific index:
+- PostgreSQL: pg_trgm GIN index on ``search_text`` (substring + similarity ranking)
+- SQLite: external-content FTS5 table kept in sync by triggers (prefix + bm25 ranking)
+Other backends fall back to a plain LIKE over the normalized column.
+
+Every backend matches each query token as a word prefix ("an" finds "Anders",
+not "Joanna").
+
+``search_text`` is derived in CustomUser.save(), so ``QuerySet.update()`` and
+``bulk_update()`` of name/username/email columns leave it stale; run
+``python manage.py rebuild_search_text`` (rebuild_search_text()) after such
+bulk writes.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, F, FloatField, Func, IntegerField, Lookup, Q, TextField, Value, When
+
+USER_TABLE = 'Authentication_customuser'
+FTS_TABLE = 'Authentication_customuser_fts'
+TRGM_INDEX = 'Authentication_customuser_search_trgm'
+
+# Fields folded into CustomUser.search_text (order matters for prefix ranking)
+SEARCH_FIELDS = ('first_name', 'last_name', 'username', 'email')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_search_text(value):
+    """Lowercase, strip accents and collapse whitespace."""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value))
+    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    return ' '.join(value.lower().split())
+
+
+def build_search_text(first_name='', last_name='', username='', email=''):
+    """Build the denormalized value stored in CustomUser.search_text."""
+    parts = (first_name, last_name, username, email)
+    return normalize_search_text(' '.join(p for p in parts if p))[:700]
+
+
+def tokenize_query(query):
+    """Split a raw search box value into normalized word tokens."""
+    return _TOKEN_RE.findall(normalize_search_text(query))[:8]
+
+
+def _fts_match_expression(tokens):
+    # Every token must match as a word prefix: "jo" "do" -> "jo"* AND "do"*
+    return ' '.join(f'"{t}"*' for t in tokens)
+
+
+class FullTextMatch(Lookup):
+    """``<fts column>__match=<FTS5 query>``, matched against the whole FTS table."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{compiler.quote_name_unless_alias(self.lhs.alias)} MATCH {rhs}', rhs_params
+
+
+class FullTextField(TextField):
+    """Column of an FTS5 virtual table (see UserSearchIndex)."""
+
+
+FullTextField.register_lookup(FullTextMatch)
+
+
+class FullTextRank(Func):
+    """bm25() of the matched FTS row joined through an FTS column, negated so higher is better."""
+    output_field = FloatField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column = self.get_source_expressions()[0]
+        return f'-bm25({compiler.quote_name_unless_alias(column.alias)})', []
+
+
+def _prefix_rank(tokens):
+    """Portable boost for matches at the start of a name/username/email."""
+    first = tokens[0]
+    return Case(
+        When(Q(username__istartswith=first), then=Value(3)),
+        When(Q(first_name__istartswith=first) | Q(last_name__istartswith=first), then=Value(2)),
+        When(Q(email__istartswith=first), then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def search_users(query, queryset=None):
+    """
+    Filter ``queryset`` (default: all users) to users matching ``query``.
+
+    Results are annotated with ``search_rank`` (higher is better); callers
+    decide on ordering and slicing, e.g. ``.order_by('-search_rank', 'id')[:20]``.
+    """
+    if queryset is None:
+        from Authentication.models import CustomUser
+        queryset = CustomUser.objects.all()
+
+    tokens = tokenize_query(query)
+    if not tokens:
+        return queryset.none()
+
+    vendor = connection.vendor
+    prefix_rank = _prefix_rank(tokens)
+
+    if vendor == 'sqlite':
+        # Join the FTS table (UserSearchIndex) so MATCH runs once and bm25()
+        # is read from the same scan
+        queryset = queryset.filter(search_index__search_text__match=_fts_match_expression(tokens))
+        text_rank = FullTextRank('search_index__search_text')
+    else:
+        # search_text is space separated, so a word starts the column or follows a space
+        condition = Q()
+        for token in tokens:
+            condition &= Q(search_text__startswith=token) | Q(search_text__contains=f' {token}')
+        queryset = queryset.filter(condition)
+        if vendor == 'postgresql':
+            from django.contrib.postgres.search import TrigramSimilarity
+            text_rank = TrigramSimilarity('search_text', ' '.join(tokens))
+        else:
+            text_rank = Value(0.0, output_field=FloatField())
+
+    return queryset.annotate(
+        search_prefix_rank=prefix_rank,
+        search_text_rank=text_rank,
+    ).annotate(
+        search_rank=F('search_prefix_rank') * Value(10.0, output_field=FloatField()) + F('search_text_rank'),
+    )
+
+
+def rebuild_search_text(model, batch_size=2000):
+    """
+    Recompute ``search_text`` for every row of ``model`` (CustomUser or its
+    historical migration model); returns the number of rows that changed.
+    """
+    changed, batch = 0, []
+    for user in model.objects.only('id', 'search_text', *SEARCH_FIELDS).iterator(chunk_size=batch_size):
+        value = build_search_text(*(getattr(user, f) for f in SEARCH_FIELDS))
+        if value != user.search_text:
+            user.search_text = value
+            batch.append(user)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, ['search_text'])
+            changed += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, ['search_text'])
+        changed += len(batch)
+    return changed
+
+
+# ---------------------------------------------------------------------------
+# Index DDL (used by migrations)
+# ---------------------------------------------------------------------------
+
+SQLITE_CREATE_SQL = [
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" USING fts5('
+    f'search_text, content="{USER_TABLE}", content_rowid="id", '
+    f'tokenize="unicode61 remove_diacritics 2", prefix="2 3")',
+    f'CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ai" AFTER INSERT ON "{USER_TABLE}" BEGIN '
+    f'INSERT INTO "{FTS_TABLE}"(rowid, search_text) VALUES (new.id, new.search_text); END',
+    f'CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ad" AFTER DELETE ON "{USER_TABLE}" BEGIN '
+    f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, search_text) VALUES (\'delete\', old.id, old.search_text); END',
+    f'CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_au" AFTER UPDATE OF search_text ON "{USER_TABLE}" BEGIN '
+    f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, search_text) VALUES (\'delete\', old.id, old.search_text); '
+    f'INSERT INTO "{FTS_TABLE}"(rowid, search_text) VALUES (new.id, new.search_text); END',
+    f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES (\'rebuild\')',
+]
+
+SQLITE_DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ai"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ad"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_au"',
+    f'DROP TABLE IF EXISTS "{FTS_TABLE}"',
+]
+
+POSTGRES_CREATE_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS "{TRGM_INDEX}" ON "{USER_TABLE}" USING gin (search_text gin_trgm_ops)',
+]
+
+POSTGRES_DROP_SQL = [
+    f'DROP INDEX IF EXISTS "{TRGM_INDEX}"',
+]
+
+
+def create_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_CREATE_SQL, 'postgresql': POSTGRES_CREATE_SQL}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_DROP_SQL, 'postgresql': POSTGRES_DROP_SQL}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
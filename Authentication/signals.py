@@ -1,12 +1,24 @@
 """
 Authentication Signals
-Auto-creates PaymentProfile when a Profile is created
+Auto-creates Profile when a user is created, and PaymentProfile when a Profile is created
 """
+from django.conf import settings
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 import uuid
 
 
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    """
+    Guarantee the CustomUser -> Profile -> PaymentProfile chain exists from
+    signup, so payment lookups are a plain read instead of get_or_create.
+    """
+    if created and not raw:
+        from Authentication.models import Profile
+        Profile.objects.get_or_create(user=instance)
+
+
 @receiver(post_save, sender='Authentication.Profile')
 def create_payment_profile(sender, instance, created, **kwargs):
     """
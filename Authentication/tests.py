@@ -1,3 +1,56 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from Authentication.models import CustomUser
+from Authentication.search import build_search_text, rebuild_search_text, search_users
+
+
+class UserSearchIndexTests(TestCase):
+    """Tests for the normalized user search column and ranked search"""
+
+    def setUp(self):
+        self.viewer = CustomUser.objects.create_user(
+            email='viewer@test.com', password='testpass123',
+            first_name='View', last_name='Er'
+        )
+        self.jose = CustomUser.objects.create_user(
+            email='jose.doe@test.com', password='testpass123',
+            first_name='José', last_name='Doe'
+        )
+        self.jon = CustomUser.objects.create_user(
+            email='jon@test.com', password='testpass123',
+            first_name='Jonathan', last_name='Smith'
+        )
+
+    def test_search_text_is_normalized(self):
+        self.assertEqual(self.jose.search_text, build_search_text('José', 'Doe', self.jose.username, 'jose.doe@test.com'))
+        self.assertIn('jose doe', self.jose.search_text)
+
+    def test_search_text_follows_name_updates(self):
+        self.jon.last_name = 'Kamau'
+        self.jon.save(update_fields=['last_name'])
+        self.jon.refresh_from_db()
+        self.assertIn('kamau', self.jon.search_text)
+        self.assertEqual(list(search_users('kam')), [self.jon])
+
+    def test_prefix_match_across_tokens(self):
+        ids = set(search_users('jo').values_list('id', flat=True))
+        self.assertEqual(ids, {self.jose.id, self.jon.id})
+        self.assertEqual(list(search_users('jose d')), [self.jose])
+
+    def test_tokens_match_word_prefixes_only(self):
+        self.assertEqual(list(search_users('smi')), [self.jon])
+        self.assertEqual(list(search_users('ith')), [])
+
+    def test_rebuild_after_queryset_update(self):
+        CustomUser.objects.filter(pk=self.jon.pk).update(last_name='Kamau')
+        self.assertEqual(list(search_users('kam')), [])
+        self.assertEqual(rebuild_search_text(CustomUser), 1)
+        self.assertEqual(list(search_users('kam')), [self.jon])
+
+    def test_search_view_excludes_requester(self):
+        client = APIClient()
+        client.force_authenticate(user=self.viewer)
+        response = client.get('/auth/users/search/', {'q': 'view'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
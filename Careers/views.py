@@ -5,6 +5,7 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, Count
+from comrade import counters
 from .models import Gig, GigApplication, CareerOpportunity, CareerApplication, UserCareerPreference
 from .serializers import (
     GigSerializer, GigCreateSerializer, GigApplicationSerializer,
@@ -77,9 +78,7 @@ class GigViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def increment_view(self, request, pk=None):
         gig = self.get_object()
-        gig.views_count += 1
-        gig.save()
-        return Response({'status': 'viewed', 'views': gig.views_count})
+        return Response({'status': 'viewed', 'views': counters.incr(gig, 'views_count')})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def increment_share(self, request, pk=None):
@@ -173,9 +172,7 @@ class CareerOpportunityViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def increment_view(self, request, pk=None):
         career = self.get_object()
-        career.views_count += 1
-        career.save()
-        return Response({'status': 'viewed', 'views': career.views_count})
+        return Response({'status': 'viewed', 'views': counters.incr(career, 'views_count')})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def increment_share(self, request, pk=None):
@@ -7,3 +7,5 @@ class InstitutionConfig(AppConfig):
 
     def ready(self):
         import Institution.signals  # noqa
+        from Institution.hierarchy import institution_hierarchy
+        institution_hierarchy.connect()
@@ -0,0 +1,57 @@
+"""
+Institution hierarchy document (see comrade/hierarchy.py).
+Holds the publicly visible (approved) units of every unit viewset, so the
+structure is one cached request instead of one request per unit type.
+"""
+from comrade.hierarchy import Hierarchy, Section
+from Institution.models import (
+    HR, ICT, AdminDep, Admissions, Cafeteria, CareerOffice, Counselling, Faculty, Finance, HealthServices,
+    Hostel, InstBranch, InstDepartment, Legal, Library, Marketing, OtherInstitutionUnit, Programme,
+    RegistrarOffice, Security, StudentAffairs, SupportServices, Transport, VCOffice,
+)
+from Institution.serializers import (
+    AdminDepSerializer, AdmissionsSerializer, CafeteriaSerializer, CareerOfficeSerializer, CounsellingSerializer,
+    FacultySerializer, FinanceSerializer, HealthServicesSerializer, HostelSerializer, HRSerializer,
+    ICTSerializer, InstBranchSerializer, InstDepartmentSerializer, LegalSerializer, LibrarySerializer,
+    MarketingSerializer, OtherInstitutionUnitSerializer, ProgrammeSerializer, RegistrarOfficeSerializer,
+    SecuritySerializer, StudentAffairsSerializer, SupportServicesSerializer, TransportSerializer,
+    VCOfficeSerializer,
+)
+
+UNITS = (
+    ('inst_branches', InstBranch, InstBranchSerializer),
+    ('vc_offices', VCOffice, VCOfficeSerializer),
+    ('faculties', Faculty, FacultySerializer),
+    ('inst_departments', InstDepartment, InstDepartmentSerializer),
+    ('programmes', Programme, ProgrammeSerializer),
+    ('admin_departments', AdminDep, AdminDepSerializer),
+    ('registrar_offices', RegistrarOffice, RegistrarOfficeSerializer),
+    ('hr', HR, HRSerializer),
+    ('ict', ICT, ICTSerializer),
+    ('finance', Finance, FinanceSerializer),
+    ('marketing', Marketing, MarketingSerializer),
+    ('legal', Legal, LegalSerializer),
+    ('student_affairs', StudentAffairs, StudentAffairsSerializer),
+    ('admissions', Admissions, AdmissionsSerializer),
+    ('career_offices', CareerOffice, CareerOfficeSerializer),
+    ('counselling', Counselling, CounsellingSerializer),
+    ('support_services', SupportServices, SupportServicesSerializer),
+    ('security', Security, SecuritySerializer),
+    ('transport', Transport, TransportSerializer),
+    ('libraries', Library, LibrarySerializer),
+    ('cafeterias', Cafeteria, CafeteriaSerializer),
+    ('hostels', Hostel, HostelSerializer),
+    ('health_services', HealthServices, HealthServicesSerializer),
+    ('other_units', OtherInstitutionUnit, OtherInstitutionUnitSerializer),
+)
+
+
+def _public(model):
+    """Filters for what non-admins see (mirrors BaseUnitViewSet.get_queryset)."""
+    fields = {field.name for field in model._meta.get_fields()}
+    return {'approval_status': 'approved'} if 'approval_status' in fields else {}
+
+
+institution_hierarchy = Hierarchy('institution', 'institution', {
+    key: Section(model, serializer_class, _public(model)) for key, model, serializer_class in UNITS
+})
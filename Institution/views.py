@@ -2,6 +2,7 @@
 Institution App Views
 Includes ViewSets for verification system and hierarchical institutional structures
 """
+from django.core.exceptions import ValidationError
 from django.shortcuts import render
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
@@ -78,6 +79,7 @@ from Institution.serializers import (
     HealthServicesSerializer,
     OtherInstitutionUnitSerializer,
 )
+from Institution.hierarchy import institution_hierarchy
 
 
 # ============================================================================
@@ -96,6 +98,12 @@ class InstitutionViewSet(ModelViewSet):
         """Set created_by to the authenticated user"""
         serializer.save(created_by=self.request.user, is_active=True)
 
+    @action(detail=True, methods=['get'])
+    def hierarchy(self, request, pk=None):
+        """All approved units of the institution in one cached document (ETag/304)"""
+        institution = self.get_object()
+        return institution_hierarchy.respond(request, institution.pk)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def follow(self, request, pk=None):
         institution = self.get_object()
@@ -557,24 +565,44 @@ class BaseUnitViewSet(ModelViewSet):
         if user.is_staff:
             return qs
 
-        # Check if Institution Admin
-        is_inst_admin = False
-        if institution_id:
-            try:
-                is_inst_admin = Institution.objects.filter(id=institution_id, created_by=user).exists()
-                if not is_inst_admin:
-                    is_inst_admin = InstitutionMember.objects.filter(
-                        institution_id=institution_id, user=user, role__in=['creator', 'admin']
-                    ).exists()
-            except:
-                pass
-        
-        if not is_inst_admin:
+        if not self._is_inst_admin(institution_id):
              if hasattr(self.queryset.model, 'approval_status'):
                 qs = qs.filter(approval_status='approved')
         
         return qs
 
+    def _is_inst_admin(self, institution_id):
+        user = self.request.user
+        if not institution_id:
+            return False
+        try:
+            return (Institution.objects.filter(id=institution_id, created_by=user).exists() or
+                    InstitutionMember.objects.filter(
+                        institution_id=institution_id, user=user, role__in=['creator', 'admin']
+                    ).exists())
+        except:
+            return False
+
+    def list(self, request, *args, **kwargs):
+        """
+        The public listing of one institution's units is a section of the
+        cached hierarchy document (ETag/304). Admins, who also see pending
+        units, and any other filtering go through the regular queryset.
+        """
+        institution_id = request.query_params.get('institution')
+        section = institution_hierarchy.section_for(self.queryset.model)
+        snapshot = (
+            institution_id and section
+            and set(request.query_params) <= {'institution', 'page', 'page_size'}
+            and not request.user.is_staff and not self._is_inst_admin(institution_id)
+        )
+        if snapshot:
+            try:
+                return institution_hierarchy.respond(request, institution_id, section=section, view=self)
+            except ValidationError:
+                pass
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         institution_id = self.request.data.get('institution')
         branch_id = self.request.data.get('inst_branch')
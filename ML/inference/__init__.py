@@ -1,2 +1,2 @@
 # ML Inference modules
-from .fake_news_detector import FakeNewsDetector, analyze_content
+from .fake_news_detector import FakeNewsDetector, analyze_content, content_hash
@@ -0,0 +1,179 @@
+"""
+Distribution Engine — Inference module for the PricingDistributionModel.
+
+The model's input is tiny and mostly discrete:
+    [base_cost (0-100), tier (0-3), buy_mode (0/1), group_size (0, 2-10), is_digital (0/1)]
+so when the weights load we evaluate it once over the whole grid
+
+    tier × buy_mode × group_size × is_digital × log-spaced cost bins
+
+and answer requests from that table, interpolating linearly (in log-cost)
+between neighbouring bins; bin 0 holds cost 0. Inputs outside the grid (cost
+above MAX_COST, group sizes above MAX_GROUP_SIZE) are evaluated with one
+batched torch call.
+Falls back to the training targets (rule-based split) if the model is unavailable.
+"""
+
+import os
+import numpy as np
+from dataclasses import dataclass
+
+from ML.inference.model_registry import ModelHandle, load_into
+
+
+@dataclass
+class DistributionSplit:
+    """Share of the price going to each party (fractions summing to 1)."""
+    supplier_gain: float
+    platform_fee: float
+    user_discount: float
+    model_version: str
+    is_fallback: bool = False
+
+
+MIN_COST = 0.5
+MAX_COST = 100.0
+COST_BINS = 64
+MAX_GROUP_SIZE = 10
+NUM_TIERS = 4
+
+
+class DistributionEngine:
+    """
+    Production inference engine for supplier/platform/discount splits.
+
+    Usage:
+        engine = DistributionEngine()
+        split = engine.get_split(base_cost=42.0, tier=1, buy_mode=1, group_size=5, is_digital=0)
+        splits = engine.split_batch(np.array([[42.0, 1, 1, 5, 0], ...]))  # -> [n, 3]
+    """
+
+    def __init__(self, model_dir=None):
+        self.model_dir = model_dir or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'models', 'distribution'
+        )
+        self.model = None
+        self.model_version = 'v1'
+        # Bin 0 is cost 0; bins 1.. are log-spaced from MIN_COST to MAX_COST
+        self.log_costs = np.linspace(np.log(MIN_COST), np.log(MAX_COST), COST_BINS - 1).astype(np.float32)
+        self.bin_costs = np.concatenate([[0.0], np.exp(self.log_costs)]).astype(np.float32)
+        # table[tier, buy_mode, group_size, is_digital, cost_bin] -> (supplier, platform, discount)
+        self.table = None
+        self._load_model()
+
+    @property
+    def is_available(self):
+        return self.model is not None
+
+    def _load_model(self):
+        """Load the trained model and precompute the lookup table."""
+        weights_path = os.path.join(self.model_dir, 'tier_distribution.pth')
+        if not os.path.exists(weights_path):
+            print(f"[DistributionEngine] No trained model found at {self.model_dir}, using rule-based fallback")
+            return
+
+        try:
+            from ML.training.distribution_model import PricingDistributionModel
+
+            model = PricingDistributionModel()
+            load_into(model, weights_path)
+            model.eval()
+            self.model = model
+            self.table = self._build_table()
+            self.model_version = f"v1-lut{COST_BINS}"
+            print(f"[DistributionEngine] Model loaded from {self.model_dir} ({self.model_version})")
+        except Exception as e:
+            print(f"[DistributionEngine] Failed to load model: {e}, using rule-based fallback")
+            self.model = None
+            self.table = None
+
+    def _build_table(self):
+        """Evaluate the model over the full discrete grid in one batch."""
+        tiers, modes, sizes, digital, bins = np.meshgrid(
+            np.arange(NUM_TIERS), np.arange(2), np.arange(MAX_GROUP_SIZE + 1),
+            np.arange(2), np.arange(COST_BINS), indexing='ij',
+        )
+        grid = np.stack([
+            self.bin_costs[bins.ravel()],
+            tiers.ravel(), modes.ravel(), sizes.ravel(), digital.ravel(),
+        ], axis=1).astype(np.float32)
+        out = self._evaluate(grid)
+        return out.reshape(NUM_TIERS, 2, MAX_GROUP_SIZE + 1, 2, COST_BINS, 3)
+
+    def _evaluate(self, inputs):
+        import torch
+        with torch.no_grad():
+            return self.model(torch.from_numpy(np.ascontiguousarray(inputs, dtype=np.float32))).numpy()
+
+    @staticmethod
+    def rule_based(inputs):
+        """Training targets: tiered discount, +10% for groups, ~10% platform fee."""
+        tier, mode, digital = inputs[:, 1], inputs[:, 2], inputs[:, 4]
+        base = np.where((tier == 0) & (digital == 0), 0.15, 0.05)
+        discount = np.clip(base + tier * 0.05 + mode * 0.10, 0.0, 0.6)
+        platform = np.full_like(discount, 0.10)
+        return np.stack([1.0 - discount - platform, platform, discount], axis=1).astype(np.float32)
+
+    def split_batch(self, inputs):
+        """
+        Vectorized splits for ``inputs`` of shape [n, 5].
+
+        Returns:
+            np.ndarray [n, 3] of (supplier_gain, platform_fee, user_discount)
+        """
+        inputs = np.atleast_2d(np.asarray(inputs, dtype=np.float32))
+        if self.model is None:
+            return self.rule_based(inputs)
+
+        cost = inputs[:, 0]
+        tier = np.clip(np.rint(inputs[:, 1]), 0, NUM_TIERS - 1).astype(np.int64)
+        mode = (inputs[:, 2] > 0.5).astype(np.int64)
+        size = np.rint(inputs[:, 3]).astype(np.int64)
+        digital = (inputs[:, 4] > 0.5).astype(np.int64)
+
+        in_range = (cost <= MAX_COST) & (size >= 0) & (size <= MAX_GROUP_SIZE)
+        out = np.empty((len(inputs), 3), dtype=np.float32)
+
+        idx = np.nonzero(in_range)[0]
+        if len(idx):
+            # Fractional bin position: linear below MIN_COST, log-spaced above
+            c = np.maximum(cost[idx], 0.0)
+            step = self.log_costs[1] - self.log_costs[0]
+            log_pos = 1.0 + (np.log(np.maximum(c, MIN_COST)) - self.log_costs[0]) / step
+            pos = np.clip(np.where(c < MIN_COST, c / MIN_COST, log_pos), 0, COST_BINS - 1)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, COST_BINS - 1)
+            frac = (pos - lo)[:, None]
+            cells = self.table[tier[idx], mode[idx], size[idx], digital[idx]]
+            rows = np.arange(len(idx))
+            mixed = cells[rows, lo] * (1.0 - frac) + cells[rows, hi] * frac
+            out[idx] = mixed / mixed.sum(axis=1, keepdims=True)
+
+        rest = np.nonzero(~in_range)[0]
+        if len(rest):
+            out[rest] = self._evaluate(inputs[rest])
+        return out
+
+    def get_split(self, base_cost, tier=0, buy_mode=0, group_size=0, is_digital=0):
+        """Split for a single item."""
+        values = self.split_batch([[base_cost, tier, buy_mode, group_size, is_digital]])[0]
+        return DistributionSplit(
+            supplier_gain=float(values[0]),
+            platform_fee=float(values[1]),
+            user_discount=float(values[2]),
+            model_version=self.model_version,
+            is_fallback=self.model is None,
+        )
+
+    def reload(self):
+        """Reload model from disk (e.g., after retraining) and rebuild the table."""
+        self._load_model()
+
+
+# Hot-swappable instance backed by the model registry
+_handle = ModelHandle('distribution', DistributionEngine)
+
+def get_distribution_engine():
+    """Get the current distribution engine (reloaded in the background when a new version is published)."""
+    return _handle.get()
@@ -6,6 +6,7 @@ Uses HuggingFace Inference API when local model is not available.
 """
 
 import os
+import hashlib
 import requests
 from typing import Dict, Optional
 import json
@@ -180,13 +181,109 @@ class FakeNewsDetector:
             'message': 'Using rule-based fallback. Results may not be accurate.'
         }
     
-    def batch_predict(self, texts: list) -> list:
-        """Predict for multiple texts"""
-        return [self.predict(text) for text in texts]
+    def batch_predict(self, texts: list, batch_size: int = 32) -> list:
+        """
+        Predict for multiple texts.
+        
+        Identical texts are scored once. The local model runs one padded
+        forward pass per micro-batch (texts sorted by length to keep padding
+        small); the HuggingFace API gets one request per micro-batch.
+        """
+        unique = {}
+        for text in texts:
+            unique.setdefault(content_hash(text), text)
+        keys = list(unique)
+        if self.local_model:
+            keys.sort(key=lambda k: len(unique[k]))
+        
+        results = {}
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            chunk_texts = [unique[k] for k in chunk]
+            if self.local_model:
+                predictions = self._predict_local_batch(chunk_texts)
+            else:
+                predictions = self._predict_huggingface_batch(chunk_texts)
+            results.update(zip(chunk, predictions))
+        
+        return [results[content_hash(text)] for text in texts]
+    
+    def _predict_local_batch(self, texts: list) -> list:
+        """One padded forward pass over a micro-batch"""
+        import torch
+        
+        inputs = self.local_tokenizer(
+            texts,
+            return_tensors='pt',
+            truncation=True,
+            padding=True,
+            max_length=512
+        )
+        
+        with torch.inference_mode():
+            probs = torch.softmax(self.local_model(**inputs).logits, dim=1)
+            predictions = torch.argmax(probs, dim=1).tolist()
+            probs = probs.tolist()
+        
+        return [
+            {
+                'is_fake': prediction == 1,
+                'confidence': row[prediction],
+                'label': 'fake' if prediction == 1 else 'real',
+                'source': 'local_model',
+                'probabilities': {'real': float(row[0]), 'fake': float(row[1])}
+            }
+            for prediction, row in zip(predictions, probs)
+        ]
+    
+    def _predict_huggingface_batch(self, texts: list) -> list:
+        """One Inference API request for a micro-batch, rule-based on failure"""
+        api_url = f"https://api-inference.huggingface.co/models/{self.hf_model}"
+        
+        headers = {}
+        if self.hf_token:
+            headers["Authorization"] = f"Bearer {self.hf_token}"
+        
+        try:
+            response = requests.post(
+                api_url,
+                headers=headers,
+                json={"inputs": [text[:1000] for text in texts]},
+                timeout=30
+            )
+            results = response.json() if response.status_code == 200 else None
+        except Exception as e:
+            print(f"HuggingFace API error: {e}")
+            results = None
+        
+        if not isinstance(results, list) or len(results) != len(texts):
+            return [self._rule_based_detection(text) for text in texts]
+        
+        predictions = []
+        for text, scores in zip(texts, results):
+            if not isinstance(scores, list) or not scores:
+                predictions.append(self._rule_based_detection(text))
+                continue
+            best = max(scores, key=lambda x: x.get('score', 0))
+            label = best.get('label', '').lower()
+            is_fake = 'fake' in label or 'false' in label or label == '1'
+            predictions.append({
+                'is_fake': is_fake,
+                'confidence': best.get('score', 0),
+                'label': 'fake' if is_fake else 'real',
+                'source': 'huggingface_api',
+                'raw_response': scores
+            })
+        return predictions
+
+
+def content_hash(text: str) -> str:
+    """Stable key used to dedupe texts before inference"""
+    return hashlib.sha256(' '.join(str(text).split()).encode('utf-8')).hexdigest()
 
 
-# Singleton instance for easy import
-detector = FakeNewsDetector()
+# Singleton instance for easy import (FAKE_NEWS_MODEL_PATH selects a local model)
+detector = FakeNewsDetector(os.getenv('FAKE_NEWS_MODEL_PATH') or None)
 
 
 def analyze_content(text: str) -> Dict:
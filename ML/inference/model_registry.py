@@ -0,0 +1,241 @@
+"""
+Versioned model registry with hot reload for the inference engines.
+
+Layout (per model, under ML/models/<name>/):
+
+    manifest.json            {"current": "v0003", "versions": {...}}
+    versions/v0003/          immutable copy of one training run's artifacts
+    actor.pth, ...           training output (the publish source)
+
+publish_version() copies a finished training run into a new version
+directory and then swaps the manifest's ``current`` pointer with an atomic
+os.replace, so readers only ever see a complete version.
+
+ModelHandle replaces the per-module ``_engine`` singletons. get() returns
+the current engine immediately; at most every CHECK_INTERVAL seconds it
+stats manifest.json, and if the mtime moved it builds the new engine in a
+background thread and swaps the reference once it is ready. Requests never
+wait on a reload.
+
+Weights are opened with torch.load(mmap=True) and assigned into the module
+(load_state_dict(assign=True)), so the parameters are views of the page
+cache and N workers share one copy of each version's weights.
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+MANIFEST_NAME = 'manifest.json'
+CHECK_INTERVAL = float(os.environ.get('MODEL_REGISTRY_CHECK_INTERVAL', '5'))
+KEEP_VERSIONS = 5
+
+# Files that make up a servable version of each model
+MODEL_ARTIFACTS = {
+    'pricing': ['actor.pth', 'config.json'],
+    'recommendation': ['dual_stream_rec.pth', 'rec_metadata.json'],
+    'distribution': ['tier_distribution.pth', 'dist_metrics.json'],
+}
+
+
+def model_root(name):
+    return os.path.join(MODELS_DIR, name)
+
+
+def read_manifest(name):
+    path = os.path.join(model_root(name), MANIFEST_NAME)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(name, manifest):
+    path = os.path.join(model_root(name), MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def resolve(name):
+    """
+    (version, directory) currently serving for ``name``.
+
+    Models that were never published are served from the training output
+    directory with version ``None``.
+    """
+    manifest = read_manifest(name)
+    if manifest and manifest.get('current'):
+        version = manifest['current']
+        directory = os.path.join(model_root(name), 'versions', version)
+        if os.path.isdir(directory):
+            return version, directory
+    return None, model_root(name)
+
+
+def publish_version(name, source_dir=None, metadata=None, keep=KEEP_VERSIONS):
+    """
+    Snapshot the training output of ``name`` as a new version and make it current.
+
+    Returns the new version id, or None if the required weights are missing.
+    """
+    root = model_root(name)
+    source_dir = source_dir or root
+    artifacts = [f for f in MODEL_ARTIFACTS[name] if os.path.exists(os.path.join(source_dir, f))]
+    if MODEL_ARTIFACTS[name][0] not in artifacts:
+        print(f"[ModelRegistry] {name}: no {MODEL_ARTIFACTS[name][0]} in {source_dir}, nothing to publish")
+        return None
+
+    manifest = read_manifest(name) or {'current': None, 'versions': {}}
+    number = max([int(v[1:]) for v in manifest['versions']] + [0]) + 1
+    version = f"v{number:04d}"
+
+    versions_dir = os.path.join(root, 'versions')
+    staging = os.path.join(versions_dir, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for filename in artifacts:
+        shutil.copy2(os.path.join(source_dir, filename), os.path.join(staging, filename))
+    os.replace(staging, os.path.join(versions_dir, version))
+
+    manifest['versions'][version] = {
+        'created_at': time.time(),
+        'files': artifacts,
+        'metadata': metadata or {},
+    }
+    manifest['current'] = version
+
+    # Old versions stay on disk a few generations so workers still mapping
+    # them are unaffected; the oldest are dropped from the manifest and disk
+    stale = sorted(manifest['versions'])[:-keep] if keep else []
+    for old in stale:
+        manifest['versions'].pop(old, None)
+    _write_manifest(name, manifest)
+    for old in stale:
+        shutil.rmtree(os.path.join(versions_dir, old), ignore_errors=True)
+
+    print(f"[ModelRegistry] {name}: published {version}")
+    return version
+
+
+def rollback(name, version):
+    """Point ``current`` back at an existing version."""
+    manifest = read_manifest(name)
+    if not manifest or version not in manifest['versions']:
+        raise ValueError(f"Unknown version {version} for {name}")
+    manifest['current'] = version
+    _write_manifest(name, manifest)
+
+
+def load_state_dict_mmap(path):
+    """State dict whose tensors are memory-mapped from ``path`` (shared between processes)."""
+    import torch
+    try:
+        return torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    except (RuntimeError, TypeError):
+        # Legacy (non-zipfile) checkpoints cannot be mapped
+        return torch.load(path, map_location='cpu', weights_only=True)
+
+
+def load_into(module, path):
+    """Load weights into ``module`` without copying them into private memory."""
+    module.load_state_dict(load_state_dict_mmap(path), assign=True)
+    return module
+
+
+class ModelHandle:
+    """
+    Hot-swappable reference to an inference engine.
+
+    ``factory(model_dir)`` builds an engine for a version directory.
+    """
+
+    def __init__(self, name, factory, check_interval=None):
+        self.name = name
+        self.factory = factory
+        self.check_interval = CHECK_INTERVAL if check_interval is None else check_interval
+        self.version = None
+        self._engine = None
+        self._manifest_mtime = None
+        self._next_check = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    def _manifest_stamp(self):
+        try:
+            return os.stat(os.path.join(model_root(self.name), MANIFEST_NAME)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _build(self):
+        stamp = self._manifest_stamp()
+        version, directory = resolve(self.name)
+        engine = self.factory(directory)
+        if version:
+            engine.model_version = f"{engine.model_version}+{version}"
+        return engine, version, stamp
+
+    def get(self):
+        """Current engine; schedules a background reload if the manifest changed."""
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine, self.version, self._manifest_mtime = self._build()
+                    self._next_check = time.monotonic() + self.check_interval
+            return self._engine
+
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            if self._manifest_stamp() != self._manifest_mtime:
+                self._start_reload()
+        return self._engine
+
+    def peek(self):
+        """Engine if already loaded in this process, else None."""
+        return self._engine
+
+    def _start_reload(self):
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, name=f"reload-{self.name}", daemon=True).start()
+
+    def _reload(self):
+        try:
+            engine, version, stamp = self._build()
+            # Plain attribute assignment: readers see either the old or the new engine
+            self._engine, self.version, self._manifest_mtime = engine, version, stamp
+            print(f"[ModelRegistry] {self.name}: now serving {version or 'unversioned'}")
+        except Exception as e:
+            print(f"[ModelRegistry] {self.name}: reload failed ({e}), keeping {self.version or 'unversioned'}")
+        finally:
+            self._reloading = False
+
+    def reload_now(self):
+        """Synchronously rebuild the engine (tests, management commands)."""
+        self._engine, self.version, self._manifest_mtime = self._build()
+        return self._engine
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Publish or roll back inference model versions')
+    parser.add_argument('action', choices=['publish', 'rollback', 'status'])
+    parser.add_argument('model', choices=sorted(MODEL_ARTIFACTS))
+    parser.add_argument('--version', type=str, default='')
+    args = parser.parse_args()
+
+    if args.action == 'publish':
+        publish_version(args.model)
+    elif args.action == 'rollback':
+        rollback(args.model, args.version)
+    print(json.dumps(read_manifest(args.model), indent=2))
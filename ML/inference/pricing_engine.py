@@ -11,6 +11,8 @@ import numpy as np
 from dataclasses import dataclass
 from typing import Optional
 
+from ML.inference.model_registry import ModelHandle, load_into
+
 
 @dataclass
 class PricingDecision:
@@ -70,13 +72,15 @@ class PricingEngine:
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             'models', 'pricing'
         )
-        self.agent = None
+        self.agent = None  # trained Actor network
         self.config = None
+        self.state_mean = None
+        self.state_std = None
         self.model_version = 'v1'
         self._load_model()
     
     def _load_model(self):
-        """Load the trained RL model if available."""
+        """Load the trained actor (memory-mapped) and its state normalization."""
         config_path = os.path.join(self.model_dir, 'config.json')
         actor_path = os.path.join(self.model_dir, 'actor.pth')
         
@@ -85,24 +89,33 @@ class PricingEngine:
             return
         
         try:
-            import torch
-            from ML.training.agent import ComradeTD3Agent
+            from ML.training.agent import Actor
             
             with open(config_path, 'r') as f:
                 self.config = json.load(f)
+            state_dim = self.config.get('state_dim', 8)
             
-            self.agent = ComradeTD3Agent(
-                state_dim=self.config.get('state_dim', 8),
-                action_dim=self.config.get('action_dim', 3),
-            )
-            self.agent.load(self.model_dir)
-            self.agent.actor.eval()
+            # Only the actor is needed to serve prices; critics/optimizers stay in training
+            actor = Actor(state_dim, self.config.get('action_dim', 3))
+            load_into(actor, actor_path)
+            actor.eval()
+            self.state_mean = np.array(self.config.get('state_mean', [0] * state_dim), dtype=np.float32)
+            self.state_std = np.array(self.config.get('state_std', [1] * state_dim), dtype=np.float32)
+            self.agent = actor
             self.model_version = f"v1-it{self.config.get('total_iterations', 0)}"
             print(f"[PricingEngine] Model loaded from {self.model_dir} ({self.model_version})")
         except Exception as e:
             print(f"[PricingEngine] Failed to load model: {e}, using rule-based fallback")
             self.agent = None
     
+    def _model_action(self, state_vector):
+        """Deterministic actor output for one state (saved normalization, no exploration)."""
+        import torch
+        norm_state = (state_vector - self.state_mean) / (self.state_std + 1e-8)
+        with torch.no_grad():
+            action = self.agent(torch.from_numpy(norm_state.astype(np.float32)).unsqueeze(0)).numpy()[0]
+        return np.clip(action, [-0.3, 0.0, 0.0], [0.3, 1.0, 0.5])
+    
     def get_price(self, state_vector, base_price=100.0):
         """
         Compute dynamic price for a given state.
@@ -123,7 +136,7 @@ class PricingEngine:
         
         if self.agent is not None:
             # Use RL model
-            action = self.agent.select_action(state_vector, evaluate=True)
+            action = self._model_action(state_vector)
             price_adj, notify_intensity, promo_discount = action
         else:
             # Rule-based fallback
@@ -230,12 +243,9 @@ class PricingEngine:
         self._load_model()
 
 
-# Singleton instance
-_engine = None
+# Hot-swappable instance backed by the model registry
+_handle = ModelHandle('pricing', PricingEngine)
 
 def get_pricing_engine():
-    """Get or create the global pricing engine singleton."""
-    global _engine
-    if _engine is None:
-        _engine = PricingEngine()
-    return _engine
+    """Get the current pricing engine (reloaded in the background when a new version is published)."""
+    return _handle.get()
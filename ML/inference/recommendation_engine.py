@@ -0,0 +1,286 @@
+"""
+Product Recommendation Engine — Inference module for the DualStreamRecModel.
+
+Loads the trained dual-stream network once per process and keeps the whole
+product catalog pre-scored by the categorization stream:
+
+    catalog matrix  C[n_products, n_categories]  (softmax of category logits)
+    user Q-values   q[n_categories]               (recommendation stream)
+    scores          C @ q                         (one mat-vec per request)
+
+Top-k is taken with np.argpartition, so a request costs one small forward
+pass for the user plus one matrix-vector product over the catalog. Products
+added or edited later are scored in small batches and written into the
+matrix in place instead of rebuilding it.
+
+Falls back to an empty ranking (callers use a rule-based list) if torch or
+the trained weights are unavailable.
+"""
+
+import os
+import json
+import threading
+import zlib
+import numpy as np
+from dataclasses import dataclass
+
+from ML.inference.model_registry import ModelHandle, load_state_dict_mmap
+
+
+@dataclass
+class ProductRecommendation:
+    """A scored catalog entry."""
+    product_id: int
+    score: float
+    category: int
+
+
+SEQ_LEN = 10
+BATCH_SIZE = 512
+
+
+class RecommendationEngine:
+    """
+    Production inference engine for product recommendations.
+
+    Usage:
+        engine = RecommendationEngine()
+        engine.set_catalog([(product_id, "name description"), ...])
+        engine.upsert_products([(new_id, "text")])
+        recs = engine.recommend(user_state, k=10)
+    """
+
+    def __init__(self, model_dir=None):
+        self.model_dir = model_dir or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'models', 'recommendation'
+        )
+        self.model = None
+        self.vocab = {}
+        self.vocab_size = 10000
+        self.num_categories = 0
+        self.user_state_dim = 15
+        self.model_version = 'v1'
+
+        # Catalog matrix with spare capacity so appends are amortized O(1)
+        self._lock = threading.RLock()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._row_of = {}
+        self.catalog_version = 0
+        self.catalog_loaded = False
+
+        self._load_model()
+
+    @property
+    def is_available(self):
+        return self.model is not None
+
+    def _load_model(self):
+        """Load the trained weights (and vocabulary, if the trainer saved one)."""
+        weights_path = os.path.join(self.model_dir, 'dual_stream_rec.pth')
+        meta_path = os.path.join(self.model_dir, 'rec_metadata.json')
+
+        if not os.path.exists(weights_path):
+            print(f"[RecommendationEngine] No trained model found at {self.model_dir}, using fallback")
+            return
+
+        try:
+            from ML.training.recommendation_pipeline import DualStreamRecModel
+
+            state_dict = load_state_dict_mmap(weights_path)
+            # Dimensions come from the checkpoint; the trainer may rebuild the
+            # output layer for the real category count.
+            self.vocab_size, embed_dim = state_dict['embedding.weight'].shape
+            self.num_categories = state_dict['text_fc2.weight'].shape[0]
+            self.user_state_dim = state_dict['rec_fc1.weight'].shape[1]
+
+            model = DualStreamRecModel(
+                vocab_size=self.vocab_size,
+                embed_dim=embed_dim,
+                num_categories=self.num_categories,
+                user_state_dim=self.user_state_dim,
+            )
+            model.load_state_dict(state_dict, assign=True)
+            model.eval()
+            self.model = model
+
+            if os.path.exists(meta_path):
+                with open(meta_path, 'r') as f:
+                    self.vocab = json.load(f).get('vocab', {})
+            self.model_version = f"v1-c{self.num_categories}"
+            self._matrix = np.zeros((0, self.num_categories), dtype=np.float32)
+            print(f"[RecommendationEngine] Model loaded from {self.model_dir} ({self.model_version})")
+        except Exception as e:
+            print(f"[RecommendationEngine] Failed to load model: {e}, using fallback")
+            self.model = None
+
+    # ── Text encoding ─────────────────────────────────────────
+
+    def _token_index(self, word):
+        if self.vocab:
+            return self.vocab.get(word, 0)
+        # No saved vocabulary: stable hashing into the embedding table
+        return zlib.crc32(word.encode('utf-8')) % (self.vocab_size - 1) + 1
+
+    def encode_texts(self, texts, seq_len=SEQ_LEN):
+        """Tokenize product texts into a padded [n, seq_len] index matrix."""
+        out = np.zeros((len(texts), seq_len), dtype=np.int64)
+        for i, text in enumerate(texts):
+            words = str(text or '').lower().split()[:seq_len]
+            for j, word in enumerate(words):
+                out[i, j] = self._token_index(word)
+        return out
+
+    def _score_texts(self, texts):
+        """Batched categorization stream -> softmax category distribution."""
+        import torch
+
+        rows = []
+        with torch.no_grad():
+            for start in range(0, len(texts), BATCH_SIZE):
+                indices = torch.from_numpy(self.encode_texts(texts[start:start + BATCH_SIZE]))
+                logits = self.model.forward_categorization(indices)
+                rows.append(torch.softmax(logits, dim=1).numpy().astype(np.float32))
+        if not rows:
+            return np.zeros((0, self.num_categories), dtype=np.float32)
+        return np.concatenate(rows)
+
+    # ── Catalog matrix ────────────────────────────────────────
+
+    def set_catalog(self, items, version=0):
+        """Replace the catalog with ``items`` = iterable of (product_id, text)."""
+        if self.model is None:
+            return
+        items = list(items)
+        ids = np.array([pid for pid, _ in items], dtype=np.int64)
+        matrix = self._score_texts([text for _, text in items])
+        with self._lock:
+            self._ids = ids
+            self._matrix = matrix
+            self._size = len(ids)
+            self._row_of = {int(pid): row for row, pid in enumerate(ids)}
+            self.catalog_version = version
+            self.catalog_loaded = True
+
+    def upsert_products(self, items):
+        """Score new/edited products and write them into the catalog matrix."""
+        if self.model is None:
+            return
+        items = list(items)
+        if not items:
+            return
+        scored = self._score_texts([text for _, text in items])
+        with self._lock:
+            for (pid, _), row_values in zip(items, scored):
+                pid = int(pid)
+                row = self._row_of.get(pid)
+                if row is None:
+                    row = self._append_row(pid)
+                self._matrix[row] = row_values
+
+    def _append_row(self, pid):
+        if self._size == len(self._ids):
+            capacity = max(16, len(self._ids) * 2)
+            ids = np.zeros(capacity, dtype=np.int64)
+            ids[:self._size] = self._ids[:self._size]
+            matrix = np.zeros((capacity, self.num_categories), dtype=np.float32)
+            matrix[:self._size] = self._matrix[:self._size]
+            self._ids, self._matrix = ids, matrix
+        row = self._size
+        self._ids[row] = pid
+        self._row_of[pid] = row
+        self._size += 1
+        return row
+
+    def remove_products(self, product_ids):
+        """Drop products from the catalog (swap-with-last, no reallocation)."""
+        with self._lock:
+            for pid in product_ids:
+                row = self._row_of.pop(int(pid), None)
+                if row is None:
+                    continue
+                last = self._size - 1
+                if row != last:
+                    moved = int(self._ids[last])
+                    self._ids[row] = moved
+                    self._matrix[row] = self._matrix[last]
+                    self._row_of[moved] = row
+                self._size = last
+
+    @property
+    def catalog_size(self):
+        return self._size
+
+    # ── Scoring ───────────────────────────────────────────────
+
+    def user_q_values(self, user_state):
+        """Recommendation-stream Q-values for one user state vector."""
+        import torch
+
+        state = np.zeros(self.user_state_dim, dtype=np.float32)
+        values = np.asarray(user_state, dtype=np.float32).ravel()[:self.user_state_dim]
+        state[:len(values)] = values
+        with torch.no_grad():
+            q = self.model.forward_recommendation(torch.from_numpy(state).unsqueeze(0))
+        return q.numpy()[0].astype(np.float32)
+
+    def recommend(self, user_state, k=10, exclude_ids=()):
+        """
+        Rank the catalog for a user.
+
+        Args:
+            user_state: vector of length user_state_dim (values in [0, 1])
+            k: number of products to return
+            exclude_ids: product ids to skip (e.g. already purchased)
+
+        Returns:
+            list[ProductRecommendation] ordered by descending score
+        """
+        if self.model is None or self._size == 0 or k <= 0:
+            return []
+
+        q = self.user_q_values(user_state)
+        with self._lock:
+            ids = self._ids[:self._size].copy()
+            scores = self._matrix[:self._size] @ q
+
+            if exclude_ids:
+                rows = [self._row_of[int(pid)] for pid in exclude_ids if int(pid) in self._row_of]
+                scores[rows] = -np.inf
+
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            categories = self._matrix[top].argmax(axis=1)
+
+        return [
+            ProductRecommendation(product_id=int(ids[i]), score=float(scores[i]), category=int(c))
+            for i, c in zip(top, categories)
+            if np.isfinite(scores[i])
+        ]
+
+    def reload(self):
+        """Reload model from disk (e.g., after retraining); the catalog must be rebuilt."""
+        with self._lock:
+            self._load_model()
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._matrix = np.zeros((0, self.num_categories), dtype=np.float32)
+            self._size = 0
+            self._row_of = {}
+            self.catalog_loaded = False
+
+
+# Hot-swappable instance backed by the model registry. A swapped-in engine
+# starts with an empty catalog; recommendation_service.sync_catalog rebuilds it.
+_handle = ModelHandle('recommendation', RecommendationEngine)
+
+def get_recommendation_engine():
+    """Get the current recommendation engine (reloaded in the background when a new version is published)."""
+    return _handle.get()
+
+
+def peek_recommendation_engine():
+    """Return the engine only if this process already loaded it."""
+    return _handle.peek()
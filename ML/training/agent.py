@@ -12,8 +12,6 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
-from collections import deque
-import random
 import json
 import os
 
@@ -103,7 +101,7 @@ class OUNoise:
         self.state = self.mu.copy()
     
     def sample(self):
-        dx = self.theta * (self.mu - self.state) + self.sigma * np.random.randn(self.size)
+        dx = self.theta * (self.mu - self.state) + self.sigma * np.random.standard_normal(self.size)
         self.state += dx
         return self.state.copy()
 
@@ -112,57 +110,123 @@ class OUNoise:
 # Prioritized Replay Buffer
 # ─────────────────────────────────────────────────
 
+class SumTree:
+    """
+    Binary sum-tree over a fixed number of leaves, stored as a flat array.
+
+    Node i has children 2i and 2i + 1; leaves start at ``self.leaf_offset``
+    and the root (index 1) holds the total. Updates and prefix-sum lookups
+    are done for a whole batch of indices at once, one tree level per step.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.leaf_offset = 1
+        while self.leaf_offset < capacity:
+            self.leaf_offset *= 2
+        self.depth = int(np.log2(self.leaf_offset))
+        self.nodes = np.zeros(2 * self.leaf_offset, dtype=np.float64)
+
+    @property
+    def total(self):
+        return self.nodes[1]
+
+    def update(self, indices, values):
+        """Set leaf values and recompute the affected ancestors."""
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_offset
+        self.nodes[nodes] = values
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+
+    def find(self, prefix_sums):
+        """Leaf index whose cumulative range contains each prefix sum."""
+        values = np.array(prefix_sums, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sums = self.nodes[left]
+            go_right = values > left_sums
+            values = np.where(go_right, values - left_sums, values)
+            nodes = left + go_right
+        return nodes - self.leaf_offset
+
+
 class PrioritizedReplayBuffer:
-    """Experience replay with TD-error based priorities."""
+    """
+    Experience replay with TD-error based priorities.
+
+    Transitions live in preallocated float32 ring arrays; sampling is
+    proportional to priority ** alpha via a sum-tree (O(log n) per draw).
+    """
     
-    def __init__(self, capacity=100000, alpha=0.6, beta=0.4, beta_increment=0.001):
+    def __init__(self, capacity=100000, alpha=0.6, beta=0.4, beta_increment=0.001,
+                 state_dim=8, action_dim=3):
         self.capacity = capacity
         self.alpha = alpha
         self.beta = beta
         self.beta_increment = beta_increment
-        self.buffer = []
-        self.priorities = np.zeros(capacity, dtype=np.float32)
+        self.states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros((capacity, action_dim), dtype=np.float32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.tree = SumTree(capacity)
         self.position = 0
+        self.size = 0
         self.max_priority = 1.0
     
     def push(self, state, action, reward, next_state, done):
-        experience = (state, action, reward, next_state, done)
-        if len(self.buffer) < self.capacity:
-            self.buffer.append(experience)
-        else:
-            self.buffer[self.position] = experience
-        self.priorities[self.position] = self.max_priority
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.tree.update([i], self.max_priority ** self.alpha)
         self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+    
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions (e.g. one step of a vectorized env)."""
+        n = len(rewards)
+        indices = (self.position + np.arange(n)) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+        self.tree.update(indices, np.full(n, self.max_priority ** self.alpha))
+        self.position = int(indices[-1] + 1) % self.capacity
+        self.size = min(self.size + n, self.capacity)
     
     def sample(self, batch_size):
-        n = len(self.buffer)
-        probs = self.priorities[:n] ** self.alpha
-        probs /= probs.sum()
-        
-        indices = np.random.choice(n, batch_size, p=probs, replace=False)
+        # Stratified draw: one uniform point per equal slice of the total mass
+        total = self.tree.total
+        segment = total / batch_size
+        points = (np.arange(batch_size) + np.random.random_sample(batch_size)) * segment
+        indices = np.minimum(self.tree.find(np.minimum(points, total)), self.size - 1)
         
         # Importance sampling weights
         self.beta = min(1.0, self.beta + self.beta_increment)
-        weights = (n * probs[indices]) ** (-self.beta)
+        probs = self.tree.nodes[indices + self.tree.leaf_offset] / total
+        weights = (self.size * probs) ** (-self.beta)
         weights /= weights.max()
         
-        batch = [self.buffer[i] for i in indices]
-        states, actions, rewards, next_states, dones = zip(*batch)
-        
         return (
-            (np.array(states), np.array(actions), np.array(rewards),
-             np.array(next_states), np.array(dones)),
+            (self.states[indices], self.actions[indices], self.rewards[indices],
+             self.next_states[indices], self.dones[indices]),
             indices,
-            weights,
+            weights.astype(np.float32),
         )
     
     def update_priorities(self, indices, priorities):
-        for idx, priority in zip(indices, priorities):
-            self.priorities[idx] = priority + 1e-6
-            self.max_priority = max(self.max_priority, priority + 1e-6)
+        priorities = np.asarray(priorities, dtype=np.float64) + 1e-6
+        self.tree.update(indices, priorities ** self.alpha)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
     
     def __len__(self):
-        return len(self.buffer)
+        return self.size
 
 
 # ─────────────────────────────────────────────────
@@ -210,12 +274,15 @@ class ComradeTD3Agent:
         
         # Exploration
         self.ou_noise = OUNoise(action_dim, sigma=0.2)
+        self.batch_ou_noise = None  # created on first select_actions call
         self.exploration_noise = 1.0
         self.exploration_decay = 0.9995
         self.min_exploration = 0.05
         
         # Buffer
-        self.replay_buffer = PrioritizedReplayBuffer(capacity=100000)
+        self.replay_buffer = PrioritizedReplayBuffer(
+            capacity=100000, state_dim=state_dim, action_dim=action_dim
+        )
         
         # Training state
         self.total_it = 0
@@ -230,10 +297,14 @@ class ComradeTD3Agent:
         return (state - self.state_mean) / (self.state_std + 1e-8)
     
     def update_normalization(self, state):
-        """Update running normalization statistics."""
-        self._state_samples.append(state)
+        """Update running normalization statistics (accepts one state or a batch)."""
+        if np.ndim(state) > 1:
+            self._state_samples.extend(state)
+        else:
+            self._state_samples.append(state)
+        del self._state_samples[:-10000]
         if len(self._state_samples) > 100:
-            samples = np.array(self._state_samples[-10000:])
+            samples = np.array(self._state_samples)
             self.state_mean = samples.mean(axis=0).astype(np.float32)
             self.state_std = samples.std(axis=0).astype(np.float32)
             self.state_std[self.state_std < 0.01] = 1.0  # Prevent div by zero
@@ -261,6 +332,45 @@ class ComradeTD3Agent:
         action = np.clip(action, [-0.3, 0.0, 0.0], [0.3, 1.0, 0.5])
         return action
     
+    def select_actions(self, states, evaluate=False):
+        """
+        Batched select_action for a vectorized env: one actor forward pass
+        for all ``states`` [n, state_dim], with an independent OU process per env.
+        """
+        states = np.asarray(states, dtype=np.float32)
+        self.update_normalization(states)
+        norm_states = self.normalize_state(states)
+        
+        with torch.no_grad():
+            actions = self.actor(torch.from_numpy(norm_states).to(self.device)).cpu().numpy()
+        
+        if not evaluate:
+            if self.batch_ou_noise is None or self.batch_ou_noise.size != actions.shape:
+                self.batch_ou_noise = OUNoise(actions.shape, sigma=0.2)
+            actions = actions + self.batch_ou_noise.sample() * self.exploration_noise
+            self.exploration_noise = max(
+                self.min_exploration,
+                self.exploration_noise * self.exploration_decay
+            )
+        
+        return np.clip(actions, [-0.3, 0.0, 0.0], [0.3, 1.0, 0.5]).astype(np.float32)
+    
+    def reset_noise(self, mask=None):
+        """Reset exploration noise (only the envs in ``mask`` for the batched process)."""
+        self.ou_noise.reset()
+        if self.batch_ou_noise is not None:
+            if mask is None:
+                self.batch_ou_noise.reset()
+            else:
+                self.batch_ou_noise.state[mask] = self.batch_ou_noise.mu[mask]
+    
+    def store_transitions(self, states, actions, rewards, next_states, dones):
+        """Store one step of a vectorized env in the replay buffer."""
+        self.replay_buffer.push_batch(
+            self.normalize_state(np.asarray(states, dtype=np.float32)), actions, rewards,
+            self.normalize_state(np.asarray(next_states, dtype=np.float32)), dones,
+        )
+    
     def store_transition(self, state, action, reward, next_state, done):
         """Store a transition in the replay buffer."""
         norm_state = self.normalize_state(state)
@@ -1,8 +1,10 @@
 """
 Continuous Orchestration Pipeline for Comrade ML Models.
 
-ONE-SITE-AT-A-TIME scraping to avoid IP blacklisting.
-Splits scraped data into 3 model-specific directories.
+Concurrent scraping across sites with per-domain politeness (one request at a
+time per host, randomized delays, robots.txt), or ONE-SITE-AT-A-TIME with --sequential.
+Ingests scraped batches into one partitioned dataset store (dataset_store.py);
+each model reads only its own columns from it.
 Trains all 3 models SEQUENTIALLY after enough data is collected.
 Reports live progress to scrape_status.json for the React dashboard.
 
@@ -10,6 +12,7 @@ Usage:
   python -m ML.training.continuous_pipeline              # Full cycle (all sites)
   python -m ML.training.continuous_pipeline --site JumiaKEScraper  # Single site
   python -m ML.training.continuous_pipeline --scrape-only           # Scrape without training
+  python -m ML.training.continuous_pipeline --sequential            # Legacy one-site-at-a-time mode
 """
 
 import os
@@ -18,14 +21,16 @@ import time
 import json
 import glob
 import argparse
-import pandas as pd
-import numpy as np
 from datetime import datetime
 import logging
 
 # Ensure project root is in path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from ML.training.dataset_store import DatasetStore, STORE_DIR, count_parquet_rows
+from ML.training.data_volume import DataVolume
+from ML.inference.model_registry import publish_version
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -46,9 +51,6 @@ ITEMS_PER_CATEGORY = 100       # Items per category
 PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(os.path.dirname(PIPELINE_DIR), 'data')
 
-PRICING_DATA_DIR = os.path.join(DATA_DIR, 'pricing_data')
-REC_DATA_DIR = os.path.join(DATA_DIR, 'recommendation_data')
-DIST_DATA_DIR = os.path.join(DATA_DIR, 'distribution_data')
 RAW_DATA_DIR = os.path.join(DATA_DIR, 'raw_scraped')
 STATUS_FILE = os.path.join(DATA_DIR, 'scrape_status.json')
 
@@ -56,9 +58,12 @@ TRAIN_PRICING = os.path.join(PIPELINE_DIR, 'train_pricing.py')
 TRAIN_REC = os.path.join(PIPELINE_DIR, 'recommendation_pipeline.py')
 TRAIN_DIST = os.path.join(PIPELINE_DIR, 'distribution_model.py')
 
-for d in [PRICING_DATA_DIR, REC_DATA_DIR, DIST_DATA_DIR, RAW_DATA_DIR]:
+for d in [STORE_DIR, RAW_DATA_DIR]:
     os.makedirs(d, exist_ok=True)
 
+# Running byte counters (data_volume.json), read by the ML dashboard
+data_volume = DataVolume()
+
 
 # ── Import all scrapers to populate the registry ─────────────────────────────
 def _load_all_scrapers():
@@ -110,25 +115,36 @@ def update_status(status_msg, phase="idle", current_site="", size=0.0,
 
 # ── Directory metrics ────────────────────────────────────────────────────────
 
-def get_dir_size_gb(directory):
+def get_dir_size_bytes(directory):
     total_size = 0
     for dirpath, _, filenames in os.walk(directory):
         for f in filenames:
             fp = os.path.join(dirpath, f)
             if not os.path.islink(fp):
                 total_size += os.path.getsize(fp)
-    return total_size / (1024 * 1024 * 1024)
+    return total_size
+
+
+def seed_data_volume():
+    """Initialise the running counters with one directory scan if they were never written."""
+    if 'raw_scraped' not in data_volume.counters:
+        data_volume.set('raw_scraped', get_dir_size_bytes(RAW_DATA_DIR))
+    if 'store' not in data_volume.counters:
+        data_volume.set('store', DatasetStore(STORE_DIR).byte_count())
+
+
+def data_volume_gb():
+    """Scraped data on disk, from the running counters (no directory walk)."""
+    return data_volume.total() / (1024 * 1024 * 1024)
+
+
+def record_raw_file(path):
+    data_volume.add_file('raw_scraped', path)
 
 
 def count_rows_in_dir(directory):
-    total = 0
-    for f in glob.glob(os.path.join(directory, '*.parquet')):
-        try:
-            df = pd.read_parquet(f)
-            total += len(df)
-        except Exception:
-            pass
-    return total
+    """Row count from parquet footers (no data is loaded)."""
+    return count_parquet_rows(directory)
 
 
 # ── ONE-SITE-AT-A-TIME Scraper ───────────────────────────────────────────────
@@ -145,7 +161,7 @@ def scrape_single_site(scraper_name, scraper_class):
     update_status(
         f"Scraping {scraper_name}", "scraping",
         current_site=scraper_name,
-        size=get_dir_size_gb(RAW_DATA_DIR)
+        size=data_volume_gb()
     )
     
     try:
@@ -153,7 +169,8 @@ def scrape_single_site(scraper_name, scraper_class):
         rows = scraper.run_scraper(
             max_categories=MAX_CATEGORIES_PER_SITE,
             items_per_category=ITEMS_PER_CATEGORY,
-            output_dir=RAW_DATA_DIR
+            output_dir=RAW_DATA_DIR,
+            on_flush=record_raw_file,
         )
         logger.info(f"  {scraper_name}: extracted {rows} rows")
         return rows
@@ -186,7 +203,7 @@ def scrape_all_sites_sequentially(registry, only_site=None):
             update_status(
                 f"Cooldown after {name}", "cooldown",
                 current_site=f"waiting ({SITE_COOLDOWN_SECONDS}s)",
-                size=get_dir_size_gb(RAW_DATA_DIR)
+                size=data_volume_gb()
             )
             time.sleep(SITE_COOLDOWN_SECONDS)
     
@@ -194,51 +211,71 @@ def scrape_all_sites_sequentially(registry, only_site=None):
     return total_rows
 
 
-# ── Data Splitter ────────────────────────────────────────────────────────────
+def scrape_all_sites_concurrently(registry, only_site=None):
+    """
+    Scrape all sites at once through the async engine.
 
-def split_scraped_data():
-    """Split raw parquet files into 3 model-specific directories."""
-    logger.info("Splitting raw scraped data into 3 model-specific directories...")
-    
-    raw_files = glob.glob(os.path.join(RAW_DATA_DIR, '*.parquet'))
-    if not raw_files:
-        logger.info("No raw data files found to split.")
-        return
+    Each host still sees at most one request at a time with the scraper's
+    usual delay between requests; only different hosts overlap.
+    """
+    from ML.training.data_scrapers.async_engine import AsyncScrapeEngine
     
-    pricing_rows, rec_rows, dist_rows = [], [], []
+    sites = list(registry.items())
+    if only_site:
+        sites = [(k, v) for k, v in sites if k == only_site]
+        if not sites:
+            logger.error(f"Site '{only_site}' not found in registry. Available: {list(registry.keys())}")
+            return 0
     
-    for f in raw_files:
+    scrapers = []
+    for name, cls in sites:
         try:
-            df = pd.read_parquet(f)
-            if 'category' not in df.columns:
-                df['category'] = 'General'
-            if 'is_digital' not in df.columns:
-                df['is_digital'] = False
-            
-            pricing_cols = ['product_name', 'category', 'platform', 'country',
-                           'price_kes', 'original_price_kes', 'discount_pct',
-                           'rating', 'reviews_count', 'demand_signal', 'is_digital', 'timestamp']
-            pricing_rows.append(df[[c for c in pricing_cols if c in df.columns]])
-            
-            rec_cols = ['product_name', 'category', 'platform', 'country', 'price_kes', 'timestamp']
-            rec_rows.append(df[[c for c in rec_cols if c in df.columns]])
-            
-            dist_cols = ['product_name', 'category', 'platform', 'country',
-                        'price_kes', 'original_price_kes', 'discount_pct', 'is_digital', 'timestamp']
-            dist_rows.append(df[[c for c in dist_cols if c in df.columns]])
+            scrapers.append(cls())
         except Exception as e:
-            logger.error(f"Error reading {f}: {e}")
+            logger.error(f"  {name} could not be created: {e}")
+    
+    update_status(
+        f"Scraping {len(scrapers)} sites concurrently", "scraping",
+        current_site=", ".join(s.platform_name for s in scrapers),
+        size=data_volume_gb()
+    )
+    engine = AsyncScrapeEngine(
+        output_dir=RAW_DATA_DIR,
+        max_categories=MAX_CATEGORIES_PER_SITE,
+        items_per_category=ITEMS_PER_CATEGORY,
+        on_flush=record_raw_file,
+    )
+    started = time.time()
+    counts = engine.run(scrapers)
+    for platform, rows in counts.items():
+        logger.info(f"  {platform}: extracted {rows} rows")
+    total_rows = sum(counts.values())
+    logger.info(f"All sites scraped in {time.time() - started:.0f}s. Total rows: {total_rows}")
+    return total_rows
+
+
+# ── Data Ingest ──────────────────────────────────────────────────────────────
+
+def split_scraped_data():
+    """
+    Ingest new raw batch files into the partitioned store and compact it.
+
+    Models no longer get their own copies: each trainer projects its
+    columns out of the shared store (see dataset_store.MODEL_COLUMNS).
+    """
+    raw_files = glob.glob(os.path.join(RAW_DATA_DIR, '*.parquet'))
+    if not raw_files:
+        logger.info("No raw data files found to ingest.")
+        return 0
     
-    ts = int(time.time())
-    if pricing_rows:
-        pd.concat(pricing_rows, ignore_index=True).to_parquet(
-            os.path.join(PRICING_DATA_DIR, f'pricing_{ts}.parquet'))
-    if rec_rows:
-        pd.concat(rec_rows, ignore_index=True).to_parquet(
-            os.path.join(REC_DATA_DIR, f'recommendation_{ts}.parquet'))
-    if dist_rows:
-        pd.concat(dist_rows, ignore_index=True).to_parquet(
-            os.path.join(DIST_DATA_DIR, f'distribution_{ts}.parquet'))
+    store = DatasetStore(STORE_DIR)
+    rows = store.ingest(raw_files)
+    store.compact()
+    # Ingested raw files are deleted; unreadable ones stay behind
+    data_volume.set('raw_scraped', sum(os.path.getsize(f) for f in raw_files if os.path.exists(f)))
+    data_volume.set('store', store.byte_count())
+    logger.info(f"Store now holds {store.row_count()} rows in {len(store.manifest['files'])} files.")
+    return rows
 
 
 # ── Sequential Model Training ────────────────────────────────────────────────
@@ -275,57 +312,74 @@ def run_training(model_name, cmd, model_key, rows_count):
 
 
 def train_all_models_sequentially():
-    """Train all 3 models sequentially."""
-    p_rows = count_rows_in_dir(PRICING_DATA_DIR)
-    r_rows = count_rows_in_dir(REC_DATA_DIR)
-    d_rows = count_rows_in_dir(DIST_DATA_DIR)
-    
-    logger.info(f"Data ready — Pricing: {p_rows} | Rec: {r_rows} | Dist: {d_rows}")
-    
-    if p_rows >= MIN_ROWS_PER_MODEL:
-        run_training("Pricing RL Agent", [
+    """
+    Train all 3 models sequentially.
+
+    A model is retrained only when the store has enough rows overall and
+    some of them arrived after its last successful run.
+    """
+    store = DatasetStore(STORE_DIR)
+    total_rows = store.row_count()
+    jobs = [
+        ("Pricing RL Agent", "pricing", [
             sys.executable, TRAIN_PRICING,
             "--episodes", "100", "--eval-interval", "25",
-            "--resume", "--data-file", PRICING_DATA_DIR
-        ], "pricing", p_rows)
-    
-    if r_rows >= MIN_ROWS_PER_MODEL:
-        run_training("Recommendation NN", [
+            "--resume", "--data-file", STORE_DIR
+        ]),
+        ("Recommendation NN", "recommendation", [
             sys.executable, TRAIN_REC,
-            "--epochs", "50", "--data-dir", REC_DATA_DIR
-        ], "recommendation", r_rows)
-    
-    if d_rows >= MIN_ROWS_PER_MODEL:
-        run_training("Distribution Model", [
+            "--epochs", "50", "--data-dir", STORE_DIR
+        ]),
+        ("Distribution Model", "distribution", [
             sys.executable, TRAIN_DIST,
-            "--epochs", "200", "--data-dir", DIST_DATA_DIR
-        ], "distribution", d_rows)
+            "--epochs", "200", "--data-dir", STORE_DIR
+        ]),
+    ]
+    new_rows = {key: store.pending_rows(key) for _, key, _ in jobs}
     
-    update_status("All Training Complete", "idle",
-        pricing={"status": "complete", "rows": p_rows, "progress_pct": 100},
-        recommendation={"status": "complete", "rows": r_rows, "progress_pct": 100},
-        distribution={"status": "complete", "rows": d_rows, "progress_pct": 100},
-    )
+    logger.info(f"Data ready — {total_rows} rows | new since last run: "
+                f"Pricing: {new_rows['pricing']} | Rec: {new_rows['recommendation']} | "
+                f"Dist: {new_rows['distribution']}")
+    
+    results = {}
+    for model_name, key, cmd in jobs:
+        if total_rows < MIN_ROWS_PER_MODEL or new_rows[key] == 0:
+            results[key] = {"status": "idle", "rows": total_rows, "progress_pct": 100 if new_rows[key] == 0 else 0}
+            continue
+        seq = store.manifest['seq']
+        ok = run_training(model_name, cmd, key, total_rows)
+        if ok:
+            store.mark_consumed(key, seq)
+            # Serving workers pick the new version up on their next manifest check
+            publish_version(key, metadata={'rows': total_rows, 'store_seq': seq})
+        results[key] = {"status": "complete" if ok else "failed", "rows": total_rows, "progress_pct": 100}
+    
+    update_status("All Training Complete", "idle", **results)
 
 
 # ── Main Orchestrator ────────────────────────────────────────────────────────
 
-def run_pipeline(only_site=None, scrape_only=False):
+def run_pipeline(only_site=None, scrape_only=False, sequential=False):
     """Main continuous orchestration loop."""
     registry = _load_all_scrapers()
+    seed_data_volume()
     
     logger.info("=" * 60)
-    logger.info("  Comrade ML Pipeline — ONE-SITE-AT-A-TIME mode")
+    logger.info(f"  Comrade ML Pipeline — {'ONE-SITE-AT-A-TIME' if sequential else 'CONCURRENT'} mode")
     logger.info(f"  Available scrapers: {list(registry.keys())}")
-    logger.info(f"  Cooldown between sites: {SITE_COOLDOWN_SECONDS}s")
+    if sequential:
+        logger.info(f"  Cooldown between sites: {SITE_COOLDOWN_SECONDS}s")
     logger.info("=" * 60)
     
     cycle = 1
     while True:
         logger.info(f"--- Cycle {cycle} ---")
         
-        # 1. Scrape sites sequentially
-        scrape_all_sites_sequentially(registry, only_site=only_site)
+        # 1. Scrape sites (concurrently across hosts, politely per host)
+        if sequential:
+            scrape_all_sites_sequentially(registry, only_site=only_site)
+        else:
+            scrape_all_sites_concurrently(registry, only_site=only_site)
         
         # 2. Split into model directories
         split_scraped_data()
@@ -342,6 +396,7 @@ def run_pipeline(only_site=None, scrape_only=False):
                 os.remove(f)
             except Exception:
                 pass
+        data_volume.set('raw_scraped', get_dir_size_bytes(RAW_DATA_DIR))
         
         if only_site:
             logger.info("Single-site mode: exiting after one cycle.")
@@ -359,5 +414,7 @@ if __name__ == '__main__':
                         help='Scrape only this site (e.g. JumiaKEScraper)')
     parser.add_argument('--scrape-only', action='store_true',
                         help='Only scrape data, skip training')
+    parser.add_argument('--sequential', action='store_true',
+                        help='Scrape one site at a time with a cooldown between sites')
     args = parser.parse_args()
-    run_pipeline(only_site=args.site, scrape_only=args.scrape_only)
+    run_pipeline(only_site=args.site, scrape_only=args.scrape_only, sequential=args.sequential)
@@ -0,0 +1,224 @@
+"""
+Concurrent scraping engine: every site at once, each site as polite as before.
+
+All registered scrapers run together over one shared httpx.AsyncClient
+connection pool. Politeness is enforced per domain rather than per process:
+
+- at most one request in flight per host
+- a random gap drawn from the scraper's ``delay_range`` between requests
+  to the same host (the same spacing BaseScraper._delay gave)
+- robots.txt checked through ``check_robots_txt`` (cached per host)
+- 403/429 back-off holds the host's slot, so a throttled site is not hit
+  by anyone else while it cools down
+
+The scrapers' parsing code is unchanged: each site's discover/scrape
+generators run in a worker thread, and their ``fetch_page``/``fetch_api``
+calls are routed onto the event loop. Parsed items are streamed through a
+queue to a single writer that flushes parquet batches per platform, so
+wall time approaches that of the slowest site instead of the sum of all.
+
+Usage:
+    engine = AsyncScrapeEngine(output_dir=RAW_DATA_DIR)
+    rows_by_site = engine.run([JumiaKEScraper(), KilimallScraper(), ...])
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import httpx
+
+from .base_scraper import check_robots_txt
+
+logger = logging.getLogger("scraper.engine")
+
+FLUSH_ROWS = 500
+_DONE = object()
+
+
+class DomainSlot:
+    """Per-host politeness state: one request at a time, spaced by a random delay."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.next_request_at = 0.0
+
+
+class AsyncFetcher:
+    """Shared async HTTP client with per-domain politeness."""
+
+    def __init__(self, max_connections=64, timeout=15.0, client=None):
+        self.client = client or httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._slots = {}
+        self._robots_locks = {}
+        self._robots_ready = set()
+
+    def _slot(self, host):
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = DomainSlot()
+        return slot
+
+    async def allowed(self, url, user_agent='*'):
+        """robots.txt check; the first lookup for a host runs in a thread."""
+        host = urlparse(url).netloc
+        if host in self._robots_ready:
+            return check_robots_txt(url, user_agent)  # parsed file is cached, no I/O
+        lock = self._robots_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            result = await asyncio.to_thread(check_robots_txt, url, user_agent)
+            self._robots_ready.add(host)
+            return result
+
+    async def fetch(self, url, params=None, headers=None, delay_range=(2.0, 5.0), max_retries=3):
+        """
+        GET ``url`` politely. Returns the response body (bytes) on HTTP 200,
+        None when blocked by robots.txt, on other statuses, or after retries.
+        """
+        if not await self.allowed(url):
+            logger.info(f"robots.txt disallows {url}")
+            return None
+
+        slot = self._slot(urlparse(url).netloc)
+        loop = asyncio.get_running_loop()
+        async with slot.lock:
+            for attempt in range(max_retries):
+                wait = slot.next_request_at - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                slot.next_request_at = loop.time() + random.uniform(*delay_range)
+                try:
+                    response = await self.client.get(url, params=params, headers=headers)
+                except httpx.HTTPError as e:
+                    wait_time = (2 ** attempt) * 2
+                    logger.warning(f"Request failed: {e}. Retrying in {wait_time}s...")
+                    await asyncio.sleep(wait_time)
+                    continue
+
+                if response.status_code == 200:
+                    return response.content
+                if response.status_code in (403, 429):
+                    wait_time = (2 ** attempt) * 5 + random.uniform(1, 5)
+                    logger.warning(f"Blocked (HTTP {response.status_code}) on {url}. Waiting {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
+                    continue
+                logger.error(f"HTTP {response.status_code} on {url}")
+                return None
+
+        logger.error(f"Failed to fetch {url} after {max_retries} attempts.")
+        return None
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class AsyncScrapeEngine:
+    """Runs many BaseScraper instances concurrently and streams items to parquet."""
+
+    def __init__(self, output_dir, max_categories=20, items_per_category=100,
+                 flush_rows=FLUSH_ROWS, max_connections=64, client=None, on_flush=None):
+        self.output_dir = output_dir
+        self.max_categories = max_categories
+        self.items_per_category = items_per_category
+        self.flush_rows = flush_rows
+        self.max_connections = max_connections
+        self.client = client
+        self.on_flush = on_flush  # called with each parquet path written
+
+    def run(self, scrapers):
+        """Scrape every site; returns {platform_name: rows extracted}."""
+        return asyncio.run(self.run_async(scrapers))
+
+    async def run_async(self, scrapers):
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        loop = asyncio.get_running_loop()
+        fetcher = AsyncFetcher(max_connections=self.max_connections, client=self.client)
+        queue = asyncio.Queue(maxsize=self.flush_rows * 4)
+        writer = asyncio.create_task(self._writer(queue))
+        counts = {s.platform_name: 0 for s in scrapers}
+
+        with ThreadPoolExecutor(max_workers=max(1, len(scrapers)), thread_name_prefix='scraper') as pool:
+            for scraper in scrapers:
+                scraper.async_fetch = self._bridge(loop, fetcher, scraper)
+            try:
+                results = await asyncio.gather(*[
+                    loop.run_in_executor(pool, self._scrape_site, loop, scraper, queue)
+                    for scraper in scrapers
+                ], return_exceptions=True)
+            finally:
+                for scraper in scrapers:
+                    scraper.async_fetch = None
+                await queue.put(_DONE)
+                await writer
+                await fetcher.aclose()
+
+        for scraper, result in zip(scrapers, results):
+            if isinstance(result, Exception):
+                logger.error(f"{scraper.platform_name} failed: {result}")
+            else:
+                counts[scraper.platform_name] = result
+        return counts
+
+    @staticmethod
+    def _bridge(loop, fetcher, scraper):
+        """Blocking fetch callable for the scraper's worker thread."""
+        def fetch(url, params=None, accept_json=False, max_retries=3):
+            headers = scraper._get_headers()
+            if accept_json:
+                headers['Accept'] = 'application/json'
+            future = asyncio.run_coroutine_threadsafe(
+                fetcher.fetch(url, params=params, headers=headers,
+                              delay_range=scraper.delay_range, max_retries=max_retries),
+                loop,
+            )
+            return future.result()
+        return fetch
+
+    def _scrape_site(self, loop, scraper, queue):
+        """Worker thread: run the site's generators, pushing items onto the loop's queue."""
+        started = time.monotonic()
+        rows = 0
+        for item in scraper.iter_items(self.max_categories, self.items_per_category):
+            # Blocks this thread (not the loop) when the writer falls behind
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            rows += 1
+        scraper.logger.info(f"Completed {scraper.platform_name}: {rows} items in {time.monotonic() - started:.1f}s")
+        return rows
+
+    async def _writer(self, queue):
+        """Single consumer: buffer items per platform and flush parquet batches."""
+        buffers = {}
+        batch_numbers = {}
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            platform = item.get('platform') or 'unknown'
+            buffer = buffers.setdefault(platform, [])
+            buffer.append(item)
+            if len(buffer) >= self.flush_rows:
+                await self._flush(platform, buffer, batch_numbers)
+                buffers[platform] = []
+        for platform, buffer in buffers.items():
+            if buffer:
+                await self._flush(platform, buffer, batch_numbers)
+
+    async def _flush(self, platform, rows, batch_numbers):
+        import pandas as pd
+
+        batch = batch_numbers.get(platform, 0) + 1
+        batch_numbers[platform] = batch
+        path = os.path.join(self.output_dir, f"{platform}_batch_{batch}_{int(time.time())}.parquet")
+        await asyncio.to_thread(pd.DataFrame(rows).to_parquet, path)
+        logger.info(f"Saved batch {batch} ({len(rows)} rows) -> {path}")
+        if self.on_flush:
+            self.on_flush(path)
@@ -13,6 +13,7 @@ Handles:
 
 import os
 import re
+import json
 import time
 import random
 import logging
@@ -66,9 +67,10 @@ def check_robots_txt(url: str, user_agent: str = '*') -> bool:
         try:
             rp.read()
         except Exception:
-            return True  # If we can't read robots.txt, proceed cautiously
+            rp = None  # If we can't read robots.txt, proceed cautiously (and don't retry per URL)
         _robots_cache[robots_url] = rp
-    return _robots_cache[robots_url].can_fetch(user_agent, url)
+    rp = _robots_cache[robots_url]
+    return True if rp is None else rp.can_fetch(user_agent, url)
 
 
 
@@ -102,6 +104,9 @@ class BaseScraper(ABC):
         self.base_url = base_url
         self.delay_range = delay_range
         self.session = requests.Session()
+        # Set by AsyncScrapeEngine while it drives this scraper: a blocking
+        # callable (url, params, accept_json, max_retries) -> bytes | None
+        self.async_fetch = None
         
         # Configure logging
         self.logger = logging.getLogger(f"scraper.{platform_name}")
@@ -135,6 +140,9 @@ class BaseScraper(ABC):
         """
         Securely fetch a page with exponential backoff.
         """
+        if self.async_fetch is not None:
+            content = self.async_fetch(url, params=params, max_retries=max_retries)
+            return BeautifulSoup(content, 'html.parser') if content is not None else None
         for attempt in range(max_retries):
             self._delay()
             try:
@@ -168,6 +176,12 @@ class BaseScraper(ABC):
         """
         Securely fetch from a platform's public JSON API if available.
         """
+        if self.async_fetch is not None:
+            content = self.async_fetch(url, params=params, accept_json=True, max_retries=max_retries)
+            try:
+                return json.loads(content) if content is not None else None
+            except ValueError:
+                return None
         for attempt in range(max_retries):
             self._delay()
             headers = self._get_headers()
@@ -204,14 +218,31 @@ class BaseScraper(ABC):
         """
         pass
     
-    def run_scraper(self, max_categories=500, items_per_category=200, output_dir=None):
+    def iter_items(self, max_categories=500, items_per_category=200):
+        """Yield scraped items across discovered categories, enriched with category metadata."""
+        self.logger.info(f"Starting {self.platform_name} scraper...")
+        categories = self.discover_categories(max_categories=max_categories)
+        self.logger.info(f"Discovered {len(categories)} categories")
+        
+        for idx, cat_url in enumerate(categories):
+            # Extract category name from the URL
+            cat_name = extract_category_from_url(cat_url)
+            digital = is_digital_category(cat_name)
+            
+            self.logger.info(f"Scraping category {idx+1}/{len(categories)}: {cat_name} ({cat_url})")
+            for item in self.scrape_category(cat_url, max_items=items_per_category):
+                item['category'] = item.get('category', cat_name)
+                item['is_digital'] = item.get('is_digital', digital)
+                yield item
+    
+    def run_scraper(self, max_categories=500, items_per_category=200, output_dir=None, on_flush=None):
         """
         Main entry point for the specific platform scraper.
         Extracts up to (max_categories * items_per_category) items.
-        Handles batch saving to disk directly.
+        Handles batch saving to disk directly; ``on_flush(path)`` is called
+        after each batch file is written.
         """
         import pandas as pd
-        import datetime
         
         # Use provided output_dir or fall back to default raw_scrapped
         if output_dir is None:
@@ -220,35 +251,24 @@ class BaseScraper(ABC):
         
         os.makedirs(output_dir, exist_ok=True)
         
-        self.logger.info(f"Starting {self.platform_name} scraper...")
-        categories = self.discover_categories(max_categories=max_categories)
-        self.logger.info(f"Discovered {len(categories)} categories")
-        
         results = []
         total_extracted = 0
         batch_count = 1
         
-        for idx, cat_url in enumerate(categories):
-            # Extract category name from the URL
-            cat_name = extract_category_from_url(cat_url)
-            digital = is_digital_category(cat_name)
+        for item in self.iter_items(max_categories, items_per_category):
+            results.append(item)
+            total_extracted += 1
             
-            self.logger.info(f"Scraping category {idx+1}/{len(categories)}: {cat_name} ({cat_url})")
-            for item in self.scrape_category(cat_url, max_items=items_per_category):
-                # Enrich item with category metadata
-                item['category'] = item.get('category', cat_name)
-                item['is_digital'] = item.get('is_digital', digital)
-                results.append(item)
-                total_extracted += 1
-                
-                # Save in batches of 50 for faster visual feedback
-                if len(results) >= 50:
-                    df = pd.DataFrame(results)
-                    file_path = os.path.join(output_dir, f"{self.platform_name}_batch_{batch_count}_{int(time.time())}.parquet")
-                    df.to_parquet(file_path)
-                    self.logger.info(f"Saved batch {batch_count} ({len(df)} rows) -> {file_path}")
-                    results = []
-                    batch_count += 1
+            # Save in batches of 50 for faster visual feedback
+            if len(results) >= 50:
+                df = pd.DataFrame(results)
+                file_path = os.path.join(output_dir, f"{self.platform_name}_batch_{batch_count}_{int(time.time())}.parquet")
+                df.to_parquet(file_path)
+                self.logger.info(f"Saved batch {batch_count} ({len(df)} rows) -> {file_path}")
+                if on_flush:
+                    on_flush(file_path)
+                results = []
+                batch_count += 1
                     
         # Save remaining items
         if results:
@@ -256,6 +276,8 @@ class BaseScraper(ABC):
             file_path = os.path.join(output_dir, f"{self.platform_name}_batch_{batch_count}_{int(time.time())}.parquet")
             df.to_parquet(file_path)
             self.logger.info(f"Saved final batch {batch_count} ({len(df)} rows) -> {file_path}")
+            if on_flush:
+                on_flush(file_path)
             
         self.logger.info(f"Completed {self.platform_name} scraper. Total: {total_extracted} items extracted.")
         return total_extracted
@@ -0,0 +1,162 @@
+"""
+Tests for the concurrent scraping engine against local fixture HTTP servers.
+
+Run with:
+    python -m unittest ML.training.data_scrapers.test_async_engine
+"""
+
+import glob
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from ML.training.data_scrapers.africa_scrapers import generic_discover, generic_scrape
+from ML.training.data_scrapers.async_engine import AsyncScrapeEngine
+from ML.training.data_scrapers.base_scraper import BaseScraper
+
+PAGES_PER_CATEGORY = 3
+PRODUCTS_PER_PAGE = 4
+DELAY = 0.15
+
+
+class FixtureSite:
+    """A tiny shop on its own port (= its own domain to the engine)."""
+
+    def __init__(self, categories=('phones', 'laptops'), response_time=0.02):
+        self.categories = categories
+        self.response_time = response_time
+        self.requests = []          # (path, start, end)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.handle(self)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def handle(self, request):
+        path = request.path
+        if path == '/robots.txt':
+            return self._send(request, 'User-agent: *\nDisallow: /c/private\n', 'text/plain')
+
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.monotonic()
+        time.sleep(self.response_time)
+        try:
+            if path == '/':
+                links = ''.join(f'<a href="/c/{c}">{c}</a>' for c in self.categories)
+                body = f'<html><body>{links}<a href="/c/private">hidden</a></body></html>'
+            else:
+                category, _, query = path[len('/c/'):].partition('?')
+                page = int(query.split('=')[1]) if query.startswith('page=') else 1
+                body = '<html><body></body></html>'
+                if page <= PAGES_PER_CATEGORY:
+                    body = '<html><body>' + ''.join(
+                        f'<div class="product-card"><span class="name">{category} item {page}-{i}</span>'
+                        f'<span class="price">KSh {100 + i}</span></div>'
+                        for i in range(PRODUCTS_PER_PAGE)
+                    ) + '</body></html>'
+            self._send(request, body, 'text/html')
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.requests.append((path, start, time.monotonic()))
+
+    @staticmethod
+    def _send(request, body, content_type):
+        data = body.encode('utf-8')
+        request.send_response(200)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_scraper(name, base_url):
+    class FixtureScraper(BaseScraper):
+        def __init__(self):
+            super().__init__(name, base_url, delay_range=(DELAY, DELAY))
+
+        def discover_categories(self, max_categories=500):
+            return sorted(generic_discover(self, max_categories))
+
+        def scrape_category(self, category_url, max_items=1000):
+            yield from generic_scrape(self, category_url, max_items)
+
+    return FixtureScraper()
+
+
+class AsyncScrapeEngineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.sites = [FixtureSite(), FixtureSite()]
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for site in self.sites:
+            site.close()
+
+    def run_engine(self):
+        scrapers = [make_scraper(f"Fixture{i}", site.base_url) for i, site in enumerate(self.sites)]
+        engine = AsyncScrapeEngine(self.output_dir, max_categories=10, items_per_category=100, flush_rows=5)
+        started = time.monotonic()
+        counts = engine.run(scrapers)
+        return counts, time.monotonic() - started
+
+    def test_items_streamed_to_parquet(self):
+        counts, _ = self.run_engine()
+
+        expected = 2 * PAGES_PER_CATEGORY * PRODUCTS_PER_PAGE
+        self.assertEqual(counts, {'Fixture0': expected, 'Fixture1': expected})
+        files = glob.glob(f"{self.output_dir}/*.parquet")
+        self.assertGreater(len(files), 2)  # flushed in several small batches
+        df = pd.concat([pd.read_parquet(f) for f in files])
+        self.assertEqual(len(df), 2 * expected)
+        self.assertEqual(set(df['platform']), {'Fixture0', 'Fixture1'})
+        self.assertEqual(set(df['category']), {'Phones', 'Laptops'})
+
+    def test_robots_txt_respected(self):
+        self.run_engine()
+        for site in self.sites:
+            self.assertFalse([p for p, _, _ in site.requests if p.startswith('/c/private')])
+
+    def test_one_request_at_a_time_per_domain_with_delay(self):
+        self.run_engine()
+        for site in self.sites:
+            self.assertEqual(site.max_in_flight, 1)
+            starts = sorted(start for _, start, _ in site.requests)
+            gaps = [b - a for a, b in zip(starts, starts[1:])]
+            self.assertGreaterEqual(min(gaps), DELAY * 0.9)
+
+    def test_domains_scraped_concurrently(self):
+        _, elapsed = self.run_engine()
+        spans = [(min(s for _, s, _ in site.requests), max(e for _, _, e in site.requests))
+                 for site in self.sites]
+        # The two sites' activity overlaps in time ...
+        self.assertLess(max(start for start, _ in spans), min(end for _, end in spans))
+        # ... so the run takes about as long as one site, not the sum of both
+        per_site = min(end - start for start, end in spans)
+        self.assertLess(elapsed, per_site * 1.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
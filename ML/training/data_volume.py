@@ -0,0 +1,63 @@
+"""
+Running byte counters for the pipeline's data directories.
+
+The pipeline adds the size of every file it writes (scraper batches) and
+resets a counter when it consumes or rewrites a directory (ingest,
+compaction), persisting the totals to data_volume.json. Readers such as
+the ML dashboard get the data volume from that one small file instead of
+walking the directories on every request.
+"""
+
+import os
+import json
+import time
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+VOLUME_FILE = os.path.join(DATA_DIR, 'data_volume.json')
+
+
+def read_data_volume(path=VOLUME_FILE):
+    """{counter: bytes, ..., 'updated_at': ts} or None if the pipeline never wrote it."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class DataVolume:
+    """Persistent per-directory byte counters (one writer process, many readers)."""
+
+    def __init__(self, path=VOLUME_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        data = read_data_volume(path) or {}
+        self.counters = {k: v for k, v in data.items() if k != 'updated_at'}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({**self.counters, 'updated_at': time.time()}, f)
+        os.replace(tmp, self.path)
+
+    def add(self, name, nbytes):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + int(nbytes)
+            self._save()
+
+    def add_file(self, name, path):
+        """Count a file that was just written."""
+        try:
+            self.add(name, os.path.getsize(path))
+        except OSError:
+            pass
+
+    def set(self, name, nbytes):
+        with self._lock:
+            self.counters[name] = int(nbytes)
+            self._save()
+
+    def total(self):
+        return sum(self.counters.values())
@@ -0,0 +1,311 @@
+"""
+Partitioned parquet store for scraped product data.
+
+Replaces the per-model copies (pricing_data/, recommendation_data/,
+distribution_data/) with one dataset that every trainer reads through a
+column projection:
+
+    products/
+        manifest.json
+        platform=JumiaKE/part-000007-3f2a91c0.parquet
+        platform=Kilimall/part-000007-8d41e2b7.parquet
+        ...
+
+- ingest(): folds the scrapers' small raw batch files into one part file
+  per platform and records it in the manifest (files, row counts, sequence)
+- compact(): merges small part files that every consumer has already seen
+- row_count() / byte_count() / pending_rows(): answered from the manifest,
+  which takes its counts from parquet footers, never by loading data
+- read(): pyarrow dataset scan of only the columns a model needs
+- mark_consumed(): per-consumer watermark, so the next run only reacts to
+  files added since the last one
+"""
+
+import os
+import re
+import json
+import glob
+import time
+import uuid
+import logging
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger("DatasetStore")
+
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(os.path.dirname(PIPELINE_DIR), 'data', 'products')
+
+MANIFEST_NAME = 'manifest.json'
+
+STORE_SCHEMA = pa.schema([
+    ('product_name', pa.string()),
+    ('category', pa.string()),
+    ('platform', pa.string()),
+    ('country', pa.string()),
+    ('price_kes', pa.float64()),
+    ('original_price_kes', pa.float64()),
+    ('discount_pct', pa.float64()),
+    ('rating', pa.float64()),
+    ('reviews_count', pa.float64()),
+    ('demand_signal', pa.float64()),
+    ('is_digital', pa.bool_()),
+    ('timestamp', pa.string()),
+])
+
+# Columns each model reads (formerly copied into its own directory)
+MODEL_COLUMNS = {
+    'pricing': ['product_name', 'category', 'platform', 'country',
+                'price_kes', 'original_price_kes', 'discount_pct',
+                'rating', 'reviews_count', 'demand_signal', 'is_digital', 'timestamp'],
+    'recommendation': ['product_name', 'category', 'platform', 'country', 'price_kes', 'timestamp'],
+    'distribution': ['product_name', 'category', 'platform', 'country',
+                     'price_kes', 'original_price_kes', 'discount_pct', 'is_digital', 'timestamp'],
+}
+
+# Fill values for columns older scrapers did not emit
+COLUMN_DEFAULTS = {'category': 'General', 'is_digital': False}
+
+COMPACT_MIN_ROWS = 5000      # part files smaller than this are compaction candidates
+COMPACT_TARGET_ROWS = 100000  # stop growing a merged file past this
+
+
+def parquet_row_count(path):
+    """Row count from the parquet footer (no data pages are read)."""
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def _read_file(path):
+    # ParquetFile, not pq.read_table: the latter would infer a second
+    # 'platform' column from the platform=... directory name
+    return pq.ParquetFile(path).read()
+
+
+def list_parquet_files(directory):
+    """All parquet files under ``directory`` (flat legacy dirs or partitioned stores)."""
+    return sorted(glob.glob(os.path.join(directory, '**', '*.parquet'), recursive=True))
+
+
+def count_parquet_rows(directory):
+    """Total rows of every parquet file under ``directory``, from metadata."""
+    total = 0
+    for f in list_parquet_files(directory):
+        try:
+            total += parquet_row_count(f)
+        except Exception:
+            pass
+    return total
+
+
+def conform_table(table):
+    """Cast a raw scraper table onto STORE_SCHEMA, filling missing/unparseable columns."""
+    arrays = []
+    for field in STORE_SCHEMA:
+        column = None
+        if field.name in table.column_names:
+            try:
+                column = pc.cast(table[field.name], field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                column = None
+        if column is None:
+            column = pa.nulls(len(table), type=field.type)
+        default = COLUMN_DEFAULTS.get(field.name)
+        if default is not None:
+            column = pc.fill_null(column, pa.scalar(default, type=field.type))
+        arrays.append(column)
+    return pa.Table.from_arrays(arrays, schema=STORE_SCHEMA)
+
+
+def _partition_dir(platform):
+    return 'platform=' + re.sub(r'[^A-Za-z0-9_.-]+', '_', platform or 'unknown')
+
+
+class DatasetStore:
+    """Platform-partitioned product dataset with a JSON manifest."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        os.makedirs(root, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    # ── Manifest ──────────────────────────────────────────────
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        return {'seq': 0, 'files': {}, 'consumers': {}}
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _write_part(self, table, platform, seq):
+        relpath = os.path.join(_partition_dir(platform), f"part-{seq:06d}-{uuid.uuid4().hex[:8]}.parquet")
+        path = os.path.join(self.root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        pq.write_table(table, tmp, compression='zstd')
+        os.replace(tmp, path)
+        self.manifest['files'][relpath] = {
+            'rows': parquet_row_count(path),
+            'bytes': os.path.getsize(path),
+            'seq': seq,
+            'platform': platform,
+            'added_at': time.time(),
+        }
+        return relpath
+
+    # ── Writes ────────────────────────────────────────────────
+
+    def ingest(self, raw_files, delete=True):
+        """
+        Add raw scraper batch files to the store as one part file per platform.
+
+        Returns the number of rows ingested. Unreadable files are skipped
+        (and kept on disk for inspection).
+        """
+        tables, consumed = [], []
+        for f in raw_files:
+            try:
+                tables.append(conform_table(_read_file(f)))
+                consumed.append(f)
+            except Exception as e:
+                logger.error(f"Error reading {f}: {e}")
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return 0
+
+        combined = pa.concat_tables(tables)
+        self.manifest['seq'] += 1
+        seq = self.manifest['seq']
+        platforms = pc.unique(pc.fill_null(combined['platform'], 'unknown')).to_pylist()
+        for platform in platforms:
+            mask = pc.equal(pc.fill_null(combined['platform'], 'unknown'), platform)
+            self._write_part(combined.filter(mask), platform, seq)
+        self._save_manifest()
+
+        if delete:
+            for f in consumed:
+                try:
+                    os.remove(f)
+                except OSError:
+                    pass
+        logger.info(f"Ingested {len(combined)} rows from {len(consumed)} raw files into {len(platforms)} partitions")
+        return len(combined)
+
+    def compact(self, min_rows=COMPACT_MIN_ROWS, target_rows=COMPACT_TARGET_ROWS):
+        """
+        Merge small part files within each partition.
+
+        Only files every registered consumer has already processed are
+        merged, so compaction never makes old rows look new to a trainer.
+        Returns the number of files removed.
+        """
+        watermark = min(self.manifest['consumers'].values(), default=self.manifest['seq'])
+        by_platform = {}
+        for relpath, info in sorted(self.manifest['files'].items(), key=lambda kv: kv[1]['seq']):
+            if info['rows'] < min_rows and info['seq'] <= watermark:
+                by_platform.setdefault(info['platform'], []).append(relpath)
+
+        removed = 0
+        for platform, relpaths in by_platform.items():
+            groups, current, rows = [], [], 0
+            for relpath in relpaths:
+                current.append(relpath)
+                rows += self.manifest['files'][relpath]['rows']
+                if rows >= target_rows:
+                    groups.append(current)
+                    current, rows = [], 0
+            if current:
+                groups.append(current)
+
+            for group in groups:
+                if len(group) < 2:
+                    continue
+                seq = max(self.manifest['files'][r]['seq'] for r in group)
+                table = pa.concat_tables([_read_file(os.path.join(self.root, r)) for r in group])
+                self._write_part(table, platform, seq)
+                for r in group:
+                    del self.manifest['files'][r]
+                self._save_manifest()
+                for r in group:
+                    try:
+                        os.remove(os.path.join(self.root, r))
+                    except OSError:
+                        pass
+                removed += len(group) - 1
+        if removed:
+            logger.info(f"Compaction merged away {removed} part files")
+        return removed
+
+    # ── Reads ─────────────────────────────────────────────────
+
+    def files(self, since_seq=0):
+        """Absolute paths of part files added after ``since_seq``."""
+        return [os.path.join(self.root, relpath)
+                for relpath, info in sorted(self.manifest['files'].items())
+                if info['seq'] > since_seq]
+
+    def row_count(self):
+        return sum(info['rows'] for info in self.manifest['files'].values())
+
+    def byte_count(self):
+        """On-disk size of the store's part files, from the manifest."""
+        total = 0
+        for relpath, info in self.manifest['files'].items():
+            if 'bytes' not in info:  # entries written before sizes were recorded
+                try:
+                    info['bytes'] = os.path.getsize(os.path.join(self.root, relpath))
+                except OSError:
+                    info['bytes'] = 0
+            total += info['bytes']
+        return total
+
+    def pending_rows(self, consumer):
+        """Rows in files the consumer has not processed yet."""
+        since = self.manifest['consumers'].get(consumer, 0)
+        return sum(info['rows'] for info in self.manifest['files'].values() if info['seq'] > since)
+
+    def mark_consumed(self, consumer, seq=None):
+        """Advance a consumer's watermark (to the current sequence by default)."""
+        self.manifest['consumers'][consumer] = self.manifest['seq'] if seq is None else seq
+        self._save_manifest()
+
+    def read(self, columns=None, model=None, since_seq=0):
+        """Scan the store, reading only ``columns`` (or the model's projection)."""
+        columns = columns or MODEL_COLUMNS.get(model)
+        paths = self.files(since_seq)
+        if not paths:
+            return STORE_SCHEMA.empty_table().select(columns) if columns else STORE_SCHEMA.empty_table()
+        return ds.dataset(paths, schema=STORE_SCHEMA, format='parquet').to_table(columns=columns)
+
+
+def read_model_frame(data_dir, model):
+    """
+    DataFrame of ``model``'s columns from ``data_dir``.
+
+    Works for the partitioned store and for legacy flat directories of
+    parquet files; returns None if there is no readable data.
+    """
+    columns = MODEL_COLUMNS[model]
+    if os.path.exists(os.path.join(data_dir, MANIFEST_NAME)):
+        table = DatasetStore(data_dir).read(model=model)
+    else:
+        tables = []
+        for f in list_parquet_files(data_dir):
+            try:
+                tables.append(conform_table(_read_file(f)).select(columns))
+            except Exception:
+                pass
+        if not tables:
+            return None
+        table = pa.concat_tables(tables)
+    if len(table) == 0:
+        return None
+    return table.to_pandas()
@@ -13,17 +13,20 @@ Supports loading REAL scraped data from --data-dir or falls back to synthetic da
 """
 
 import os
-import glob
+import sys
 import torch
 import torch.nn as nn
 import torch.optim as optim
-import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Add project root to path (the continuous pipeline runs this file as a script)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ML.training.dataset_store import STORE_DIR, read_model_frame
+
 PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_DIR = os.path.join(os.path.dirname(PIPELINE_DIR), 'models', 'distribution')
-DIST_DATA_DIR = os.path.join(os.path.dirname(PIPELINE_DIR), 'data', 'distribution_data')
 os.makedirs(MODEL_DIR, exist_ok=True)
 
 
@@ -67,28 +70,16 @@ class DistributionTrainer:
         
         # Load real data if available
         self.real_data = None
-        self.data_dir = data_dir or DIST_DATA_DIR
+        self.data_dir = data_dir or STORE_DIR
         self._load_real_data()
         
     def _load_real_data(self):
-        """Load real scraped data from parquet files."""
-        files = glob.glob(os.path.join(self.data_dir, '*.parquet'))
-        if not files:
+        """Load real scraped data (only the distribution columns) from parquet files."""
+        self.real_data = read_model_frame(self.data_dir, 'distribution')
+        if self.real_data is None:
             print(f"No real data found in {self.data_dir}. Will use synthetic data.")
             return
-        
-        dfs = []
-        for f in files:
-            try:
-                dfs.append(pd.read_parquet(f))
-            except:
-                pass
-        
-        if not dfs:
-            return
-            
-        self.real_data = pd.concat(dfs, ignore_index=True)
-        print(f"Loaded {len(self.real_data)} real distribution rows from {len(files)} files.")
+        print(f"Loaded {len(self.real_data)} real distribution rows from {self.data_dir}.")
         
     def _loss_function(self, distributions, tier_levels, buy_modes, is_digital):
         """
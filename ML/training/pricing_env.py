@@ -7,9 +7,12 @@ Action: [price_adjustment, notification_intensity, promo_discount]
 Reward: α·user_savings_pct + (1-α)·supplier_margin + λ·Δgroup_growth
 """
 
+import multiprocessing as mp
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
 
 
 # Tier configuration from Qomrade.docx
@@ -27,6 +30,12 @@ TIER_THRESHOLDS = {
     2: 700,   # Premium → Gold
 }
 
+# Per-tier lookup arrays for the vectorized environment
+TIER_NAMES = np.array([TIER_CONFIG[i]['name'] for i in range(4)])
+TIER_K = np.array([TIER_CONFIG[i]['K'] for i in range(4)], dtype=np.float64)
+TIER_MAX_NOTIFICATIONS = np.array([TIER_CONFIG[i]['max_notifications'] for i in range(4)], dtype=np.float64)
+TIER_UPGRADE_AT = np.array([TIER_THRESHOLDS[0], TIER_THRESHOLDS[1], TIER_THRESHOLDS[2], np.inf])
+
 # Kenya market calibration parameters from Qomrade.docx
 DEFAULT_PARAMS = {
     'r': 0.25,           # Group growth rate
@@ -252,8 +261,268 @@ class ComradePricingEnv(gym.Env):
         }
 
 
+class ComradePricingVectorEnv(VectorEnv):
+    """
+    ``num_envs`` independent pricing markets stepped together with array ops.
+
+    Same dynamics and reward as ComradePricingEnv, but every quantity is a
+    length-``num_envs`` array, so one step of N markets costs about as much
+    as a handful of single-market steps. Finished markets are reset in the
+    same step (AutoresetMode.SAME_STEP): the returned observation is the new
+    episode's first state and the terminal one is in ``infos['final_obs']``.
+    """
+
+    metadata = {'render_modes': [], 'autoreset_mode': AutoresetMode.SAME_STEP}
+
+    def __init__(self, num_envs=8, params=None, max_steps=90):
+        self.num_envs = num_envs
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.max_steps = max_steps
+
+        self.single_action_space = spaces.Box(
+            low=np.array([-0.3, 0.0, 0.0], dtype=np.float32),
+            high=np.array([0.3, 1.0, 0.5], dtype=np.float32),
+        )
+        self.single_observation_space = spaces.Box(
+            low=np.array([0, 0, 0, 0, 0, 0, 0, 0], dtype=np.float32),
+            high=np.array([100, 500, 200, 100, 500, 1, 3, 1], dtype=np.float32),
+        )
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        self.state = np.zeros((num_envs, 8), dtype=np.float32)
+        self.step_count = np.zeros(num_envs, dtype=np.int64)
+        self.cumulative_savings = np.zeros(num_envs, dtype=np.float64)
+        self.prev_group_size = np.zeros(num_envs, dtype=np.float64)
+        self.integral_error = np.zeros(num_envs, dtype=np.float64)
+        self.prev_dG = np.zeros(num_envs, dtype=np.float64)
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.state.copy(), {}
+
+    def _reset_envs(self, mask):
+        """Draw fresh initial conditions for the markets selected by ``mask``."""
+        n = int(mask.sum())
+        rng = self.np_random
+        tier_idx = rng.choice(4, size=n, p=[0.5, 0.25, 0.15, 0.1])
+        is_student = (rng.random(n) < 0.3).astype(np.float32)
+        K = TIER_K[tier_idx]
+
+        state = np.empty((n, 8), dtype=np.float32)
+        state[:, 0] = np.maximum(1.0, rng.uniform(1, K * 0.5))
+        state[:, 1] = self.params['retail_price']
+        state[:, 2] = rng.uniform(5, 20, n)
+        state[:, 3] = rng.uniform(0, 5, n)
+        state[:, 4] = TIER_MAX_NOTIFICATIONS[tier_idx]
+        state[:, 5] = rng.uniform(0.3, 0.7, n)
+        state[:, 6] = tier_idx
+        state[:, 7] = is_student
+
+        self.state[mask] = state
+        self.step_count[mask] = 0
+        self.cumulative_savings[mask] = 0.0
+        self.prev_group_size[mask] = state[:, 0]
+        self.integral_error[mask] = 0.0
+        self.prev_dG[mask] = 0.0
+
+    def step(self, actions):
+        actions = np.clip(
+            np.asarray(actions, dtype=np.float32).reshape(self.num_envs, -1),
+            self.single_action_space.low, self.single_action_space.high,
+        ).astype(np.float64)
+        price_adj, notify_intensity, promo_discount = actions.T
+
+        G, P, D, S, N, M, tier_f, is_student = self.state.astype(np.float64).T
+        tier_idx = tier_f.astype(np.int64)
+        p = self.params
+        K = TIER_K[tier_idx]
+        N_max = TIER_MAX_NOTIFICATIONS[tier_idx]
+        rng = self.np_random
+
+        student_mult = np.where(is_student > 0.5, 1.0 - p['student_discount'], 1.0)
+        new_P = P * (1.0 + price_adj) * student_mult * (1.0 - promo_discount)
+        new_P = np.clip(new_P, p['base_cost'] * 0.5, p['retail_price'] * 1.5)
+
+        # Eq 1-6, as in ComradePricingEnv.step
+        N_push = notify_intensity * N
+        dG = (p['r'] * G * (1 - G / np.maximum(K, 1)) +
+              p['beta'] * N_push * np.sqrt(np.maximum(D, 0.01)) -
+              p['gamma_price'] * new_P * G)
+
+        error = 0.8 * K - G
+        self.integral_error += error
+        dP = (-p['alpha1'] * error + p['alpha2'] * dG + p['alpha3'] * self.integral_error)
+
+        dD = (p['lambda_d'] * M * np.exp(-p['mu'] * new_P) *
+              (1 + G / 6) ** p['nu'] - p['delta'] * D)
+
+        profit = (new_P - p['base_cost']) * G - p['fixed_cost']
+        dS = np.maximum(0, p['eta'] * (profit - p['pi_res'])) - p['theta'] * S
+
+        dN = np.where(N < N_max, N_max * 0.1, 0.0) - p['rho'] * N_push
+
+        noise = p['sigma_noise'] * rng.standard_normal(self.num_envs)
+        dM = (-p['kappa'] * (M - 0.5) + noise + p['phi'] * dG)
+
+        new_G = np.maximum(1.0, G + dG)
+        new_P_final = np.clip(new_P + dP * 0.1, p['base_cost'] * 0.3, p['retail_price'] * 2)
+        new_D = np.maximum(0, D + dD)
+        new_S = np.maximum(0, S + dS)
+        new_N = np.clip(N + dN, 0, N_max)
+        new_M = np.clip(M + dM, 0, 1)
+
+        # Reward
+        user_savings_pct = np.maximum(0, (p['retail_price'] - new_P_final) / p['retail_price'])
+        supplier_cost = p['base_cost'] * new_G + p['fixed_cost']
+        supplier_margin = np.clip(
+            (new_P_final * new_G - supplier_cost) / np.maximum(supplier_cost, 1), -1, 1
+        )
+        group_growth = (new_G - self.prev_group_size) / np.maximum(self.prev_group_size, 1)
+
+        purchase_prob = 1.0 / (1.0 + np.exp(-(user_savings_pct * 5 - 1)))
+        purchased = rng.random(self.num_envs) < purchase_prob
+
+        alpha, lam = 0.5, 0.1
+        reward = (alpha * user_savings_pct +
+                  (1 - alpha) * np.maximum(0, supplier_margin) +
+                  lam * group_growth)
+        reward += 0.2 * purchased
+        self.cumulative_savings += np.where(purchased, (p['retail_price'] - new_P_final) * new_G, 0.0)
+        reward -= 0.3 * np.abs(np.minimum(supplier_margin, 0))
+
+        upgraded = self.cumulative_savings > TIER_UPGRADE_AT[tier_idx]
+        new_tier = tier_idx + upgraded
+        reward += 0.5 * upgraded
+
+        self.state = np.stack([
+            new_G, new_P_final, new_D, new_S, new_N, new_M, new_tier, is_student,
+        ], axis=1).astype(np.float32)
+        self.prev_group_size = new_G
+        self.prev_dG = dG
+        self.step_count += 1
+
+        terminated = self.step_count >= self.max_steps
+        truncated = np.zeros(self.num_envs, dtype=bool)
+
+        infos = {
+            'cumulative_savings': self.cumulative_savings.copy(),
+            'tier': TIER_NAMES[new_tier],
+            'purchase_prob': purchase_prob,
+            'purchased': purchased,
+            'supplier_margin': supplier_margin,
+            'user_savings_pct': user_savings_pct,
+            'group_size': new_G,
+            'price': new_P_final,
+        }
+        # Always present (even when nothing finished) so shards can be concatenated
+        final_obs = np.full(self.num_envs, None, dtype=object)
+        for i in np.nonzero(terminated)[0]:
+            final_obs[i] = self.state[i].copy()
+        infos['final_obs'] = final_obs
+        infos['_final_obs'] = terminated.copy()
+        if terminated.any():
+            self._reset_envs(terminated)
+
+        return self.state.copy(), reward.astype(np.float32), terminated, truncated, infos
+
+
+def _shard_worker(conn, num_envs, params, max_steps):
+    env = ComradePricingVectorEnv(num_envs=num_envs, params=params, max_steps=max_steps)
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == 'step':
+                conn.send(env.step(data))
+            elif command == 'reset':
+                conn.send(env.reset(seed=data))
+            elif command == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        conn.close()
+
+
+def _concat_infos(parts):
+    return {
+        key: _concat_infos([part[key] for part in parts]) if isinstance(parts[0][key], dict)
+        else np.concatenate([part[key] for part in parts])
+        for key in parts[0]
+    }
+
+
+class ShardedPricingVectorEnv(VectorEnv):
+    """
+    ComradePricingVectorEnv split across worker processes.
+
+    Each worker owns a contiguous slice of the markets and steps it with
+    ComradePricingVectorEnv; the parent scatters actions and gathers the
+    batch. Useful when the simulation, not the network, is the bottleneck.
+    """
+
+    metadata = {'render_modes': [], 'autoreset_mode': AutoresetMode.SAME_STEP}
+
+    def __init__(self, num_envs=8, workers=2, params=None, max_steps=90, context=None):
+        workers = max(1, min(workers, num_envs))
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        template = ComradePricingVectorEnv(num_envs=1, params=params, max_steps=max_steps)
+        self.single_action_space = template.single_action_space
+        self.single_observation_space = template.single_observation_space
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        sizes = [len(chunk) for chunk in np.array_split(np.arange(num_envs), workers)]
+        self._bounds = np.cumsum([0] + sizes)
+        ctx = mp.get_context(context)
+        self._conns = []
+        self._processes = []
+        for size in sizes:
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_shard_worker, args=(child, size, params, max_steps), daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+
+    def reset(self, *, seed=None, options=None):
+        for i, conn in enumerate(self._conns):
+            conn.send(('reset', None if seed is None else seed + i))
+        results = [conn.recv() for conn in self._conns]
+        return np.concatenate([obs for obs, _ in results]), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.float32)
+        for conn, lo, hi in zip(self._conns, self._bounds[:-1], self._bounds[1:]):
+            conn.send(('step', actions[lo:hi]))
+        results = [conn.recv() for conn in self._conns]
+        obs, rewards, terminated, truncated, infos = zip(*results)
+        return (np.concatenate(obs), np.concatenate(rewards), np.concatenate(terminated),
+                np.concatenate(truncated), _concat_infos(infos))
+
+    def close_extras(self, **kwargs):
+        for conn in self._conns:
+            try:
+                conn.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        self._conns, self._processes = [], []
+
+
+def make_pricing_vector_env(num_envs=8, workers=0, params=None, max_steps=90):
+    """In-process vectorized env, or sharded across ``workers`` processes when > 0."""
+    if workers and workers > 0:
+        return ShardedPricingVectorEnv(num_envs=num_envs, workers=workers, params=params, max_steps=max_steps)
+    return ComradePricingVectorEnv(num_envs=num_envs, params=params, max_steps=max_steps)
+
+
 # Register with Gymnasium
 gym.register(
     id='ComradePricing-v0',
     entry_point='ML.training.pricing_env:ComradePricingEnv',
+    vector_entry_point='ML.training.pricing_env:ComradePricingVectorEnv',
 )
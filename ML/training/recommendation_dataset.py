@@ -0,0 +1,227 @@
+"""
+Columnar token cache and Dataset for the recommendation categorization stream.
+
+The scraped parquet corpus (the partitioned product store or a flat
+directory of parquet files) is tokenized once into
+
+    tokens.npy      int32 [n_rows, seq_len]   (0 = padding / unknown word)
+    categories.npy  int32 [n_rows]            (index into category_map)
+    meta.json       vocab, category_map, source files
+
+under ``<data_dir>/token_cache/<key>/``, where ``key`` is a hash of the
+parquet files' contents and the tokenizer settings. Later runs on the same
+files memory-map the arrays instead of re-reading parquet, and batches are
+drawn by fancy-indexing those arrays with random row indices.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import Dataset, DataLoader, BatchSampler, RandomSampler
+
+from ML.training.dataset_store import list_parquet_files
+
+CACHE_FORMAT = 1
+MAX_VOCAB = 9999
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """sha256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(files, seq_len):
+    """Key identifying a corpus (file contents, not paths or mtimes) and tokenizer settings."""
+    digest = hashlib.sha256(f"v{CACHE_FORMAT}:seq{seq_len}:vocab{MAX_VOCAB}".encode())
+    for file_hash in sorted(file_digest(f) for f in files):
+        digest.update(file_hash.encode())
+    return digest.hexdigest()[:32]
+
+
+class TokenCache:
+    """Tokenized corpus: memory-mapped token/category arrays plus vocabularies."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        self.vocab = meta['vocab']
+        self.category_map = meta['category_map']
+        self.seq_len = meta['seq_len']
+        self.files = meta['files']
+        self.tokens_path = os.path.join(directory, 'tokens.npy')
+        self.categories_path = os.path.join(directory, 'categories.npy')
+        self.tokens = np.load(self.tokens_path, mmap_mode='r')
+        self.categories = np.load(self.categories_path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.categories)
+
+    @property
+    def num_categories(self):
+        return len(self.category_map)
+
+
+def _read_corpus(files):
+    frames = []
+    for f in files:
+        try:
+            frames.append(pd.read_parquet(f, columns=['product_name', 'category']))
+        except Exception:
+            pass
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def _tokenize(names, vocab, seq_len):
+    """Padded token matrix; each distinct name is split only once."""
+    codes, uniques = pd.factorize(names.fillna('').astype(str).str.lower(), sort=False)
+    table = np.zeros((len(uniques), seq_len), dtype=np.int32)
+    for row, name in enumerate(uniques):
+        ids = [vocab.get(w, 0) for w in name.split()[:seq_len]]
+        table[row, :len(ids)] = ids
+    return table[codes]
+
+
+def _save_array(path, array):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def build_token_cache(files, directory, seq_len=10):
+    """Tokenize ``files`` into ``directory``; returns None if nothing was readable."""
+    df = _read_corpus(files)
+    if df is None or df.empty:
+        return None
+
+    # Vocabulary from product names, sorted so the same corpus always maps
+    # to the same ids (0 is reserved for padding)
+    words = set()
+    for name in df['product_name'].dropna().astype(str).str.lower().unique():
+        words.update(name.split())
+    vocab = {w: i + 1 for i, w in enumerate(sorted(words)[:MAX_VOCAB])}
+
+    categories = df['category'].dropna().unique().tolist()
+    category_map = {c: i for i, c in enumerate(categories)}
+
+    tokens = _tokenize(df['product_name'], vocab, seq_len)
+    targets = df['category'].map(category_map).fillna(0).to_numpy(dtype=np.int32)
+
+    os.makedirs(directory, exist_ok=True)
+    _save_array(os.path.join(directory, 'tokens.npy'), tokens)
+    _save_array(os.path.join(directory, 'categories.npy'), targets)
+    # meta.json is written last: its presence marks a complete cache
+    tmp = os.path.join(directory, 'meta.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump({
+            'format': CACHE_FORMAT,
+            'seq_len': seq_len,
+            'rows': len(targets),
+            'files': [os.path.basename(f) for f in sorted(files)],
+            'vocab': vocab,
+            'category_map': category_map,
+        }, f)
+    os.replace(tmp, os.path.join(directory, 'meta.json'))
+    return TokenCache(directory)
+
+
+def load_token_cache(data_dir, seq_len=10, cache_root=None):
+    """
+    Token cache for the parquet files in ``data_dir``, building it on first use.
+
+    Caches for other file sets are removed once the current one is ready,
+    since the scraper only ever adds files and the old key will not recur.
+    """
+    files = list_parquet_files(data_dir)
+    if not files:
+        return None
+
+    cache_root = cache_root or os.path.join(data_dir, 'token_cache')
+    key = cache_key(files, seq_len)
+    directory = os.path.join(cache_root, key)
+
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        cache = TokenCache(directory)
+        print(f"Loaded token cache {key[:12]} ({len(cache)} rows).")
+        return cache
+
+    cache = build_token_cache(files, directory, seq_len=seq_len)
+    if cache is None:
+        return None
+    print(f"Built token cache {key[:12]} ({len(cache)} rows from {len(files)} files).")
+    for name in os.listdir(cache_root):
+        if name != key:
+            shutil.rmtree(os.path.join(cache_root, name), ignore_errors=True)
+    return cache
+
+
+class ProductTextDataset(Dataset):
+    """
+    Map-style dataset over a TokenCache.
+
+    Indexed with a list of row indices (see ``make_text_loader``) it returns
+    a whole batch via one fancy-indexing read. The memory maps are opened
+    lazily so DataLoader workers map the files themselves rather than
+    receiving pickled copies of the arrays.
+    """
+
+    def __init__(self, cache):
+        self.tokens_path = cache.tokens_path
+        self.categories_path = cache.categories_path
+        self.length = len(cache)
+        self._tokens = None
+        self._categories = None
+
+    def __len__(self):
+        return self.length
+
+    def _arrays(self):
+        if self._tokens is None:
+            self._tokens = np.load(self.tokens_path, mmap_mode='r')
+            self._categories = np.load(self.categories_path, mmap_mode='r')
+        return self._tokens, self._categories
+
+    def __getitem__(self, index):
+        tokens, categories = self._arrays()
+        # Sorted reads keep page access sequential; order within a batch is irrelevant
+        index = np.sort(np.asarray(index, dtype=np.int64))
+        return (torch.from_numpy(tokens[index].astype(np.int64)),
+                torch.from_numpy(categories[index].astype(np.int64)))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_tokens'] = None
+        state['_categories'] = None
+        return state
+
+
+def make_text_loader(cache, batch_size=64, num_workers=2, num_batches=100000):
+    """
+    DataLoader yielding (tokens [b, seq_len], categories [b]) batches of rows
+    sampled uniformly with replacement.
+    """
+    dataset = ProductTextDataset(cache)
+    sampler = BatchSampler(
+        RandomSampler(dataset, replacement=True, num_samples=batch_size * num_batches),
+        batch_size=batch_size, drop_last=False,
+    )
+    return DataLoader(
+        dataset,
+        sampler=sampler,
+        batch_size=None,
+        num_workers=num_workers,
+        pin_memory=torch.cuda.is_available(),
+        persistent_workers=num_workers > 0,
+        prefetch_factor=4 if num_workers > 0 else None,
+    )
@@ -9,21 +9,25 @@ Supports loading REAL scraped data from --data-dir or falls back to synthetic da
 """
 
 import os
+import sys
 import time
-import glob
+import json
 import torch
 import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
 import numpy as np
-import pandas as pd
 from datetime import datetime
 
+# Add project root to path (the continuous pipeline runs this file as a script)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ML.training.dataset_store import STORE_DIR
+from ML.training.recommendation_dataset import load_token_cache, make_text_loader
+
 # Setup directories
 PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
-REC_DATA_DIR = os.path.join(os.path.dirname(PIPELINE_DIR), 'data', 'recommendation_data')
 MODEL_DIR = os.path.join(os.path.dirname(PIPELINE_DIR), 'models', 'recommendation')
-os.makedirs(REC_DATA_DIR, exist_ok=True)
 os.makedirs(MODEL_DIR, exist_ok=True)
 
 
@@ -67,7 +71,7 @@ class DualStreamRecModel(nn.Module):
 
 
 class RecommendationTrainer:
-    def __init__(self, model, data_dir=None):
+    def __init__(self, model, data_dir=None, num_workers=2, batch_size=64):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = model.to(self.device)
         self.cat_optimizer = optim.Adam(self.model.parameters(), lr=0.001)
@@ -76,47 +80,29 @@ class RecommendationTrainer:
         self.rec_criterion = nn.MSELoss()
         
         # Load real data if available
-        self.real_data = None
+        self.real_data = None  # TokenCache over the scraped parquet corpus
         self.vocab = {}
         self.category_map = {}
         self.num_categories = 500
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+        self._text_loader = None
+        self._text_batches = None
         
-        self.data_dir = data_dir or REC_DATA_DIR
+        self.data_dir = data_dir or STORE_DIR
         self._load_real_data()
     
     def _load_real_data(self):
-        """Load real scraped data from parquet files."""
-        files = glob.glob(os.path.join(self.data_dir, '*.parquet'))
-        if not files:
+        """Load real scraped data (tokenized once into the on-disk token cache)."""
+        self.real_data = load_token_cache(self.data_dir)
+        if self.real_data is None:
             print(f"No real data found in {self.data_dir}. Will use synthetic data.")
             return
+        print(f"Loaded {len(self.real_data)} real product rows from {len(self.real_data.files)} files.")
         
-        dfs = []
-        for f in files:
-            try:
-                dfs.append(pd.read_parquet(f))
-            except:
-                pass
-        
-        if not dfs:
-            return
-            
-        self.real_data = pd.concat(dfs, ignore_index=True)
-        print(f"Loaded {len(self.real_data)} real product rows from {len(files)} files.")
-        
-        # Build vocabulary from product names
-        all_words = set()
-        for name in self.real_data['product_name'].dropna():
-            for word in str(name).lower().split():
-                all_words.add(word)
-        
-        # Map words to indices (reserve 0 for padding)
-        self.vocab = {w: i+1 for i, w in enumerate(list(all_words)[:9999])}
-        
-        # Map categories to indices
-        categories = self.real_data['category'].dropna().unique().tolist()
-        self.category_map = {c: i for i, c in enumerate(categories)}
-        actual_cats = len(categories)
+        self.vocab = self.real_data.vocab
+        self.category_map = self.real_data.category_map
+        actual_cats = self.real_data.num_categories
         
         # Rebuild model output layer if needed
         if actual_cats != self.num_categories and actual_cats > 0:
@@ -140,20 +126,19 @@ class RecommendationTrainer:
         indices += [0] * (seq_len - len(indices))
         return indices
         
-    def _real_text_batch(self, batch_size=64, seq_len=10):
-        """Generate a training batch from real scraped data."""
-        sample = self.real_data.sample(n=min(batch_size, len(self.real_data)), replace=True)
-        
-        texts = []
-        targets = []
-        for _, row in sample.iterrows():
-            indices = self._text_to_indices(row.get('product_name', ''), seq_len)
-            texts.append(indices)
-            cat = row.get('category', 'General')
-            targets.append(self.category_map.get(cat, 0))
-        
-        return (torch.tensor(texts, dtype=torch.long).to(self.device),
-                torch.tensor(targets, dtype=torch.long).to(self.device))
+    def _real_text_batch(self):
+        """Next training batch of cached real rows (sampled with replacement)."""
+        if self._text_loader is None:
+            self._text_loader = make_text_loader(
+                self.real_data, batch_size=self.batch_size, num_workers=self.num_workers
+            )
+        try:
+            texts, targets = next(self._text_batches)
+        except (StopIteration, TypeError):
+            self._text_batches = iter(self._text_loader)
+            texts, targets = next(self._text_batches)
+        return (texts.to(self.device, non_blocking=True),
+                targets.to(self.device, non_blocking=True))
     
     def _synthetic_text_batch(self, batch_size=64, seq_len=10, vocab_size=10000, num_categories=500):
         texts = torch.randint(1, vocab_size, (batch_size, seq_len)).to(self.device)
@@ -222,6 +207,9 @@ class RecommendationTrainer:
                 
         # Save final weights
         torch.save(self.model.state_dict(), os.path.join(MODEL_DIR, "dual_stream_rec.pth"))
+        # Vocabulary/category ids are needed to encode catalog text at inference time
+        with open(os.path.join(MODEL_DIR, "rec_metadata.json"), 'w') as f:
+            json.dump({'vocab': self.vocab, 'category_map': self.category_map}, f)
         print(f"\nTraining Complete! Model saved. Final Cat Loss: {avg_cat_loss:.4f}")
 
 if __name__ == "__main__":
@@ -229,9 +217,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--epochs", type=int, default=50)
     parser.add_argument("--data-dir", type=str, default="")
+    parser.add_argument("--num-workers", type=int, default=2, help="DataLoader worker processes")
     args = parser.parse_args()
     
     data_dir = args.data_dir if args.data_dir else None
     model = DualStreamRecModel()
-    trainer = RecommendationTrainer(model, data_dir=data_dir)
+    trainer = RecommendationTrainer(model, data_dir=data_dir, num_workers=args.num_workers)
     trainer.train(epochs=args.epochs)
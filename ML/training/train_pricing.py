@@ -4,6 +4,8 @@ Training script for the Comrade RL Pricing Model.
 Usage:
     python -m ML.training.train_pricing
     python -m ML.training.train_pricing --episodes 1000 --eval-interval 100
+    python -m ML.training.train_pricing --num-envs 64 --workers 4
+    python -m ML.training.train_pricing --benchmark --benchmark-steps 2000
 """
 
 import os
@@ -16,7 +18,7 @@ import numpy as np
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from ML.training.pricing_env import ComradePricingEnv
+from ML.training.pricing_env import ComradePricingEnv, make_pricing_vector_env
 from ML.training.agent import ComradeTD3Agent
 
 
@@ -192,6 +194,169 @@ def train(args):
     return agent
 
 
+def train_vectorized(args):
+    """
+    Training loop over ``args.num_envs`` markets stepped as one batch.
+
+    Every vector step is one actor forward pass, one batched buffer write
+    and ``args.updates_per_step`` TD3 updates; with ``--workers`` the
+    simulation runs in that many worker processes.
+    """
+    print("=" * 60)
+    print("  Comrade RL Pricing Model - Vectorized Training")
+    print("=" * 60)
+    
+    model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
+                             'models', 'pricing')
+    os.makedirs(model_dir, exist_ok=True)
+    log_path = os.path.join(model_dir, 'training_log.csv')
+    
+    envs = make_pricing_vector_env(args.num_envs, workers=args.workers, max_steps=args.max_steps)
+    eval_env = ComradePricingEnv(max_steps=args.max_steps)
+    agent = ComradeTD3Agent(state_dim=8, action_dim=3)
+    
+    print(f"\nDevice: {agent.device}")
+    print(f"Episodes: {args.episodes} ({args.num_envs} envs, {args.workers} workers)")
+    print(f"Max steps/episode: {args.max_steps}")
+    print(f"Model save dir: {model_dir}")
+    print()
+    
+    with open(log_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            'episode', 'episode_reward', 'critic_loss', 'actor_loss', 'q_value',
+            'exploration_noise', 'eval_mean_reward', 'eval_tier_upgrade_rate',
+            'eval_avg_price', 'eval_avg_savings', 'time_elapsed'
+        ])
+    
+    best_reward = -float('inf')
+    episodes_done = 0
+    env_steps = 0
+    next_eval = args.eval_interval
+    episode_rewards = np.zeros(args.num_envs)
+    losses = {'critic_loss': [], 'actor_loss': [], 'q_value': []}
+    start_time = time.time()
+    
+    states, _ = envs.reset(seed=args.seed)
+    agent.reset_noise()
+    try:
+        while episodes_done < args.episodes:
+            actions = agent.select_actions(states)
+            next_states, rewards, terminated, truncated, infos = envs.step(actions)
+            dones = terminated | truncated
+            
+            # Autoreset: store the true terminal state, not the next episode's first one
+            real_next = next_states.copy()
+            for i in np.nonzero(infos['_final_obs'])[0]:
+                real_next[i] = infos['final_obs'][i]
+            agent.store_transitions(states, actions, rewards, real_next, dones.astype(np.float32))
+            
+            for _ in range(args.updates_per_step):
+                metrics = agent.train_step()
+                for k in losses:
+                    if metrics.get(k) is not None:
+                        losses[k].append(metrics[k])
+            
+            episode_rewards += rewards
+            env_steps += args.num_envs
+            states = next_states
+            
+            if not dones.any():
+                continue
+            
+            finished = episode_rewards[dones]
+            episode_rewards[dones] = 0.0
+            agent.reset_noise(dones)
+            episodes_done += len(finished)
+            
+            eval_metrics = {}
+            if episodes_done >= next_eval:
+                next_eval += args.eval_interval
+                eval_metrics = evaluate_agent(agent, eval_env, n_episodes=10)
+                if eval_metrics['mean_reward'] > best_reward:
+                    best_reward = eval_metrics['mean_reward']
+                    agent.save(model_dir)
+                    print(f"  -> New best model saved! (reward: {best_reward:.2f})")
+            
+            elapsed = time.time() - start_time
+            print(f"Ep {episodes_done:5d}/{args.episodes} | "
+                  f"Train R: {finished.mean():7.2f} | "
+                  + (f"Eval R: {eval_metrics['mean_reward']:7.2f} | " if eval_metrics else "")
+                  + f"eps: {agent.exploration_noise:.3f} | "
+                  f"Buffer: {len(agent.replay_buffer)} | "
+                  f"{env_steps / max(elapsed, 1e-9):,.0f} env steps/s")
+            
+            with open(log_path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow([
+                    episodes_done, finished.mean(),
+                    np.mean(losses['critic_loss']) if losses['critic_loss'] else 0,
+                    np.mean(losses['actor_loss']) if losses['actor_loss'] else 0,
+                    np.mean(losses['q_value']) if losses['q_value'] else 0,
+                    agent.exploration_noise,
+                    eval_metrics.get('mean_reward', ''),
+                    eval_metrics.get('tier_upgrade_rate', ''),
+                    eval_metrics.get('avg_price', ''),
+                    eval_metrics.get('avg_cumulative_savings', ''),
+                    elapsed,
+                ])
+            losses = {k: [] for k in losses}
+    finally:
+        envs.close()
+    
+    agent.save(model_dir)
+    final_eval = evaluate_agent(agent, eval_env, n_episodes=20)
+    elapsed = time.time() - start_time
+    
+    print()
+    print("=" * 60)
+    print("  Training Complete")
+    print("=" * 60)
+    print(f"  Total time:           {elapsed:.1f}s")
+    print(f"  Env steps/sec:        {env_steps / elapsed:,.0f}")
+    print(f"  Best eval reward:     {best_reward:.2f}")
+    print(f"  Final eval reward:    {final_eval['mean_reward']:.2f} ± {final_eval['std_reward']:.2f}")
+    print(f"  Model saved to:       {model_dir}")
+    print()
+    
+    return agent
+
+
+def benchmark(args):
+    """Measure train_step iterations/sec with a full 100k-transition replay buffer."""
+    agent = ComradeTD3Agent(state_dim=8, action_dim=3)
+    buffer = agent.replay_buffer
+    rng = np.random.default_rng(0)
+    
+    print(f"Filling replay buffer ({buffer.capacity} transitions)...")
+    for _ in range(buffer.capacity):
+        buffer.push(
+            rng.standard_normal(8), rng.uniform([-0.3, 0.0, 0.0], [0.3, 1.0, 0.5]),
+            rng.standard_normal(), rng.standard_normal(8), float(rng.random() < 0.01),
+        )
+    
+    # Buffer alone: proportional sampling + priority write-back
+    start = time.perf_counter()
+    for _ in range(args.benchmark_steps):
+        _, indices, _ = buffer.sample(agent.batch_size)
+        buffer.update_priorities(indices, rng.random(agent.batch_size))
+    buffer_rate = args.benchmark_steps / (time.perf_counter() - start)
+    
+    # Full TD3 update (warm up once so lazy CUDA/kernel init is not timed)
+    agent.train_step()
+    start = time.perf_counter()
+    for _ in range(args.benchmark_steps):
+        agent.train_step()
+    step_rate = args.benchmark_steps / (time.perf_counter() - start)
+    
+    print(f"Device:                {agent.device}")
+    print(f"Buffer size:           {len(buffer)}")
+    print(f"Batch size:            {agent.batch_size}")
+    print(f"sample+update_priorities: {buffer_rate:8.1f} it/s")
+    print(f"train_step:               {step_rate:8.1f} it/s")
+    return step_rate
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Train Comrade RL Pricing Model')
     parser.add_argument('--episodes', type=int, default=500, help='Number of training episodes')
@@ -199,6 +364,17 @@ if __name__ == '__main__':
     parser.add_argument('--eval-interval', type=int, default=50, help='Evaluate every N episodes')
     parser.add_argument('--resume', action='store_true', help='Resume training from existing weights')
     parser.add_argument('--data-file', type=str, default='', help='Path to actual scraped data chunk')
+    parser.add_argument('--num-envs', type=int, default=1, help='Markets stepped together (>1 uses the vectorized env)')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes for the vectorized env (0 = in-process)')
+    parser.add_argument('--updates-per-step', type=int, default=1, help='TD3 updates per vectorized env step')
+    parser.add_argument('--seed', type=int, default=None, help='Environment seed')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark train_step throughput and exit')
+    parser.add_argument('--benchmark-steps', type=int, default=1000, help='train_step calls to time with --benchmark')
     args = parser.parse_args()
     
-    train(args)
+    if args.benchmark:
+        benchmark(args)
+    elif args.num_envs > 1:
+        train_vectorized(args)
+    else:
+        train(args)
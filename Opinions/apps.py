@@ -5,3 +5,10 @@ class OpinionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Opinions'
     verbose_name = 'Opinions & Social'
+
+    def ready(self):
+        from comrade.media import register
+        from .feed import connect_signals
+        from .models import OpinionMedia
+        connect_signals()
+        register(OpinionMedia, 'file', is_image=lambda media, file: media.media_type == 'image')
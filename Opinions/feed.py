@@ -0,0 +1,305 @@
+"""
+Unified feed composer.
+
+Each source (opinions, research, announcements, products) keeps a cached
+window of its newest (timestamp, pk) keys. A page is built by k-way merging
+the sources' key streams with heapq.merge, starting from a composite cursor
+that records the last key consumed from every source. Only the keys that
+make the page are hydrated, with one bulk query per content type.
+
+- windows hold WINDOW_SIZE keys for WINDOW_TTL seconds and are dropped when
+  a source row is created, deleted or has a ``feed_fields`` column saved
+  (connect_signals); counter-only saves (``update_fields=['likes_count']``)
+  keep the window
+- a cursor position beyond the cached window falls back to a keyset query
+  on (timestamp, pk), so deep pages are stable and never use OFFSET
+"""
+
+import base64
+import heapq
+import json
+import logging
+from datetime import datetime
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SIZE = 200
+WINDOW_TTL = 60
+WINDOW_KEY = 'feed:window:{}'
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _truncate(text, length):
+    text = text or ''
+    return text[:length] + '...' if len(text) > length else text
+
+
+class FeedSource:
+    """One content type in the unified feed."""
+    name = None
+    model_label = None
+    # Columns deciding whether and where a row appears in the feed
+    feed_fields = ()
+
+    def model(self):
+        """The source model, or LookupError if its app is not installed."""
+        return apps.get_model(self.model_label)
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def timestamp(self):
+        """Expression the feed is ordered by."""
+        raise NotImplementedError
+
+    def hydrate(self, objects, request):
+        """Feed item dicts for ``objects``, in the same order."""
+        raise NotImplementedError
+
+    # ── Keys ──────────────────────────────────────────────────
+
+    def keys(self, after=None, limit=WINDOW_SIZE):
+        """Up to ``limit`` (timestamp, pk) keys older than ``after``, newest first."""
+        qs = self.queryset().annotate(feed_ts=self.timestamp()).filter(feed_ts__isnull=False)
+        if after is not None:
+            qs = qs.filter(Q(feed_ts__lt=after[0]) | Q(feed_ts=after[0], pk__lt=after[1]))
+        return list(qs.order_by('-feed_ts', '-pk').values_list('feed_ts', 'pk')[:limit])
+
+    def window(self):
+        key = WINDOW_KEY.format(self.name)
+        window = cache.get(key)
+        if window is None:
+            window = self.keys()
+            cache.set(key, window, WINDOW_TTL)
+        return window
+
+    def invalidate(self, created=False, update_fields=None, **kwargs):
+        """Signal receiver; saves that only touch other columns keep the window."""
+        if not created and update_fields is not None and not set(update_fields) & set(self.feed_fields):
+            return
+        cache.delete(WINDOW_KEY.format(self.name))
+
+    def entries_after(self, position, limit):
+        """``limit`` keys following ``position`` (from the window while it lasts)."""
+        window = self.window()
+        start = 0
+        if position is not None:
+            start = next((i for i, entry in enumerate(window) if entry < position), len(window))
+        entries = window[start:start + limit]
+        if len(entries) < limit and len(window) >= WINDOW_SIZE:
+            # Past the cached window (it is full, so older rows may exist)
+            last = entries[-1] if entries else position
+            entries = entries + self.keys(last, limit - len(entries))
+        return entries
+
+    def parse_position(self, value):
+        timestamp, pk = value
+        return datetime.fromisoformat(timestamp), self.model()._meta.pk.to_python(pk)
+
+
+class OpinionSource(FeedSource):
+    name = 'opinions'
+    feed_fields = ('visibility', 'is_deleted', 'created_at')
+    model_label = 'Opinions.Opinion'
+
+    def queryset(self):
+        return self.model().objects.filter(is_deleted=False, visibility='public')
+
+    def timestamp(self):
+        return F('created_at')
+
+    def hydrate(self, objects, request):
+        from .serializers import OpinionSerializer
+        items = OpinionSerializer(objects, many=True, context={'request': request}).data
+        for item in items:
+            item['content_type'] = 'opinion'
+            item['category_label'] = 'Opinion'
+            item['category_color'] = 'blue'
+        return items
+
+    def bulk(self, pks):
+        return self.queryset().select_related('user', 'reposted_by').prefetch_related('media_files').in_bulk(pks)
+
+
+class ResearchSource(FeedSource):
+    name = 'research'
+    feed_fields = ('is_published', 'published_at', 'created_at')
+    model_label = 'Research.ResearchProject'
+
+    def queryset(self):
+        return self.model().objects.filter(is_published=True)
+
+    def timestamp(self):
+        return Coalesce('published_at', 'created_at')
+
+    def bulk(self, pks):
+        return self.queryset().select_related('principal_investigator').in_bulk(pks)
+
+    def hydrate(self, objects, request):
+        return [{
+            'id': str(r.id),
+            'content_type': 'research',
+            'category_label': 'Research',
+            'category_color': 'purple',
+            'title': r.title,
+            'content': _truncate(r.abstract, 300),
+            'creator': {
+                'id': r.principal_investigator.id,
+                'name': f'{r.principal_investigator.first_name} {r.principal_investigator.last_name}',
+            },
+            'created_at': r.published_at.isoformat() if r.published_at else r.created_at.isoformat(),
+            'views_count': r.views,
+            'action_url': f'/research/{r.id}'
+        } for r in objects]
+
+
+class AnnouncementSource(FeedSource):
+    name = 'announcements'
+    feed_fields = ('time_stamp',)
+    model_label = 'Announcements.Announcements'
+
+    def queryset(self):
+        return self.model().objects.all()
+
+    def timestamp(self):
+        return F('time_stamp')
+
+    def bulk(self, pks):
+        return self.queryset().in_bulk(pks)
+
+    def hydrate(self, objects, request):
+        return [{
+            'id': a.id,
+            'content_type': 'announcement',
+            'category_label': 'Announcement',
+            'category_color': 'yellow',
+            'title': a.heading,
+            'content': _truncate(a.content, 300),
+            'created_at': a.time_stamp.isoformat() if a.time_stamp else '',
+            'action_url': f'/announcements/{a.id}'
+        } for a in objects]
+
+
+class ProductSource(FeedSource):
+    name = 'products'
+    feed_fields = ('created_at',)
+    model_label = 'Payment.Product'
+
+    def queryset(self):
+        return self.model().objects.all()
+
+    def timestamp(self):
+        return F('created_at')
+
+    def bulk(self, pks):
+        return self.queryset().in_bulk(pks)
+
+    def hydrate(self, objects, request):
+        return [{
+            'id': str(p.id),
+            'content_type': 'product',
+            'category_label': p.get_product_type_display() if hasattr(p, 'get_product_type_display') else (p.product_type or 'Product'),
+            'product_type': p.product_type or 'physical',
+            'category_color': 'green',
+            'title': p.name,
+            'content': _truncate(p.description, 200),
+            'price': str(p.price),
+            'image_url': p.image_url or '',
+            'stock_quantity': p.stock_quantity,
+            'is_available': p.stock_quantity > 0 if p.product_type == 'physical' else True,
+            'created_at': p.created_at.isoformat() if p.created_at else '',
+            'action_url': f'/shop/item/{p.id}',
+        } for p in objects]
+
+
+SOURCES = {source.name: source for source in (OpinionSource(), ResearchSource(), AnnouncementSource(), ProductSource())}
+
+
+# ── Cursor ────────────────────────────────────────────────────────────────
+
+def encode_cursor(positions):
+    payload = {name: [ts.isoformat(), str(pk)] for name, (ts, pk) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """{source name: (timestamp, pk)} from an encoded cursor ('' -> {})."""
+    if not cursor:
+        return {}
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {name: SOURCES[name].parse_position(value) for name, value in payload.items()}
+    except Exception as e:
+        raise InvalidCursor(str(e)) from e
+
+
+# ── Composition ───────────────────────────────────────────────────────────
+
+def compose_feed(request, source_names, limit=20, cursor=None):
+    """
+    One page of the unified feed.
+
+    Returns ``{'results': [...], 'next_cursor': str | None, 'has_more': bool}``.
+    Raises InvalidCursor for a malformed cursor.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    positions = decode_cursor(cursor)
+
+    streams = []
+    for name in source_names:
+        source = SOURCES[name]
+        try:
+            entries = source.entries_after(positions.get(name), limit + 1)
+        except Exception as e:
+            # A source whose app is missing or failing is left out of the feed
+            logger.warning(f"Feed source {name} unavailable: {e}")
+            continue
+        streams.append([(ts, name, pk) for ts, pk in entries])
+
+    merged = list(heapq.merge(*streams, key=lambda entry: entry[0], reverse=True))
+    page, has_more = merged[:limit], len(merged) > limit
+
+    next_positions = dict(positions)
+    for ts, name, pk in page:
+        next_positions[name] = (ts, pk)
+
+    # Hydrate only the page: one bulk query per content type
+    by_source = {}
+    for _, name, pk in page:
+        by_source.setdefault(name, []).append(pk)
+    items = {}
+    for name, pks in by_source.items():
+        source = SOURCES[name]
+        rows = source.bulk(pks)
+        objects = [rows[pk] for pk in pks if pk in rows]
+        for obj, item in zip(objects, source.hydrate(objects, request)):
+            items[(name, obj.pk)] = item
+
+    results = [items[(name, pk)] for _, name, pk in page if (name, pk) in items]
+    return {
+        'results': results,
+        'next_cursor': encode_cursor(next_positions) if has_more else None,
+        'has_more': has_more,
+    }
+
+
+def connect_signals():
+    """Drop a source's cached window when one of its rows enters, leaves or moves in the feed."""
+    for source in SOURCES.values():
+        try:
+            model = source.model()
+        except LookupError:
+            continue
+        uid = f'feed-window-{source.name}'
+        post_save.connect(source.invalidate, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(source.invalidate, sender=model, weak=False, dispatch_uid=f'{uid}-delete')
@@ -0,0 +1,165 @@
+"""
+benchmark_trending – Read latency of the old and new trending queries.
+Builds a throwaway SQLite database with synthetic opinions (same columns and
+indexes the trending queries touch), then times:
+  old: last-24h filter ordered by raw likes/comments/reposts (sort per call)
+  new: top-K walk of the TrendingScore score index
+plus the initial scoring pass and an incremental rescore after a slice of
+opinions gain engagement. Runs outside the project database on purpose.
+Usage: python manage.py benchmark_trending --opinions 1000000 --reads 50
+"""
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+
+from Opinions.trending import EPOCH, HORIZON, gravity_score
+
+SCHEMA = """
+CREATE TABLE opinion (
+    id INTEGER PRIMARY KEY,
+    visibility VARCHAR(20) NOT NULL,
+    is_deleted BOOL NOT NULL,
+    likes_count INTEGER NOT NULL,
+    comments_count INTEGER NOT NULL,
+    reposts_count INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX opinion_created ON opinion (created_at DESC);
+CREATE TABLE trending_score (
+    opinion_id INTEGER PRIMARY KEY REFERENCES opinion (id),
+    score REAL NOT NULL,
+    likes_count INTEGER NOT NULL,
+    comments_count INTEGER NOT NULL,
+    reposts_count INTEGER NOT NULL
+);
+CREATE INDEX trending_score_score ON trending_score (score DESC);
+"""
+
+OLD_READ = """
+SELECT id FROM opinion
+WHERE is_deleted = 0 AND visibility = 'public' AND created_at >= ?
+ORDER BY likes_count DESC, comments_count DESC, reposts_count DESC
+LIMIT 50
+"""
+
+NEW_READ = """
+SELECT t.opinion_id FROM trending_score t
+JOIN opinion o ON o.id = t.opinion_id
+WHERE o.is_deleted = 0 AND o.visibility = 'public'
+ORDER BY t.score DESC
+LIMIT 50
+"""
+
+CHANGED = """
+SELECT o.id, o.created_at, o.likes_count, o.comments_count, o.reposts_count
+FROM opinion o LEFT JOIN trending_score t ON t.opinion_id = o.id
+WHERE o.is_deleted = 0 AND o.visibility = 'public' AND o.created_at >= ?
+  AND (t.opinion_id IS NULL OR t.likes_count != o.likes_count
+       OR t.comments_count != o.comments_count OR t.reposts_count != o.reposts_count)
+"""
+
+UPSERT = """
+INSERT INTO trending_score (opinion_id, score, likes_count, comments_count, reposts_count)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (opinion_id) DO UPDATE SET score = excluded.score, likes_count = excluded.likes_count,
+    comments_count = excluded.comments_count, reposts_count = excluded.reposts_count
+"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks trending reads: raw engagement sort vs precomputed score index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--opinions', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=30, help='Spread of created_at')
+        parser.add_argument('--reads', type=int, default=50)
+        parser.add_argument('--changed', type=float, default=0.01, help='Fraction of opinions touched before the rescore')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        now = datetime.now(dt_timezone.utc)
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        try:
+            db = sqlite3.connect(path)
+            db.executescript(SCHEMA)
+
+            started = time.perf_counter()
+            self._populate(db, rng, options['opinions'], options['days'], now)
+            self.stdout.write(f"populated {options['opinions']} opinions in {time.perf_counter() - started:.1f}s")
+
+            scored, elapsed = self._rescore(db, now)
+            self.stdout.write(f"initial scoring: {scored} opinions in {elapsed:.2f}s")
+            # Planner statistics for both tables (stale ones pick a full scan of opinion)
+            db.execute('ANALYZE')
+
+            touched = self._touch(db, rng, options['opinions'], options['changed'])
+            scored, elapsed = self._rescore(db, now)
+            self.stdout.write(f"incremental rescore after {touched} updates: {scored} opinions in {elapsed:.3f}s")
+
+            yesterday = (now - timedelta(days=1) - EPOCH).total_seconds()
+            old = self._time_reads(db, OLD_READ, (yesterday,), options['reads'])
+            new = self._time_reads(db, NEW_READ, (), options['reads'])
+            self.stdout.write(f"old read (24h engagement sort): median {old[0]:.2f}ms  p95 {old[1]:.2f}ms")
+            self.stdout.write(f"new read (score index top-K):   median {new[0]:.2f}ms  p95 {new[1]:.2f}ms")
+            self.stdout.write(self.style.SUCCESS(f"speedup (median): {old[0] / new[0]:.0f}x"))
+            db.close()
+        finally:
+            os.remove(path)
+
+    def _populate(self, db, rng, count, days, now):
+        span = days * 86400
+        newest = (now - EPOCH).total_seconds()
+
+        def rows():
+            for pk in range(1, count + 1):
+                # Heavy-tailed engagement: most posts get little, a few get a lot
+                likes = int(rng.paretovariate(1.2)) - 1
+                yield (
+                    pk,
+                    'public' if rng.random() < 0.9 else 'followers',
+                    rng.random() < 0.02,
+                    likes,
+                    int(likes * rng.random() * 0.3),
+                    int(likes * rng.random() * 0.1),
+                    newest - rng.random() * span,
+                )
+
+        db.executemany('INSERT INTO opinion VALUES (?, ?, ?, ?, ?, ?, ?)', rows())
+        db.commit()
+
+    def _rescore(self, db, now):
+        started = time.perf_counter()
+        horizon = (now - HORIZON - EPOCH).total_seconds()
+        batch = [
+            (pk, gravity_score(likes, comments, reposts, EPOCH + timedelta(seconds=created)), likes, comments, reposts)
+            for pk, created, likes, comments, reposts in db.execute(CHANGED, (horizon,))
+        ]
+        db.executemany(UPSERT, batch)
+        db.commit()
+        return len(batch), time.perf_counter() - started
+
+    def _touch(self, db, rng, count, fraction):
+        ids = rng.sample(range(1, count + 1), int(count * fraction))
+        db.executemany(
+            'UPDATE opinion SET likes_count = likes_count + ?, comments_count = comments_count + ? WHERE id = ?',
+            [(rng.randint(1, 50), rng.randint(0, 5), pk) for pk in ids],
+        )
+        db.commit()
+        return len(ids)
+
+    def _time_reads(self, db, sql, params, reads):
+        timings = []
+        for _ in range(reads):
+            started = time.perf_counter()
+            db.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))]
@@ -0,0 +1,28 @@
+"""
+build_follow_suggestions – Materialize friends-of-friends follow suggestions.
+Snapshots the follow graph and room/institution memberships into CSR arrays
+(saved for the circles endpoint), then stores each user's top suggestions.
+Run it periodically (e.g. hourly).
+Usage: python manage.py build_follow_suggestions --limit 50
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from Opinions import suggestions
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the follow graph snapshot and stored follow suggestions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=suggestions.SUGGESTIONS_PER_USER, help='Suggestions per user')
+        parser.add_argument('--batch-size', type=int, default=suggestions.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = suggestions.materialize(limit=options['limit'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {result['suggestions']} suggestions for {result['users']} users "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
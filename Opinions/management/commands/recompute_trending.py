@@ -0,0 +1,23 @@
+"""
+recompute_trending – Refresh precomputed trending scores.
+Only opinions whose like/comment/repost counters changed since the last run
+(or that have no score yet) are rescored; rows for deleted, non-public or
+out-of-horizon opinions are removed. Run it periodically (e.g. every minute).
+Usage: python manage.py recompute_trending
+"""
+from django.core.management.base import BaseCommand
+
+from Opinions import trending
+
+
+class Command(BaseCommand):
+    help = 'Rescores opinions whose engagement changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=trending.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        result = trending.recompute(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {result['scored']} opinions, removed {result['removed']} stale scores."
+        ))
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.11 on 2026-10-19 09:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Opinions", "0008_story_likes_count_story_shared_entity_id_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrendingScore",
+            fields=[
+                (
+                    "opinion",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="trending_score",
+                        serialize=False,
+                        to="Opinions.opinion",
+                    ),
+                ),
+                ("score", models.FloatField(default=0)),
+                ("likes_count", models.PositiveIntegerField(default=0)),
+                ("comments_count", models.PositiveIntegerField(default=0)),
+                ("reposts_count", models.PositiveIntegerField(default=0)),
+                (
+                    "computed_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-score"], name="Opinions_tr_score_a94b70_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Opinions", "0010_followsuggestion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="opinionmedia",
+            name="derivatives",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="opinionmedia",
+            name="placeholder",
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -187,6 +187,10 @@ class OpinionMedia(models.Model):
     duration = models.PositiveIntegerField(null=True, blank=True)  # in seconds
     thumbnail = models.ImageField(upload_to='opinions/thumbnails/', blank=True, null=True)
     
+    # For images: WebP sizes and blur-up placeholder (see comrade/media.py)
+    derivatives = models.JSONField(default=dict, blank=True)
+    placeholder = models.TextField(blank=True)
+    
     created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
@@ -323,6 +327,37 @@ class Follow(models.Model):
         return f"{self.follower.email} follows {self.following.email}"
 
 
+class FollowSuggestion(models.Model):
+    """
+    Precomputed follow suggestion, maintained by the build_follow_suggestions
+    command (see Opinions/suggestions.py).
+    """
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    suggested = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField(default=0)
+    mutual_count = models.PositiveIntegerField(default=0)
+    shared_rooms = models.PositiveIntegerField(default=0)
+    shared_institutions = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('user', 'suggested')
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+    def __str__(self):
+        return f"Suggest {self.suggested_id} to {self.user_id} ({self.score:.2f})"
+
+
 class Bookmark(models.Model):
     """Bookmarked opinions"""
     user = models.ForeignKey(
@@ -566,3 +601,31 @@ class StoryLike(models.Model):
     def __str__(self):
         return f"{self.user.email} liked story {self.story.id}"
 
+
+
+class TrendingScore(models.Model):
+    """
+    Precomputed trending rank of an opinion, maintained by the
+    recompute_trending command (see Opinions/trending.py).
+    The counter columns are the values the score was computed from, so a run
+    only rescores opinions whose engagement has changed since.
+    """
+    opinion = models.OneToOneField(
+        Opinion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending_score'
+    )
+    score = models.FloatField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    reposts_count = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score']),
+        ]
+
+    def __str__(self):
+        return f"Trending score {self.score:.3f} for opinion {self.opinion_id}"
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from comrade.media import srcset
 from .models import Opinion, OpinionLike, OpinionComment, OpinionRepost, Follow, Bookmark, OpinionMedia, Story, StoryView
 from Authentication.models import CustomUser
 
@@ -7,11 +8,12 @@ class UserMiniSerializer(serializers.ModelSerializer):
     """Minimal user info for opinions"""
     full_name = serializers.SerializerMethodField()
     avatar_url = serializers.SerializerMethodField()
+    avatar_srcset = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     
     class Meta:
         model = CustomUser
-        fields = ['id', 'email', 'first_name', 'last_name', 'username', 'full_name', 'avatar_url', 'user_type', 'is_following']
+        fields = ['id', 'email', 'first_name', 'last_name', 'username', 'full_name', 'avatar_url', 'avatar_srcset', 'user_type', 'is_following']
     
     def get_full_name(self, obj):
         return f"{obj.first_name or ''} {obj.last_name or ''}".strip() or obj.email
@@ -27,6 +29,12 @@ class UserMiniSerializer(serializers.ModelSerializer):
             pass
         return None
     
+    def get_avatar_srcset(self, obj):
+        profile = getattr(obj, 'user_profile', None)
+        if profile is None:
+            return None
+        return srcset(profile.avatar, profile.avatar_derivatives, self.context.get('request'))
+    
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
@@ -37,10 +45,11 @@ class UserMiniSerializer(serializers.ModelSerializer):
 class OpinionMediaSerializer(serializers.ModelSerializer):
     """Serializer for opinion media attachments"""
     url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = OpinionMedia
-        fields = ['id', 'url', 'media_type', 'caption', 'file_name', 'order']
+        fields = ['id', 'url', 'srcset', 'placeholder', 'media_type', 'caption', 'file_name', 'order']
     
     def get_url(self, obj):
         request = self.context.get('request')
@@ -49,6 +58,11 @@ class OpinionMediaSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.file.url)
             return obj.file.url
         return None
+    
+    def get_srcset(self, obj):
+        if obj.media_type != 'image':
+            return None
+        return srcset(obj.file, obj.derivatives, self.context.get('request'))
 
 
 class OpinionSerializer(serializers.ModelSerializer):
@@ -395,6 +409,7 @@ class UserFollowSerializer(serializers.ModelSerializer):
     """User serializer for followers/following lists"""
     full_name = serializers.SerializerMethodField()
     avatar_url = serializers.SerializerMethodField()
+    avatar_srcset = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     followers_count = serializers.SerializerMethodField()
     following_count = serializers.SerializerMethodField()
@@ -404,7 +419,7 @@ class UserFollowSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = [
             'id', 'email', 'first_name', 'last_name', 'full_name',
-            'avatar_url', 'user_type', 'is_following',
+            'avatar_url', 'avatar_srcset', 'user_type', 'is_following',
             'followers_count', 'following_count', 'bio'
         ]
     
@@ -423,6 +438,12 @@ class UserFollowSerializer(serializers.ModelSerializer):
             pass
         return None
     
+    def get_avatar_srcset(self, obj):
+        profile = getattr(obj, 'user_profile', None)
+        if profile is None:
+            return None
+        return srcset(profile.avatar, profile.avatar_derivatives, self.context.get('request'))
+    
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user != obj:
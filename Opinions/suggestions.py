@@ -0,0 +1,353 @@
+"""
+Friends-of-friends follow suggestions.
+
+The build_follow_suggestions command periodically snapshots the follow graph
+(plus room and institution memberships) into CSR adjacency arrays:
+``indices[indptr[i]:indptr[i + 1]]`` are the neighbours of dense user index
+``i``. For every user, candidates two hops away are scored by
+
+    mutual follows + ROOM_WEIGHT * shared rooms + INSTITUTION_WEIGHT * shared institutions
+
+and the top SUGGESTIONS_PER_USER are stored in FollowSuggestion. The
+suggestions endpoint is then an indexed read of those rows, filtered against
+live follows and blocks.
+
+The snapshot is also saved to GRAPH_PATH so web processes can reuse it:
+circle_ids() takes mutual-follow candidates from it and checks them (and
+any follows made since the snapshot) against the live Follow rows.
+"""
+
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from Authentication.models import CustomUser
+
+from .models import ContentBlock, Follow, FollowSuggestion
+
+GRAPH_PATH = os.path.join(settings.BASE_DIR, 'ML', 'data', 'follow_graph.npz')
+SUGGESTIONS_PER_USER = 50
+ROOM_WEIGHT = 0.5
+INSTITUTION_WEIGHT = 0.5
+MAX_GROUP_SIZE = 500  # larger rooms/institutions say little about affinity
+POPULAR_COUNT = 200
+BATCH_SIZE = 500
+
+Suggestion = namedtuple('Suggestion', 'user_id score mutual_count shared_rooms shared_institutions')
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+class Adjacency:
+    """Sparse rows in CSR form."""
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_pairs(cls, rows, cols, n_rows):
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        return cls(indptr, cols[order].astype(np.int64))
+
+    def row(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def gather(self, rows):
+        """Neighbours of all ``rows`` concatenated (repeats kept, so they can be counted)."""
+        if len(rows) == 0:
+            return _EMPTY
+        return np.concatenate([self.row(i) for i in rows])
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+
+def _dense(values, keys):
+    """Dense indices of ``values`` in ``keys`` (a sorted array of all values)."""
+    return np.searchsorted(keys, values).astype(np.int64)
+
+
+class FollowGraph:
+    """Snapshot of the follow graph and group memberships over dense user indices."""
+
+    def __init__(self, user_ids, following, followers, user_rooms, room_users,
+                 user_institutions, institution_users, built_at):
+        self.user_ids = user_ids
+        self.following = following
+        self.followers = followers
+        self.user_rooms = user_rooms
+        self.room_users = room_users
+        self.user_institutions = user_institutions
+        self.institution_users = institution_users
+        self.built_at = built_at
+
+    @classmethod
+    def from_edges(cls, follows, room_members, institution_members, built_at=None):
+        """
+        Build from ``(follower_id, following_id)`` pairs and
+        ``(group_id, user_id)`` membership pairs.
+        """
+        follows = np.asarray(follows, dtype=np.int64).reshape(-1, 2)
+        room_members = [(g, u) for g, u in room_members]
+        institution_members = [(g, u) for g, u in institution_members]
+        user_ids = np.unique(np.concatenate([
+            follows.ravel(),
+            np.array([u for _, u in room_members + institution_members], dtype=np.int64),
+        ]))
+        n = len(user_ids)
+        src, dst = _dense(follows[:, 0], user_ids), _dense(follows[:, 1], user_ids)
+
+        def groups(pairs):
+            group_index = {}
+            g = np.array([group_index.setdefault(gid, len(group_index)) for gid, _ in pairs], dtype=np.int64)
+            u = _dense(np.array([uid for _, uid in pairs], dtype=np.int64), user_ids)
+            return Adjacency.from_pairs(u, g, n), Adjacency.from_pairs(g, u, len(group_index))
+
+        user_rooms, room_users = groups(room_members)
+        user_institutions, institution_users = groups(institution_members)
+        return cls(
+            user_ids,
+            Adjacency.from_pairs(src, dst, n),
+            Adjacency.from_pairs(dst, src, n),
+            user_rooms, room_users, user_institutions, institution_users,
+            built_at or timezone.now(),
+        )
+
+    @classmethod
+    def build(cls):
+        """Snapshot the current Follow, room membership and institution membership tables."""
+        # Taken first: follows made while the tables are read are also after built_at
+        built_at = timezone.now()
+        follows = list(Follow.objects.values_list('follower_id', 'following_id').iterator(chunk_size=10000))
+        room_members = apps.get_model('Rooms', 'Room').members.through.objects.values_list('room_id', 'customuser_id')
+        institution_members = apps.get_model('Institution', 'InstitutionMember').objects.filter(
+            is_active=True
+        ).values_list('institution_id', 'user_id')
+        return cls.from_edges(
+            follows,
+            room_members.iterator(chunk_size=10000),
+            institution_members.iterator(chunk_size=10000),
+            built_at,
+        )
+
+    # ── Persistence ─────────────────────────────────────────────────────
+
+    _ARRAYS = ('following', 'followers', 'user_rooms', 'room_users', 'user_institutions', 'institution_users')
+
+    def save(self, path=GRAPH_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {'user_ids': self.user_ids, 'built_at': np.array(self.built_at.timestamp())}
+        for name in self._ARRAYS:
+            adjacency = getattr(self, name)
+            arrays[f'{name}_indptr'] = adjacency.indptr
+            arrays[f'{name}_indices'] = adjacency.indices
+        tmp = f'{path}.tmp.npz'
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=GRAPH_PATH):
+        with np.load(path) as data:
+            adjacency = {
+                name: Adjacency(data[f'{name}_indptr'], data[f'{name}_indices'])
+                for name in cls._ARRAYS
+            }
+            built_at = datetime.fromtimestamp(float(data['built_at']), tz=dt_timezone.utc)
+            return cls(data['user_ids'], built_at=built_at, **adjacency)
+
+    # ── Queries ─────────────────────────────────────────────────────────
+
+    def index(self, user_id):
+        i = int(np.searchsorted(self.user_ids, user_id))
+        return i if i < len(self.user_ids) and self.user_ids[i] == user_id else None
+
+    def mutual_ids(self, user_id):
+        """Users ``user_id`` follows who follow back, as of the snapshot."""
+        i = self.index(user_id)
+        if i is None:
+            return []
+        mutual = np.intersect1d(self.following.row(i), self.followers.row(i), assume_unique=True)
+        return self.user_ids[mutual].tolist()
+
+    def popular_ids(self, limit=POPULAR_COUNT):
+        """Most-followed users, most followers first."""
+        order = np.argsort(-self.followers.degrees(), kind='stable')[:limit]
+        return self.user_ids[order].tolist()
+
+    def _co_members(self, i, user_groups, group_users):
+        groups = user_groups.row(i)
+        sizes = group_users.degrees()[groups] if len(groups) else _EMPTY
+        return group_users.gather(groups[sizes <= MAX_GROUP_SIZE])
+
+    def suggestions_for_index(self, i, limit=SUGGESTIONS_PER_USER):
+        """Top ``limit`` Suggestions for dense user index ``i``."""
+        followed = self.following.row(i)
+        parts = (
+            self.following.gather(followed),
+            self._co_members(i, self.user_rooms, self.room_users),
+            self._co_members(i, self.user_institutions, self.institution_users),
+        )
+        candidates, inverse = np.unique(np.concatenate(parts), return_inverse=True)
+        if len(candidates) == 0:
+            return []
+        counts = []
+        offset = 0
+        for part in parts:
+            counts.append(np.bincount(inverse[offset:offset + len(part)], minlength=len(candidates)))
+            offset += len(part)
+        mutual, rooms, institutions = counts
+        score = mutual + ROOM_WEIGHT * rooms + INSTITUTION_WEIGHT * institutions
+
+        eligible = np.ones(len(candidates), dtype=bool)
+        eligible[candidates == i] = False
+        eligible[np.isin(candidates, followed, assume_unique=True)] = False
+        picks = np.flatnonzero(eligible)
+        picks = picks[np.argsort(-score[picks], kind='stable')[:limit]]
+        return [
+            Suggestion(int(self.user_ids[candidates[k]]), float(score[k]), int(mutual[k]), int(rooms[k]), int(institutions[k]))
+            for k in picks
+        ]
+
+    def suggestions(self, user_id, limit=SUGGESTIONS_PER_USER):
+        i = self.index(user_id)
+        return [] if i is None else self.suggestions_for_index(i, limit)
+
+
+# ── Snapshot shared by web processes ─────────────────────────────────────
+
+_graph = None
+_graph_stamp = None
+_graph_lock = threading.Lock()
+
+
+def current_graph():
+    """The last saved FollowGraph (reloaded when the file changes), or None."""
+    global _graph, _graph_stamp
+    try:
+        st = os.stat(GRAPH_PATH)
+    except OSError:
+        return None
+    stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+    with _graph_lock:
+        if stamp != _graph_stamp:
+            try:
+                _graph = FollowGraph.load(GRAPH_PATH)
+            except (OSError, ValueError, KeyError):
+                return None
+            _graph_stamp = stamp
+        return _graph
+
+
+# ── Materialization ──────────────────────────────────────────────────────
+
+def materialize(limit=SUGGESTIONS_PER_USER, batch_size=BATCH_SIZE):
+    """
+    Rebuild the graph snapshot and every user's stored suggestions.
+
+    Returns ``{'users': n, 'suggestions': n}``.
+    """
+    graph = FollowGraph.build()
+    graph.save()
+    now = graph.built_at
+
+    users = stored = 0
+    for start in range(0, len(graph.user_ids), batch_size):
+        indices = range(start, min(start + batch_size, len(graph.user_ids)))
+        rows = [
+            FollowSuggestion(
+                user_id=int(graph.user_ids[i]),
+                suggested_id=s.user_id,
+                score=s.score,
+                mutual_count=s.mutual_count,
+                shared_rooms=s.shared_rooms,
+                shared_institutions=s.shared_institutions,
+                computed_at=now,
+            )
+            for i in indices
+            for s in graph.suggestions_for_index(i, limit)
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=graph.user_ids[indices.start:indices.stop].tolist()).delete()
+            FollowSuggestion.objects.bulk_create(rows, batch_size=1000)
+        users += len(indices)
+        stored += len(rows)
+
+    # Users who dropped out of the graph entirely
+    FollowSuggestion.objects.filter(computed_at__lt=now).delete()
+    return {'users': users, 'suggestions': stored}
+
+
+# ── Reads ────────────────────────────────────────────────────────────────
+
+def _hidden_ids(user):
+    """Subqueries of users never to suggest: already followed or blocked either way."""
+    return (
+        Follow.objects.filter(follower=user).values('following_id'),
+        ContentBlock.objects.filter(user=user).values('blocked_user_id'),
+        ContentBlock.objects.filter(blocked_user=user).values('user_id'),
+    )
+
+
+def suggested_users(user, limit=20):
+    """
+    Users to suggest to ``user``, best first: stored friends-of-friends
+    suggestions, topped up with the snapshot's most-followed users.
+    """
+    followed, blocked, blocked_by = _hidden_ids(user)
+    rows = (
+        FollowSuggestion.objects.filter(user=user)
+        .exclude(suggested_id__in=followed)
+        .exclude(suggested_id__in=blocked)
+        .exclude(suggested_id__in=blocked_by)
+        .select_related('suggested')
+        .order_by('-score')[:limit]
+    )
+    users = [row.suggested for row in rows]
+    if len(users) >= limit:
+        return users
+
+    graph = current_graph()
+    exclude = [user.id] + [u.id for u in users]
+    fill = CustomUser.objects.exclude(id__in=exclude).exclude(
+        id__in=followed).exclude(id__in=blocked).exclude(id__in=blocked_by)
+    if graph is None:
+        # No snapshot built yet
+        fill = fill.annotate(follower_count=Count('followers')).order_by('-follower_count')[:limit - len(users)]
+        return users + list(fill)
+    popular = graph.popular_ids()
+    by_id = fill.filter(id__in=popular).in_bulk()
+    return users + [by_id[uid] for uid in popular if uid in by_id][:limit - len(users)]
+
+
+def circle_ids(user):
+    """
+    Ids of users ``user`` follows who follow back.
+
+    Candidates are the snapshot's mutuals plus anyone on a follow edge with
+    ``user`` created since the snapshot; all are checked against live rows.
+    """
+    graph = current_graph()
+    if graph is None:
+        following = set(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+        return following & set(Follow.objects.filter(following=user).values_list('follower_id', flat=True))
+
+    candidates = set(graph.mutual_ids(user.id))
+    recent = Follow.objects.filter(Q(follower=user) | Q(following=user), created_at__gte=graph.built_at)
+    for follower_id, following_id in recent.values_list('follower_id', 'following_id'):
+        candidates.add(following_id if follower_id == user.id else follower_id)
+    if not candidates:
+        return set()
+    following = set(Follow.objects.filter(follower=user, following_id__in=candidates).values_list('following_id', flat=True))
+    followers = set(Follow.objects.filter(following=user, follower_id__in=following).values_list('follower_id', flat=True))
+    return following & followers
@@ -0,0 +1,280 @@
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from io import BytesIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from comrade import media
+from Opinions import feed, trending
+from Opinions.models import Opinion, OpinionMedia, TrendingScore
+from Opinions.suggestions import FollowGraph
+
+User = get_user_model()
+
+
+class GravityScoreTests(SimpleTestCase):
+    def test_score_is_independent_of_read_time(self):
+        created = timezone.now()
+        self.assertEqual(
+            trending.gravity_score(10, 2, 1, created),
+            trending.gravity_score(10, 2, 1, created),
+        )
+
+    def test_tenfold_engagement_offsets_decay_window(self):
+        created = timezone.now()
+        older = created - timedelta(seconds=trending.DECAY_SECONDS)
+        self.assertAlmostEqual(
+            trending.gravity_score(100, 0, 0, older),
+            trending.gravity_score(10, 0, 0, created),
+        )
+
+    def test_no_cliff_at_one_day(self):
+        now = timezone.now()
+        before = trending.gravity_score(500, 0, 0, now - timedelta(hours=23, minutes=59))
+        after = trending.gravity_score(500, 0, 0, now - timedelta(hours=24, minutes=1))
+        self.assertLess(before - after, 0.01)
+
+
+class TrendingRecomputeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='poster@test.com', password='testpass123',
+            first_name='Trend', last_name='Poster'
+        )
+
+    def _opinion(self, likes=0, **kwargs):
+        return Opinion.objects.create(user=self.user, content='hello', likes_count=likes, **kwargs)
+
+    def test_only_changed_opinions_are_rescored(self):
+        quiet = self._opinion(likes=1)
+        busy = self._opinion(likes=5)
+        self.assertEqual(trending.recompute()['scored'], 2)
+        self.assertEqual(trending.recompute()['scored'], 0)
+
+        Opinion.objects.filter(pk=busy.pk).update(likes_count=50)
+        self.assertEqual(trending.recompute()['scored'], 1)
+        self.assertEqual(TrendingScore.objects.get(pk=busy.pk).likes_count, 50)
+        self.assertEqual(trending.top_opinion_ids(), [busy.pk, quiet.pk])
+
+    def test_ineligible_opinions_are_removed(self):
+        opinion = self._opinion(likes=3)
+        old = self._opinion(likes=3, created_at=timezone.now() - trending.HORIZON - timedelta(hours=1))
+        trending.recompute()
+        self.assertFalse(TrendingScore.objects.filter(pk=old.pk).exists())
+
+        Opinion.objects.filter(pk=opinion.pk).update(is_deleted=True)
+        self.assertEqual(trending.top_opinion_ids(), [])
+        self.assertEqual(trending.recompute()['removed'], 1)
+
+
+class FollowGraphTests(SimpleTestCase):
+    def setUp(self):
+        # 1 follows 2 and 3; both follow 4, only 3 follows 5; 2 follows 1 back
+        self.graph = FollowGraph.from_edges(
+            follows=[(1, 2), (1, 3), (2, 4), (3, 4), (3, 5), (2, 1)],
+            room_members=[('r1', 1), ('r1', 6)],
+            institution_members=[('i1', 1), ('i1', 5)],
+        )
+
+    def test_candidates_ranked_by_mutuals_and_shared_groups(self):
+        suggestions = self.graph.suggestions(1)
+        self.assertEqual([s.user_id for s in suggestions], [4, 5, 6])
+        four, five, six = suggestions
+        self.assertEqual((four.mutual_count, four.score), (2, 2.0))
+        self.assertEqual((five.mutual_count, five.shared_institutions), (1, 1))
+        self.assertEqual((six.mutual_count, six.shared_rooms), (0, 1))
+
+    def test_followed_users_and_self_are_not_suggested(self):
+        suggested = {s.user_id for s in self.graph.suggestions(2)}
+        self.assertNotIn(2, suggested)
+        self.assertNotIn(4, suggested)
+        self.assertIn(3, suggested)
+
+    def test_mutual_ids_and_popular(self):
+        self.assertEqual(self.graph.mutual_ids(1), [2])
+        self.assertEqual(self.graph.mutual_ids(99), [])
+        self.assertEqual(self.graph.popular_ids(1), [4])
+
+
+def _jpeg(size=(1600, 900), orientation=None):
+    exif = Image.Exif()
+    exif[0x010F] = 'CameraCo'
+    if orientation:
+        exif[0x0112] = orientation
+    buf = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buf, 'JPEG', exif=exif.tobytes())
+    return buf.getvalue()
+
+
+class MediaRenderTests(SimpleTestCase):
+    def test_exif_stripped_after_orientation_applied(self):
+        rendered = media.render(BytesIO(_jpeg(orientation=6)))
+        original = Image.open(BytesIO(rendered.original))
+        self.assertEqual(original.size, (900, 1600))
+        self.assertEqual(dict(original.getexif()), {})
+
+    def test_tiff_metadata_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'CameraCo'
+        exif.get_ifd(0x8825)[2] = (1.0, 17.0, 30.0)
+        buf = BytesIO()
+        Image.new('RGB', (400, 300), (30, 200, 30)).save(buf, 'TIFF', exif=exif.tobytes())
+
+        rendered = media.render(BytesIO(buf.getvalue()))
+        self.assertIsNotNone(rendered.original)
+        original = Image.open(BytesIO(rendered.original))
+        self.assertEqual((original.format, original.size), ('TIFF', (400, 300)))
+        self.assertNotIn(0x010F, original.getexif())
+        self.assertEqual(original.getexif().get_ifd(0x8825), {})
+
+    def test_animated_gif_comment_stripped_keeping_frames(self):
+        frames = [Image.new('RGB', (60, 40), (shade, 0, 0)) for shade in (0, 80, 160)]
+        buf = BytesIO()
+        frames[0].save(buf, 'GIF', save_all=True, append_images=frames[1:], duration=100, loop=0, comment=b'home')
+
+        rendered = media.render(BytesIO(buf.getvalue()))
+        original = Image.open(BytesIO(rendered.original))
+        self.assertEqual(original.n_frames, 3)
+        self.assertNotIn('comment', original.info)
+
+    def test_webp_sizes_never_upscale(self):
+        rendered = media.render(BytesIO(_jpeg(size=(400, 200))))
+        self.assertEqual(sorted(rendered.derivatives), [64, 320])
+        thumb = Image.open(BytesIO(rendered.derivatives[320]))
+        self.assertEqual((thumb.format, thumb.size), ('WEBP', (320, 160)))
+        self.assertTrue(rendered.placeholder.startswith('data:image/webp;base64,'))
+
+
+class MediaDerivativeTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_user(
+            email='media@test.com', password='testpass123',
+            first_name='Media', last_name='Poster'
+        )
+
+    def test_derivatives_stored_on_row_and_served_as_srcset(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            opinion = Opinion.objects.create(user=self.user, content='photo')
+            item = OpinionMedia.objects.create(
+                opinion=opinion, media_type='image',
+                file=SimpleUploadedFile('photo.jpg', _jpeg(), content_type='image/jpeg'),
+            )
+            self.assertEqual(media.srcset(item.file, item.derivatives)['320'], item.file.url)
+
+            media.generate_derivatives('Opinions.OpinionMedia', item.pk)
+            item.refresh_from_db()
+            self.assertEqual(sorted(item.derivatives['widths']), ['1080', '320', '64'])
+            self.assertTrue(item.placeholder.startswith('data:image/webp'))
+            with item.file.open('rb') as f:
+                self.assertEqual(dict(Image.open(f).getexif()), {})
+
+            urls = media.srcset(item.file, item.derivatives)
+            self.assertTrue(urls['320'].endswith('_320.webp'))
+            self.assertEqual(urls['original'], item.file.url)
+
+
+class ListSource(feed.FeedSource):
+    """Feed source over an in-memory list of (timestamp, pk) keys."""
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = sorted(rows, reverse=True)
+
+    def keys(self, after=None, limit=feed.WINDOW_SIZE):
+        return [row for row in self.rows if after is None or row < after][:limit]
+
+    def bulk(self, pks):
+        return {pk: SimpleNamespace(pk=pk) for pk in pks}
+
+    def hydrate(self, objects, request):
+        return [{'source': self.name, 'id': obj.pk} for obj in objects]
+
+    def parse_position(self, value):
+        return datetime.fromisoformat(value[0]), int(value[1])
+
+
+class FeedComposerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        base = datetime(2025, 1, 1, 12, 0)
+        self.a = ListSource('a', [(base + timedelta(minutes=m), pk) for pk, m in enumerate((1, 4, 5, 9), 1)])
+        # Several rows share a timestamp, within b and across a and b
+        self.b = ListSource('b', [(base + timedelta(minutes=m), pk) for pk, m in enumerate((2, 5, 5, 5, 7), 1)])
+        patcher = mock.patch.dict(feed.SOURCES, {'a': self.a, 'b': self.b}, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _expected(self):
+        keys = [(ts, 'a', pk) for ts, pk in self.a.rows] + [(ts, 'b', pk) for ts, pk in self.b.rows]
+        return [(name, pk) for _, name, pk in sorted(keys, key=lambda key: key[0], reverse=True)]
+
+    def _pages(self, limit):
+        seen, cursor = [], None
+        while True:
+            page = feed.compose_feed(None, ['a', 'b'], limit=limit, cursor=cursor)
+            seen.extend((item['source'], item['id']) for item in page['results'])
+            cursor = page['next_cursor']
+            if not page['has_more']:
+                return seen
+
+    def test_page_is_newest_first_across_sources(self):
+        page = feed.compose_feed(None, ['a', 'b'], limit=4)
+        self.assertEqual([(item['source'], item['id']) for item in page['results']],
+                         [('a', 4), ('b', 5), ('a', 3), ('b', 4)])
+        self.assertTrue(page['has_more'])
+
+    def test_tied_timestamps_page_without_duplicates_or_gaps(self):
+        expected = self._expected()
+        for limit in (1, 2, 3, 4):
+            with self.subTest(limit=limit):
+                seen = self._pages(limit)
+                self.assertEqual(len(seen), len(set(seen)))
+                self.assertEqual(sorted(seen), sorted(expected))
+                ts = {('a', pk): t for t, pk in self.a.rows} | {('b', pk): t for t, pk in self.b.rows}
+                self.assertEqual([ts[key] for key in seen], sorted((ts[key] for key in seen), reverse=True))
+
+    def test_malformed_cursor_is_rejected(self):
+        unknown = feed.encode_cursor({'gone': (datetime(2025, 1, 1), 1)})
+        for cursor in ('not-a-cursor', unknown, 'eyJhIjpbIm5vdC1hLWRhdGUiLCIxIl19'):
+            with self.subTest(cursor=cursor), self.assertRaises(feed.InvalidCursor):
+                feed.compose_feed(None, ['a', 'b'], cursor=cursor)
+
+
+class FeedWindowInvalidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='feed@test.com', password='testpass123',
+            first_name='Feed', last_name='Poster'
+        )
+        self.opinion = Opinion.objects.create(user=self.user, content='hello', visibility='public')
+        self.source = feed.SOURCES['opinions']
+        self.key = feed.WINDOW_KEY.format(self.source.name)
+        cache.clear()
+        self.source.window()
+
+    def test_counter_saves_keep_the_window(self):
+        self.opinion.likes_count = 5
+        self.opinion.save(update_fields=['likes_count'])
+        self.assertIsNotNone(cache.get(self.key))
+
+    def test_visibility_change_drops_the_window(self):
+        self.opinion.visibility = 'only_me'
+        self.opinion.save(update_fields=['visibility'])
+        self.assertIsNone(cache.get(self.key))
+
+    def test_create_and_delete_drop_the_window(self):
+        Opinion.objects.create(user=self.user, content='again', visibility='public')
+        self.assertIsNone(cache.get(self.key))
+        self.source.window()
+        self.opinion.delete()
+        self.assertIsNone(cache.get(self.key))
@@ -0,0 +1,103 @@
+"""
+Time-decayed trending scores for opinions.
+
+An opinion's score is
+
+    log10(max(likes + 2*comments + 3*reposts, 1)) + age_offset / DECAY_SECONDS
+
+where age_offset is its creation time in seconds after EPOCH. This is the
+logarithmic form of a gravity decay: an opinion needs ten times the
+engagement of one posted DECAY_SECONDS later to rank level with it, so old
+posts fade smoothly instead of dropping off at a fixed cut-off.
+
+Unlike the power-law form (points / (age + 2)^gravity) the score does not
+depend on the time it is read, so stored scores stay comparable and
+recompute() only has to rescore opinions whose counters changed. The trending
+endpoint is then a top-K read of the score index.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Opinion, TrendingScore
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+DECAY_SECONDS = 45000  # 12.5 hours per tenfold engagement
+HORIZON = timedelta(days=7)  # older opinions are dropped from the table
+COMMENT_WEIGHT = 2
+REPOST_WEIGHT = 3
+BATCH_SIZE = 1000
+
+COUNTERS = ('likes_count', 'comments_count', 'reposts_count')
+
+
+def gravity_score(likes, comments, reposts, created_at):
+    engagement = likes + COMMENT_WEIGHT * comments + REPOST_WEIGHT * reposts
+    return math.log10(max(engagement, 1)) + (created_at - EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def _eligible(now):
+    return Opinion.objects.filter(is_deleted=False, visibility='public', created_at__gte=now - HORIZON)
+
+
+def changed_opinions(now=None):
+    """Eligible opinions with no score yet or whose counters moved since it was computed."""
+    now = now or timezone.now()
+    stale = Q(trending_score__isnull=True)
+    for counter in COUNTERS:
+        stale |= ~Q(**{f'trending_score__{counter}': F(counter)})
+    return _eligible(now).filter(stale)
+
+
+def recompute(now=None, batch_size=BATCH_SIZE):
+    """
+    Rescore changed opinions and drop rows that are no longer eligible.
+
+    Returns ``{'scored': n, 'removed': n}``.
+    """
+    now = now or timezone.now()
+    rows = changed_opinions(now).values_list('pk', 'created_at', *COUNTERS).order_by()
+
+    scored = 0
+    batch = []
+    for pk, created_at, likes, comments, reposts in rows.iterator(chunk_size=batch_size):
+        batch.append(TrendingScore(
+            opinion_id=pk,
+            score=gravity_score(likes, comments, reposts, created_at),
+            likes_count=likes,
+            comments_count=comments,
+            reposts_count=reposts,
+            computed_at=now,
+        ))
+        if len(batch) >= batch_size:
+            scored += _upsert(batch)
+            batch = []
+    if batch:
+        scored += _upsert(batch)
+
+    removed, _ = TrendingScore.objects.filter(
+        Q(opinion__is_deleted=True) | ~Q(opinion__visibility='public') | Q(opinion__created_at__lt=now - HORIZON)
+    ).delete()
+    return {'scored': scored, 'removed': removed}
+
+
+def _upsert(batch):
+    TrendingScore.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['opinion'],
+        update_fields=['score', *COUNTERS, 'computed_at'],
+    )
+    return len(batch)
+
+
+def top_opinion_ids(limit=50):
+    """Highest scored visible opinion ids, best first (an index scan on score)."""
+    return list(
+        TrendingScore.objects.filter(opinion__is_deleted=False, opinion__visibility='public')
+        .order_by('-score')
+        .values_list('opinion_id', flat=True)[:limit]
+    )
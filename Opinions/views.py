@@ -324,13 +324,21 @@ class OpinionViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def trending(self, request):
-        """Get trending opinions (most engagement in last 24h)"""
-        yesterday = timezone.now() - timedelta(days=1)
-        queryset = Opinion.objects.filter(
-            is_deleted=False,
-            visibility='public',
-            created_at__gte=yesterday
-        ).order_by('-likes_count', '-comments_count', '-reposts_count')[:50]
+        """Get trending opinions (top time-decayed scores, see Opinions/trending.py)"""
+        from .trending import top_opinion_ids
+        
+        ids = top_opinion_ids(limit=50)
+        if ids:
+            rows = Opinion.objects.select_related('user', 'reposted_by').prefetch_related('media_files').in_bulk(ids)
+            queryset = [rows[pk] for pk in ids if pk in rows]
+        else:
+            # recompute_trending has not run yet: rank the last day by raw engagement
+            yesterday = timezone.now() - timedelta(days=1)
+            queryset = Opinion.objects.filter(
+                is_deleted=False,
+                visibility='public',
+                created_at__gte=yesterday
+            ).order_by('-likes_count', '-comments_count', '-reposts_count')[:50]
         
         serializer = OpinionSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
@@ -731,34 +739,18 @@ class FollowViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['get'])
     def suggestions(self, request):
-        """Get suggested users to follow"""
-        following_ids = list(request.user.following.values_list('following_id', flat=True))
-        following_ids.append(request.user.id)
-        blocked_ids = list(ContentBlock.objects.filter(
-            Q(user=request.user) | Q(blocked_user=request.user)
-        ).values_list('blocked_user_id', 'user_id'))
-        blocked_ids = [item for sublist in blocked_ids for item in sublist]
-        
-        suggestions = CustomUser.objects.exclude(
-            id__in=following_ids + blocked_ids
-        ).annotate(
-            follower_count=Count('followers')
-        ).order_by('-follower_count')[:20]
+        """Get suggested users to follow (friends of friends, see Opinions/suggestions.py)"""
+        from .suggestions import suggested_users
         
-        serializer = UserFollowSerializer(suggestions, many=True, context={'request': request})
+        serializer = UserFollowSerializer(suggested_users(request.user, limit=20), many=True, context={'request': request})
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def circles(self, request):
         """Get circles - mutual followers (users who follow you and you follow them)"""
-        # Get users I'm following
-        following_ids = set(request.user.following.values_list('following_id', flat=True))
-        # Get users following me
-        followers_ids = set(request.user.followers.values_list('follower_id', flat=True))
-        # Intersection = mutual followers (circles)
-        circle_ids = following_ids & followers_ids
+        from .suggestions import circle_ids
         
-        circles = CustomUser.objects.filter(id__in=circle_ids)
+        circles = CustomUser.objects.filter(id__in=circle_ids(request.user)).select_related('user_profile')
         
         results = []
         for u in circles:
@@ -797,141 +789,40 @@ class BookmarkViewSet(viewsets.ReadOnlyModelViewSet):
 
 class UnifiedFeedView(APIView):
     """
-    Unified feed combining opinions, research, articles, announcements, products
+    Unified feed combining opinions, research, announcements, products.
+
+    Pages are k-way merged from per-source cached key windows (see
+    Opinions/feed.py); pass ``next_cursor`` back as ``cursor`` for the next page.
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
     def get(self, request):
-        feed_type = request.query_params.get('type', 'all')  # all, opinions, research, announcements, products
-        limit = int(request.query_params.get('limit', 20))
-        
-        feed_items = []
+        from .feed import SOURCES, InvalidCursor, compose_feed
         
-        # Get opinions
-        if feed_type in ['all', 'opinions']:
-            opinions = self._get_opinions(request, limit if feed_type == 'opinions' else limit // 3)
-            feed_items.extend(opinions)
-        
-        # Get research
-        if feed_type in ['all', 'research']:
-            research = self._get_research(request, limit if feed_type == 'research' else limit // 4)
-            feed_items.extend(research)
-        
-        # Get announcements
-        if feed_type in ['all', 'announcements']:
-            announcements = self._get_announcements(request, limit if feed_type == 'announcements' else limit // 4)
-            feed_items.extend(announcements)
+        feed_type = request.query_params.get('type', 'all')  # all, opinions, research, announcements, products
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response({'detail': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get products
-        if feed_type in ['all', 'products']:
-            products = self._get_products(request, limit if feed_type == 'products' else limit // 4)
-            feed_items.extend(products)
+        if feed_type == 'all':
+            sources = list(SOURCES)
+        elif feed_type in SOURCES:
+            sources = [feed_type]
+        else:
+            return Response({'detail': f'Unknown feed type: {feed_type}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Sort by date
-        feed_items.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        try:
+            page = compose_feed(request, sources, limit=limit, cursor=request.query_params.get('cursor'))
+        except InvalidCursor:
+            return Response({'detail': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
-            'results': feed_items[:limit],
-            'count': len(feed_items)
+            'results': page['results'],
+            'count': len(page['results']),
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more'],
         })
-    
-    def _get_opinions(self, request, limit):
-        from .serializers import OpinionSerializer
-        
-        queryset = Opinion.objects.filter(
-            is_deleted=False,
-            visibility='public'
-        ).select_related('user', 'reposted_by').prefetch_related('media_files').order_by('-created_at')[:limit]
-        
-        serializer = OpinionSerializer(queryset, many=True, context={'request': request})
-        items = serializer.data
-        
-        for item in items:
-            item['content_type'] = 'opinion'
-            item['category_label'] = 'Opinion'
-            item['category_color'] = 'blue'
-        
-        return items
-    
-    def _get_research(self, request, limit):
-        try:
-            from Research.models import ResearchProject
-            
-            research = ResearchProject.objects.filter(
-                is_published=True
-            ).select_related('principal_investigator').order_by('-published_at')[:limit]
-            
-            items = []
-            for r in research:
-                items.append({
-                    'id': str(r.id),
-                    'content_type': 'research',
-                    'category_label': 'Research',
-                    'category_color': 'purple',
-                    'title': r.title,
-                    'content': r.abstract[:300] + '...' if len(r.abstract) > 300 else r.abstract,
-                    'creator': {
-                        'id': r.principal_investigator.id,
-                        'name': f'{r.principal_investigator.first_name} {r.principal_investigator.last_name}',
-                    },
-                    'created_at': r.published_at.isoformat() if r.published_at else r.created_at.isoformat(),
-                    'views_count': r.views,
-                    'action_url': f'/research/{r.id}'
-                })
-            return items
-        except Exception:
-            return []
-    
-    def _get_announcements(self, request, limit):
-        try:
-            from Announcements.models import Announcements
-            
-            announcements = Announcements.objects.all().order_by('-time_stamp')[:limit]
-            
-            items = []
-            for a in announcements:
-                items.append({
-                    'id': a.id,
-                    'content_type': 'announcement',
-                    'category_label': 'Announcement',
-                    'category_color': 'yellow',
-                    'title': a.heading,
-                    'content': a.content[:300] + '...' if len(a.content) > 300 else a.content,
-                    'created_at': a.time_stamp.isoformat() if a.time_stamp else '',
-                    'action_url': f'/announcements/{a.id}'
-                })
-            return items
-        except Exception as e:
-            import traceback; traceback.print_exc()
-            return []
-    
-    def _get_products(self, request, limit):
-        try:
-            from Payment.models import Product
-            
-            products = Product.objects.all().order_by('-created_at')[:limit]
-            
-            items = []
-            for p in products:
-                items.append({
-                    'id': str(p.id),
-                    'content_type': 'product',
-                    'category_label': p.get_product_type_display() if hasattr(p, 'get_product_type_display') else (p.product_type or 'Product'),
-                    'product_type': p.product_type or 'physical',
-                    'category_color': 'green',
-                    'title': p.name,
-                    'content': p.description[:200] + '...' if len(p.description) > 200 else p.description,
-                    'price': str(p.price),
-                    'image_url': p.image_url or '',
-                    'stock_quantity': p.stock_quantity,
-                    'is_available': p.stock_quantity > 0 if p.product_type == 'physical' else True,
-                    'created_at': p.created_at.isoformat() if p.created_at else '',
-                    'action_url': f'/shop/item/{p.id}',
-                })
-            return items
-        except Exception as e:
-            import traceback; traceback.print_exc()
-            return []
 
 
 class NewContentCheckView(APIView):
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class OrganisationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Organisation'
+
+    def ready(self):
+        from Organisation.hierarchy import organisation_hierarchy
+        organisation_hierarchy.connect()
@@ -0,0 +1,21 @@
+"""
+Organisation hierarchy document (see comrade/hierarchy.py).
+Sections match the keys OrganisationViewSet.hierarchy has always returned.
+"""
+from comrade.hierarchy import Hierarchy, Section
+from Organisation.models import Board, Centre, Committee, Division, Institute, OrgBranch, Program, Project
+from Organisation.serializers import (
+    BoardSerializer, CentreSerializer, CommitteeSerializer, DivisionSerializer, InstituteSerializer,
+    OrgBranchSerializer, ProgramSerializer, ProjectSerializer,
+)
+
+organisation_hierarchy = Hierarchy('organisation', 'organisation', {
+    'branches': Section(OrgBranch, OrgBranchSerializer, {}),
+    'divisions': Section(Division, DivisionSerializer, {}),
+    'committees': Section(Committee, CommitteeSerializer, {}),
+    'boards': Section(Board, BoardSerializer, {}),
+    'projects': Section(Project, ProjectSerializer, {}),
+    'programs': Section(Program, ProgramSerializer, {}),
+    'centres': Section(Centre, CentreSerializer, {}),
+    'institutes': Section(Institute, InstituteSerializer, {}),
+})
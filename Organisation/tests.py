@@ -1,3 +1,34 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from Organisation.hierarchy import organisation_hierarchy
+from Organisation.models import Division, Organisation
+
+
+class OrganisationHierarchyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organisation = Organisation.objects.create(name='Acme')
+        self.url = f'/api/organizations/organisation/{self.organisation.pk}/hierarchy/'
+
+    def test_unchanged_hierarchy_answers_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['divisions'], [])
+
+        etag = response['ETag']
+        with self.assertNumQueries(1):  # the organisation lookup only
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unit_save_invalidates_document(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Division.objects.create(organisation=self.organisation, name='Research', div_code='RD-1')
+        self.assertNotEqual(organisation_hierarchy.etag(self.organisation.pk), etag)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([d['name'] for d in response.data['divisions']], ['Research'])
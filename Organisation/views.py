@@ -6,6 +6,7 @@ from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAuthenticated
 from Organisation.serializers import OrganisationSerializer, OrgBranchSerializer, DivisionSerializer, DepartmentSerializer, SectionSerializer, TeamSerializer, ProjectSerializer, CentreSerializer, CommitteeSerializer, BoardSerializer, UnitSerializer, InstituteSerializer, ProgramSerializer, OtherOrgUnitSerializer, OrganisationMemberSerializer
+from Organisation.hierarchy import organisation_hierarchy
 
 
 # Create your views here.
@@ -57,19 +58,9 @@ class OrganisationViewSet(ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def hierarchy(self, request, pk=None):
-        """Get full hierarchy of the organisation"""
+        """Get full hierarchy of the organisation (cached per version, ETag/304)"""
         organisation = self.get_object()
-        hierarchy = {
-            'branches': OrgBranchSerializer(OrgBranch.objects.filter(organisation=organisation), many=True).data,
-            'divisions': DivisionSerializer(Division.objects.filter(organisation=organisation), many=True).data,
-            'committees': CommitteeSerializer(Committee.objects.filter(organisation=organisation), many=True).data,
-            'boards': BoardSerializer(Board.objects.filter(organisation=organisation), many=True).data,
-            'projects': ProjectSerializer(Project.objects.filter(organisation=organisation), many=True).data,
-            'programs': ProgramSerializer(Program.objects.filter(organisation=organisation), many=True).data,
-            'centres': CentreSerializer(Centre.objects.filter(organisation=organisation), many=True).data,
-            'institutes': InstituteSerializer(Institute.objects.filter(organisation=organisation), many=True).data,
-        }
-        return Response(hierarchy)
+        return organisation_hierarchy.respond(request, organisation.pk)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def set_portal_password(self, request, pk=None):
@@ -0,0 +1,137 @@
+"""
+Page-level aggregates for Payment serializers.
+
+List endpoints used to run each computed field's COUNT/SUM once per row.
+Serializers using AggregatedFieldsMixin declare ``aggregate_specs``: named
+callables that take every instance being serialized and return
+``{pk: value}`` from a single grouped query. When the serializer runs with
+``many=True``, AggregatingListSerializer hands it the whole page up front,
+and each ``get_*`` method becomes a dict lookup. A spec is computed on
+first use only, so fields a response never reads cost nothing.
+
+A serializer used for a single object builds a one-object provider, which
+still runs each relation's query once per response (no repeated aggregates).
+"""
+
+from datetime import timedelta
+
+from django.db import models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from rest_framework import serializers
+
+
+class AggregateProvider:
+    """Lazily computed ``{name: {pk: value}}`` for a set of instances."""
+
+    def __init__(self, instances, specs, context):
+        self.instances = list(instances)
+        self.pks = {obj.pk for obj in self.instances}
+        self.specs = specs
+        self.context = context
+        self._values = {}
+
+    def covers(self, obj):
+        return obj.pk in self.pks
+
+    def value(self, name, obj, default=0):
+        if name not in self._values:
+            self._values[name] = self.specs[name](self.instances, self.context) if self.instances else {}
+        return self._values[name].get(obj.pk, default)
+
+
+class AggregatingListSerializer(serializers.ListSerializer):
+    """ListSerializer that primes the child's aggregates with the whole page."""
+
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.prime_aggregates(instances)
+        return super().to_representation(instances)
+
+
+class AggregatedFieldsMixin:
+    """
+    Serializer mixin reading computed fields from an AggregateProvider kept
+    in the serializer context. Set ``list_serializer_class =
+    AggregatingListSerializer`` in Meta so list responses share one provider.
+    """
+    aggregate_specs = {}
+
+    def _providers(self):
+        return self.context.setdefault('aggregates', {})
+
+    def prime_aggregates(self, instances):
+        self._providers()[type(self)] = AggregateProvider(instances, self.aggregate_specs, self.context)
+
+    def aggregate(self, name, obj, default=0):
+        provider = self._providers().get(type(self))
+        if provider is None or not provider.covers(obj):
+            self.prime_aggregates([obj])
+            provider = self._providers()[type(self)]
+        return provider.value(name, obj, default)
+
+
+# ── Spec builders ─────────────────────────────────────────────────────────
+
+def count_by(model, fk, **filters):
+    """Rows of ``model`` per ``fk`` value (one GROUP BY query)."""
+    def spec(instances, context):
+        rows = (model.objects.filter(**{f'{fk}__in': [obj.pk for obj in instances]}, **filters)
+                .order_by().values(fk).annotate(n=Count('pk')))
+        return {row[fk]: row['n'] for row in rows}
+    return spec
+
+
+def sum_by(model, fk, field):
+    """SUM(``field``) of ``model`` per ``fk`` value (one GROUP BY query)."""
+    def spec(instances, context):
+        rows = (model.objects.filter(**{f'{fk}__in': [obj.pk for obj in instances]})
+                .order_by().values(fk).annotate(total=Sum(field)))
+        return {row[fk]: row['total'] or 0 for row in rows}
+    return spec
+
+
+def m2m_count(descriptor):
+    """Size of a many-to-many relation per instance, from its through table."""
+    def spec(instances, context):
+        # Resolved on first use: the through model may not exist at import time
+        return count_by(descriptor.through, descriptor.field.m2m_field_name())(instances, context)
+    return spec
+
+
+def related_count(fk_attr, model, fk):
+    """
+    Rows of ``model`` per instance's ``fk_attr`` (e.g. members of each
+    request's group), queried once for all distinct targets.
+    """
+    def spec(instances, context):
+        targets = {getattr(obj, fk_attr) for obj in instances}
+        targets.discard(None)
+        if not targets:
+            return {}
+        rows = (model.objects.filter(**{f'{fk}__in': targets})
+                .order_by().values(fk).annotate(n=Count('pk')))
+        counts = {row[fk]: row['n'] for row in rows}
+        return {obj.pk: counts.get(getattr(obj, fk_attr), 0) for obj in instances}
+    return spec
+
+
+def monthly_sums(model, fk, date_field, amount_field, days=210):
+    """
+    ``[{'month': date, 'total': Decimal}, ...]`` per instance over the last
+    ``days`` days, grouped by (``fk``, month) in one query.
+    """
+    def spec(instances, context):
+        start = timezone.now() - timedelta(days=days)
+        rows = (model.objects.filter(**{f'{fk}__in': [obj.pk for obj in instances],
+                                        f'{date_field}__gte': start})
+                .annotate(month=TruncMonth(date_field))
+                .order_by().values(fk, 'month')
+                .annotate(total=Sum(amount_field))
+                .order_by(fk, 'month'))
+        result = {}
+        for row in rows:
+            result.setdefault(row[fk], []).append({'month': row['month'], 'total': row['total']})
+        return result
+    return spec
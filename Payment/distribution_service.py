@@ -0,0 +1,99 @@
+"""
+Django service layer for the pricing Distribution Engine.
+
+Computes how each checkout line's price is split between supplier, platform
+and user discount:
+- compute_item_distributions(): batched splits for a cart
+- summarize_distributions(): order-level totals for API responses
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+from Payment.services.orders import line_quantity
+
+TIER_TO_IDX = {'free': 0, 'standard': 1, 'premium': 2, 'gold': 3}
+
+# Prices are mapped onto the model's 0-100 cost scale relative to this
+# reference; anything above it falls outside the lookup table.
+PRICE_REFERENCE = 10000.0
+
+CENT = Decimal('0.01')
+
+
+def _get_distribution_engine():
+    """Lazy-load the distribution engine to avoid import overhead at module level."""
+    from ML.inference.distribution_engine import get_distribution_engine
+    return get_distribution_engine()
+
+
+def _is_digital(item, product=None):
+    if product is not None:
+        return product.product_type in ('digital', 'subscription')
+    return item.get('type') in ('digital', 'subscription', 'resource', 'specialization')
+
+
+def compute_item_distributions(payment_profile, items, group_size=0, products=None):
+    """
+    Split every cart line in one vectorized engine call.
+
+    Args:
+        payment_profile: buyer PaymentProfile (tier drives the discount band)
+        items: checkout item dicts with 'price' and 'qty'/'quantity'
+        group_size: 0 for individual checkout, member count for group checkout
+        products: optional {item index: Product} for product_type lookups
+
+    Returns:
+        list of dicts (one per item) with fractions and amounts
+
+    Raises:
+        OrderError: an item's quantity is not a whole number >= 1
+    """
+    if not items:
+        return []
+    products = products or {}
+    tier = TIER_TO_IDX.get(getattr(payment_profile, 'tier', 'free'), 0)
+    buy_mode = 1 if group_size else 0
+
+    line_totals = []
+    rows = []
+    for i, item in enumerate(items):
+        qty = line_quantity(item)
+        total = Decimal(str(item.get('price', 0) or 0)) * qty
+        line_totals.append(total)
+        rows.append([
+            float(total) / PRICE_REFERENCE * 100.0,
+            tier,
+            buy_mode,
+            group_size if buy_mode else 0,
+            1 if _is_digital(item, products.get(i)) else 0,
+        ])
+
+    engine = _get_distribution_engine()
+    splits = engine.split_batch(np.array(rows, dtype=np.float32))
+
+    results = []
+    for total, (supplier, platform, discount) in zip(line_totals, splits):
+        platform_amount = (total * Decimal(str(float(platform)))).quantize(CENT, rounding=ROUND_HALF_UP)
+        discount_amount = (total * Decimal(str(float(discount)))).quantize(CENT, rounding=ROUND_HALF_UP)
+        results.append({
+            'supplier_gain': round(float(supplier), 4),
+            'platform_fee': round(float(platform), 4),
+            'user_discount': round(float(discount), 4),
+            'supplier_amount': str(total - platform_amount - discount_amount),
+            'platform_amount': str(platform_amount),
+            'discount_amount': str(discount_amount),
+            'model_version': engine.model_version,
+            'is_fallback': not engine.is_available,
+        })
+    return results
+
+
+def summarize_distributions(distributions):
+    """Order-level totals of per-item distributions."""
+    totals = {'supplier_amount': Decimal('0'), 'platform_amount': Decimal('0'), 'discount_amount': Decimal('0')}
+    for dist in distributions:
+        for key in totals:
+            totals[key] += Decimal(dist[key])
+    return {key: str(value) for key, value in totals.items()}
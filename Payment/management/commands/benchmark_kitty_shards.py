@@ -0,0 +1,143 @@
+"""
+benchmark_kitty_shards – Throughput of concurrent contributions into one hot kitty, 1 vs N shards.
+For every shard count, creates throwaway wallets (one per thread) and a kitty,
+then runs worker threads that each post ledger transfers from their wallet
+into the kitty. The wallets never contend, so the kitty's balance rows are
+the only shared hot spot: one row with KITTY_SHARDS=1, N rows otherwise.
+Ends with a compaction and checks the folded balance equals what was paid in.
+SQLite locks the whole database on write, so the difference only shows on
+Postgres/MySQL.
+Usage: python manage.py benchmark_kitty_shards --threads 16 --contributions 50 --shards 1 16
+"""
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+from django.utils import timezone
+
+from Authentication.models import CustomUser
+from Payment.models import KittyShard, LedgerEntry, LedgerTransfer, PaymentGroups
+from Payment.services import kitty, ledger
+from Payment.utils import get_or_create_payment_profile
+
+CONTRIBUTION = Decimal('1.00')
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks concurrent ledger contributions into a kitty with 1 vs N balance shards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--contributions', type=int, default=50, help='Contributions per thread')
+        parser.add_argument('--shards', type=int, nargs='+', default=[1, 16])
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark rows')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        self.stdout.write(f"backend: {connection.vendor}")
+        configured = kitty.SHARDS
+        throughputs = {}
+        try:
+            for shards in options['shards']:
+                # ledger credits kitties through kitty.credit(), which picks from SHARDS
+                kitty.SHARDS = shards
+                throughputs[shards] = self._run(f'{tag}-{shards}', shards, options)
+        finally:
+            kitty.SHARDS = configured
+            if not options['keep']:
+                self._cleanup(tag)
+
+        if len(throughputs) > 1:
+            base, *rest = throughputs
+            for shards in rest:
+                self.stdout.write(
+                    f"{shards} vs {base} shard(s): {throughputs[shards] / throughputs[base]:.2f}x throughput"
+                )
+
+    def _run(self, tag, shards, options):
+        profiles = self._create_wallets(tag, options['threads'], options['contributions'] * CONTRIBUTION)
+        group = PaymentGroups.objects.create(
+            name=f'Kitty benchmark ({shards} shards)', creator=profiles[0], group_type='kitty',
+            max_capacity=options['threads'], auto_create_room=False,
+            expiry_date=timezone.now() + timedelta(days=1),
+        )
+        destination = ledger.group(group)
+
+        retries = [0]
+        errors = []
+        lock = threading.Lock()
+
+        def worker(payment_profile):
+            source = ledger.wallet(payment_profile)
+            try:
+                for _ in range(options['contributions']):
+                    while True:
+                        try:
+                            ledger.post_transfer(source, destination, CONTRIBUTION, transfer_type='contribution')
+                            break
+                        except OperationalError:
+                            # SQLite serialises writers; row-locking databases only block per shard
+                            with lock:
+                                retries[0] += 1
+                            time.sleep(0.001)
+            except Exception as exc:  # surfaced after the run
+                errors.append(exc)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(p,)) for p in profiles]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        total = options['threads'] * options['contributions']
+        credited = ledger.account_balance_from_entries(destination)
+        kitty.compact([group.pk])
+        group.refresh_from_db(fields=['current_amount'])
+        unfolded = KittyShard.objects.filter(payment_group=group).exclude(amount=0).exists()
+        throughput = total / elapsed
+
+        self.stdout.write(
+            f"{shards:>3} shard(s): {total} contributions from {len(profiles)} wallets in {elapsed:.2f}s  "
+            f"throughput: {throughput:.0f} transfers/s  lock retries: {retries[0]}"
+        )
+        self.stdout.write(
+            f"    credited: {credited}  folded balance: {group.current_amount}  "
+            f"balance exact: {group.current_amount == credited == total * CONTRIBUTION and not unfolded}"
+        )
+        if errors:
+            self.stdout.write(self.style.ERROR(f"{len(errors)} worker errors, first: {errors[0]!r}"))
+        return throughput
+
+    def _create_wallets(self, tag, count, balance):
+        profiles = []
+        for i in range(count):
+            user = CustomUser.objects.create_user(
+                email=f'kitty-bench-{tag}-{i}@example.invalid', password=None,
+                first_name='Kitty', last_name=f'Bench {i}',
+            )
+            payment_profile = get_or_create_payment_profile(user)
+            payment_profile.comrade_balance = balance
+            payment_profile.save(update_fields=['comrade_balance'])
+            profiles.append(payment_profile)
+        return profiles
+
+    def _cleanup(self, tag):
+        groups = list(PaymentGroups.objects.filter(
+            creator__user__user__email__startswith=f'kitty-bench-{tag}-'
+        ).values_list('pk', flat=True))
+        transfer_ids = list(LedgerEntry.objects.filter(
+            account_type='group', account_id__in=[str(pk) for pk in groups]
+        ).values_list('transfer_id', flat=True).distinct())
+        LedgerEntry.objects.filter(transfer_id__in=transfer_ids).delete()
+        LedgerTransfer.objects.filter(id__in=transfer_ids).delete()
+        PaymentGroups.objects.filter(pk__in=groups).delete()
+        CustomUser.objects.filter(email__startswith=f'kitty-bench-{tag}-').delete()
@@ -0,0 +1,107 @@
+"""
+benchmark_ledger – Throughput of concurrent ledger transfers between hot accounts.
+Creates throwaway wallets, then runs worker threads that move money back and
+forth between a small set of accounts (worst case for row-lock contention).
+Usage: python manage.py benchmark_ledger --threads 8 --transfers 200 --accounts 4
+"""
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+
+from Authentication.models import CustomUser
+from Payment.models import LedgerEntry, LedgerTransfer, PaymentProfile
+from Payment.services import ledger
+from Payment.utils import get_or_create_payment_profile
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks concurrent ledger transfers between hot accounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--transfers', type=int, default=200, help='Transfers per thread')
+        parser.add_argument('--accounts', type=int, default=4)
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark rows')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        profiles = self._create_wallets(tag, options['accounts'])
+        accounts = [ledger.wallet(p) for p in profiles]
+        start_total = sum(p.comrade_balance for p in profiles)
+
+        retries = [0]
+        errors = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                for _ in range(options['transfers']):
+                    source, destination = rng.sample(accounts, 2)
+                    amount = Decimal(rng.randint(1, 500)) / 100
+                    while True:
+                        try:
+                            ledger.post_transfer(source, destination, amount, allow_overdraft=True)
+                            break
+                        except OperationalError:
+                            # SQLite serialises writers; Postgres only blocks on the row locks
+                            with lock:
+                                retries[0] += 1
+                            time.sleep(0.001)
+            except Exception as exc:  # surfaced after the run
+                errors.append(exc)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        total = options['threads'] * options['transfers']
+        end_total = sum(PaymentProfile.objects.filter(pk__in=[p.pk for p in profiles])
+                        .values_list('comrade_balance', flat=True))
+        journal_ok = all(
+            ledger.account_balance_from_entries(a) == PaymentProfile.objects.get(pk=a.account_id).comrade_balance - Decimal('1000.00')
+            for a in accounts
+        )
+
+        self.stdout.write(f"backend: {connection.vendor}")
+        self.stdout.write(f"transfers: {total} across {len(accounts)} hot accounts, {options['threads']} threads")
+        self.stdout.write(f"elapsed: {elapsed:.2f}s  throughput: {total / elapsed:.0f} transfers/s  lock retries: {retries[0]}")
+        self.stdout.write(f"balance conserved: {start_total == end_total}  journal matches balances: {journal_ok}")
+        if errors:
+            self.stdout.write(self.style.ERROR(f"{len(errors)} worker errors, first: {errors[0]!r}"))
+
+        if not options['keep']:
+            self._cleanup(tag, accounts)
+
+    def _create_wallets(self, tag, count):
+        profiles = []
+        for i in range(count):
+            user = CustomUser.objects.create_user(
+                email=f'ledger-bench-{tag}-{i}@example.invalid', password=None,
+                first_name='Ledger', last_name=f'Bench {i}',
+            )
+            payment_profile = get_or_create_payment_profile(user)
+            payment_profile.comrade_balance = Decimal('1000.00')
+            payment_profile.save(update_fields=['comrade_balance'])
+            profiles.append(payment_profile)
+        return profiles
+
+    def _cleanup(self, tag, accounts):
+        transfer_ids = list(LedgerEntry.objects.filter(
+            account_type='wallet', account_id__in=[a.account_id for a in accounts]
+        ).values_list('transfer_id', flat=True).distinct())
+        LedgerEntry.objects.filter(transfer_id__in=transfer_ids).delete()
+        LedgerTransfer.objects.filter(id__in=transfer_ids).delete()
+        CustomUser.objects.filter(email__startswith=f'ledger-bench-{tag}-').delete()
@@ -0,0 +1,19 @@
+"""
+compact_kitties – Fold kitty shards back into PaymentGroups.current_amount.
+Each kitty is locked and folded in its own short transaction, so running
+this next to live contributions only briefly blocks one kitty at a time.
+Run it periodically (e.g. every minute from cron) next to run_standing_orders.
+Usage: python manage.py compact_kitties
+"""
+from django.core.management.base import BaseCommand
+
+from Payment.services import kitty
+
+
+class Command(BaseCommand):
+    help = 'Folds sharded kitty credits into the group balances'
+
+    def handle(self, *args, **kwargs):
+        folded = kitty.compact()
+        total = sum(folded.values())
+        self.stdout.write(self.style.SUCCESS(f"Compacted {len(folded)} kitties ({total} folded)."))
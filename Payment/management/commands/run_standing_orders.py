@@ -0,0 +1,75 @@
+"""
+run_standing_orders – Settle due group standing orders through the ledger.
+Due orders are grouped per kitty and each kitty is settled in one batch
+(one lock pass, one UPDATE per account, bulk-created entries). Each
+settlement and the date advance of its orders commit together, so a failed
+run never debits the same members twice.
+Usage: python manage.py run_standing_orders
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from Payment.models import StandingOrder
+from Payment.services import ledger
+
+FREQUENCY_DELTAS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'biweekly': timedelta(weeks=2),
+    'monthly': timedelta(days=30),
+}
+
+
+class Command(BaseCommand):
+    help = 'Settles due standing orders into their group kitties'
+
+    def handle(self, *args, **kwargs):
+        now = timezone.now()
+        due = (
+            StandingOrder.objects.filter(is_active=True, next_contribution_date__lte=now)
+            .select_related('member__payment_group', 'member__payment_profile')
+            .order_by('member__payment_group_id', 'pk')
+        )
+        by_group = defaultdict(list)
+        for order in due:
+            by_group[order.member.payment_group_id].append(order)
+
+        settled = failed = 0
+        for orders in by_group.values():
+            payment_group = orders[0].member.payment_group
+            try:
+                with transaction.atomic():
+                    ledger.settle_group_contributions(
+                        payment_group,
+                        [(order.member, order.amount) for order in orders],
+                        notes='Standing order',
+                    )
+                    self._advance(orders)
+            except ledger.InsufficientFunds:
+                # One short wallet should not block the rest of the kitty
+                orders, short = self._settle_individually(payment_group, orders)
+                failed += short
+            settled += len(orders)
+
+        self.stdout.write(self.style.SUCCESS(f"Settled {settled} standing orders ({failed} skipped)."))
+
+    def _advance(self, orders):
+        for order in orders:
+            order.next_contribution_date += FREQUENCY_DELTAS.get(order.frequency, timedelta(days=30))
+        StandingOrder.objects.bulk_update(orders, ['next_contribution_date'])
+
+    def _settle_individually(self, payment_group, orders):
+        ok = []
+        for order in orders:
+            try:
+                with transaction.atomic():
+                    ledger.settle_group_contributions(payment_group, [(order.member, order.amount)], notes='Standing order')
+                    self._advance([order])
+                ok.append(order)
+            except ledger.InsufficientFunds:
+                self.stdout.write(self.style.WARNING(f"Standing order {order.pk}: insufficient balance"))
+        return ok, len(orders) - len(ok)
@@ -0,0 +1,15 @@
+from Payment.utils import payment_profile_scope
+
+
+class PaymentProfileScopeMiddleware:
+    """
+    Opens a per-request memo for get_or_create_payment_profile so the
+    CustomUser -> Profile -> PaymentProfile chain is resolved once per request,
+    however many views, serializers and helpers ask for it.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with payment_profile_scope():
+            return self.get_response(request)
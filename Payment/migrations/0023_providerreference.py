@@ -0,0 +1,101 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Payment", "0022_billprovider_insuranceproduct_loanproduct_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProviderReference",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "provider",
+                    models.CharField(
+                        choices=[("mpesa", "M-Pesa"), ("stripe", "Stripe"), ("paypal", "PayPal"), ("equity", "Equity Bank")],
+                        max_length=20,
+                    ),
+                ),
+                ("external_id", models.CharField(max_length=255)),
+                (
+                    "purpose",
+                    models.CharField(
+                        choices=[
+                            ("deposit", "Wallet Deposit"),
+                            ("purchase", "Purchase"),
+                            ("withdrawal", "Withdrawal"),
+                            ("contribution", "Group Contribution"),
+                        ],
+                        default="deposit",
+                        max_length=20,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                            ("refunded", "Refunded"),
+                            ("cancelled", "Cancelled"),
+                            ("in_review", "In Review"),
+                            ("verified", "Verified"),
+                            ("declined", "Declined"),
+                            ("authorized", "Authorized"),
+                            ("settled", "Settled"),
+                            ("reversed", "Reversed"),
+                            ("expired", "Expired"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("result_payload", models.JSONField(blank=True, default=dict)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "payment_group",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="provider_references",
+                        to="Payment.paymentgroups",
+                    ),
+                ),
+                (
+                    "payment_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="provider_references",
+                        to="Payment.paymentprofile",
+                    ),
+                ),
+                (
+                    "transaction_token",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="provider_references",
+                        to="Payment.transactiontoken",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["payment_profile", "-created_at"], name="payment_provref_profile_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(fields=("provider", "external_id"), name="unique_provider_external_id")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from Payment.utils import backfill_payment_profiles
+
+
+def backfill(apps, schema_editor):
+    backfill_payment_profiles(
+        apps.get_model('Authentication', 'CustomUser'),
+        apps.get_model('Authentication', 'Profile'),
+        apps.get_model('Payment', 'PaymentProfile'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Authentication", "0012_customuser_search_text"),
+        ("Payment", "0023_providerreference"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Payment", "0024_backfill_payment_profiles"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerTransfer",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                (
+                    "transfer_type",
+                    models.CharField(
+                        choices=[
+                            ("purchase", "Purchase"),
+                            ("refund", "Refund"),
+                            ("withdrawal", "Withdrawal"),
+                            ("deposit", "Deposit"),
+                            ("transfer", "Transfer"),
+                            ("bid", "Bid"),
+                            ("donation", "Donation"),
+                            ("subscription", "Subscription"),
+                            ("fee", "Fee"),
+                            ("contribution", "Contribution"),
+                            ("other", "Other"),
+                        ],
+                        default="transfer",
+                        max_length=200,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("description", models.TextField(blank=True)),
+                ("idempotency_key", models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "transaction_token",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="ledger_transfers",
+                        to="Payment.transactiontoken",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["-created_at"], name="payment_ledger_created_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "account_type",
+                    models.CharField(
+                        choices=[
+                            ("wallet", "Wallet (PaymentProfile.comrade_balance)"),
+                            ("group", "Group / Kitty (PaymentGroups.current_amount)"),
+                            ("external", "External Provider"),
+                            ("platform", "Platform"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("account_id", models.CharField(max_length=64)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "transfer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="entries",
+                        to="Payment.ledgertransfer",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["account_type", "account_id", "-created_at"], name="payment_ledger_account_idx"
+                    )
+                ],
+            },
+        ),
+    ]
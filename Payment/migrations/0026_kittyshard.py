@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Payment", "0025_ledgertransfer_ledgerentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KittyShard",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("shard", models.PositiveSmallIntegerField()),
+                ("amount", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                (
+                    "payment_group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="kitty_shards",
+                        to="Payment.paymentgroups",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("payment_group", "shard")},
+            },
+        ),
+    ]
@@ -1152,6 +1152,116 @@ class SavedPaymentMethod(models.Model):
         super().save(*args, **kwargs)
 
 
+PROVIDER_REFERENCE_PROVIDERS = (
+    ('mpesa', 'M-Pesa'),
+    ('stripe', 'Stripe'),
+    ('paypal', 'PayPal'),
+    ('equity', 'Equity Bank'),
+)
+
+PROVIDER_REFERENCE_PURPOSE = (
+    ('deposit', 'Wallet Deposit'),
+    ('purchase', 'Purchase'),
+    ('withdrawal', 'Withdrawal'),
+    ('contribution', 'Group Contribution'),
+)
+
+class ProviderReference(models.Model):
+    """Correlates an external provider id (M-Pesa CheckoutRequestID, Stripe
+    PaymentIntent id, PayPal order id) with our transaction so callbacks and
+    webhooks resolve it with a unique-index lookup."""
+    provider = models.CharField(max_length=20, choices=PROVIDER_REFERENCE_PROVIDERS)
+    external_id = models.CharField(max_length=255)
+    purpose = models.CharField(max_length=20, choices=PROVIDER_REFERENCE_PURPOSE, default='deposit')
+    payment_profile = models.ForeignKey(PaymentProfile, on_delete=models.CASCADE, related_name='provider_references')
+    transaction_token = models.ForeignKey(
+        TransactionToken, on_delete=models.SET_NULL, null=True, blank=True, related_name='provider_references'
+    )
+    payment_group = models.ForeignKey(
+        PaymentGroups, on_delete=models.SET_NULL, null=True, blank=True, related_name='provider_references'
+    )
+    amount = models.DecimalField(decimal_places=2, max_digits=12)
+    status = models.CharField(max_length=20, choices=TRANSACTION_STATUS, default='pending')
+    result_payload = models.JSONField(default=dict, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'external_id'], name='unique_provider_external_id'),
+        ]
+        indexes = [
+            models.Index(fields=['payment_profile', '-created_at'], name='payment_provref_profile_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.provider}:{self.external_id} ({self.status})"
+
+
+# ============================================================================
+# LEDGER: Append-only double-entry journal for balance movements
+# ============================================================================
+
+LEDGER_ACCOUNT_TYPE = (
+    ('wallet', 'Wallet (PaymentProfile.comrade_balance)'),
+    ('group', 'Group / Kitty (PaymentGroups.current_amount)'),
+    ('external', 'External Provider'),
+    ('platform', 'Platform'),
+)
+
+class LedgerTransfer(models.Model):
+    """Journal header: one balanced movement of money between ledger accounts."""
+    import uuid
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    transfer_type = models.CharField(max_length=200, choices=TRANSACTION_CATEGORY, default='transfer')
+    amount = models.DecimalField(decimal_places=2, max_digits=14)
+    description = models.TextField(blank=True)
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    transaction_token = models.ForeignKey(
+        TransactionToken, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_transfers'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='payment_ledger_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.transfer_type} {self.amount} ({self.id})"
+
+class LedgerEntry(models.Model):
+    """Journal line. Entries of a transfer always sum to zero; rows are never updated."""
+    transfer = models.ForeignKey(LedgerTransfer, on_delete=models.PROTECT, related_name='entries')
+    account_type = models.CharField(max_length=20, choices=LEDGER_ACCOUNT_TYPE)
+    account_id = models.CharField(max_length=64)
+    amount = models.DecimalField(decimal_places=2, max_digits=14)  # +credit / -debit
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['account_type', 'account_id', '-created_at'], name='payment_ledger_account_idx'),
+        ]
+
+
+class KittyShard(models.Model):
+    """
+    Slice of a kitty's balance. Ledger credits to a group land on one random
+    shard so concurrent contributions don't queue on the PaymentGroups row;
+    the balance is current_amount plus every shard, and compaction folds the
+    shards back into current_amount (see Payment/services/kitty.py).
+    """
+    payment_group = models.ForeignKey(PaymentGroups, on_delete=models.CASCADE, related_name='kitty_shards')
+    shard = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(decimal_places=2, max_digits=14, default=0)
+    
+    class Meta:
+        unique_together = ('payment_group', 'shard')
+    
+    def __str__(self):
+        return f"{self.payment_group_id}[{self.shard}] {self.amount}"
+
+
 # ============================================================================
 # ML PRICING: Models for RL-based dynamic pricing
 # ============================================================================
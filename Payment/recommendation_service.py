@@ -0,0 +1,162 @@
+"""
+Django service layer for the product Recommendation Engine.
+
+Integrates the DualStreamRecModel inference engine with the Product catalog:
+- recommend_products(): ranked products for a PaymentProfile
+- build_user_state(): 15-dim user state for the recommendation stream
+- mark_product_changed(): queue a catalog row refresh (called from signals)
+
+Each worker keeps its own scored catalog matrix. Product edits bump a
+version counter in the Django cache and record the changed id under that
+version; workers replay the missed ids on their next request instead of
+re-scoring the whole catalog. A worker that falls too far behind (or whose
+matrix is older than CATALOG_MAX_AGE) rebuilds it from scratch.
+"""
+
+import time
+import numpy as np
+from django.core.cache import cache
+
+from Payment.models import Product, OrderItem
+
+CATALOG_VERSION_KEY = 'rec:catalog:version'
+CATALOG_CHANGE_KEY = 'rec:catalog:change:{}'
+CHANGE_TTL = 60 * 60
+MAX_REPLAY = 500
+CATALOG_MAX_AGE = 15 * 60
+
+_catalog_built_at = 0.0
+
+
+def _get_recommendation_engine():
+    """Lazy-load the recommendation engine to avoid import overhead at module level."""
+    from ML.inference.recommendation_engine import get_recommendation_engine
+    return get_recommendation_engine()
+
+
+def _product_text(name, description):
+    return f"{name or ''} {description or ''}"
+
+
+def _catalog_rows(queryset):
+    for pk, name, description in queryset.values_list('pk', 'name', 'description').iterator(chunk_size=2000):
+        yield pk, _product_text(name, description)
+
+
+def _rebuild_catalog(engine, version):
+    global _catalog_built_at
+    engine.set_catalog(_catalog_rows(Product.objects.order_by('pk')), version=version)
+    _catalog_built_at = time.monotonic()
+
+
+def sync_catalog(engine):
+    """Bring this worker's catalog matrix up to the shared version."""
+    version = cache.get(CATALOG_VERSION_KEY, 0)
+    stale = time.monotonic() - _catalog_built_at > CATALOG_MAX_AGE
+    if not engine.catalog_loaded or stale or version - engine.catalog_version > MAX_REPLAY \
+            or version < engine.catalog_version:
+        _rebuild_catalog(engine, version)
+        return
+    if version == engine.catalog_version:
+        return
+
+    keys = [CATALOG_CHANGE_KEY.format(v) for v in range(engine.catalog_version + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        # Part of the changelog expired; cheaper to start over than to guess
+        _rebuild_catalog(engine, version)
+        return
+
+    changed_ids = set(changes.values())
+    present = list(_catalog_rows(Product.objects.filter(pk__in=changed_ids)))
+    engine.upsert_products(present)
+    engine.remove_products(changed_ids - {pk for pk, _ in present})
+    engine.catalog_version = version
+
+
+def mark_product_changed(product_id):
+    """Record that a product was created, edited or deleted."""
+    try:
+        version = cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, 0, timeout=None)
+        version = cache.incr(CATALOG_VERSION_KEY)
+    cache.set(CATALOG_CHANGE_KEY.format(version), product_id, CHANGE_TTL)
+
+
+def build_user_state(user_profile):
+    """
+    Build the 15-dimensional user state vector (values squashed into [0, 1],
+    the range the recommendation stream was trained on).
+    """
+    tier_to_idx = {'free': 0, 'standard': 1, 'premium': 2, 'gold': 3}
+
+    def squash(value, scale):
+        value = max(float(value or 0), 0.0)
+        return value / (value + scale)
+
+    try:
+        features = user_profile.pricing_features
+    except Exception:
+        features = None
+
+    state = np.zeros(15, dtype=np.float32)
+    state[0] = tier_to_idx.get(user_profile.tier, 0) / 3.0
+    state[1] = squash(user_profile.monthly_purchases, 10)
+    state[2] = squash(user_profile.comrade_balance, 1000)
+    if features is not None:
+        state[3:15] = [
+            squash(features.cumulative_savings, 200),
+            squash(features.purchase_frequency, 5),
+            squash(features.avg_transaction_value, 100),
+            squash(features.total_spend, 1000),
+            squash(features.login_frequency, 7),
+            squash(features.session_duration_avg, 30),
+            squash(features.pages_per_session, 10),
+            float(features.is_student),
+            squash(features.group_memberships_count, 5),
+            squash(features.days_since_registration, 365),
+            min(max(features.price_sensitivity, 0.0), 1.0),
+            min(max(features.churn_risk, 0.0), 1.0),
+        ]
+    return state
+
+
+def _fallback_products(limit, exclude_ids):
+    products = Product.objects.filter(product_type='recommendation').exclude(pk__in=exclude_ids)[:limit]
+    if not products:
+        products = Product.objects.exclude(pk__in=exclude_ids).order_by('-created_at')[:limit]
+    return list(products)
+
+
+def recommend_products(user_profile, limit=10):
+    """
+    Ranked Product instances for a user.
+
+    Already-purchased products are skipped. Falls back to tagged/newest
+    products when the model is unavailable or the catalog is empty.
+    """
+    purchased = []
+    if user_profile is not None:
+        purchased = list(
+            OrderItem.objects.filter(order__buyer_id=user_profile.user_id, product__isnull=False)
+            .values_list('product_id', flat=True).distinct()[:200]
+        )
+
+    engine = _get_recommendation_engine()
+    if user_profile is None or not engine.is_available:
+        return _fallback_products(limit, purchased)
+
+    sync_catalog(engine)
+    ranked = engine.recommend(build_user_state(user_profile), k=limit, exclude_ids=purchased)
+    if not ranked:
+        return _fallback_products(limit, purchased)
+
+    by_id = Product.objects.in_bulk([r.product_id for r in ranked])
+    products = []
+    for rec in ranked:
+        product = by_id.get(rec.product_id)
+        if product is not None:
+            product.recommendation_score = rec.score
+            products.append(product)
+    return products
@@ -5,13 +5,17 @@ from Payment.models import (
     TransactionHistory, TransactionTracker, PaymentGroupMember,
     Contribution, StandingOrder, GroupInvitation, GroupTarget,
     Product, UserSubscription, SavedPaymentMethod, GroupCheckoutRequest,
-    GroupJoinRequest, GroupVote,
+    GroupJoinRequest, GroupVote, KittyShard,
     BillProvider, BillPayment,
     LoanProduct, CreditScore, LoanApplication, LoanRepayment,
     EscrowTransaction, EscrowDispute,
     InsuranceProduct, InsurancePolicy, InsuranceClaim
 )
 from Payment.models import TRANSACTION_CATEGORY, PAY_OPT
+from Payment.aggregates import (
+    AggregatedFieldsMixin, AggregatingListSerializer,
+    count_by, sum_by, m2m_count, related_count, monthly_sums,
+)
 from Authentication.models import Profile, CustomUser
 
 class PaymentProfileSerializer(serializers.ModelSerializer):
@@ -193,7 +197,24 @@ class GroupInvitationSerializer(serializers.ModelSerializer):
     def get_invited_by_name(self, obj):
         return f"{obj.invited_by.user.user.first_name} {obj.invited_by.user.user.last_name}"
 
-class PaymentGroupsSerializer(serializers.ModelSerializer):
+class KittyBalanceMixin:
+    """
+    Sharded kitty balance (current_amount plus KittyShard rows, summed for
+    the whole page by the 'kitty_shards' aggregate) written into
+    ``balance_fields``.
+    """
+    balance_fields = ()
+
+    def kitty_balance(self, obj):
+        return obj.current_amount + self.aggregate('kitty_shards', obj)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for name in self.balance_fields:
+            data[name] = self.fields[name].to_representation(self.kitty_balance(instance))
+        return data
+
+class PaymentGroupsSerializer(KittyBalanceMixin, AggregatedFieldsMixin, serializers.ModelSerializer):
     members = PaymentGroupMemberSerializer(many=True, read_only=True)
     contributions_summary = serializers.SerializerMethodField()
     targets = GroupTargetSerializer(many=True, read_only=True)
@@ -201,30 +222,38 @@ class PaymentGroupsSerializer(serializers.ModelSerializer):
     member_count = serializers.SerializerMethodField()
     progress_percentage = serializers.SerializerMethodField()
     
+    aggregate_specs = {
+        'member_count': count_by(PaymentGroupMember, 'payment_group'),
+        'contribution_count': count_by(Contribution, 'payment_group'),
+        'kitty_shards': sum_by(KittyShard, 'payment_group', 'amount'),
+    }
+    balance_fields = ('current_amount',)
+    
     class Meta:
         model = PaymentGroups
         fields = '__all__'
         read_only_fields = ['current_amount', 'created_at', 'updated_at']
+        list_serializer_class = AggregatingListSerializer
     
     def get_creator_name(self, obj):
         return f"{obj.creator.user.user.first_name} {obj.creator.user.user.last_name}"
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        return self.aggregate('member_count', obj)
     
     def get_progress_percentage(self, obj):
         if obj.target_amount and obj.target_amount > 0:
-            return round((float(obj.current_amount) / float(obj.target_amount)) * 100, 2)
+            return round((float(self.kitty_balance(obj)) / float(obj.target_amount)) * 100, 2)
         return 0.0
     
     def get_contributions_summary(self, obj):
         return {
-            'total_contributions': obj.contributions.count(),
-            'total_amount': obj.current_amount,
+            'total_contributions': self.aggregate('contribution_count', obj),
+            'total_amount': self.kitty_balance(obj),
             'target_amount': obj.target_amount or 0,
         }
 
-class GroupCheckoutRequestSerializer(serializers.ModelSerializer):
+class GroupCheckoutRequestSerializer(AggregatedFieldsMixin, serializers.ModelSerializer):
     initiator_name = serializers.SerializerMethodField()
     initiator_username = serializers.SerializerMethodField()
     initiator_profile_picture = serializers.SerializerMethodField()
@@ -235,10 +264,17 @@ class GroupCheckoutRequestSerializer(serializers.ModelSerializer):
     group_cover_photo = serializers.SerializerMethodField()
     recipient_info = serializers.SerializerMethodField()
 
+    aggregate_specs = {
+        'approvals': m2m_count(GroupCheckoutRequest.approvals),
+        'rejections': m2m_count(GroupCheckoutRequest.rejections),
+        'group_members': related_count('group_id', PaymentGroupMember, 'payment_group'),
+    }
+
     class Meta:
         model = GroupCheckoutRequest
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
+        list_serializer_class = AggregatingListSerializer
 
     def get_initiator_name(self, obj):
         if obj.initiator and obj.initiator.user:
@@ -263,13 +299,13 @@ class GroupCheckoutRequestSerializer(serializers.ModelSerializer):
         return None
 
     def get_approvals_count(self, obj):
-        return obj.approvals.count()
+        return self.aggregate('approvals', obj)
 
     def get_rejections_count(self, obj):
-        return obj.rejections.count()
+        return self.aggregate('rejections', obj)
 
     def get_total_members(self, obj):
-        return obj.group.members.count()
+        return self.aggregate('group_members', obj)
 
     def get_group_name(self, obj):
         return obj.group.name if obj.group else None
@@ -307,7 +343,7 @@ class PaymentGroupsCreateSerializer(serializers.ModelSerializer):
                   'allow_anonymous', 'auto_create_room']
 
 
-class KittySerializer(serializers.ModelSerializer):
+class KittySerializer(KittyBalanceMixin, AggregatedFieldsMixin, serializers.ModelSerializer):
     """Serializer tailored for the kitty management frontend."""
     balance = serializers.DecimalField(source='current_amount', max_digits=12, decimal_places=2)
     total_inflow = serializers.SerializerMethodField()
@@ -321,6 +357,14 @@ class KittySerializer(serializers.ModelSerializer):
     monthly_data = serializers.SerializerMethodField()
     connected_accounts = serializers.SerializerMethodField()
 
+    aggregate_specs = {
+        'inflow': sum_by(Contribution, 'payment_group', 'amount'),
+        'investors': count_by(PaymentGroupMember, 'payment_group'),
+        'monthly': monthly_sums(Contribution, 'payment_group', 'contributed_at', 'amount', days=210),  # ~7 months
+        'kitty_shards': sum_by(KittyShard, 'payment_group', 'amount'),
+    }
+    balance_fields = ('balance',)
+
     class Meta:
         model = PaymentGroups
         fields = [
@@ -329,20 +373,16 @@ class KittySerializer(serializers.ModelSerializer):
             'investors_count', 'is_charity', 'monthly_data',
             'connected_accounts', 'created_at', 'target_amount',
         ]
+        list_serializer_class = AggregatingListSerializer
 
     # ── Computed helpers ──────────────────────────────────────────
-    def _contributions_qs(self, obj):
-        return obj.contributions.all()
-
     def get_total_inflow(self, obj):
-        from django.db.models import Sum
-        total = self._contributions_qs(obj).aggregate(total=Sum('amount'))['total']
-        return float(total or 0)
+        return float(self.aggregate('inflow', obj))
 
     def get_total_outflow(self, obj):
         """Outflow = total_inflow − current_amount (what has been withdrawn)."""
         inflow = self.get_total_inflow(obj)
-        return max(inflow - float(obj.current_amount), 0)
+        return max(inflow - float(self.kitty_balance(obj)), 0)
 
     def get_entity_type(self, obj):
         if obj.entity_content_type:
@@ -372,7 +412,7 @@ class KittySerializer(serializers.ModelSerializer):
         return 'KES'
 
     def get_investors_count(self, obj):
-        return obj.members.count()
+        return self.aggregate('investors', obj)
 
     def get_is_charity(self, obj):
         if obj.entity_content_type:
@@ -384,31 +424,13 @@ class KittySerializer(serializers.ModelSerializer):
         return False
 
     def get_monthly_data(self, obj):
-        """Aggregate contributions by month for the last 7 months."""
-        from django.db.models import Sum
-        from django.db.models.functions import TruncMonth
-        from datetime import datetime, timedelta
-        from django.utils import timezone
-
-        end = timezone.now()
-        start = end - timedelta(days=210)  # ~7 months
-
-        monthly = (
-            obj.contributions
-               .filter(contributed_at__gte=start)
-               .annotate(month=TruncMonth('contributed_at'))
-               .values('month')
-               .annotate(inflow=Sum('amount'))
-               .order_by('month')
-        )
-
+        """Contributions by month for the last 7 months."""
         result = []
-        for entry in monthly:
-            month_label = entry['month'].strftime('%b')
-            inflow = float(entry['inflow'] or 0)
+        for entry in self.aggregate('monthly', obj, default=[]):
+            inflow = float(entry['total'] or 0)
             # Outflow is approximated as a fraction of inflow for display
             outflow = round(inflow * 0.65, 2)
-            result.append({'month': month_label, 'inflow': inflow, 'outflow': outflow})
+            result.append({'month': entry['month'].strftime('%b'), 'inflow': inflow, 'outflow': outflow})
         return result
 
     def get_connected_accounts(self, obj):
@@ -977,22 +999,50 @@ class GroupJoinRequestSerializer(serializers.ModelSerializer):
         return None
 
 
-class GroupVoteSerializer(serializers.ModelSerializer):
+def _viewer_votes(instances, context):
+    """{vote pk: 'for'|'against'|'abstain'} for the requesting user's payment profile."""
+    request = context.get('request')
+    if not request or not request.user.is_authenticated:
+        return {}
+    from Payment.utils import resolve_payment_profile
+    pp = resolve_payment_profile(request)
+    if not pp:
+        return {}
+    pks = [obj.pk for obj in instances]
+    choices = {}
+    for choice, descriptor in (('abstain', GroupVote.votes_abstain),
+                               ('against', GroupVote.votes_against),
+                               ('for', GroupVote.votes_for)):
+        for vote_id in descriptor.through.objects.filter(
+                groupvote_id__in=pks, paymentprofile_id=pp.pk).values_list('groupvote_id', flat=True):
+            choices[vote_id] = choice  # later entries win, so 'for' takes precedence as before
+    return choices
+
+
+class GroupVoteSerializer(AggregatedFieldsMixin, serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
     group_name = serializers.CharField(source='group.name', read_only=True)
     vote_type_display = serializers.CharField(source='get_vote_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    total_votes = serializers.IntegerField(read_only=True)
-    approval_percentage = serializers.FloatField(read_only=True)
+    total_votes = serializers.SerializerMethodField()
+    approval_percentage = serializers.SerializerMethodField()
     votes_for_count = serializers.SerializerMethodField()
     votes_against_count = serializers.SerializerMethodField()
     votes_abstain_count = serializers.SerializerMethodField()
     user_vote = serializers.SerializerMethodField()
     
+    aggregate_specs = {
+        'for': m2m_count(GroupVote.votes_for),
+        'against': m2m_count(GroupVote.votes_against),
+        'abstain': m2m_count(GroupVote.votes_abstain),
+        'user_vote': _viewer_votes,
+    }
+    
     class Meta:
         model = GroupVote
         fields = '__all__'
         read_only_fields = ['id', 'created_by', 'status', 'created_at', 'updated_at']
+        list_serializer_class = AggregatingListSerializer
     
     def get_created_by_name(self, obj):
         try:
@@ -1001,32 +1051,29 @@ class GroupVoteSerializer(serializers.ModelSerializer):
             return "Unknown"
     
     def get_votes_for_count(self, obj):
-        return obj.votes_for.count()
+        return self.aggregate('for', obj)
     
     def get_votes_against_count(self, obj):
-        return obj.votes_against.count()
+        return self.aggregate('against', obj)
     
     def get_votes_abstain_count(self, obj):
-        return obj.votes_abstain.count()
+        return self.aggregate('abstain', obj)
+    
+    def get_total_votes(self, obj):
+        """Same as GroupVote.total_votes, from the page aggregates."""
+        return self.get_votes_for_count(obj) + self.get_votes_against_count(obj) + self.get_votes_abstain_count(obj)
+    
+    def get_approval_percentage(self, obj):
+        """Same as GroupVote.approval_percentage, from the page aggregates."""
+        votes_for = self.get_votes_for_count(obj)
+        total = votes_for + self.get_votes_against_count(obj)
+        if total == 0:
+            return 0.0
+        return round((votes_for / total) * 100, 1)
     
     def get_user_vote(self, obj):
         """Return the current user's vote on this item."""
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return None
-        try:
-            from Authentication.models import Profile
-            profile = Profile.objects.get(user=request.user)
-            pp = PaymentProfile.objects.get(user=profile)
-            if obj.votes_for.filter(pk=pp.pk).exists():
-                return 'for'
-            if obj.votes_against.filter(pk=pp.pk).exists():
-                return 'against'
-            if obj.votes_abstain.filter(pk=pp.pk).exists():
-                return 'abstain'
-        except Exception:
-            pass
-        return None
+        return self.aggregate('user_vote', obj, default=None)
 
 
 # ==================== BILL PAYMENT SERIALIZERS ====================
@@ -0,0 +1,191 @@
+"""
+Provider HTTP Client Layer
+Shared, pooled HTTP sessions and cached OAuth tokens for external payment APIs.
+
+- One keep-alive ``requests.Session`` per (provider, host) with a sized connection pool
+- OAuth tokens cached until shortly before ``expires_in`` with single-flight refresh
+- Retry/backoff in one place (request()): failed connects always, timeouts and
+  429/5xx only for idempotent calls
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for provider calls."""
+
+    def __init__(self, attempts=3, backoff=0.5, max_backoff=8.0):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt, response=None):
+        """Seconds to wait before retry number ``attempt`` (1-based)."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        base = min(self.backoff * (2 ** (attempt - 1)), self.max_backoff)
+        return base * (0.5 + random.random() / 2)
+
+
+class ProviderHTTPClient:
+    """Pooled HTTP client for a single provider host."""
+
+    def __init__(self, name, base_url, pool_size=10, timeout=DEFAULT_TIMEOUT, retry_policy=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.session = requests.Session()
+        # No urllib3 retries: request() is the only retry layer
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @staticmethod
+    def _not_sent(exc):
+        """True when ``exc`` is a failed connect, so the provider never saw the request."""
+        if isinstance(exc, requests.ConnectTimeout):
+            return True
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, idempotent=None, **kwargs):
+        """
+        Send a request through the pooled session.
+
+        Failed connects are retried for every call (the provider never saw
+        the request). Timeouts, dropped connections and retryable statuses are
+        retried only when the call is idempotent (GET-like methods, or
+        ``idempotent=True`` for e.g. token endpoints) so a payment is never
+        submitted twice.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault('timeout', self.timeout)
+        attempts = self.retry_policy.attempts
+
+        for attempt in range(1, attempts + 1):
+            try:
+                response = self.session.request(method, self.url(path), **kwargs)
+            except (requests.Timeout, requests.ConnectionError) as exc:
+                if attempt >= attempts or not (idempotent or self._not_sent(exc)):
+                    raise
+                time.sleep(self.retry_policy.delay(attempt))
+                continue
+            if response.status_code in RETRYABLE_STATUSES and idempotent and attempt < attempts:
+                logger.warning("%s %s -> %s, retrying (%s/%s)",
+                               self.name, path, response.status_code, attempt, attempts)
+                time.sleep(self.retry_policy.delay(attempt, response))
+                continue
+            return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class TokenCache:
+    """
+    Thread-safe OAuth token cache with single-flight refresh.
+
+    ``fetch`` must return ``(access_token, expires_in_seconds)``; concurrent
+    callers with an expired token wait for one refresh instead of each
+    hitting the provider's token endpoint.
+    """
+
+    def __init__(self, skew=60, default_ttl=300):
+        self.skew = skew
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+    def _valid(self):
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    def get(self, fetch):
+        if self._valid():
+            return self._token
+        with self._lock:
+            if self._valid():
+                return self._token
+            token, expires_in = fetch()
+            if not token:
+                return None
+            try:
+                ttl = float(expires_in)
+            except (TypeError, ValueError):
+                ttl = self.default_ttl
+            # Refresh a little early, but never cache for a negative window
+            self._expires_at = time.monotonic() + max(ttl - self.skew, ttl / 2)
+            self._token = token
+            return token
+
+    def invalidate(self, token=None):
+        """Drop the cached token (only if it is still ``token`` when given)."""
+        with self._lock:
+            if token is None or token == self._token:
+                self._token = None
+                self._expires_at = 0.0
+
+
+_registry_lock = threading.Lock()
+_clients = {}
+_token_caches = {}
+
+
+def get_client(provider, base_url, **kwargs):
+    """Return the shared pooled client for ``provider`` at ``base_url``."""
+    key = (provider, base_url.rstrip('/'))
+    client = _clients.get(key)
+    if client is None:
+        with _registry_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = ProviderHTTPClient(provider, base_url, **kwargs)
+                _clients[key] = client
+    return client
+
+
+def get_token_cache(provider, credentials_key=''):
+    """Return the token cache for ``provider`` and a given set of credentials."""
+    key = (provider, credentials_key)
+    cache = _token_caches.get(key)
+    if cache is None:
+        with _registry_lock:
+            cache = _token_caches.setdefault(key, TokenCache())
+    return cache
+
+
+def reset_clients():
+    """Close pooled sessions and forget cached tokens (tests / settings changes)."""
+    with _registry_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _token_caches.clear()
@@ -0,0 +1,95 @@
+"""
+Sharded Kitty Balances
+A kitty's balance is PaymentGroups.current_amount plus its KittyShard rows.
+
+Credits (ledger postings into a group, funding items) add to one randomly
+chosen shard with an F() UPDATE, so concurrent contributions to a popular
+kitty spread over SHARDS rows instead of queueing on the group row. Debits
+lock the group row, fold the shards into current_amount and then check the
+balance, so a withdrawal always sees every committed credit.
+
+balance() sums the shards for single reads and caches the result for
+BALANCE_TTL seconds; serializers sum a whole page with one grouped query.
+compact() (the compact_kitties command) folds idle shards back periodically.
+"""
+import random
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Sum, When
+
+from Payment.models import KittyShard, PaymentGroups
+
+SHARDS = getattr(settings, 'KITTY_SHARDS', 16)
+BALANCE_TTL = 5
+BALANCE_KEY = 'kitty:balance:{}'
+
+
+def credit(group_id, amount, shards=None):
+    """Add ``amount`` to a random shard of the kitty; the group row is not touched."""
+    shard = random.randrange(shards or SHARDS)
+    rows = KittyShard.objects.filter(payment_group_id=group_id, shard=shard)
+    if rows.update(amount=F('amount') + amount):
+        return
+    try:
+        with transaction.atomic():
+            KittyShard.objects.create(payment_group_id=group_id, shard=shard, amount=amount)
+    except IntegrityError:
+        # A concurrent credit created the shard first
+        rows.update(amount=F('amount') + amount)
+
+
+def fold(group_id):
+    """
+    Move the kitty's shards into current_amount; returns the amount moved.
+    Call inside a transaction holding the group row lock.
+    """
+    shards = list(
+        KittyShard.objects.select_for_update()
+        .filter(payment_group_id=group_id).exclude(amount=0)
+        .order_by('shard').values_list('pk', 'amount')
+    )
+    if not shards:
+        return Decimal('0')
+    total = sum((amount for _, amount in shards), Decimal('0'))
+    # Subtract what was read rather than zeroing, so a credit that lands
+    # after the read (no row locks on SQLite) stays in its shard
+    KittyShard.objects.filter(pk__in=[pk for pk, _ in shards]).update(
+        amount=Case(*[When(pk=pk, then=F('amount') - amount) for pk, amount in shards])
+    )
+    PaymentGroups.objects.filter(pk=group_id).update(current_amount=F('current_amount') + total)
+    transaction.on_commit(lambda: cache.delete(BALANCE_KEY.format(group_id)))
+    return total
+
+
+def balance(payment_group, fresh=False):
+    """current_amount plus every shard, cached for BALANCE_TTL seconds unless ``fresh``."""
+    pk = getattr(payment_group, 'pk', payment_group)
+    key = BALANCE_KEY.format(pk)
+    value = None if fresh else cache.get(key)
+    if value is None:
+        row = (PaymentGroups.objects.filter(pk=pk)
+               .annotate(shards=Sum('kitty_shards__amount'))
+               .values_list('current_amount', 'shards').first())
+        if row is None:
+            return Decimal('0')
+        value = row[0] + (row[1] or 0)
+        cache.set(key, value, BALANCE_TTL)
+    return value
+
+
+def compact(group_ids=None):
+    """Fold the shards of every kitty (or of ``group_ids``); returns {group_id: amount folded}."""
+    pending = KittyShard.objects.exclude(amount=0)
+    if group_ids is not None:
+        pending = pending.filter(payment_group_id__in=group_ids)
+    folded = {}
+    for group_id in sorted(set(pending.values_list('payment_group_id', flat=True))):
+        with transaction.atomic():
+            list(PaymentGroups.objects.select_for_update().filter(pk=group_id).values_list('pk'))
+            amount = fold(group_id)
+        if amount:
+            folded[group_id] = amount
+    return folded
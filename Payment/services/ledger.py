@@ -0,0 +1,278 @@
+"""
+Ledger Engine
+Single entry point for moving money between wallets, group kitties and the
+outside world. Every movement is an append-only, balanced LedgerTransfer with
+one debit and one credit LedgerEntry.
+
+Wallet accounts are backed by PaymentProfile.comrade_balance, group accounts
+by PaymentGroups.current_amount plus its KittyShard rows (see kitty.py).
+External/platform accounts are unbounded counterparties.
+
+Locking: wallets and debited groups are locked with SELECT ... FOR UPDATE in
+one global order (wallets by pk, then groups by pk) so concurrent transfers
+between the same accounts can never deadlock. Groups that are only credited
+are not locked; their credit goes to a kitty shard.
+"""
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import F
+
+from Payment.models import (
+    LedgerEntry, LedgerTransfer, PaymentGroups, PaymentProfile, TransactionToken,
+)
+from Payment.services import kitty
+from Payment.utils import forget_payment_profiles
+
+CENT = Decimal('0.01')
+
+
+class LedgerError(Exception):
+    """Invalid ledger posting."""
+
+
+class InsufficientFunds(LedgerError):
+    """A bounded account would go negative."""
+
+    def __init__(self, account, balance, requested):
+        self.account = account
+        self.balance = balance
+        self.requested = requested
+        super().__init__(f"Insufficient funds in {account.account_type}:{account.account_id} "
+                         f"(balance {balance}, requested {requested})")
+
+
+@dataclass(frozen=True, order=True)
+class Account:
+    account_type: str
+    account_id: str
+
+    @property
+    def is_bounded(self):
+        return self.account_type in ('wallet', 'group')
+
+
+def wallet(payment_profile):
+    """Ledger account for a PaymentProfile (instance or pk)."""
+    return Account('wallet', str(getattr(payment_profile, 'pk', payment_profile)))
+
+
+def group(payment_group):
+    """Ledger account for a PaymentGroups kitty (instance or pk)."""
+    return Account('group', str(getattr(payment_group, 'pk', payment_group)))
+
+
+def external(provider):
+    """Counterparty for money entering/leaving through a provider (mpesa, stripe...)."""
+    return Account('external', provider or 'unknown')
+
+
+def platform(name='revenue'):
+    """Platform-owned account, e.g. shop revenue."""
+    return Account('platform', name)
+
+
+@dataclass
+class Transfer:
+    """A requested posting; pass one to post_transfer or many to post_transfers."""
+    source: Account
+    destination: Account
+    amount: Decimal
+    transfer_type: str = 'transfer'
+    description: str = ''
+    idempotency_key: str = None
+    # When set, a TransactionToken is written for this profile's history
+    token_profile: PaymentProfile = None
+    token_fields: dict = field(default_factory=dict)
+    allow_overdraft: bool = False
+
+
+def _quantize(amount):
+    amount = Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_UP)
+    if amount <= 0:
+        raise LedgerError('Transfer amount must be positive')
+    return amount
+
+
+def _lock_balances(accounts, debited):
+    """
+    Lock backing rows in a global order and return {Account: balance} for
+    wallets and debited groups (shards folded in first). Credit-only groups
+    are checked for existence but neither locked nor returned.
+    """
+    wallet_ids = sorted(int(a.account_id) for a in accounts if a.account_type == 'wallet')
+    group_ids = sorted(a.account_id for a in accounts if a.account_type == 'group' and a in debited)
+    credited_ids = [a.account_id for a in accounts if a.account_type == 'group' and a not in debited]
+    balances = {}
+    found = set()
+    if wallet_ids:
+        rows = (PaymentProfile.objects.select_for_update()
+                .filter(pk__in=wallet_ids).order_by('pk').values_list('pk', 'comrade_balance'))
+        balances.update({wallet(pk): bal for pk, bal in rows})
+    if group_ids:
+        locked = (PaymentGroups.objects.select_for_update()
+                  .filter(pk__in=group_ids).order_by('pk').values_list('pk', flat=True))
+        for pk in locked:
+            kitty.fold(pk)
+        rows = PaymentGroups.objects.filter(pk__in=group_ids).values_list('pk', 'current_amount')
+        balances.update({group(pk): bal for pk, bal in rows})
+    if credited_ids:
+        found = {group(pk) for pk in PaymentGroups.objects.filter(pk__in=credited_ids).values_list('pk', flat=True)}
+    missing = [a for a in accounts if a.is_bounded and a not in balances and a not in found]
+    if missing:
+        raise LedgerError(f"Unknown ledger account {missing[0].account_type}:{missing[0].account_id}")
+    return balances
+
+
+def _apply_deltas(deltas):
+    forget_payment_profiles(a.account_id for a in deltas if a.account_type == 'wallet')
+    for account, delta in sorted(deltas.items()):
+        if delta == 0 or not account.is_bounded:
+            continue
+        if account.account_type == 'wallet':
+            PaymentProfile.objects.filter(pk=account.account_id).update(
+                comrade_balance=F('comrade_balance') + delta
+            )
+        elif delta > 0:
+            kitty.credit(account.account_id, delta)
+        else:
+            PaymentGroups.objects.filter(pk=account.account_id).update(
+                current_amount=F('current_amount') + delta
+            )
+
+
+def post_transfers(transfers):
+    """
+    Post a batch of transfers atomically.
+
+    All touched balances are locked once, each account gets a single UPDATE
+    with its net delta, and headers/entries/tokens are written with
+    bulk_create. Transfers whose idempotency_key was already posted are
+    skipped and their existing LedgerTransfer is returned in their place.
+    Raises InsufficientFunds (rolling back the whole batch) if any bounded
+    account would go negative.
+    """
+    transfers = list(transfers)
+    for t in transfers:
+        t.amount = _quantize(t.amount)
+        if t.source == t.destination:
+            raise LedgerError('Source and destination must differ')
+
+    with transaction.atomic():
+        keys = [t.idempotency_key for t in transfers if t.idempotency_key]
+        existing = {
+            lt.idempotency_key: lt
+            for lt in LedgerTransfer.objects.filter(idempotency_key__in=keys)
+        } if keys else {}
+        pending = [t for t in transfers if t.idempotency_key not in existing]
+
+        accounts = {t.source for t in pending} | {t.destination for t in pending}
+        balances = _lock_balances(accounts, {t.source for t in pending})
+
+        deltas = defaultdict(Decimal)
+        running = dict(balances)
+        for t in pending:
+            if t.source.is_bounded and not t.allow_overdraft:
+                if running[t.source] < t.amount:
+                    raise InsufficientFunds(t.source, running[t.source], t.amount)
+            if t.source.is_bounded:
+                running[t.source] -= t.amount
+            if t.destination in running:
+                running[t.destination] += t.amount
+            deltas[t.source] -= t.amount
+            deltas[t.destination] += t.amount
+        _apply_deltas(deltas)
+
+        tokens = []
+        headers = []
+        entries = []
+        for t in pending:
+            token = None
+            if t.token_profile is not None:
+                token = TransactionToken(
+                    transaction_code=uuid.uuid4(),
+                    payment_profile=t.token_profile,
+                    amount=t.amount,
+                    transaction_type=t.transfer_type,
+                    description=t.description,
+                    **t.token_fields,
+                )
+                tokens.append(token)
+            header = LedgerTransfer(
+                id=uuid.uuid4(),
+                transfer_type=t.transfer_type,
+                amount=t.amount,
+                description=t.description,
+                idempotency_key=t.idempotency_key,
+                transaction_token=token,
+            )
+            headers.append(header)
+            entries.append(LedgerEntry(transfer=header, account_type=t.source.account_type,
+                                       account_id=t.source.account_id, amount=-t.amount))
+            entries.append(LedgerEntry(transfer=header, account_type=t.destination.account_type,
+                                       account_id=t.destination.account_id, amount=t.amount))
+        if tokens:
+            TransactionToken.objects.bulk_create(tokens)
+        LedgerTransfer.objects.bulk_create(headers)
+        LedgerEntry.objects.bulk_create(entries)
+
+    posted = iter(headers)
+    return [existing.get(t.idempotency_key) or next(posted) for t in transfers]
+
+
+def post_transfer(source, destination, amount, **kwargs):
+    """Move ``amount`` from ``source`` to ``destination``; returns the LedgerTransfer."""
+    return post_transfers([Transfer(source, destination, amount, **kwargs)])[0]
+
+
+def settle_group_contributions(payment_group, contributions, description='', notes=''):
+    """
+    Batch-settle wallet contributions into a group kitty.
+
+    ``contributions`` is an iterable of (PaymentGroupMember, amount). Every
+    wallet debit, the single group credit, member totals and Contribution rows
+    are written in one transaction. Returns the created Contribution rows.
+    """
+    from Payment.models import Contribution, PaymentGroupMember
+
+    contributions = [(member, _quantize(amount)) for member, amount in contributions]
+    if not contributions:
+        return []
+    destination = group(payment_group)
+    note = description or f'Contribution to group: {payment_group.name}'
+    with transaction.atomic():
+        posted = post_transfers([
+            Transfer(
+                wallet(member.payment_profile_id), destination, amount,
+                transfer_type='contribution', description=note,
+                token_profile=member.payment_profile,
+                token_fields={'payment_group': payment_group, 'pay_from': 'internal',
+                              'payment_option': 'comrade_balance'},
+            )
+            for member, amount in contributions
+        ])
+        per_member = defaultdict(Decimal)
+        for member, amount in contributions:
+            per_member[member.pk] += amount
+        for member_pk, total in sorted(per_member.items()):
+            PaymentGroupMember.objects.filter(pk=member_pk).update(
+                total_contributed=F('total_contributed') + total
+            )
+        created = Contribution.objects.bulk_create([
+            Contribution(payment_group=payment_group, member=member, amount=amount,
+                         transaction_id=lt.transaction_token_id, notes=notes or note)
+            for (member, amount), lt in zip(contributions, posted)
+        ])
+    return created
+
+
+def account_balance_from_entries(account):
+    """Recompute a balance from the journal (for reconciliation)."""
+    from django.db.models import Sum
+    total = LedgerEntry.objects.filter(
+        account_type=account.account_type, account_id=account.account_id
+    ).aggregate(total=Sum('amount'))['total']
+    return total or Decimal('0.00')
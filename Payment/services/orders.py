@@ -0,0 +1,218 @@
+"""
+Order Placement
+Creates an Order with its items, reserves stock and debits the buyer in one
+transaction:
+
+1. every ordered product is fetched with one in_bulk query, which also locks
+   the rows (SELECT ... FOR UPDATE, ordered by pk so concurrent checkouts of
+   overlapping carts cannot deadlock)
+2. stock of physical products is taken with a conditional
+   ``UPDATE ... SET stock_quantity = stock_quantity - n WHERE stock_quantity >= n``,
+   so it can never go negative even where row locks are unavailable (SQLite)
+3. items are written with one bulk_create
+4. the buyer's wallet is debited through the ledger (locked F() update)
+
+Quantities must be whole numbers >= 1 (OrderError otherwise). Any failure
+(OrderError, OutOfStock, ledger.InsufficientFunds) rolls the whole order back.
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+
+from Funding.models import Business, CapitalVenture
+from Payment.models import (
+    Booking, Order, OrderItem, PaymentGroups, Product, ServiceTimeSlot,
+)
+from Payment.services import kitty, ledger
+
+logger = logging.getLogger(__name__)
+
+# Product types whose stock_quantity is tracked (others are always available)
+STOCKED_TYPES = ('physical',)
+
+
+class OrderError(Exception):
+    """The order cannot be placed."""
+
+
+class OutOfStock(OrderError):
+    """A product has less stock than the order asks for."""
+
+    def __init__(self, product, requested, available):
+        self.product = product
+        self.requested = requested
+        self.available = available
+        super().__init__(f"Insufficient stock for {product.name} "
+                         f"(available {available}, requested {requested})")
+
+
+def line_quantity(item_data):
+    """The line's quantity; OrderError unless it is a whole number >= 1."""
+    raw = item_data.get('quantity', item_data.get('qty', 1))
+    qty = None
+    if isinstance(raw, int) and not isinstance(raw, bool):
+        qty = raw
+    elif isinstance(raw, str) and raw.strip().isdigit():
+        qty = int(raw)
+    if qty is None or qty < 1:
+        raise OrderError(f"Invalid quantity {raw!r}: must be a whole number of at least 1")
+    return qty
+
+
+def validate_quantities(items_data):
+    """OrderError unless every line's quantity is valid (see line_quantity)."""
+    for item_data in items_data:
+        line_quantity(item_data)
+
+
+def _product_id(item_data):
+    if item_data.get('type', 'product') != 'product' or not item_data.get('id'):
+        return None
+    try:
+        return int(item_data['id'])
+    except (TypeError, ValueError):
+        return None
+
+
+def _lock_products(items_data):
+    """{pk: Product} for every product in the cart, fetched and locked in pk order."""
+    ids = sorted({pk for pk in map(_product_id, items_data) if pk is not None})
+    if not ids:
+        return {}
+    return Product.objects.select_for_update().order_by('pk').in_bulk(ids)
+
+
+def _reserve_stock(products, items_data):
+    """Take the cart's quantities of stocked products, one conditional UPDATE each."""
+    wanted = defaultdict(int)
+    for item_data in items_data:
+        product = products.get(_product_id(item_data))
+        if product is not None and product.product_type in STOCKED_TYPES:
+            wanted[product.pk] += line_quantity(item_data)
+    for pk, qty in sorted(wanted.items()):
+        taken = Product.objects.filter(pk=pk, stock_quantity__gte=qty).update(
+            stock_quantity=F('stock_quantity') - qty
+        )
+        if not taken:
+            available = Product.objects.filter(pk=pk).values_list('stock_quantity', flat=True).first()
+            raise OutOfStock(products[pk], qty, available or 0)
+
+
+def _credit_funding(item_id, item_total):
+    """Add a funding item's amount to the target Business/CapitalVenture kitty."""
+    business = Business.objects.filter(id=item_id).first()
+    if business:
+        ct = ContentType.objects.get_for_model(Business)
+        kitty_id = PaymentGroups.objects.filter(entity_content_type=ct, entity_object_id=str(business.id), group_type='kitty').values_list('pk', flat=True).first()
+        if kitty_id:
+            kitty.credit(kitty_id, item_total)
+        if business.is_charity:
+            business.charity_raised += item_total
+            business.save()
+    else:
+        venture = CapitalVenture.objects.filter(id=item_id).first()
+        if venture:
+            ct = ContentType.objects.get_for_model(CapitalVenture)
+            kitty_id = PaymentGroups.objects.filter(entity_content_type=ct, entity_object_id=str(venture.id), group_type='kitty').values_list('pk', flat=True).first()
+            if kitty_id:
+                kitty.credit(kitty_id, item_total)
+
+
+def _build_items(order, products, items_data):
+    items = []
+    for item_data in items_data:
+        item_type = item_data.get('type', 'product')
+        product = products.get(_product_id(item_data))
+        qty = line_quantity(item_data)
+        if product is not None:
+            unit_price = product.price
+        else:
+            # Unknown products and other item types are priced by the client
+            unit_price = Decimal(str(item_data.get('price', 0))).quantize(ledger.CENT)
+
+        if item_type == 'funding' and item_data.get('id'):
+            try:
+                # Savepoint: a failed credit must not abort the order's transaction
+                with transaction.atomic():
+                    _credit_funding(item_data['id'], unit_price * qty)
+            except Exception as e:
+                logger.error(f"Failed to process funding item: {e}")
+
+        # bulk_create skips OrderItem.save(), so fill in what it derives
+        items.append(OrderItem(
+            order=order,
+            product=product,
+            name=item_data.get('name', '') or (product.name if product else ''),
+            quantity=qty,
+            unit_price=unit_price,
+            subtotal=unit_price * qty,
+        ))
+    return items
+
+
+def place_order(buyer, payment_profile, data, establishment=None):
+    """
+    Create a confirmed Order from CreateOrderSerializer ``data`` for the
+    ``buyer`` Profile. Raises OrderError (invalid quantity), OutOfStock or
+    ledger.InsufficientFunds.
+    """
+    is_offline = data.get('sales_channel') in ['in_store', 'pop_up'] or data.get('is_offline', False)
+    items_data = data.get('items', [])
+    validate_quantities(items_data)
+
+    with transaction.atomic():
+        products = _lock_products(items_data)
+        _reserve_stock(products, items_data)
+
+        order = Order.objects.create(
+            buyer=buyer,
+            establishment=establishment,
+            order_type=data['order_type'],
+            delivery_mode=data['delivery_mode'],
+            payment_type=data.get('payment_type', 'individual'),
+            sales_channel=data.get('sales_channel', 'online'),
+            is_offline=is_offline,
+            delivery_address=data.get('delivery_address', ''),
+            notes=data.get('notes', ''),
+        )
+        items = OrderItem.objects.bulk_create(_build_items(order, products, items_data))
+        total = sum((item.subtotal for item in items), Decimal('0'))
+
+        # Service appointment
+        if data.get('service_time_slot_id'):
+            slot = ServiceTimeSlot.objects.select_related('service').filter(id=data['service_time_slot_id']).first()
+            if slot and not slot.is_booked:
+                slot.is_booked = True
+                slot.booked_by = buyer
+                slot.save()
+                order.service_time_slot = slot
+                total += slot.service.price
+
+        # Booking reference
+        if data.get('booking_id'):
+            booking = Booking.objects.filter(id=data['booking_id']).first()
+            if booking:
+                order.booking = booking
+                total += booking.total_price
+
+        order.total_amount = total
+
+        # Online individual purchases are paid from the buyer's balance
+        if not is_offline and data.get('payment_type', 'individual') == 'individual' and total > 0:
+            ledger.post_transfer(
+                ledger.wallet(payment_profile),
+                ledger.platform('shop'),
+                total,
+                transfer_type='purchase',
+                description='Online purchase order',
+                token_profile=payment_profile,
+                token_fields={'pay_from': 'internal', 'payment_option': 'comrade_balance'},
+            )
+
+        order.status = 'confirmed'
+        order.save()
+    return order
@@ -8,11 +8,32 @@ import base64
 from datetime import datetime
 from django.conf import settings
 
+from Payment.services.http_client import get_client, get_token_cache
+
 
 # Configure Stripe
 stripe.api_key = getattr(settings, 'STRIPE_SECRET_KEY', '')
 
 
+def _authorized_request(client, token_cache, fetch_token, method, path, **kwargs):
+    """Send a Bearer-authenticated request, refreshing the token once on 401."""
+    access_token = token_cache.get(fetch_token)
+    if not access_token:
+        return None
+    headers = dict(kwargs.pop('headers', {}) or {})
+    headers["Authorization"] = f"Bearer {access_token}"
+    headers.setdefault("Content-Type", "application/json")
+    r = client.request(method, path, headers=headers, **kwargs)
+    if r.status_code == 401:
+        token_cache.invalidate(access_token)
+        access_token = token_cache.get(fetch_token)
+        if not access_token:
+            return r
+        headers["Authorization"] = f"Bearer {access_token}"
+        r = client.request(method, path, headers=headers, **kwargs)
+    return r
+
+
 # ============================================================================
 # M-PESA PROVIDER
 # ============================================================================
@@ -21,33 +42,47 @@ class MpesaProvider:
     """Safaricom M-Pesa Daraja API integration."""
     
     @staticmethod
-    def get_access_token():
-        """Get OAuth access token from M-Pesa API."""
+    def _api_url():
+        return getattr(settings, 'MPESA_API_URL', 'https://sandbox.safaricom.co.ke')
+    
+    @staticmethod
+    def _client():
+        return get_client('mpesa', MpesaProvider._api_url())
+    
+    @staticmethod
+    def _token_cache():
+        consumer_key = getattr(settings, 'MPESA_CONSUMER_KEY', '')
+        return get_token_cache('mpesa', f"{MpesaProvider._api_url()}|{consumer_key}")
+    
+    @staticmethod
+    def _fetch_token():
+        """Request a new OAuth token; returns (access_token, expires_in)."""
         consumer_key = getattr(settings, 'MPESA_CONSUMER_KEY', '')
         consumer_secret = getattr(settings, 'MPESA_CONSUMER_SECRET', '')
         
         if not consumer_key or not consumer_secret:
-            return None
-        
-        api_url = getattr(settings, 'MPESA_API_URL', 'https://sandbox.safaricom.co.ke')
-        url = f"{api_url}/oauth/v1/generate?grant_type=client_credentials"
+            return None, None
         
         credentials = base64.b64encode(f"{consumer_key}:{consumer_secret}".encode()).decode()
         headers = {"Authorization": f"Basic {credentials}"}
         
         try:
-            r = requests.get(url, headers=headers, timeout=30)
-            return r.json().get('access_token')
+            r = MpesaProvider._client().get(
+                "/oauth/v1/generate", params={"grant_type": "client_credentials"}, headers=headers
+            )
+            data = r.json()
+            return data.get('access_token'), data.get('expires_in')
         except Exception:
-            return None
+            return None, None
+    
+    @staticmethod
+    def get_access_token():
+        """Get OAuth access token from M-Pesa API (cached until shortly before expiry)."""
+        return MpesaProvider._token_cache().get(MpesaProvider._fetch_token)
     
     @staticmethod
     def stk_push(phone_number, amount, account_reference, transaction_desc):
         """Initiate M-Pesa STK Push (Lipa Na M-Pesa Online)."""
-        access_token = MpesaProvider.get_access_token()
-        if not access_token:
-            return {"error": "M-Pesa authentication failed. Check API credentials."}
-        
         shortcode = getattr(settings, 'MPESA_BUSINESS_SHORTCODE', '')
         passkey = getattr(settings, 'MPESA_PASSKEY', '')
         callback_url = getattr(settings, 'MPESA_CALLBACK_URL', '')
@@ -77,13 +112,13 @@ class MpesaProvider:
             "TransactionDesc": transaction_desc[:13],
         }
         
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            r = requests.post(stk_url, json=payload, headers=headers, timeout=30)
+            r = _authorized_request(
+                MpesaProvider._client(), MpesaProvider._token_cache(), MpesaProvider._fetch_token,
+                'POST', stk_url, json=payload,
+            )
+            if r is None:
+                return {"error": "M-Pesa authentication failed. Check API credentials."}
             response = r.json()
             if response.get('ResponseCode') == '0':
                 return {
@@ -151,39 +186,58 @@ class PayPalProvider:
     """PayPal REST API integration."""
     
     @staticmethod
-    def get_access_token():
-        """Get PayPal OAuth access token."""
+    def _api_url():
+        return getattr(settings, 'PAYPAL_API_URL', 'https://api-m.sandbox.paypal.com')
+    
+    @staticmethod
+    def _client():
+        return get_client('paypal', PayPalProvider._api_url())
+    
+    @staticmethod
+    def _token_cache():
+        client_id = getattr(settings, 'PAYPAL_CLIENT_ID', '')
+        return get_token_cache('paypal', f"{PayPalProvider._api_url()}|{client_id}")
+    
+    @staticmethod
+    def _fetch_token():
+        """Request a new OAuth token; returns (access_token, expires_in)."""
         client_id = getattr(settings, 'PAYPAL_CLIENT_ID', '')
         client_secret = getattr(settings, 'PAYPAL_CLIENT_SECRET', '')
-        api_url = getattr(settings, 'PAYPAL_API_URL', 'https://api-m.sandbox.paypal.com')
         
         if not client_id or not client_secret:
-            return None
+            return None, None
         
         try:
             credentials = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
-            r = requests.post(
-                f"{api_url}/v1/oauth2/token",
+            r = PayPalProvider._client().post(
+                "/v1/oauth2/token",
                 headers={
                     "Authorization": f"Basic {credentials}",
                     "Content-Type": "application/x-www-form-urlencoded",
                 },
                 data="grant_type=client_credentials",
-                timeout=30,
+                idempotent=True,
             )
-            return r.json().get('access_token')
+            data = r.json()
+            return data.get('access_token'), data.get('expires_in')
         except Exception:
-            return None
+            return None, None
+    
+    @staticmethod
+    def get_access_token():
+        """Get PayPal OAuth access token (cached until shortly before expiry)."""
+        return PayPalProvider._token_cache().get(PayPalProvider._fetch_token)
+    
+    @staticmethod
+    def _request(method, path, **kwargs):
+        return _authorized_request(
+            PayPalProvider._client(), PayPalProvider._token_cache(), PayPalProvider._fetch_token,
+            method, path, **kwargs,
+        )
     
     @staticmethod
     def create_order(amount, currency='USD', description=''):
         """Create a PayPal order for checkout."""
-        access_token = PayPalProvider.get_access_token()
-        if not access_token:
-            return {"error": "PayPal authentication failed. Check API credentials."}
-        
-        api_url = getattr(settings, 'PAYPAL_API_URL', 'https://api-m.sandbox.paypal.com')
-        
         payload = {
             "intent": "CAPTURE",
             "purchase_units": [{
@@ -196,15 +250,9 @@ class PayPalProvider:
         }
         
         try:
-            r = requests.post(
-                f"{api_url}/v2/checkout/orders",
-                json=payload,
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json",
-                },
-                timeout=30,
-            )
+            r = PayPalProvider._request('POST', "/v2/checkout/orders", json=payload)
+            if r is None:
+                return {"error": "PayPal authentication failed. Check API credentials."}
             data = r.json()
             if r.status_code in (200, 201):
                 return {
@@ -221,21 +269,10 @@ class PayPalProvider:
     @staticmethod
     def capture_order(order_id):
         """Capture a previously approved PayPal order."""
-        access_token = PayPalProvider.get_access_token()
-        if not access_token:
-            return {"error": "PayPal authentication failed."}
-        
-        api_url = getattr(settings, 'PAYPAL_API_URL', 'https://api-m.sandbox.paypal.com')
-        
         try:
-            r = requests.post(
-                f"{api_url}/v2/checkout/orders/{order_id}/capture",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json",
-                },
-                timeout=30,
-            )
+            r = PayPalProvider._request('POST', f"/v2/checkout/orders/{order_id}/capture")
+            if r is None:
+                return {"error": "PayPal authentication failed."}
             data = r.json()
             if r.status_code in (200, 201):
                 return {
@@ -250,12 +287,6 @@ class PayPalProvider:
     @staticmethod
     def create_payout(email, amount, currency='USD', note=''):
         """Send a PayPal payout to an email address."""
-        access_token = PayPalProvider.get_access_token()
-        if not access_token:
-            return {"error": "PayPal authentication failed."}
-        
-        api_url = getattr(settings, 'PAYPAL_API_URL', 'https://api-m.sandbox.paypal.com')
-        
         import uuid
         payload = {
             "sender_batch_header": {
@@ -275,15 +306,9 @@ class PayPalProvider:
         }
         
         try:
-            r = requests.post(
-                f"{api_url}/v1/payments/payouts",
-                json=payload,
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json",
-                },
-                timeout=30,
-            )
+            r = PayPalProvider._request('POST', "/v1/payments/payouts", json=payload)
+            if r is None:
+                return {"error": "PayPal authentication failed."}
             data = r.json()
             if r.status_code in (200, 201):
                 return {
@@ -303,37 +328,50 @@ class EquityBankProvider:
     """Equity Bank Jenga API integration for bank transfers."""
     
     @staticmethod
-    def get_access_token():
-        """Get Jenga API access token."""
+    def _api_url():
+        return getattr(settings, 'EQUITY_API_URL', 'https://uat.jengahq.io')
+    
+    @staticmethod
+    def _client():
+        return get_client('equity', EquityBankProvider._api_url())
+    
+    @staticmethod
+    def _token_cache():
+        api_key = getattr(settings, 'EQUITY_API_KEY', '')
+        return get_token_cache('equity', f"{EquityBankProvider._api_url()}|{api_key}")
+    
+    @staticmethod
+    def _fetch_token():
+        """Request a new access token; returns (access_token, expires_in)."""
         api_key = getattr(settings, 'EQUITY_API_KEY', '')
         consumer_secret = getattr(settings, 'EQUITY_CONSUMER_SECRET', '')
-        api_url = getattr(settings, 'EQUITY_API_URL', 'https://uat.jengahq.io')
         
         if not api_key or not consumer_secret:
-            return None
+            return None, None
         
         try:
-            r = requests.post(
-                f"{api_url}/identity/v2/token",
+            r = EquityBankProvider._client().post(
+                "/identity/v2/token",
                 headers={
                     "Authorization": f"Basic {base64.b64encode(f'{api_key}:{consumer_secret}'.encode()).decode()}",
                     "Content-Type": "application/x-www-form-urlencoded",
                 },
                 data="grant_type=client_credentials",
-                timeout=30,
+                idempotent=True,
             )
-            return r.json().get('access_token')
+            data = r.json()
+            return data.get('access_token'), data.get('expires_in')
         except Exception:
-            return None
+            return None, None
+    
+    @staticmethod
+    def get_access_token():
+        """Get Jenga API access token (cached until shortly before expiry)."""
+        return EquityBankProvider._token_cache().get(EquityBankProvider._fetch_token)
     
     @staticmethod
     def send_to_bank(account_number, amount, bank_code='63', reference='', narration=''):
         """Send funds to an Equity Bank account via Jenga API."""
-        access_token = EquityBankProvider.get_access_token()
-        if not access_token:
-            return {"error": "Equity Bank authentication failed. Check API credentials."}
-        
-        api_url = getattr(settings, 'EQUITY_API_URL', 'https://uat.jengahq.io')
         merchant_code = getattr(settings, 'EQUITY_MERCHANT_CODE', '')
         
         payload = {
@@ -359,15 +397,12 @@ class EquityBankProvider:
         }
         
         try:
-            r = requests.post(
-                f"{api_url}/transaction/v2/remittance",
-                json=payload,
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json",
-                },
-                timeout=30,
+            r = _authorized_request(
+                EquityBankProvider._client(), EquityBankProvider._token_cache(),
+                EquityBankProvider._fetch_token, 'POST', "/transaction/v2/remittance", json=payload,
             )
+            if r is None:
+                return {"error": "Equity Bank authentication failed. Check API credentials."}
             data = r.json()
             if r.status_code in (200, 201):
                 return {
@@ -0,0 +1,175 @@
+"""
+Provider Reference Correlation
+Records the external id returned when a payment is initiated (M-Pesa STK push,
+Stripe PaymentIntent, PayPal order) and settles it when the provider calls back.
+
+Lookups go through the (provider, external_id) unique index, duplicate
+deliveries are no-ops, and balance effects are posted through the ledger.
+"""
+import logging
+import secrets
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from Payment.models import (
+    Contribution, PaymentAuthorization, PaymentGroupMember,
+    PaymentVerification, ProviderReference, TransactionHistory,
+)
+from Payment.services import ledger
+
+logger = logging.getLogger(__name__)
+
+# Key holding the external id in each provider's initiation result
+EXTERNAL_ID_KEYS = {
+    'mpesa': 'checkout_request_id',
+    'stripe': 'id',
+    'card': 'id',
+    'paypal': 'id',
+}
+
+# Payment methods that map onto a provider name
+PROVIDER_FOR_METHOD = {
+    'mpesa': 'mpesa',
+    'stripe': 'stripe',
+    'card': 'stripe',
+    'paypal': 'paypal',
+}
+
+
+def record_provider_reference(method, result, payment_profile, amount, purpose='deposit',
+                              transaction_token=None, payment_group=None):
+    """
+    Store the correlation row for a provider initiation ``result``.
+
+    Returns the ProviderReference, or None when the method/result carries no
+    external id (e.g. wallet payments or provider errors).
+    """
+    provider = PROVIDER_FOR_METHOD.get(method)
+    if not provider or not isinstance(result, dict) or 'error' in result:
+        return None
+    external_id = result.get(EXTERNAL_ID_KEYS[method])
+    if not external_id:
+        return None
+    try:
+        with transaction.atomic():
+            reference, _ = ProviderReference.objects.get_or_create(
+                provider=provider,
+                external_id=str(external_id),
+                defaults={
+                    'payment_profile': payment_profile,
+                    'amount': Decimal(str(amount)),
+                    'purpose': purpose,
+                    'transaction_token': transaction_token,
+                    'payment_group': payment_group,
+                },
+            )
+    except IntegrityError:
+        reference = ProviderReference.objects.get(provider=provider, external_id=str(external_id))
+    return reference
+
+
+def _record_history(reference, status):
+    if reference.transaction_token_id is None:
+        return
+    TransactionHistory.objects.create(
+        payment_profile_id=reference.payment_profile_id,
+        transaction_token_id=reference.transaction_token_id,
+        authorization_token=PaymentAuthorization.objects.create(
+            payment_profile_id=reference.payment_profile_id,
+            authorization_code=secrets.token_hex(16)
+        ),
+        verification_token=PaymentVerification.objects.create(
+            payment_profile_id=reference.payment_profile_id,
+            verification_code=secrets.token_hex(16)
+        ),
+        status=status,
+    )
+
+
+def _ledger_key(reference, outcome):
+    return f'{reference.provider}:{reference.external_id}:{outcome}'
+
+
+def _apply_success(reference):
+    if reference.purpose == 'deposit':
+        ledger.post_transfer(
+            ledger.external(reference.provider),
+            ledger.wallet(reference.payment_profile_id),
+            reference.amount,
+            transfer_type='deposit',
+            idempotency_key=_ledger_key(reference, 'settled'),
+        )
+    elif reference.purpose == 'contribution' and reference.payment_group_id:
+        ledger.post_transfer(
+            ledger.external(reference.provider),
+            ledger.group(reference.payment_group_id),
+            reference.amount,
+            transfer_type='contribution',
+            idempotency_key=_ledger_key(reference, 'settled'),
+        )
+        member = PaymentGroupMember.objects.filter(
+            payment_group_id=reference.payment_group_id,
+            payment_profile_id=reference.payment_profile_id,
+        ).first()
+        if member:
+            PaymentGroupMember.objects.filter(pk=member.pk).update(
+                total_contributed=F('total_contributed') + reference.amount
+            )
+            Contribution.objects.create(
+                payment_group_id=reference.payment_group_id,
+                member=member,
+                amount=reference.amount,
+                transaction_id=reference.transaction_token_id,
+                notes=f'{reference.get_provider_display()} {reference.external_id}',
+            )
+
+
+def _apply_failure(reference):
+    # Withdrawals debit the wallet up front; give the money back if the payout fails
+    if reference.purpose == 'withdrawal':
+        ledger.post_transfer(
+            ledger.external(reference.provider),
+            ledger.wallet(reference.payment_profile_id),
+            reference.amount,
+            transfer_type='refund',
+            idempotency_key=_ledger_key(reference, 'reversed'),
+        )
+
+
+def settle_provider_reference(provider, external_id, succeeded, payload=None):
+    """
+    Apply a provider callback/webhook exactly once.
+
+    Returns ``(reference, applied)``; ``reference`` is None for unknown ids and
+    ``applied`` is False when the reference was already settled (duplicate
+    delivery).
+    """
+    if not external_id:
+        return None, False
+    with transaction.atomic():
+        reference = (
+            ProviderReference.objects.select_for_update()
+            .filter(provider=provider, external_id=str(external_id))
+            .first()
+        )
+        if reference is None:
+            return None, False
+        if reference.status != 'pending':
+            logger.info('Duplicate %s delivery for %s ignored', provider, external_id)
+            return reference, False
+
+        status = 'completed' if succeeded else 'failed'
+        if succeeded:
+            _apply_success(reference)
+        else:
+            _apply_failure(reference)
+        _record_history(reference, status)
+
+        reference.status = status
+        reference.result_payload = payload or {}
+        reference.processed_at = timezone.now()
+        reference.save(update_fields=['status', 'result_payload', 'processed_at'])
+    return reference, True
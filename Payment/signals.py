@@ -5,7 +5,8 @@ This lets every Business, CapitalVenture, ShopRegistration, Organisation,
 Institution, and Specialization have its own fund pool for tracking money.
 """
 import logging
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 
@@ -174,3 +175,15 @@ def auto_create_room_for_group(sender, instance, created, **kwargs):
     except Exception as e:
         logger.warning(f"Failed to auto-create room for group {instance.name}: {e}")
 
+
+
+# ──────────────────────────────────────────────
+# 8. Keep the recommendation catalog matrix fresh
+# ──────────────────────────────────────────────
+@receiver(post_save, sender='Payment.Product')
+@receiver(post_delete, sender='Payment.Product')
+def refresh_recommendation_catalog(sender, instance, **kwargs):
+    """Queue the product's catalog row for re-scoring once the write commits."""
+    from Payment.recommendation_service import mark_product_changed
+    product_id = instance.pk
+    transaction.on_commit(lambda: mark_product_changed(product_id))
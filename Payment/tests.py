@@ -1,10 +1,17 @@
-from django.test import TestCase
+from django.test import TestCase, SimpleTestCase, TransactionTestCase, override_settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from datetime import timedelta
 from decimal import Decimal
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from Payment.models import PaymentProfile, PaymentGroups, PaymentGroupMember, GroupInvitation
 
 User = get_user_model()
@@ -112,9 +119,9 @@ class PaymentGroupContributionTests(PaymentGroupBaseTestCase):
             {'amount': '100.00', 'payment_method': 'wallet'}
         )
         self.assertIn(resp.status_code, [status.HTTP_200_OK, status.HTTP_201_CREATED])
-        self.group.refresh_from_db()
+        from Payment.services import kitty
         self.profile2.refresh_from_db()
-        self.assertEqual(self.group.current_amount, Decimal('100.00'))
+        self.assertEqual(kitty.balance(self.group, fresh=True), Decimal('100.00'))
         self.assertEqual(self.profile2.comrade_balance, Decimal('400.00'))
     
     def test_wallet_contribution_insufficient_balance(self):
@@ -423,3 +430,655 @@ class PaymentGroupDeletionTests(PaymentGroupBaseTestCase):
             f'/api/payments/groups/{self.group.id}/'
         )
         self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class _FakeProviderHandler(BaseHTTPRequestHandler):
+    """Minimal M-Pesa/PayPal lookalike used by the provider client tests"""
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is observable
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send(self, code, body):
+        payload = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits['token'] += 1
+            server.connections.add(self.client_address)
+        self._send(200, {'access_token': f"tok-{server.hits['token']}", 'expires_in': '3599'})
+    
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+        with server.lock:
+            server.connections.add(self.client_address)
+            if self.path.startswith('/v1/oauth2/token'):
+                server.hits['token'] += 1
+                if server.fail_token_once:
+                    server.fail_token_once = False
+                    return self._send(503, {'message': 'try again'})
+                return self._send(200, {'access_token': f"tok-{server.hits['token']}", 'expires_in': 32400})
+            server.hits['api'] += 1
+            server.auth_headers.append(self.headers.get('Authorization'))
+            reject = server.reject_next_api
+            server.reject_next_api = False
+        if reject:
+            return self._send(401, {'message': 'expired token'})
+        if self.path.startswith('/v2/checkout/orders'):
+            return self._send(201, {'id': 'ORDER-1', 'status': 'CREATED', 'links': []})
+        self._send(200, {
+            'ResponseCode': '0', 'CheckoutRequestID': 'ws_CO_1',
+            'MerchantRequestID': 'mr-1', 'CustomerMessage': 'ok',
+        })
+
+
+class PaymentProviderClientTests(SimpleTestCase):
+    """Tests for pooled provider sessions and cached OAuth tokens"""
+    
+    def setUp(self):
+        from Payment.services.http_client import reset_clients
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeProviderHandler)
+        self.server.lock = threading.Lock()
+        self.server.hits = {'token': 0, 'api': 0}
+        self.server.connections = set()
+        self.server.auth_headers = []
+        self.server.fail_token_once = False
+        self.server.reject_next_api = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        reset_clients()
+        self.addCleanup(reset_clients)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+    
+    def _mpesa_settings(self):
+        return override_settings(
+            MPESA_CONSUMER_KEY='key', MPESA_CONSUMER_SECRET='secret',
+            MPESA_API_URL=self.base_url, MPESA_STK_PUSH_URL=f"{self.base_url}/mpesa/stkpush/v1/processrequest",
+            MPESA_BUSINESS_SHORTCODE='174379', MPESA_PASSKEY='pass', MPESA_CALLBACK_URL='http://cb',
+        )
+    
+    def test_token_fetched_once_across_payments(self):
+        from Payment.services.payment_service import MpesaProvider
+        with self._mpesa_settings():
+            for _ in range(5):
+                result = MpesaProvider.stk_push('0712345678', 10, 'ref', 'desc')
+                self.assertEqual(result['checkout_request_id'], 'ws_CO_1')
+        self.assertEqual(self.server.hits['token'], 1)
+        self.assertEqual(self.server.hits['api'], 5)
+        # Keep-alive: all six requests reused a single pooled connection
+        self.assertEqual(len(self.server.connections), 1)
+    
+    def test_single_flight_refresh_across_threads(self):
+        from Payment.services.payment_service import MpesaProvider
+        with self._mpesa_settings():
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                tokens = list(pool.map(lambda _: MpesaProvider.get_access_token(), range(32)))
+        self.assertEqual(set(tokens), {'tok-1'})
+        self.assertEqual(self.server.hits['token'], 1)
+    
+    def test_token_refreshed_after_401(self):
+        from Payment.services.payment_service import MpesaProvider
+        with self._mpesa_settings():
+            MpesaProvider.get_access_token()
+            self.server.reject_next_api = True
+            result = MpesaProvider.stk_push('0712345678', 10, 'ref', 'desc')
+        self.assertEqual(result['status'], 'pending')
+        self.assertEqual(self.server.hits['token'], 2)
+        self.assertEqual(self.server.auth_headers, ['Bearer tok-1', 'Bearer tok-2'])
+    
+    def test_token_endpoint_retried_with_backoff(self):
+        from Payment.services.http_client import get_client, RetryPolicy
+        from Payment.services.payment_service import PayPalProvider
+        get_client('paypal', self.base_url, retry_policy=RetryPolicy(backoff=0.01))
+        self.server.fail_token_once = True
+        with override_settings(PAYPAL_CLIENT_ID='id', PAYPAL_CLIENT_SECRET='secret', PAYPAL_API_URL=self.base_url):
+            result = PayPalProvider.create_order(25, description='Test')
+        self.assertEqual(result['id'], 'ORDER-1')
+        self.assertEqual(self.server.hits['token'], 2)
+        self.assertEqual(self.server.hits['api'], 1)
+
+    def test_failed_connect_retried_once_per_attempt(self):
+        import requests
+        from Payment.services.http_client import ProviderHTTPClient, RetryPolicy
+        client = ProviderHTTPClient('test', self.base_url, retry_policy=RetryPolicy(attempts=3, backoff=0.001))
+        self.addCleanup(client.close)
+        for method in ('POST', 'GET'):
+            with mock.patch('urllib3.connection.connection.create_connection',
+                            side_effect=ConnectionRefusedError) as connect:
+                with self.assertRaises(requests.ConnectionError):
+                    client.request(method, '/api')
+            self.assertEqual(connect.call_count, 3)
+
+
+@override_settings(DEBUG=True)
+class ProviderCallbackCorrelationTests(PaymentGroupBaseTestCase):
+    """Tests for provider-reference correlation of M-Pesa callbacks"""
+    
+    def _callback(self, checkout_id, result_code=0):
+        return APIClient().post('/api/payments/mpesa/callback/', {
+            'Body': {'stkCallback': {
+                'CheckoutRequestID': checkout_id, 'ResultCode': result_code, 'ResultDesc': 'ok',
+            }},
+        }, format='json')
+    
+    def _pending_deposit(self, checkout_id, amount='50.00'):
+        from Payment.models import TransactionToken
+        from Payment.services.provider_references import record_provider_reference
+        token = TransactionToken.objects.create(
+            payment_profile=self.profile2, amount=Decimal(amount),
+            transaction_type='deposit', payment_option='mpesa',
+        )
+        return record_provider_reference(
+            'mpesa', {'status': 'pending', 'checkout_request_id': checkout_id},
+            self.profile2, amount, 'deposit', transaction_token=token,
+        )
+    
+    def test_callback_credits_wallet_once(self):
+        """Duplicate callback deliveries must not double-credit"""
+        self._pending_deposit('ws_CO_123')
+        for _ in range(3):
+            resp = self._callback('ws_CO_123')
+            self.assertEqual(resp.data['ResultCode'], 0)
+        self.profile2.refresh_from_db()
+        self.assertEqual(self.profile2.comrade_balance, Decimal('550.00'))
+    
+    def test_failed_callback_marks_reference(self):
+        reference = self._pending_deposit('ws_CO_456')
+        self._callback('ws_CO_456', result_code=1032)
+        reference.refresh_from_db()
+        self.assertEqual(reference.status, 'failed')
+        self.profile2.refresh_from_db()
+        self.assertEqual(self.profile2.comrade_balance, Decimal('500.00'))
+    
+    def test_recording_is_idempotent_per_external_id(self):
+        from Payment.models import ProviderReference
+        first = self._pending_deposit('ws_CO_789')
+        second = self._pending_deposit('ws_CO_789')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(ProviderReference.objects.filter(external_id='ws_CO_789').count(), 1)
+
+
+class PaymentProfileResolutionTests(TestCase):
+    """Tests for signal-created profiles and request-scoped resolution"""
+    
+    def test_profile_chain_created_with_user(self):
+        from Authentication.models import Profile
+        user = User.objects.create_user(email='chain@test.com', password='testpass123',
+                                        first_name='Chain', last_name='User')
+        profile = Profile.objects.get(user=user)
+        self.assertTrue(PaymentProfile.objects.filter(user=profile).exists())
+    
+    def test_resolution_memoized_within_scope(self):
+        from Payment.utils import get_or_create_payment_profile, payment_profile_scope
+        user = User.objects.create_user(email='memo@test.com', password='testpass123',
+                                        first_name='Memo', last_name='User')
+        with payment_profile_scope():
+            with self.assertNumQueries(1):
+                first = get_or_create_payment_profile(user)
+                second = get_or_create_payment_profile(user)
+        self.assertIs(first, second)
+    
+    def test_ledger_posting_evicts_memoized_profile(self):
+        from Payment.services import ledger
+        from Payment.utils import get_or_create_payment_profile, payment_profile_scope
+        user = User.objects.create_user(email='memo2@test.com', password='testpass123',
+                                        first_name='Memo', last_name='User')
+        with payment_profile_scope():
+            first = get_or_create_payment_profile(user)
+            ledger.post_transfer(ledger.external('mpesa'), ledger.wallet(first), '10.00')
+            second = get_or_create_payment_profile(user)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.comrade_balance, first.comrade_balance + Decimal('10.00'))
+    
+    def test_backfill_creates_missing_rows(self):
+        from Authentication.models import Profile
+        from Payment.utils import backfill_payment_profiles
+        user = User.objects.create_user(email='legacy@test.com', password='testpass123',
+                                        first_name='Legacy', last_name='User')
+        Profile.objects.filter(user=user).delete()
+        created = backfill_payment_profiles(User, Profile, PaymentProfile)
+        self.assertEqual(created, (1, 1))
+        self.assertTrue(PaymentProfile.objects.filter(user__user=user).exists())
+        # Nothing left to create: nothing counted
+        self.assertEqual(backfill_payment_profiles(User, Profile, PaymentProfile), (0, 0))
+
+
+class LedgerTests(PaymentGroupBaseTestCase):
+    """Tests for balanced ledger postings and batched group settlement"""
+    
+    def setUp(self):
+        super().setUp()
+        self.member2 = PaymentGroupMember.objects.create(
+            payment_group=self.group,
+            payment_profile=self.profile2,
+        )
+    
+    def test_transfer_writes_balanced_entries(self):
+        from Payment.services import ledger
+        posted = ledger.post_transfer(ledger.wallet(self.profile1), ledger.wallet(self.profile2), '25.50')
+        self.profile1.refresh_from_db()
+        self.profile2.refresh_from_db()
+        self.assertEqual(self.profile1.comrade_balance, Decimal('974.50'))
+        self.assertEqual(self.profile2.comrade_balance, Decimal('525.50'))
+        amounts = sorted(posted.entries.values_list('amount', flat=True))
+        self.assertEqual(amounts, [Decimal('-25.50'), Decimal('25.50')])
+    
+    def test_insufficient_funds_rolls_back(self):
+        from Payment.models import LedgerTransfer
+        from Payment.services import ledger
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.post_transfer(ledger.wallet(self.profile3), ledger.wallet(self.profile1), '200.01')
+        self.profile3.refresh_from_db()
+        self.assertEqual(self.profile3.comrade_balance, Decimal('200.00'))
+        self.assertFalse(LedgerTransfer.objects.exists())
+    
+    def test_idempotency_key_posts_once(self):
+        from Payment.services import ledger
+        first = ledger.post_transfer(ledger.external('mpesa'), ledger.wallet(self.profile3), 10,
+                                     idempotency_key='mpesa:abc:settled')
+        second = ledger.post_transfer(ledger.external('mpesa'), ledger.wallet(self.profile3), 10,
+                                      idempotency_key='mpesa:abc:settled')
+        self.assertEqual(first.pk, second.pk)
+        self.profile3.refresh_from_db()
+        self.assertEqual(self.profile3.comrade_balance, Decimal('210.00'))
+    
+    def test_batched_group_settlement(self):
+        from Payment.models import Contribution
+        from Payment.services import ledger
+        member1 = PaymentGroupMember.objects.get(payment_group=self.group, payment_profile=self.profile1)
+        from Payment.services import kitty
+        ledger.settle_group_contributions(self.group, [(member1, 100), (self.member2, 50), (member1, 25)])
+        member1.refresh_from_db()
+        self.assertEqual(kitty.balance(self.group, fresh=True), Decimal('175.00'))
+        self.assertEqual(member1.total_contributed, Decimal('125.00'))
+        self.assertEqual(Contribution.objects.filter(payment_group=self.group).count(), 3)
+        self.assertEqual(ledger.account_balance_from_entries(ledger.group(self.group)), Decimal('175.00'))
+    
+    def test_kitty_withdraw_posts_to_ledger(self):
+        from Payment.services import ledger
+        self.group.current_amount = Decimal('300.00')
+        self.group.save()
+        resp = self.client1.post(f'/api/payments/groups/{self.group.id}/kitty_withdraw/', {'amount': '120'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.group.refresh_from_db()
+        self.profile1.refresh_from_db()
+        self.assertEqual(self.group.current_amount, Decimal('180.00'))
+        self.assertEqual(self.profile1.comrade_balance, Decimal('1120.00'))
+        self.assertEqual(ledger.account_balance_from_entries(ledger.wallet(self.profile1)), Decimal('120.00'))
+
+
+class ProductRecommendationTests(PaymentGroupBaseTestCase):
+    """Tests for the recommendation endpoint and catalog change tracking"""
+    
+    def setUp(self):
+        super().setUp()
+        from Payment.models import Product
+        self.products = [
+            Product.objects.create(name=f'Notebook {i}', description='A5 ruled notebook', price=Decimal('3.50'))
+            for i in range(3)
+        ]
+    
+    def test_recommendations_return_catalog_products(self):
+        resp = self.client1.get('/api/payments/products/recommendations/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        ids = {p['id'] for p in resp.data}
+        self.assertTrue(ids)
+        self.assertTrue(ids <= {p.pk for p in self.products})
+    
+    def test_out_of_range_limit_is_clamped(self):
+        for limit in ('0', '-5'):
+            resp = self.client1.get('/api/payments/products/recommendations/', {'limit': limit})
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(resp.data), 1)
+    
+    def test_product_edit_bumps_catalog_version(self):
+        from django.core.cache import cache
+        from Payment.recommendation_service import CATALOG_VERSION_KEY, CATALOG_CHANGE_KEY
+        before = cache.get(CATALOG_VERSION_KEY, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].name = 'Notebook deluxe'
+            self.products[0].save()
+        after = cache.get(CATALOG_VERSION_KEY)
+        self.assertEqual(after, before + 1)
+        self.assertEqual(cache.get(CATALOG_CHANGE_KEY.format(after)), self.products[0].pk)
+
+
+class CheckoutDistributionTests(PaymentGroupBaseTestCase):
+    """Tests for supplier/platform/discount splits attached to checkouts"""
+    
+    def test_item_distributions_balance(self):
+        from Payment.distribution_service import compute_item_distributions
+        items = [{'price': '120.00', 'qty': 2}, {'price': '15000', 'qty': 1, 'type': 'digital'}]
+        dists = compute_item_distributions(self.profile1, items)
+        self.assertEqual(len(dists), 2)
+        for item, dist in zip(items, dists):
+            fractions = dist['supplier_gain'] + dist['platform_fee'] + dist['user_discount']
+            self.assertAlmostEqual(fractions, 1.0, places=3)
+            amounts = sum(Decimal(dist[k]) for k in ('supplier_amount', 'platform_amount', 'discount_amount'))
+            self.assertEqual(amounts, Decimal(item['price']) * item['qty'])
+    
+    def test_checkout_records_distribution(self):
+        from Payment.models import OrderItem
+        resp = self.client1.post('/api/payments/profiles/checkout/', {
+            'amount': '50.00',
+            'payment_method': 'wallet',
+            'items': [{'type': 'other', 'name': 'Pens', 'price': '25.00', 'qty': 2}],
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn('distribution', resp.data)
+        item = OrderItem.objects.get(order_id=resp.data['order_id'])
+        self.assertIn('distribution', item.metadata)
+    
+    def test_checkout_rejects_invalid_quantity(self):
+        from Payment.models import Order
+        for qty in ('2.5', 'x', 0):
+            resp = self.client1.post('/api/payments/profiles/checkout/', {
+                'amount': '50.00',
+                'payment_method': 'wallet',
+                'items': [{'type': 'other', 'name': 'Pens', 'price': '25.00', 'qty': qty}],
+            }, format='json')
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('Invalid quantity', resp.data['error'])
+        self.profile1.refresh_from_db()
+        self.assertEqual(self.profile1.comrade_balance, Decimal('1000.00'))
+        self.assertFalse(Order.objects.exists())
+    
+    def test_group_checkout_survives_failed_funding_credit(self):
+        from django.db import DatabaseError
+        from Funding.models import Business
+        from Payment.models import Order, Product
+        PaymentGroups.objects.filter(pk=self.group.pk).update(current_amount=Decimal('100.00'))
+        
+        def failing_lookup(**kwargs):
+            Product.objects.create(name='Half-written', description='', price=Decimal('1.00'))
+            raise DatabaseError('lookup failed')
+        
+        with mock.patch.object(Business.objects, 'filter', side_effect=failing_lookup):
+            resp = self.client1.post(f'/api/payments/groups/{self.group.id}/group_checkout/', {
+                'amount': '10.00',
+                'items': [{'type': 'funding', 'id': 'venture-1', 'name': 'Pledge', 'price': '10.00', 'qty': 1}],
+            }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(Order.objects.filter(pk=resp.data['order_id']).exists())
+        self.assertFalse(Product.objects.filter(name='Half-written').exists())
+
+
+class TrainingLogTailTests(SimpleTestCase):
+    """Tests for the incremental training log reader behind the ML dashboard"""
+    
+    def setUp(self):
+        import tempfile
+        self.path = os.path.join(tempfile.mkdtemp(), 'training_log.csv')
+        with open(self.path, 'w') as f:
+            f.write("episode,reward\n")
+            for i in range(120):
+                f.write(f"{i},{'nan' if i == 118 else i * 0.5}\n")
+    
+    def test_tail_returns_last_rows(self):
+        from Payment.training_log_service import read_log_tail
+        tail = read_log_tail(self.path, rows=50)
+        self.assertEqual([r['episode'] for r in tail['rows']], list(range(70, 120)))
+        self.assertIsNone(tail['rows'][-2]['reward'])
+        self.assertEqual(tail['offset'], os.path.getsize(self.path))
+    
+    def test_since_offset_returns_only_complete_new_rows(self):
+        from Payment.training_log_service import read_log_tail, read_log_since
+        offset = read_log_tail(self.path)['offset']
+        self.assertEqual(read_log_since(self.path, offset)['rows'], [])
+        with open(self.path, 'a') as f:
+            f.write("120,60.0\n121,6")  # second row still being written
+        new = read_log_since(self.path, offset)
+        self.assertEqual(new['rows'], [{'episode': 120, 'reward': 60.0}])
+        self.assertFalse(new['reset'])
+        with open(self.path, 'a') as f:
+            f.write("0.5\n")
+        self.assertEqual(read_log_since(self.path, new['offset'])['rows'], [{'episode': 121, 'reward': 60.5}])
+    
+    def test_truncated_log_resets_to_tail(self):
+        from Payment.training_log_service import read_log_tail, read_log_since
+        offset = read_log_tail(self.path)['offset']
+        with open(self.path, 'w') as f:
+            f.write("episode,reward\n1,0.5\n")
+        result = read_log_since(self.path, offset)
+        self.assertTrue(result['reset'])
+        self.assertEqual(result['rows'], [{'episode': 1, 'reward': 0.5}])
+
+
+class PaymentAggregateQueryTests(PaymentGroupBaseTestCase):
+    """List endpoints compute per-row counts/sums in one grouped query per relation"""
+    
+    def _count_queries(self, client, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), resp
+    
+    def _make_group(self, name, contributions=()):
+        from Payment.models import Contribution
+        group = PaymentGroups.objects.create(
+            name=name, creator=self.profile1, target_amount=Decimal('500.00'),
+            max_capacity=10, expiry_date=timezone.now() + timedelta(days=30),
+        )
+        member = PaymentGroupMember.objects.create(payment_group=group, payment_profile=self.profile1, is_admin=True)
+        PaymentGroupMember.objects.create(payment_group=group, payment_profile=self.profile2)
+        for amount in contributions:
+            Contribution.objects.create(payment_group=group, member=member, amount=Decimal(amount))
+        return group
+    
+    def test_group_list_queries_do_not_grow_with_groups(self):
+        small, _ = self._count_queries(self.client1, '/api/payments/groups/')
+        for i in range(5):
+            self._make_group(f'Group {i}', contributions=['10.00', '15.00'])
+        large, resp = self._count_queries(self.client1, '/api/payments/groups/')
+        self.assertEqual(small, large)
+        rows = resp.data['results'] if isinstance(resp.data, dict) else resp.data
+        made = [g for g in rows if g['name'].startswith('Group ')]
+        self.assertTrue(all(g['member_count'] == 2 for g in made))
+        self.assertTrue(all(g['contributions_summary']['total_contributions'] == 2 for g in made))
+    
+    def test_vote_list_counts_and_user_vote(self):
+        from Payment.models import GroupVote
+        for i in range(2):
+            GroupVote.objects.create(group=self.group, created_by=self.profile1, title=f'Vote {i}')
+        small, _ = self._count_queries(self.client1, '/api/payments/group-votes/')
+        for i in range(6):
+            vote = GroupVote.objects.create(group=self.group, created_by=self.profile1, title=f'More {i}')
+            vote.votes_for.add(self.profile1)
+            vote.votes_against.add(self.profile2)
+        large, resp = self._count_queries(self.client1, '/api/payments/group-votes/')
+        self.assertEqual(small, large)
+        rows = resp.data['results'] if isinstance(resp.data, dict) else resp.data
+        voted = [v for v in rows if v['title'].startswith('More')]
+        self.assertEqual(len(voted), 6)
+        for v in voted:
+            self.assertEqual((v['votes_for_count'], v['votes_against_count'], v['total_votes']), (1, 1, 2))
+            self.assertEqual(v['approval_percentage'], 50.0)
+            self.assertEqual(v['user_vote'], 'for')
+    
+    def test_kitty_inflow_and_monthly_data(self):
+        from Payment.serializers import KittySerializer
+        kitty = self._make_group('Kitty', contributions=['40.00', '60.00'])
+        kitty.current_amount = Decimal('30.00')
+        with self.assertNumQueries(4):  # inflow, members, monthly, kitty shards — once each
+            data = KittySerializer([kitty], many=True).data[0]
+        self.assertEqual(data['total_inflow'], 100.0)
+        self.assertEqual(data['total_outflow'], 70.0)
+        self.assertEqual(data['investors_count'], 2)
+        self.assertEqual(sum(m['inflow'] for m in data['monthly_data']), 100.0)
+
+
+class KittyShardTests(PaymentGroupBaseTestCase):
+    """Tests for sharded kitty balances"""
+    
+    def setUp(self):
+        super().setUp()
+        self.member1 = PaymentGroupMember.objects.get(payment_group=self.group, payment_profile=self.profile1)
+    
+    def test_credits_land_on_shards_and_compact_folds_them(self):
+        from Payment.models import KittyShard
+        from Payment.services import kitty, ledger
+        for amount in (10, 20, 30):
+            ledger.settle_group_contributions(self.group, [(self.member1, amount)])
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.current_amount, Decimal('0.00'))
+        self.assertEqual(kitty.balance(self.group, fresh=True), Decimal('60.00'))
+        
+        self.assertEqual(kitty.compact(), {self.group.pk: Decimal('60.00')})
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.current_amount, Decimal('60.00'))
+        self.assertFalse(KittyShard.objects.exclude(amount=0).exists())
+        self.assertEqual(kitty.balance(self.group, fresh=True), Decimal('60.00'))
+    
+    def test_debit_sees_uncompacted_credits(self):
+        from Payment.services import kitty, ledger
+        ledger.settle_group_contributions(self.group, [(self.member1, 100)])
+        ledger.post_transfer(ledger.group(self.group), ledger.wallet(self.profile2), 80)
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.post_transfer(ledger.group(self.group), ledger.wallet(self.profile2), 21)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.current_amount, Decimal('20.00'))
+        self.assertEqual(kitty.balance(self.group, fresh=True), Decimal('20.00'))
+    
+    def test_group_list_reports_sharded_balance(self):
+        from Payment.services import ledger
+        ledger.settle_group_contributions(self.group, [(self.member1, 40)])
+        resp = self.client1.get(f'/api/payments/groups/{self.group.id}/')
+        self.assertEqual(Decimal(resp.data['current_amount']), Decimal('40.00'))
+        self.assertEqual(resp.data['progress_percentage'], 4.0)
+
+
+class OrderPlacementTests(PaymentGroupBaseTestCase):
+    """Tests for priced, stock-reserving order creation"""
+    
+    def setUp(self):
+        super().setUp()
+        from Payment.models import Product
+        self.mug = Product.objects.create(name='Mug', description='Ceramic mug', price=Decimal('12.00'), stock_quantity=3)
+        self.ebook = Product.objects.create(name='E-book', description='PDF', price=Decimal('5.00'), product_type='digital')
+    
+    def _order(self, client, items):
+        return client.post('/api/payments/orders/', {
+            'order_type': 'product', 'delivery_mode': 'pickup', 'items': items,
+        }, format='json')
+    
+    def test_order_prices_items_and_takes_stock(self):
+        resp = self._order(self.client1, [
+            {'id': self.mug.pk, 'quantity': 2, 'price': '0.01'},
+            {'id': self.ebook.pk, 'quantity': 1},
+            {'id': self.mug.pk, 'quantity': 1},
+        ])
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Decimal(str(resp.data['total_amount'])), Decimal('41.00'))
+        self.mug.refresh_from_db()
+        self.profile1.refresh_from_db()
+        self.assertEqual(self.mug.stock_quantity, 0)
+        self.assertEqual(self.profile1.comrade_balance, Decimal('959.00'))
+    
+    def test_oversell_rolls_back_whole_order(self):
+        from Payment.models import Order
+        resp = self._order(self.client1, [{'id': self.ebook.pk, 'quantity': 1}, {'id': self.mug.pk, 'quantity': 4}])
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data['available'], 3)
+        self.mug.refresh_from_db()
+        self.profile1.refresh_from_db()
+        self.assertEqual(self.mug.stock_quantity, 3)
+        self.assertEqual(self.profile1.comrade_balance, Decimal('1000.00'))
+        self.assertFalse(Order.objects.exists())
+    
+    def test_invalid_quantities_are_rejected(self):
+        from Payment.models import Order
+        for quantity in (-50, 0, 'lots'):
+            resp = self._order(self.client1, [{'id': self.mug.pk, 'quantity': quantity}])
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, quantity)
+            self.assertIn('Invalid quantity', resp.data['error'])
+        self.mug.refresh_from_db()
+        self.profile1.refresh_from_db()
+        self.assertEqual(self.mug.stock_quantity, 3)
+        self.assertEqual(self.profile1.comrade_balance, Decimal('1000.00'))
+        self.assertFalse(Order.objects.exists())
+    
+    def test_failed_funding_credit_is_rolled_back_alone(self):
+        from django.db import DatabaseError
+        from Payment.models import Product
+        
+        def failing_credit(item_id, item_total):
+            Product.objects.create(name='Half-written', description='', price=Decimal('1.00'))
+            raise DatabaseError('credit failed')
+        
+        with mock.patch('Payment.services.orders._credit_funding', side_effect=failing_credit):
+            resp = self._order(self.client1, [{'type': 'funding', 'id': 'venture-1', 'price': '10.00', 'quantity': 1}])
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Product.objects.filter(name='Half-written').exists())
+        self.profile1.refresh_from_db()
+        self.assertEqual(self.profile1.comrade_balance, Decimal('990.00'))
+    
+    def test_insufficient_balance_releases_stock(self):
+        self.mug.stock_quantity = 20
+        self.mug.save()
+        resp = self._order(self.client3, [{'id': self.mug.pk, 'quantity': 20}])
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data['error'], 'Insufficient balance')
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.stock_quantity, 20)
+
+
+class OrderOversellTests(TransactionTestCase):
+    """Concurrent checkouts of the last units of a product"""
+    
+    def test_concurrent_checkouts_never_oversell(self):
+        from django.db import OperationalError, connection
+        from Authentication.models import Profile
+        from Payment.models import OrderItem, Product
+        from Payment.services.orders import OutOfStock, place_order
+        from Payment.utils import get_or_create_payment_profile
+        
+        stock, buyers = 5, 12
+        product = Product.objects.create(name='Limited print', description='Signed', price=Decimal('20.00'),
+                                         stock_quantity=stock)
+        accounts = []
+        for i in range(buyers):
+            user = User.objects.create_user(email=f'buyer{i}@test.com', password='testpass123',
+                                            first_name='Buyer', last_name=str(i))
+            payment_profile = get_or_create_payment_profile(user)
+            payment_profile.comrade_balance = Decimal('100.00')
+            payment_profile.save()
+            accounts.append((Profile.objects.get(user=user), payment_profile))
+        data = {'order_type': 'product', 'delivery_mode': 'pickup',
+                'items': [{'id': product.pk, 'quantity': 1}]}
+        start = threading.Barrier(buyers)
+        
+        def checkout(account):
+            start.wait()
+            try:
+                while True:
+                    try:
+                        place_order(*account, data)
+                        return 'placed'
+                    except OutOfStock:
+                        return 'sold out'
+                    except OperationalError:
+                        # SQLite serializes writers with "database is locked"; try again
+                        time.sleep(0.01)
+            finally:
+                connection.close()
+        
+        with ThreadPoolExecutor(max_workers=buyers) as pool:
+            outcomes = list(pool.map(checkout, accounts))
+        
+        product.refresh_from_db()
+        self.assertEqual(outcomes.count('placed'), stock)
+        self.assertEqual(outcomes.count('sold out'), buyers - stock)
+        self.assertEqual(product.stock_quantity, 0)
+        self.assertEqual(OrderItem.objects.filter(product=product).count(), stock)
+        debited = PaymentProfile.objects.filter(comrade_balance=Decimal('80.00')).count()
+        self.assertEqual(debited, stock)
@@ -0,0 +1,200 @@
+"""
+Incremental readers for the ML pipeline's training logs.
+
+The training scripts append one CSV row per episode/epoch, so the logs only
+grow during a run. Instead of parsing whole files on every dashboard poll:
+
+- read_log_tail(): last N rows, read backwards from the end of the file in
+  blocks. The parsed result is cached per path and reused while the file's
+  (inode, size, mtime) is unchanged.
+- read_log_since(): rows appended after a byte offset returned by an
+  earlier call, so a polling dashboard only fetches new rows.
+- read_text_tail(): last N lines of a plain text log (pipeline.log).
+
+Offsets always point just past a complete line; a row that is still being
+written is left for the next poll. An offset the file no longer matches
+(a new training run truncated it) returns the tail again with ``reset``.
+"""
+
+import os
+import csv
+import math
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_MODELS_DIR = os.path.join(BASE_DIR, 'ML', 'models')
+PIPELINE_LOG = os.path.join(BASE_DIR, 'ML', 'training', 'pipeline.log')
+
+TRAINING_LOGS = {
+    'pricing': os.path.join(ML_MODELS_DIR, 'pricing', 'training_log.csv'),
+    'recommendation': os.path.join(ML_MODELS_DIR, 'recommendation', 'rec_training_log.csv'),
+    'distribution': os.path.join(ML_MODELS_DIR, 'distribution', 'dist_training_log.csv'),
+}
+
+TAIL_ROWS = 50
+BLOCK_SIZE = 64 * 1024
+MAX_SINCE_BYTES = 1024 * 1024  # clients further behind than this get the tail instead
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _cached(key, stamp, build):
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    result = build()
+    with _cache_lock:
+        _cache[key] = (stamp, result)
+    return result
+
+
+def _tail_lines(f, size, count):
+    """(lines, start, end): the last ``count`` complete lines before byte ``size``."""
+    pos, data = size, b''
+    # count + 1 newlines guarantee the first returned line is complete
+    while pos > 0 and data.count(b'\n') < count + 1:
+        step = min(BLOCK_SIZE, pos)
+        pos -= step
+        f.seek(pos)
+        data = f.read(step) + data
+    end = data.rfind(b'\n') + 1  # drop a partially written last line
+    lines = data[:end].split(b'\n')[:-1]
+    if pos > 0:
+        lines = lines[1:]
+    lines = lines[-count:] if count else []
+    start = pos + end - sum(len(line) + 1 for line in lines)
+    return lines, start, pos + end
+
+
+def _value(text):
+    """CSV field to a JSON-safe value (numbers parsed, NaN/Infinity -> None)."""
+    if text == '':
+        return None
+    if text in ('True', 'False'):
+        return text == 'True'
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return number if math.isfinite(number) else None
+
+
+def _parse_rows(header, lines):
+    decoded = (line.decode('utf-8', errors='replace').rstrip('\r') for line in lines)
+    return [
+        {column: _value(field) for column, field in zip(header, fields)}
+        for fields in csv.reader(decoded)
+    ]
+
+
+def _read_header(f):
+    """(columns, offset of the first data row), or (None, 0) if the header is incomplete."""
+    f.seek(0)
+    line = f.readline()
+    if not line.endswith(b'\n'):
+        return None, 0
+    return next(csv.reader([line.decode('utf-8', errors='replace').rstrip('\r\n')])), len(line)
+
+
+def _empty(reset=False):
+    return {'rows': [], 'offset': 0, 'reset': reset}
+
+
+def read_log_tail(path, rows=TAIL_ROWS):
+    """
+    Last ``rows`` rows of a CSV log as dicts, plus the byte offset to pass
+    to read_log_since() on the next poll.
+    """
+    stamp = _file_stamp(path)
+    if stamp is None or stamp[1] == 0:
+        return _empty()
+
+    def build():
+        try:
+            with open(path, 'rb') as f:
+                header, header_end = _read_header(f)
+                if header is None:
+                    return _empty()
+                lines, start, end = _tail_lines(f, stamp[1], rows + 1)
+                if start < header_end:
+                    lines = lines[1:]  # the header itself
+                return {'rows': _parse_rows(header, lines[-rows:]), 'offset': max(end, header_end), 'reset': False}
+        except OSError:
+            return _empty()
+
+    return _cached(('csv', path, rows), stamp, build)
+
+
+def read_log_since(path, offset, rows=TAIL_ROWS):
+    """
+    Rows appended to a CSV log after byte ``offset``.
+
+    Falls back to read_log_tail() (with ``reset`` set) when the offset does
+    not belong to the current file or the client is too far behind.
+    """
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return _empty(reset=offset > 0)
+    size = stamp[1]
+
+    def tail():
+        return {**read_log_tail(path, rows), 'reset': True}
+
+    if offset > size or size - offset > MAX_SINCE_BYTES:
+        return tail()
+    try:
+        with open(path, 'rb') as f:
+            header, header_end = _read_header(f)
+            if header is None:
+                return _empty(reset=offset > 0)
+            start = max(offset, header_end)
+            if start > header_end:
+                f.seek(start - 1)
+                if f.read(1) != b'\n':
+                    return tail()
+            f.seek(start)
+            data = f.read(size - start)
+    except OSError:
+        return _empty()
+
+    end = data.rfind(b'\n') + 1
+    lines = data[:end].split(b'\n')[:-1]
+    return {'rows': _parse_rows(header, lines), 'offset': start + end, 'reset': False}
+
+
+def read_text_tail(path, lines=200):
+    """Last ``lines`` complete lines of a text log (cached on the file's stamp)."""
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return []
+
+    def build():
+        try:
+            with open(path, 'rb') as f:
+                tail, _, _ = _tail_lines(f, stamp[1], lines)
+        except OSError:
+            return []
+        return [line.decode('utf-8', errors='replace') + '\n' for line in tail]
+
+    return _cached(('text', path, lines), stamp, build)
+
+
+def scraped_data_bytes():
+    """Scraped data on disk from the pipeline's running counters (0 before its first run)."""
+    from ML.training.data_volume import read_data_volume
+    volume = read_data_volume() or {}
+    return sum(v for k, v in volume.items() if k != 'updated_at')
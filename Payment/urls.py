@@ -83,6 +83,7 @@ urlpatterns = [
     
     # ML Monitoring
     path('ml-dashboard/', views.MLDashboardView.as_view(), name='ml-dashboard'),
+    path('ml-dashboard/logs/<str:model>/', views.MLTrainingLogView.as_view(), name='ml-training-log'),
     
     # Student Verification
     path('student/verify/', views.StudentVerificationView.as_view(), name='student-verify'),
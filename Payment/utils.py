@@ -2,6 +2,10 @@
 Payment Tier Utilities
 Handles tier-based limits for purchases, groups, and subscriptions
 """
+from contextlib import contextmanager
+from contextvars import ContextVar
+import uuid
+
 from django.utils import timezone
 
 
@@ -320,33 +324,128 @@ def calculate_individual_share(target, member, quantity=1):
     
     return share
 
+# Request-scoped memo of user pk -> PaymentProfile, opened by
+# Payment.middleware.PaymentProfileScopeMiddleware (or payment_profile_scope()).
+# Code that changes a balance with an F() update calls forget_payment_profiles()
+# so later callers in the request do not get the stale instance.
+_payment_profile_scope = ContextVar('payment_profile_scope', default=None)
+
+
+@contextmanager
+def payment_profile_scope():
+    """Memoize PaymentProfile resolution for the duration of the block."""
+    token = _payment_profile_scope.set({})
+    try:
+        yield
+    finally:
+        _payment_profile_scope.reset(token)
+
+
+def forget_payment_profiles(payment_profile_ids):
+    """Drop memoized PaymentProfiles whose row was updated behind the instance's back."""
+    scope = _payment_profile_scope.get()
+    if not scope:
+        return
+    ids = {str(pk) for pk in payment_profile_ids}
+    for user_pk, payment_profile in list(scope.items()):
+        if payment_profile is not None and str(payment_profile.pk) in ids:
+            del scope[user_pk]
+
+
+def _new_profile_token():
+    return f"PAY-{uuid.uuid4().hex[:12].upper()}"
+
+
 def get_or_create_payment_profile(user):
     """
     Safely get or create a PaymentProfile for a user.
     Handles missing Profile logic as well.
+
+    The hot path is a single select_related read (profiles are created by the
+    user post_save signal); inside a request scope the result is memoized so
+    repeated calls during one request cost nothing.
     """
+    if user is None or not getattr(user, 'pk', None):
+        return None
+    scope = _payment_profile_scope.get()
+    if scope is not None and user.pk in scope:
+        return scope[user.pk]
     try:
         from Authentication.models import Profile
         from Payment.models import PaymentProfile
-        import uuid
-        
-        # Ensure Profile exists
-        profile, created = Profile.objects.get_or_create(user=user)
         
-        # Ensure PaymentProfile exists
-        payment_profile, created = PaymentProfile.objects.get_or_create(
-            user=profile,
-            defaults={
-                'tier': 'free',
-                'comrade_balance': 0.00,
-                'profile_token': f"PAY-{uuid.uuid4().hex[:12].upper()}",
-                'payment_option': 'comrade_balance'
-            }
+        payment_profile = (
+            PaymentProfile.objects.select_related('user__user')
+            .filter(user__user_id=user.pk)
+            .order_by('pk')
+            .first()
         )
-        return payment_profile
+        if payment_profile is None:
+            # Slow path for users created before the signal existed
+            profile, created = Profile.objects.get_or_create(user=user)
+            payment_profile, created = PaymentProfile.objects.get_or_create(
+                user=profile,
+                defaults={
+                    'tier': 'free',
+                    'comrade_balance': 0.00,
+                    'profile_token': _new_profile_token(),
+                    'payment_option': 'comrade_balance'
+                }
+            )
     except Exception as e:
         print(f"Error getting/creating payment profile: {e}")
         return None
+    if scope is not None:
+        scope[user.pk] = payment_profile
+    return payment_profile
+
+
+def resolve_payment_profile(request):
+    """
+    Return the requesting user's PaymentProfile, memoized by the request's
+    payment_profile_scope (and refetched after ledger postings touch it).
+    """
+    return get_or_create_payment_profile(request.user)
+
+
+def backfill_payment_profiles(user_model, profile_model, payment_profile_model, batch_size=1000):
+    """
+    Create missing Profile and PaymentProfile rows in bulk.
+    Takes model classes so data migrations can pass historical models.
+    Returns (profiles_created, payment_profiles_created), counted from the
+    tables since ignore_conflicts hides which rows were skipped.
+    """
+    profiles_before = profile_model.objects.count()
+    user_ids = list(user_model.objects.filter(profile__isnull=True).values_list('pk', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        profile_model.objects.bulk_create(
+            [profile_model(user_id=pk) for pk in chunk], ignore_conflicts=True
+        )
+    profiles_created = profile_model.objects.count() - profiles_before
+
+    payment_profiles_before = payment_profile_model.objects.count()
+    profile_ids = list(
+        profile_model.objects.filter(paymentprofile__isnull=True).values_list('pk', flat=True)
+    )
+    for start in range(0, len(profile_ids), batch_size):
+        # Re-check the chunk: the user signal may have created some meanwhile
+        chunk = list(
+            profile_model.objects.filter(pk__in=profile_ids[start:start + batch_size], paymentprofile__isnull=True)
+            .values_list('pk', flat=True)
+        )
+        payment_profile_model.objects.bulk_create([
+            payment_profile_model(
+                user_id=pk,
+                tier='free',
+                comrade_balance=0,
+                profile_token=_new_profile_token(),
+                payment_option='comrade_balance',
+            )
+            for pk in chunk
+        ], ignore_conflicts=True)
+    payment_profiles_created = payment_profile_model.objects.count() - payment_profiles_before
+    return profiles_created, payment_profiles_created
 
 from django.core.mail import send_mail
 from django.conf import settings
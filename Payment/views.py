@@ -5,15 +5,12 @@ from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework import status, serializers, views, permissions
 import os
-import csv
-import pandas as pd
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction as db_transaction
 from django.db.models import Q, Sum, F
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
-import uuid
 import secrets
 
 from django.contrib.contenttypes.models import ContentType
@@ -53,6 +50,11 @@ from Payment.serializers import (
 from Authentication.models import Profile, CustomUser
 from Messages.models import Conversation, Message
 from Payment.services.payment_service import PaymentService, StripeProvider, MpesaProvider
+from Payment.services.provider_references import record_provider_reference
+from Payment.services import ledger
+from Payment.services import kitty as kitty_service
+from Payment.services.orders import OrderError, OutOfStock, line_quantity, place_order, validate_quantities
+from Payment.distribution_service import compute_item_distributions, summarize_distributions
 import logging
 
 logger = logging.getLogger(__name__)
@@ -95,6 +97,11 @@ class PaymentProfileViewSet(ModelViewSet):
         data = request.data
         amount = Decimal(str(data.get('amount', 0)))
         payment_method = data.get('payment_method', 'wallet')
+        items_data = data.get('items', [])
+        try:
+            validate_quantities(items_data)
+        except OrderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Check balance if using wallet
         if payment_method == 'wallet':
@@ -107,6 +114,7 @@ class PaymentProfileViewSet(ModelViewSet):
             PaymentProfile.objects.filter(pk=payment_profile.pk).update(
                 comrade_balance=F('comrade_balance') - amount
             )
+            forget_payment_profiles([payment_profile.pk])
             payment_profile.refresh_from_db()
             
             # Log deduction
@@ -136,8 +144,6 @@ class PaymentProfileViewSet(ModelViewSet):
         # Create Order and OrderItem records from cart items
         from Payment.models import Order, OrderItem, Product, MenuItem
         
-        items_data = data.get('items', [])
-        
         # Determine primary order type from the items
         item_types = set(item.get('type', 'product') for item in items_data)
         if 'service' in item_types:
@@ -157,18 +163,21 @@ class PaymentProfileViewSet(ModelViewSet):
             notes=f'Checkout via {payment_method}',
         )
         
-        # Create individual order items
-        for item in items_data:
-            product = None
-            item_type = item.get('type', 'product')
-            item_id = item.get('id')
-            
-            # Try to link product FK for product-type items
-            if item_type == 'product' and item_id:
+        # Resolve linked products first so the distribution split sees product types
+        products = {}
+        for i, item in enumerate(items_data):
+            if item.get('type', 'product') == 'product' and item.get('id'):
                 try:
-                    product = Product.objects.get(id=item_id)
+                    products[i] = Product.objects.get(id=item['id'])
                 except (Product.DoesNotExist, ValueError):
                     pass
+        distributions = compute_item_distributions(payment_profile, items_data, products=products)
+        
+        # Create individual order items
+        for i, item in enumerate(items_data):
+            product = products.get(i)
+            item_type = item.get('type', 'product')
+            item_id = item.get('id')
             
             # Handle group entry fee payment
             if item_type == 'join_fee' and item_id:
@@ -181,20 +190,24 @@ class PaymentProfileViewSet(ModelViewSet):
                 except (GroupJoinRequest.DoesNotExist, ValueError):
                     pass
             
+            metadata = item.get('payload', item.get('metadata', {}))
+            if isinstance(metadata, dict):
+                metadata = {**metadata, 'distribution': distributions[i]}
             OrderItem.objects.create(
                 order=order,
                 product=product,
                 name=item.get('name', 'Item'),
-                quantity=item.get('qty', 1),
+                quantity=line_quantity(item),
                 unit_price=Decimal(str(item.get('price', 0))),
                 item_type=item_type,
-                metadata=item.get('payload', item.get('metadata', {})),
+                metadata=metadata,
             )
         
         return Response({
             'success': True,
             'message': 'Checkout completed successfully',
             'order_id': str(order.id),
+            'distribution': summarize_distributions(distributions),
         })
 
     @action(detail=False, methods=['get'])
@@ -206,12 +219,12 @@ class PaymentProfileViewSet(ModelViewSet):
         
         requests = GroupCheckoutRequest.objects.filter(
             Q(group__members__payment_profile=payment_profile) | Q(group__creator=payment_profile)
-        ).distinct().order_by('-created_at')
+        ).distinct().select_related('group', 'initiator__user__user').order_by('-created_at')
         
         serializer = GroupCheckoutRequestSerializer(requests, many=True, context={'request': request})
         return Response(serializer.data)
 
-from Payment.utils import check_purchase_limit, increment_purchase_count, check_group_creation_limit, get_max_group_members, get_or_create_payment_profile
+from Payment.utils import check_purchase_limit, increment_purchase_count, check_group_creation_limit, get_max_group_members, get_or_create_payment_profile, resolve_payment_profile, forget_payment_profiles
 
 class TransactionViewSet(ModelViewSet):
     queryset = TransactionToken.objects.all()
@@ -220,8 +233,7 @@ class TransactionViewSet(ModelViewSet):
     
     def get_queryset(self):
         """Get transactions for current user"""
-        user = self.request.user
-        payment_profile = get_or_create_payment_profile(user)
+        payment_profile = resolve_payment_profile(self.request)
         if not payment_profile:
             return TransactionToken.objects.none()
             
@@ -262,48 +274,34 @@ class TransactionViewSet(ModelViewSet):
         amount = serializer.validated_data['amount']
         payment_option = serializer.validated_data['payment_option']
         
-        # Check balance for internal transfers/payments
         if payment_option == 'comrade_balance':
-            # Lock rows to prevent race conditions
-            sender_payment_profile = PaymentProfile.objects.select_for_update().get(pk=sender_payment_profile.pk)
-            if sender_payment_profile.comrade_balance < amount:
+            # Internal transfer: debit sender, credit recipient as one ledger posting
+            try:
+                posted = ledger.post_transfer(
+                    ledger.wallet(sender_payment_profile),
+                    ledger.wallet(recipient_payment_profile),
+                    amount,
+                    transfer_type=transaction_type,
+                    token_profile=sender_payment_profile,
+                    token_fields={
+                        'recipient_profile': recipient_payment_profile,
+                        'payment_option': payment_option,
+                        'pay_from': 'internal',
+                    },
+                )
+            except ledger.InsufficientFunds:
                 return Response({'error': 'Insufficient balance'}, status=status.HTTP_400_BAD_REQUEST)
-                
-            # Atomic balance transfer using F() expressions
-            PaymentProfile.objects.filter(pk=sender_payment_profile.pk).update(
-                comrade_balance=F('comrade_balance') - amount
-            )
-            PaymentProfile.objects.filter(pk=recipient_payment_profile.pk).update(
-                comrade_balance=F('comrade_balance') + amount
-            )
-            sender_payment_profile.refresh_from_db()
-            recipient_payment_profile.refresh_from_db()
-        
-        # Create Transaction Record
-        transaction = TransactionToken.objects.create(
-            payment_profile=sender_payment_profile,
-            recipient_profile=recipient_payment_profile,
-            transaction_type=transaction_type,
-            amount=amount,
-            payment_option=payment_option,
-            pay_from='internal' if payment_option == 'comrade_balance' else 'external'
-        )
-        
-        # Create History
-        TransactionHistory.objects.create(
-            payment_profile=sender_payment_profile,
-            transaction_token=transaction,
-            authorization_token=PaymentAuthorization.objects.create(
-                payment_profile=sender_payment_profile,
-                authorization_code=secrets.token_hex(16)
-            ),
-            verification_token=PaymentVerification.objects.create(
+            transaction = posted.transaction_token
+        else:
+            # External payments settle through the provider; only record the intent
+            transaction = TransactionToken.objects.create(
                 payment_profile=sender_payment_profile,
-                verification_code=secrets.token_hex(16)
-            ),
-            amount=amount, # Helper field
-            status='completed'
-        )
+                recipient_profile=recipient_payment_profile,
+                transaction_type=transaction_type,
+                amount=amount,
+                payment_option=payment_option,
+                pay_from='external'
+            )
         
         # Increment purchase count if applicable
         if transaction_type == 'purchase':
@@ -340,34 +338,16 @@ class TransactionViewSet(ModelViewSet):
         if not payment_profile:
              return Response({'error': 'Could not create payment profile'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        # Create transaction record
-        transaction = TransactionToken.objects.create(
-            payment_profile=payment_profile,
-            transaction_type='deposit',
-            amount=amount,
-            payment_option=payment_method,
-            pay_from='external'
-        )
-        
-        # Update balance
-        payment_profile.comrade_balance += amount
-        payment_profile.save()
-        
-        # Create history record
-        TransactionHistory.objects.create(
-            payment_profile=payment_profile,
-            transaction_token=transaction,
-            authorization_token=PaymentAuthorization.objects.create(
-                payment_profile=payment_profile,
-                authorization_code=secrets.token_hex(16)
-            ),
-            verification_token=PaymentVerification.objects.create(
-                payment_profile=payment_profile,
-                verification_code=secrets.token_hex(16)
-            ),
-            amount=amount,
-            status='completed'
+        posted = ledger.post_transfer(
+            ledger.external(payment_method),
+            ledger.wallet(payment_profile),
+            amount,
+            transfer_type='deposit',
+            token_profile=payment_profile,
+            token_fields={'payment_option': payment_method, 'pay_from': 'external'},
         )
+        transaction = posted.transaction_token
+        payment_profile.refresh_from_db(fields=['comrade_balance'])
         
         return Response({
             'status': 'success',
@@ -399,45 +379,23 @@ class TransactionViewSet(ModelViewSet):
         if not payment_profile:
              return Response({'error': 'Could not create payment profile'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        # Lock row to prevent race conditions (double-spend)
-        payment_profile = PaymentProfile.objects.select_for_update().get(pk=payment_profile.pk)
-        if payment_profile.comrade_balance < amount:
+        try:
+            posted = ledger.post_transfer(
+                ledger.wallet(payment_profile),
+                ledger.external(payment_method),
+                amount,
+                transfer_type='withdrawal',
+                token_profile=payment_profile,
+                token_fields={'payment_option': payment_method, 'pay_from': 'internal'},
+            )
+        except ledger.InsufficientFunds as exc:
             return Response({
                 'error': 'Insufficient balance',
-                'current_balance': float(payment_profile.comrade_balance),
+                'current_balance': float(exc.balance),
                 'requested_amount': amount
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create transaction record
-        transaction = TransactionToken.objects.create(
-            payment_profile=payment_profile,
-            transaction_type='withdrawal',
-            amount=amount,
-            payment_option=payment_method,
-            pay_from='internal'
-        )
-        
-        # Atomic deduction using F() expression
-        PaymentProfile.objects.filter(pk=payment_profile.pk).update(
-            comrade_balance=F('comrade_balance') - Decimal(str(amount))
-        )
-        payment_profile.refresh_from_db()
-        
-        # Create history record
-        TransactionHistory.objects.create(
-            payment_profile=payment_profile,
-            transaction_token=transaction,
-            authorization_token=PaymentAuthorization.objects.create(
-                payment_profile=payment_profile,
-                authorization_code=secrets.token_hex(16)
-            ),
-            verification_token=PaymentVerification.objects.create(
-                payment_profile=payment_profile,
-                verification_code=secrets.token_hex(16)
-            ),
-            amount=amount,
-            status='completed'
-        )
+        transaction = posted.transaction_token
+        payment_profile.refresh_from_db(fields=['comrade_balance'])
         
         return Response({
             'status': 'success',
@@ -450,18 +408,28 @@ class TransactionViewSet(ModelViewSet):
 
     
 
+# Nested rows PaymentGroupsSerializer renders for every group (its counts
+# come from Payment.aggregates instead)
+GROUP_SERIALIZER_PREFETCH = (
+    'members__payment_profile__user__user',
+    'targets__owner__user__user',
+    'targets__target_item',
+)
+
+
 class PaymentGroupsViewSet(ModelViewSet):
     queryset = PaymentGroups.objects.all()
     serializer_class = PaymentGroupsSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        payment_profile = get_or_create_payment_profile(user)
+        payment_profile = resolve_payment_profile(self.request)
         if not payment_profile:
             return PaymentGroups.objects.none()
             
-        return PaymentGroups.objects.filter(members__payment_profile=payment_profile).distinct()
+        return PaymentGroups.objects.filter(
+            members__payment_profile=payment_profile
+        ).distinct().select_related('creator__user__user').prefetch_related(*GROUP_SERIALIZER_PREFETCH)
             
     @db_transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -557,25 +525,20 @@ class PaymentGroupsViewSet(ModelViewSet):
         
         amount = float(amount)
         
-        # Process payment based on method
-        if payment_method == 'wallet':
-            if payment_profile.comrade_balance < amount:
-                return Response({'error': 'Insufficient balance'}, status=status.HTTP_400_BAD_REQUEST)
-            # Deduct from wallet
-            payment_profile.comrade_balance -= amount
-            payment_profile.save()
-        elif payment_method == 'stripe':
+        # External methods return early; the callback settles them
+        if payment_method == 'stripe':
             # Create Stripe PaymentIntent - return client_secret for frontend to complete
             result = StripeProvider.create_payment_intent(
                 amount, description=f'Group contribution: {group.name}'
             )
             if isinstance(result, dict) and 'error' in result:
                 return Response({'error': result['error']}, status=status.HTTP_400_BAD_REQUEST)
+            record_provider_reference('stripe', result, payment_profile, amount, 'contribution', payment_group=group)
             # Return client secret for client-side confirmation
             return Response({
                 'requires_action': True,
                 'payment_method': 'stripe',
-                'client_secret': result.client_secret,
+                'client_secret': result['client_secret'],
                 'group_id': str(group.id),
                 'amount': amount
             })
@@ -588,43 +551,27 @@ class PaymentGroupsViewSet(ModelViewSet):
             )
             if 'error' in result:
                 return Response({'error': result['error']}, status=status.HTTP_400_BAD_REQUEST)
+            record_provider_reference('mpesa', result, payment_profile, amount, 'contribution', payment_group=group)
             # M-Pesa callback will confirm payment; return pending status
             return Response({
                 'requires_action': True,
                 'payment_method': 'mpesa',
-                'checkout_request_id': result.get('CheckoutRequestID', ''),
+                'checkout_request_id': result.get('checkout_request_id', ''),
                 'message': 'STK push sent. Complete payment on your phone.'
             })
-        else:
+        elif payment_method != 'wallet':
             return Response({'error': f'Unsupported payment method: {payment_method}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Add to group (wallet path)
-        group.current_amount += amount
-        group.save()
-        
-        # Update member contribution
-        member.total_contributed += amount
-        member.save()
-        
-        # Record contribution
-        contribution = Contribution.objects.create(
-            payment_group=group,
-            member=member,
-            amount=amount,
-            notes=request.data.get('notes', '')
-        )
-        
-        # Create audit trail
-        TransactionToken.objects.create(
-            payment_profile=payment_profile,
-            transaction_code=f'grp_contrib_{uuid.uuid4().hex[:12]}',
-            amount=amount,
-            transaction_type='contribution',
-            notes=f'Contribution to group: {group.name}'
-        )
+        # Wallet path: debit wallet, credit kitty, member total and contribution in one posting
+        try:
+            contribution, = ledger.settle_group_contributions(
+                group, [(member, amount)], notes=request.data.get('notes', '')
+            )
+        except ledger.InsufficientFunds:
+            return Response({'error': 'Insufficient balance'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Check if target reached
-        if group.target_amount and group.current_amount >= group.target_amount:
+        if group.target_amount and kitty_service.balance(group, fresh=True) >= group.target_amount:
             if group.auto_purchase:
                 # Trigger auto purchase logic here
                 pass
@@ -793,6 +740,10 @@ class PaymentGroupsViewSet(ModelViewSet):
         data = request.data
         amount = Decimal(str(data.get('amount', 0)))
         items_data = data.get('items', [])
+        try:
+            validate_quantities(items_data)
+        except OrderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # If amount > 500 or group requires strict approval
         requires_approval = group.requires_approval or (amount > 500)
@@ -841,33 +792,34 @@ class PaymentGroupsViewSet(ModelViewSet):
         else:
             return Response({'error': error_or_order}, status=status.HTTP_400_BAD_REQUEST)
 
+    @db_transaction.atomic
     def _execute_group_checkout(self, group, payment_profile, amount, items_data, user):
-        # Process directly from group current_amount
-        if group.current_amount < amount:
-            return False, 'Insufficient group funds. Members need to contribute.'
-            
-        # Deduct from group
-        group.current_amount -= amount
-        group.save()
-        
-        # Log group purchase
-        from Payment.models import TransactionToken, Order, OrderItem, Product
+        from Payment.models import Order, OrderItem, Product
         from Authentication.models import Profile
         
-        TransactionToken.objects.create(
-            payment_profile=payment_profile,
-            amount=amount,
-            transaction_type='purchase',
-            pay_from='group_wallet',
-            payment_option='group_wallet',
-            description=f'Group checkout for {group.name}',
-            payment_group=group
-        )
-        
         try:
             profile = Profile.objects.get(user=user)
         except Profile.DoesNotExist:
             return False, 'Profile not found'
+        # Payloads of approved requests were stored before validation existed
+        try:
+            validate_quantities(items_data)
+        except OrderError as e:
+            return False, str(e)
+        
+        # Pay from the kitty (locks the group and folds its shards first)
+        try:
+            ledger.post_transfer(
+                ledger.group(group),
+                ledger.platform('shop'),
+                amount,
+                transfer_type='purchase',
+                description=f'Group checkout for {group.name}',
+                token_profile=payment_profile,
+                token_fields={'pay_from': 'group_wallet', 'payment_option': 'group_wallet', 'payment_group': group},
+            )
+        except ledger.InsufficientFunds:
+            return False, 'Insufficient group funds. Members need to contribute.'
             
         # Determine primary order type from the items
         item_types = set(item.get('type', 'product') for item in items_data)
@@ -888,20 +840,25 @@ class PaymentGroupsViewSet(ModelViewSet):
             notes=f'Group checkout via {group.name}',
         )
         
-        # Create individual order items
-        for item in items_data:
-            product = None
-            item_type = item.get('type', 'product')
-            item_id = item.get('id')
-            
-            # Try to link product FK for product-type items
-            if item_type == 'product' and item_id:
+        # Resolve linked products first so the distribution split sees product types
+        products = {}
+        for i, item in enumerate(items_data):
+            if item.get('type', 'product') == 'product' and item.get('id'):
                 try:
-                    product = Product.objects.get(id=item_id)
+                    products[i] = Product.objects.get(id=item['id'])
                 except (Product.DoesNotExist, ValueError):
                     pass
+        distributions = compute_item_distributions(
+            payment_profile, items_data, group_size=max(group.members.count(), 2), products=products
+        )
+        
+        # Create individual order items
+        for i, item in enumerate(items_data):
+            product = products.get(i)
+            item_type = item.get('type', 'product')
+            item_id = item.get('id')
             
-            elif item_type == 'funding' and item_id:
+            if item_type == 'funding' and item_id:
                 from Funding.models import Business, CapitalVenture
                 from django.contrib.contenttypes.models import ContentType
                 from Payment.models import PaymentGroups
@@ -909,39 +866,42 @@ class PaymentGroupsViewSet(ModelViewSet):
                 
                 # Update the target Kitty and Charity stats if applicable
                 try:
-                    business = Business.objects.filter(id=item_id).first()
-                    qty = int(item.get('qty', 1))
-                    item_total = Decimal(str(float(item.get('price', 0)) * qty))
-                    if business:
-                        ct = ContentType.objects.get_for_model(Business)
-                        kitty = PaymentGroups.objects.filter(entity_content_type=ct, entity_object_id=str(business.id), group_type='kitty').first()
-                        if kitty:
-                            kitty.current_amount += item_total
-                            kitty.save()
-                        if business.is_charity:
-                            business.charity_raised += item_total
-                            business.save()
-                    else:
-                        venture = CapitalVenture.objects.filter(id=item_id).first()
-                        if venture:
-                            ct = ContentType.objects.get_for_model(CapitalVenture)
-                            kitty = PaymentGroups.objects.filter(entity_content_type=ct, entity_object_id=str(venture.id), group_type='kitty').first()
+                    # Savepoint: a failed credit must not abort the checkout's transaction
+                    with db_transaction.atomic():
+                        business = Business.objects.filter(id=item_id).first()
+                        qty = line_quantity(item)
+                        item_total = Decimal(str(float(item.get('price', 0)) * qty))
+                        if business:
+                            ct = ContentType.objects.get_for_model(Business)
+                            kitty = PaymentGroups.objects.filter(entity_content_type=ct, entity_object_id=str(business.id), group_type='kitty').first()
                             if kitty:
-                                kitty.current_amount += item_total
-                                kitty.save()
+                                kitty_service.credit(kitty.pk, item_total)
+                            if business.is_charity:
+                                business.charity_raised += item_total
+                                business.save()
+                        else:
+                            venture = CapitalVenture.objects.filter(id=item_id).first()
+                            if venture:
+                                ct = ContentType.objects.get_for_model(CapitalVenture)
+                                kitty = PaymentGroups.objects.filter(entity_content_type=ct, entity_object_id=str(venture.id), group_type='kitty').first()
+                                if kitty:
+                                    kitty_service.credit(kitty.pk, item_total)
                 except Exception as e:
                     import logging
                     logging.getLogger(__name__).error(f"Failed to process funding item: {e}")
             
             from decimal import Decimal
+            metadata = item.get('metadata', {})
+            if isinstance(metadata, dict):
+                metadata = {**metadata, 'distribution': distributions[i]}
             OrderItem.objects.create(
                 order=order,
                 product=product,
                 name=item.get('name', 'Item'),
-                quantity=item.get('qty', 1),
+                quantity=line_quantity(item),
                 unit_price=Decimal(str(item.get('price', 0))),
                 item_type=item_type,
-                metadata=item.get('metadata', {})
+                metadata=metadata
             )
         
         return True, str(order.id)
@@ -961,7 +921,9 @@ class PaymentGroupsViewSet(ModelViewSet):
         if not is_creator and not is_member:
             return Response({'error': 'Not a member of this group'}, status=status.HTTP_403_FORBIDDEN)
             
-        requests = GroupCheckoutRequest.objects.filter(group=group).order_by('-created_at')
+        requests = GroupCheckoutRequest.objects.filter(group=group).select_related(
+            'group', 'initiator__user__user'
+        ).order_by('-created_at')
         serializer = GroupCheckoutRequestSerializer(requests, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -1083,47 +1045,28 @@ class PaymentGroupsViewSet(ModelViewSet):
         except (ValueError, TypeError):
             return Response({'error': 'Invalid amount'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if float(kitty.current_amount) < amount:
+        try:
+            posted = ledger.post_transfer(
+                ledger.group(kitty),
+                ledger.wallet(payment_profile),
+                amount,
+                transfer_type='withdrawal',
+                description=f'Kitty withdrawal from: {kitty.name}',
+                token_profile=payment_profile,
+                token_fields={'payment_group': kitty, 'pay_from': 'internal', 'payment_option': 'comrade_balance'},
+            )
+        except ledger.InsufficientFunds as exc:
             return Response({
                 'error': 'Insufficient kitty balance',
-                'current_balance': float(kitty.current_amount),
+                'current_balance': float(exc.balance),
             }, status=status.HTTP_400_BAD_REQUEST)
-
-        # Deduct from kitty
-        kitty.current_amount = float(kitty.current_amount) - amount
-        kitty.save()
-
-        # Credit user's personal wallet
-        payment_profile.comrade_balance += amount
-        payment_profile.save()
-
-        # Create audit transaction
-        tx = TransactionToken.objects.create(
-            payment_profile=payment_profile,
-            amount=amount,
-            transaction_type='withdrawal',
-            description=f'Kitty withdrawal from: {kitty.name}'
-        )
-
-        TransactionHistory.objects.create(
-            payment_profile=payment_profile,
-            transaction_token=tx,
-            authorization_token=PaymentAuthorization.objects.create(
-                payment_profile=payment_profile,
-                authorization_code=secrets.token_hex(16)
-            ),
-            verification_token=PaymentVerification.objects.create(
-                payment_profile=payment_profile,
-                verification_code=secrets.token_hex(16)
-            ),
-            amount=amount,
-            status='completed'
-        )
+        tx = posted.transaction_token
+        payment_profile.refresh_from_db(fields=['comrade_balance'])
 
         return Response({
             'status': 'success',
             'message': f'KES {amount:,.2f} withdrawn to your personal wallet',
-            'new_kitty_balance': float(kitty.current_amount),
+            'new_kitty_balance': float(kitty_service.balance(kitty, fresh=True)),
             'new_wallet_balance': float(payment_profile.comrade_balance),
             'transaction_id': str(tx.transaction_code),
         })
@@ -1499,11 +1442,13 @@ class ProductViewSet(ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def recommendations(self, request):
-        """Get recommended products"""
-        # Simple Logic: Random 5 or specific tagged 'recommendation'
-        products = Product.objects.filter(product_type='recommendation')[:10]
-        if not products.exists():
-            products = Product.objects.all()[:10]
+        """Get recommended products ranked by the recommendation model"""
+        from Payment.recommendation_service import recommend_products
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            limit = 10
+        products = recommend_products(resolve_payment_profile(request), limit=limit)
         return Response(ProductSerializer(products, many=True).data)
 
 # Piggy Bank / Group Target Views
@@ -2180,125 +2125,18 @@ class OrderViewSet(ModelViewSet):
             except Establishment.DoesNotExist:
                 return Response({'error': 'Establishment not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Offline sales handle their own payments
-        is_offline = data.get('sales_channel') in ['in_store', 'pop_up'] or data.get('is_offline', False)
-        
-        # Create order
-        order = Order.objects.create(
-            buyer=profile,
-            establishment=establishment,
-            order_type=data['order_type'],
-            delivery_mode=data['delivery_mode'],
-            payment_type=data.get('payment_type', 'individual'),
-            sales_channel=data.get('sales_channel', 'online'),
-            is_offline=is_offline,
-            delivery_address=data.get('delivery_address', ''),
-            notes=data.get('notes', ''),
-        )
-        
-        # Process items
-        total = 0
-        items_data = data.get('items', [])
-        for item_data in items_data:
-            product = None
-            menu_item = None
-            unit_price = 0
-            
-            item_type = item_data.get('type', 'product')
-            item_id = item_data.get('id')
-            
-            if item_type == 'product' and item_id:
-                try:
-                    product = Product.objects.get(id=item_id)
-                    unit_price = float(product.price)
-                except Product.DoesNotExist:
-                    unit_price = float(item_data.get('price', 0))
-            
-            elif item_type == 'funding' and item_id:
-                unit_price = float(item_data.get('price', 0))
-                # Update the target Kitty and Charity stats if applicable
-                try:
-                    business = Business.objects.filter(id=item_id).first()
-                    qty = int(item_data.get('quantity', 1))
-                    item_total = Decimal(str(unit_price * qty))
-                    if business:
-                        ct = ContentType.objects.get_for_model(Business)
-                        kitty = PaymentGroups.objects.filter(entity_content_type=ct, entity_object_id=str(business.id), group_type='kitty').first()
-                        if kitty:
-                            kitty.current_amount += item_total
-                            kitty.save()
-                        if business.is_charity:
-                            business.charity_raised += item_total
-                            business.save()
-                    else:
-                        venture = CapitalVenture.objects.filter(id=item_id).first()
-                        if venture:
-                            ct = ContentType.objects.get_for_model(CapitalVenture)
-                            kitty = PaymentGroups.objects.filter(entity_content_type=ct, entity_object_id=str(venture.id), group_type='kitty').first()
-                            if kitty:
-                                kitty.current_amount += item_total
-                                kitty.save()
-                except Exception as e:
-                    import logging
-                    logging.getLogger(__name__).error(f"Failed to process funding item: {e}")
-            else:
-                unit_price = float(item_data.get('price', 0))
-            
-            qty = int(item_data.get('quantity', item_data.get('qty', 1)))
-            order_item = OrderItem.objects.create(
-                order=order,
-                product=product,
-                menu_item=menu_item,
-                name=item_data.get('name', ''),
-                quantity=qty,
-                unit_price=unit_price
-            )
-            total += float(order_item.subtotal)
-        
-        # Handle service appointment
-        if data.get('service_time_slot_id'):
-            try:
-                slot = ServiceTimeSlot.objects.get(id=data['service_time_slot_id'])
-                if not slot.is_booked:
-                    slot.is_booked = True
-                    slot.booked_by = profile
-                    slot.save()
-                    order.service_time_slot = slot
-                    total += float(slot.service.price)
-            except ServiceTimeSlot.DoesNotExist:
-                pass
-        
-        # Handle booking reference
-        if data.get('booking_id'):
-            try:
-                booking = Booking.objects.get(id=data['booking_id'])
-                order.booking = booking
-                total += float(booking.total_price)
-            except Booking.DoesNotExist:
-                pass
-        
-        order.total_amount = total
-        
-        # Deduct from balance (individual purchase) if online
-        if not is_offline and data.get('payment_type', 'individual') == 'individual':
-            if payment_profile.comrade_balance < total:
-                order.delete()
-                return Response({'error': 'Insufficient balance'}, status=status.HTTP_400_BAD_REQUEST)
-            payment_profile.comrade_balance -= total
-            payment_profile.save()
-            
-            # Create a TransactionToken for the purchase
-            TransactionToken.objects.create(
-                payment_profile=payment_profile,
-                amount=Decimal(str(total)),
-                transaction_type='purchase',
-                pay_from='wallet',
-                payment_option='comrade_balance',
-                description='Online purchase order'
-            )
-        
-        order.status = 'confirmed'
-        order.save()
+        try:
+            order = place_order(profile, payment_profile, data, establishment=establishment)
+        except OutOfStock as e:
+            return Response({
+                'error': f'Insufficient stock for {e.product.name}',
+                'product_id': e.product.pk,
+                'available': e.available,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except OrderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ledger.InsufficientFunds:
+            return Response({'error': 'Insufficient balance'}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
     
@@ -2386,8 +2224,7 @@ class DynamicPriceView(APIView):
     def get(self, request, product_id):
         from Payment.pricing_service import calculate_dynamic_price
         
-        user = request.user
-        payment_profile = get_or_create_payment_profile(user)
+        payment_profile = resolve_payment_profile(request)
         if not payment_profile:
             return Response({'error': 'Payment profile not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -2408,8 +2245,7 @@ class TierRecommendationView(APIView):
     def get(self, request):
         from Payment.pricing_service import get_tier_recommendation
         
-        user = request.user
-        payment_profile = get_or_create_payment_profile(user)
+        payment_profile = resolve_payment_profile(request)
         if not payment_profile:
             return Response({'error': 'Payment profile not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -2433,8 +2269,7 @@ class PriceAcceptView(APIView):
             return Response({'error': 'product_id and offered_price are required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        user = request.user
-        payment_profile = get_or_create_payment_profile(user)
+        payment_profile = resolve_payment_profile(request)
         if not payment_profile:
             return Response({'error': 'Payment profile not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -2544,45 +2379,22 @@ class MLDashboardView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
+        from Payment.training_log_service import (
+            TRAINING_LOGS, PIPELINE_LOG, read_log_tail, read_text_tail, scraped_data_bytes,
+        )
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         ml_models_dir = os.path.join(base_dir, 'ML', 'models')
         ml_data_dir = os.path.join(base_dir, 'ML', 'data')
 
-        def read_csv_tail(filepath, lines=50):
-            try:
-                if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
-                    return []
-                # Read using pandas for robust parsing, taking the tail
-                df = pd.read_csv(filepath)
-                if df.empty:
-                    return []
-                # Explicitly scrub NaN/Infinity to None for JSON serialization
-                import numpy as np
-                df.replace([np.inf, -np.inf], np.nan, inplace=True)
-                df = df.astype(object).where(pd.notnull(df), None)
-                return df.tail(lines).to_dict('records')
-            except Exception as e:
-                return [] # Return empty list instead of breaking frontend parsing
-
-        # 1. Pricing Model Logs
-        pricing_log = os.path.join(ml_models_dir, 'pricing', 'training_log.csv')
-        pricing_data = read_csv_tail(pricing_log)
-
-        # 2. Recommendation Model Logs
-        rec_log = os.path.join(ml_models_dir, 'recommendation', 'rec_training_log.csv')
-        rec_data = read_csv_tail(rec_log)
+        # 1-3. Pricing / Recommendation / Distribution training logs (tail only;
+        # poll MLTrainingLogView with the returned offsets for new rows)
+        logs = {name: read_log_tail(path) for name, path in TRAINING_LOGS.items()}
+        pricing_data = logs['pricing']['rows']
+        rec_data = logs['recommendation']['rows']
+        dist_data = logs['distribution']['rows']
 
-        # 3. Distribution Model Logs
-        dist_log = os.path.join(ml_models_dir, 'distribution', 'dist_training_log.csv')
-        dist_data = read_csv_tail(dist_log)
-
-        # 4. Data Volume
-        raw_dir = os.path.join(ml_data_dir, 'raw_scrapped')
-        total_size_mb = 0
-        if os.path.exists(raw_dir):
-            for f in os.listdir(raw_dir):
-                fp = os.path.join(raw_dir, f)
-                total_size_mb += os.path.getsize(fp) / (1024 * 1024)
+        # 4. Data Volume (running counter maintained by the pipeline)
+        total_size_mb = scraped_data_bytes() / (1024 * 1024)
 
         # 5. Distribution Categorical Metrics
         import json
@@ -2606,15 +2418,7 @@ class MLDashboardView(views.APIView):
                 pass
 
         # 7. Pipeline Logs
-        pipeline_log_file = os.path.join(base_dir, 'ML', 'training', 'pipeline.log')
-        pipeline_logs = []
-        if os.path.exists(pipeline_log_file):
-            try:
-                from collections import deque
-                with open(pipeline_log_file, 'r', encoding='utf-8') as f:
-                    pipeline_logs = list(deque(f, 200)) # Take last 200 lines
-            except Exception:
-                pass
+        pipeline_logs = read_text_tail(PIPELINE_LOG, 200)
 
         return Response({
             "models": {
@@ -2623,6 +2427,7 @@ class MLDashboardView(views.APIView):
                 "distribution": dist_data,
                 "distribution_metrics": dist_metrics
             },
+            "log_offsets": {name: log['offset'] for name, log in logs.items()},
             "metrics": {
                 "total_scraped_data_mb": round(total_size_mb, 2),
                 "is_pricing_training": True,  # Inferred securely without locks
@@ -2632,6 +2437,30 @@ class MLDashboardView(views.APIView):
         })
 
 
+class MLTrainingLogView(views.APIView):
+    """
+    Rows appended to one model's training log since ``?since_offset=``
+    (an offset from a previous response or from MLDashboardView).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, model):
+        from Payment.training_log_service import TRAINING_LOGS, read_log_since, read_log_tail
+        path = TRAINING_LOGS.get(model)
+        if path is None:
+            return Response({'error': f'Unknown model: {model}'}, status=status.HTTP_404_NOT_FOUND)
+        since_offset = request.query_params.get('since_offset')
+        if since_offset is None:
+            return Response(read_log_tail(path))
+        try:
+            since_offset = int(since_offset)
+            if since_offset < 0:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'since_offset must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(read_log_since(path, since_offset))
+
+
 # ============================================================================
 # GROUP DISCOURSE & VOTING VIEWSETS
 # ============================================================================
@@ -2677,7 +2506,9 @@ class GroupJoinRequestViewSet(ModelViewSet):
         payment_profile = get_or_create_payment_profile(user)
         groups = PaymentGroups.objects.filter(
             is_public=True, is_active=True, is_terminated=False
-        ).exclude(group_type='kitty')
+        ).exclude(group_type='kitty').select_related(
+            'creator__user__user'
+        ).prefetch_related(*GROUP_SERIALIZER_PREFETCH)
         if payment_profile:
             groups = groups.exclude(members__payment_profile=payment_profile)
         serializer = PaymentGroupsSerializer(groups, many=True, context={'request': request})
@@ -2765,7 +2596,9 @@ class GroupVoteViewSet(ModelViewSet):
         my_groups = PaymentGroups.objects.filter(
             members__payment_profile=payment_profile
         ).distinct()
-        return GroupVote.objects.filter(group__in=my_groups).order_by('-created_at')
+        return GroupVote.objects.filter(group__in=my_groups).select_related(
+            'group', 'created_by__user__user'
+        ).order_by('-created_at')
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -2832,7 +2665,7 @@ class GroupPortfolioView(APIView):
         total_contributed = contributions.aggregate(total=Sum('amount'))['total'] or 0
         analytics = {
             'group_name': group.name,
-            'total_balance': float(group.current_amount),
+            'total_balance': float(kitty_service.balance(group)),
             'target_amount': float(group.target_amount or 0),
             'total_contributed': float(total_contributed),
             'member_count': members.count(),
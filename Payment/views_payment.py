@@ -25,6 +25,7 @@ from Payment.serializers import (
     SavedPaymentMethodSerializer, SavedPaymentMethodCreateSerializer
 )
 from Payment.services.payment_service import PaymentService
+from Payment.services.provider_references import record_provider_reference, settle_provider_reference
 from Payment.utils import get_or_create_payment_profile
 from datetime import datetime
 
@@ -378,6 +379,12 @@ class ProcessPaymentView(APIView):
                 status=txn_status,
             )
             
+            if txn_status == 'pending':
+                record_provider_reference(
+                    payment_method, response, payment_profile, amount, 'purchase',
+                    transaction_token=transaction_token,
+                )
+            
             serializer = TransactionTokenSerializer(transaction_token)
             
             return Response({
@@ -492,29 +499,15 @@ class StripeWebhookView(APIView):
             return Response({'error': 'Invalid signature'}, status=400)
         
         # Handle different event types
-        if event['type'] == 'payment_intent.succeeded':
+        if event['type'] in ('payment_intent.succeeded', 'payment_intent.payment_failed'):
             payment_intent = event['data']['object']
-            try:
-                transaction = TransactionToken.objects.get(transaction_code=payment_intent['id'])
-                TransactionHistory.objects.create(
-                    payment_profile=transaction.payment_profile,
-                    transaction_token=transaction,
-                    status='completed',
-                )
-            except TransactionToken.DoesNotExist:
-                pass
-        
-        elif event['type'] == 'payment_intent.payment_failed':
-            payment_intent = event['data']['object']
-            try:
-                transaction = TransactionToken.objects.get(transaction_code=payment_intent['id'])
-                TransactionHistory.objects.create(
-                    payment_profile=transaction.payment_profile,
-                    transaction_token=transaction,
-                    status='failed',
-                )
-            except TransactionToken.DoesNotExist:
-                pass
+            reference, applied = settle_provider_reference(
+                'stripe', payment_intent['id'],
+                succeeded=event['type'] == 'payment_intent.succeeded',
+                payload={'event_id': event.get('id'), 'type': event['type']},
+            )
+            if reference is None:
+                logger.warning(f"Stripe webhook for unknown intent: {payment_intent['id']}")
         
         return Response({'status': 'success'})
 
@@ -591,18 +584,15 @@ class PayPalWebhookView(APIView):
         event_type = request.data.get('event_type', '')
         resource = request.data.get('resource', {})
         
-        if event_type == 'PAYMENT.CAPTURE.COMPLETED':
+        if event_type in ('PAYMENT.CAPTURE.COMPLETED', 'PAYMENT.CAPTURE.DENIED'):
             order_id = resource.get('supplementary_data', {}).get('related_ids', {}).get('order_id')
-            if order_id:
-                try:
-                    transaction = TransactionToken.objects.get(transaction_code=order_id)
-                    TransactionHistory.objects.create(
-                        payment_profile=transaction.payment_profile,
-                        transaction_token=transaction,
-                        status='completed',
-                    )
-                except TransactionToken.DoesNotExist:
-                    pass
+            reference, applied = settle_provider_reference(
+                'paypal', order_id,
+                succeeded=event_type == 'PAYMENT.CAPTURE.COMPLETED',
+                payload={'event_id': request.data.get('id'), 'event_type': event_type},
+            )
+            if order_id and reference is None:
+                logger.warning(f'PayPal webhook for unknown order: {order_id}')
         
         return Response({'message': 'PayPal webhook received'})
 
@@ -638,20 +628,17 @@ class MpesaCallbackView(APIView):
         result_code = callback.get('ResultCode', -1)
         checkout_request_id = callback.get('CheckoutRequestID', '')
         
-        if result_code == 0 and checkout_request_id:
-            # Payment successful
-            try:
-                transaction = TransactionToken.objects.get(
-                    description__contains=checkout_request_id
-                )
-                TransactionHistory.objects.create(
-                    payment_profile=transaction.payment_profile,
-                    transaction_token=transaction,
-                    status='completed',
-                )
-                logger.info(f'M-Pesa payment completed: {checkout_request_id}')
-            except TransactionToken.DoesNotExist:
+        if checkout_request_id:
+            # Unique-index lookup on (provider, external_id); repeats are no-ops
+            reference, applied = settle_provider_reference(
+                'mpesa', checkout_request_id,
+                succeeded=result_code == 0,
+                payload={'ResultCode': result_code, 'ResultDesc': callback.get('ResultDesc', '')},
+            )
+            if reference is None:
                 logger.warning(f'M-Pesa callback for unknown checkout: {checkout_request_id}')
+            elif applied:
+                logger.info(f'M-Pesa payment {reference.status}: {checkout_request_id}')
         
         return Response({
             'ResultCode': 0,
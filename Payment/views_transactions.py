@@ -8,6 +8,8 @@ from .serializers import TransactionTokenSerializer, PaymentProfileSerializer
 from .utils import check_purchase_limit, increment_purchase_count, get_or_create_payment_profile
 from Authentication.models import Profile
 from Payment.services.payment_service import PaymentService
+from Payment.services.provider_references import record_provider_reference
+from Payment.services import ledger
 
 class VerifyAccountView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -165,6 +167,8 @@ class DepositView(APIView):
         if "error" in response:
              return Response({"detail": response["error"]}, status=status.HTTP_400_BAD_REQUEST)
 
+        record_provider_reference(payment_method, response, profile, amount, 'deposit', transaction_token=token)
+
         return Response({
             "detail": "Deposit initiated. Check your phone/email for instructions.",
             "transaction_code": token.transaction_code,
@@ -285,9 +289,17 @@ class WithdrawView(APIView):
         if "error" in response:
             return Response({"detail": response["error"]}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Deduct Balance
-        profile.comrade_balance -= float(amount)
-        profile.save()
+        record_provider_reference(payment_method, response, profile, amount, 'withdrawal', transaction_token=token)
+
+        # Deduct Balance (refunded through the ledger if the payout fails)
+        try:
+            ledger.post_transfer(
+                ledger.wallet(profile), ledger.external(payment_method), amount,
+                transfer_type='withdrawal', description=token.description,
+            )
+        except ledger.InsufficientFunds:
+            return Response({"detail": "Insufficient balance."}, status=status.HTTP_400_BAD_REQUEST)
+        profile.refresh_from_db(fields=['comrade_balance'])
 
         # Log History
         TransactionHistory.objects.create(
@@ -5,3 +5,6 @@ class QomaiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'QomAI'
     verbose_name = 'QomAI - AI Assistant'
+
+    def ready(self):
+        import QomAI.signals  # noqa: F401
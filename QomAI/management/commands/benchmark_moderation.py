@@ -0,0 +1,58 @@
+"""
+benchmark_moderation – Texts/sec of the per-item path vs batched inference.
+Runs FakeNewsDetector.predict in a loop and batch_predict over the same
+texts (with a share of duplicates, as seen in reposts). Nothing is written
+to the database.
+Usage: python manage.py benchmark_moderation --model-path /models/fake-news --texts 512
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from ML.inference.fake_news_detector import FakeNewsDetector
+
+SAMPLE_SENTENCES = [
+    "The county government announced new bursary allocations for university students.",
+    "BREAKING!!! You won't BELIEVE what they are hiding from students! Share before deleted!!!",
+    "Researchers published a study on maize yields under changing rainfall patterns.",
+    "The shocking truth about exam leaks that mainstream media won't tell you.",
+    "Campus library hours are extended during the examination period.",
+    "Wake up! The secret revealed about free data bundles for every student.",
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks per-item vs batched fake news inference'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-path', default='', help='Local HuggingFace model directory')
+        parser.add_argument('--texts', type=int, default=256)
+        parser.add_argument('--batch-size', type=int, default=32)
+        parser.add_argument('--duplicate-ratio', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        detector = FakeNewsDetector(options['model_path'] or None)
+        rng = random.Random(0)
+        texts = []
+        for i in range(options['texts']):
+            if texts and rng.random() < options['duplicate_ratio']:
+                texts.append(rng.choice(texts))
+            else:
+                words = ' '.join(rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(1, 4)))
+                texts.append(f"{words} #{i}")
+
+        source = 'local_model' if detector.local_model else 'huggingface_api/rule_based'
+        self.stdout.write(f"source: {source}  texts: {len(texts)}  unique: {len(set(texts))}")
+
+        started = time.perf_counter()
+        for text in texts:
+            detector.predict(text)
+        per_item = time.perf_counter() - started
+        self.stdout.write(f"per-item: {per_item:.2f}s  {len(texts) / per_item:.1f} texts/s")
+
+        started = time.perf_counter()
+        detector.batch_predict(texts, batch_size=options['batch_size'])
+        batched = time.perf_counter() - started
+        self.stdout.write(f"batched:  {batched:.2f}s  {len(texts) / batched:.1f} texts/s  "
+                          f"(x{per_item / batched:.1f})")
@@ -0,0 +1,40 @@
+"""
+moderate_content – Analyse opinions/articles that have no ContentAnalysis yet.
+Covers content created while the in-process pipeline was down.
+Usage: python manage.py moderate_content --batch-size 64
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+
+from Articles.models import Article
+from Opinions.models import Opinion
+from QomAI.models import ContentAnalysis
+from QomAI.services.moderation_service import ModerationItem, process_batch
+
+
+class Command(BaseCommand):
+    help = 'Runs fake news analysis over content missing from ContentAnalysis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=64)
+
+    def handle(self, *args, **options):
+        sources = [
+            (Opinion, 'user_id', lambda o: o.content, ('pk', 'user_id', 'content')),
+            (Article, 'author_id', lambda a: f"{a.title}\n\n{a.content}", ('pk', 'author_id', 'title', 'content')),
+        ]
+        total = 0
+        for model, user_field, text_of, fields in sources:
+            ct = ContentType.objects.get_for_model(model)
+            done = set(ContentAnalysis.objects.filter(content_type=ct).values_list('object_id', flat=True))
+            batch = []
+            for obj in model.objects.only(*fields).iterator(chunk_size=options['batch_size']):
+                if str(obj.pk) in done:
+                    continue
+                batch.append(ModerationItem(text_of(obj), getattr(obj, user_field), ct.pk, str(obj.pk)))
+                if len(batch) >= options['batch_size']:
+                    total += len(process_batch(batch))
+                    batch = []
+            if batch:
+                total += len(process_batch(batch))
+        self.stdout.write(self.style.SUCCESS(f"Analysed {total} items."))
@@ -85,8 +85,21 @@ class ContentAnalysis(models.Model):
     input_content = models.TextField()
     result = models.JSONField()
     confidence_score = models.FloatField(null=True, blank=True)
+    # sha256 of the normalized text; identical content is only scored once
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    # Moderated object (Opinion, Article, ...) when the analysis came from the pipeline
+    content_type = models.ForeignKey(
+        'contenttypes.ContentType',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    object_id = models.CharField(max_length=64, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Content analyses'
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='qomai_analysis_object_idx'),
+        ]
@@ -0,0 +1,178 @@
+"""
+Content Moderation Service for QomAI
+Runs new opinions and articles through the fake news detector in micro-batches.
+
+Producers (post_save signals) call ``enqueue``; a background asyncio worker
+collects up to ``batch_size`` items (waiting at most ``max_wait`` seconds
+for a batch to fill), skips texts whose content hash was already analysed,
+scores the rest with a single ``FakeNewsDetector.batch_predict`` call and
+bulk-creates the ContentAnalysis rows.
+"""
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT_LENGTH = 5000
+
+
+@dataclass
+class ModerationItem:
+    """A piece of content waiting to be analysed"""
+    text: str
+    user_id: int
+    content_type_id: Optional[int] = None
+    object_id: Optional[str] = None
+
+
+def _detector():
+    from ML.inference.fake_news_detector import detector
+    return detector
+
+
+def process_batch(items: List[ModerationItem], detector=None) -> list:
+    """
+    Analyse a batch synchronously and store one ContentAnalysis per item.
+
+    Texts already analysed (same content hash) reuse the stored verdict;
+    the remaining unique texts go to the model in one batch_predict call.
+    Returns the created ContentAnalysis rows in input order.
+    """
+    from ML.inference.fake_news_detector import content_hash
+    from QomAI.models import ContentAnalysis
+
+    if not items:
+        return []
+    hashes = [content_hash(item.text) for item in items]
+
+    # Reuse earlier verdicts for content we have already seen
+    known = {}
+    for row in (ContentAnalysis.objects
+                .filter(analysis_type='fake_news', content_hash__in=set(hashes))
+                .order_by('content_hash', '-created_at')
+                .values('content_hash', 'result', 'confidence_score')):
+        known.setdefault(row['content_hash'], row)
+
+    pending = {}
+    for item, key in zip(items, hashes):
+        if key not in known:
+            pending.setdefault(key, item.text[:MAX_TEXT_LENGTH])
+    if pending:
+        detector = detector or _detector()
+        predictions = detector.batch_predict(list(pending.values()))
+        for key, prediction in zip(pending, predictions):
+            known[key] = {'result': prediction, 'confidence_score': prediction.get('confidence')}
+
+    return ContentAnalysis.objects.bulk_create([
+        ContentAnalysis(
+            user_id=item.user_id,
+            analysis_type='fake_news',
+            input_content=item.text[:MAX_TEXT_LENGTH],
+            result=known[key]['result'],
+            confidence_score=known[key]['confidence_score'],
+            content_hash=key,
+            content_type_id=item.content_type_id,
+            object_id=item.object_id,
+        )
+        for item, key in zip(items, hashes)
+    ])
+
+
+class ModerationPipeline:
+    """
+    Background micro-batching worker.
+    The event loop lives in a daemon thread so WSGI workers can enqueue
+    without blocking the request.
+    """
+
+    def __init__(self, batch_size: int = 32, max_wait: float = 0.05):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name='moderation-worker', daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        ready.set()
+        self._loop.run_until_complete(self._worker())
+
+    def enqueue(self, item: ModerationItem):
+        self.start()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        stopping = False
+        while not stopping:
+            batch = await self._next_batch()
+            stopping = None in batch
+            batch = [item for item in batch if item is not None]
+            if not batch:
+                continue
+            try:
+                # Model and ORM calls are blocking; run them off the loop so enqueues never wait
+                await self._loop.run_in_executor(None, self._process, batch)
+            except Exception as e:
+                logger.error(f"Moderation batch of {len(batch)} failed: {e}")
+
+    @staticmethod
+    def _process(batch):
+        close_old_connections()
+        try:
+            process_batch(batch)
+        finally:
+            close_old_connections()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+
+# Singleton instance
+moderation_pipeline = ModerationPipeline()
+
+
+def enqueue(text: str, user_id: int, content_type_id=None, object_id=None):
+    """Queue content for analysis (no-op when CONTENT_MODERATION_ENABLED is False)."""
+    if not text or not getattr(settings, 'CONTENT_MODERATION_ENABLED', True):
+        return
+    moderation_pipeline.enqueue(ModerationItem(
+        text=text,
+        user_id=user_id,
+        content_type_id=content_type_id,
+        object_id=str(object_id) if object_id is not None else None,
+    ))
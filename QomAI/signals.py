@@ -0,0 +1,28 @@
+"""
+Moderation Signals
+Queue newly created opinions and articles for fake news analysis.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+
+def _queue_for_moderation(instance, text, user_id):
+    from QomAI.services.moderation_service import enqueue
+
+    content_type_id = ContentType.objects.get_for_model(instance).pk
+    object_id = instance.pk
+    transaction.on_commit(lambda: enqueue(text, user_id, content_type_id, object_id))
+
+
+@receiver(post_save, sender='Opinions.Opinion')
+def moderate_opinion(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _queue_for_moderation(instance, instance.content, instance.user_id)
+
+
+@receiver(post_save, sender='Articles.Article')
+def moderate_article(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _queue_for_moderation(instance, f"{instance.title}\n\n{instance.content}", instance.author_id)
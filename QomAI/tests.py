@@ -0,0 +1,48 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from QomAI.models import ContentAnalysis
+from QomAI.services.moderation_service import ModerationItem, process_batch
+
+User = get_user_model()
+
+
+class CountingDetector:
+    """Detector stand-in that records how many texts reach the model"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def batch_predict(self, texts):
+        self.calls.append(list(texts))
+        return [{'is_fake': '!!!' in t, 'confidence': 0.9, 'label': 'fake' if '!!!' in t else 'real'} for t in texts]
+
+
+@override_settings(CONTENT_MODERATION_ENABLED=False)
+class ModerationPipelineTests(TestCase):
+    """Tests for batched, deduplicated content analysis"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='mod@test.com', password='testpass123',
+                                             first_name='Mod', last_name='User')
+    
+    def test_batch_dedupes_by_content_hash(self):
+        detector = CountingDetector()
+        items = [
+            ModerationItem('Exam dates are out', self.user.id),
+            ModerationItem('Free data for all!!!', self.user.id),
+            ModerationItem('Exam   dates are out', self.user.id),
+        ]
+        rows = process_batch(items, detector=detector)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(len(detector.calls), 1)
+        self.assertEqual(len(detector.calls[0]), 2)
+        self.assertTrue(rows[1].result['is_fake'])
+        self.assertEqual(rows[0].content_hash, rows[2].content_hash)
+    
+    def test_known_content_skips_model(self):
+        process_batch([ModerationItem('Library hours extended', self.user.id)], detector=CountingDetector())
+        detector = CountingDetector()
+        process_batch([ModerationItem('Library hours extended', self.user.id)], detector=detector)
+        self.assertEqual(detector.calls, [])
+        self.assertEqual(ContentAnalysis.objects.filter(analysis_type='fake_news').count(), 2)
@@ -415,11 +415,25 @@ class WebSearchView(APIView):
 
 class FakeNewsAnalysisView(APIView):
     permission_classes = [IsAuthenticated]
-    def post(self, request): return Response({'message': 'Placeholder'})
+    def post(self, request):
+        from .services.moderation_service import ModerationItem, process_batch
+        texts = request.data.get('texts') or [request.data.get('text', '')]
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = [str(t) for t in texts if t][:50]
+        if not texts:
+            return Response({'error': 'text is required'}, status=status.HTTP_400_BAD_REQUEST)
+        analyses = process_batch([ModerationItem(text=t, user_id=request.user.id) for t in texts])
+        return Response({'results': ContentAnalysisSerializer(analyses, many=True).data})
 
 class RecommendationsView(APIView):
     permission_classes = [IsAuthenticated]
-    def get(self, request): return Response({'recommendations': []})
+    def get(self, request):
+        from Payment.recommendation_service import recommend_products
+        from Payment.serializers import ProductSerializer
+        from Payment.utils import resolve_payment_profile
+        products = recommend_products(resolve_payment_profile(request), limit=10)
+        return Response({'recommendations': ProductSerializer(products, many=True).data})
 
 class GenerateLearningPathView(APIView):
     permission_classes = [IsAuthenticated]
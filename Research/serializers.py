@@ -7,6 +7,7 @@ from .models import (
     ResearcherApplication
 )
 from Authentication.models import CustomUser
+from comrade.counters import PendingCountersMixin
 
 class UserMiniSerializer(serializers.ModelSerializer):
     """Minimal user info for displays"""
@@ -75,13 +76,14 @@ class ResearchPublicationSerializer(serializers.ModelSerializer):
         model = ResearchPublication
         fields = '__all__'
 
-class ResearchProjectSerializer(serializers.ModelSerializer):
+class ResearchProjectSerializer(PendingCountersMixin, serializers.ModelSerializer):
     principal_investigator = UserMiniSerializer(read_only=True)
     co_investigators = UserMiniSerializer(many=True, read_only=True)
     milestones = ResearchMilestoneSerializer(many=True, read_only=True)
     positions = ParticipantPositionSerializer(many=True, read_only=True)
     publication = ResearchPublicationSerializer(read_only=True)
     requirements = ParticipantRequirementsSerializer(many=True, read_only=True)
+    pending_counters = ('views',)
     
     class Meta:
         model = ResearchProject
@@ -2,6 +2,7 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, Count
+from comrade import counters
 from datetime import datetime
 from .models import (
     ResearchProject, ParticipantRequirements, ParticipantPosition,
@@ -130,8 +131,7 @@ class ResearchProjectViewSet(viewsets.ModelViewSet):
     def record_view(self, request, pk=None):
         """Record a project view"""
         project = self.get_object()
-        project.views += 1
-        project.save(update_fields=['views'])
+        counters.incr(project, 'views')
         user = request.user if request.user.is_authenticated else None
         ResearchAnalytics.objects.create(research=project, user=user, action='view')
         return Response({'status': 'recorded'})
@@ -164,7 +164,7 @@ class ResearchProjectViewSet(viewsets.ModelViewSet):
         total_survey_responses = TaskResponse.objects.filter(task__in=tasks).count()
         
         return Response({
-            'views': project.views,
+            'views': counters.value(project, 'views'),
             'action_counts': action_counts,
             'daily_views': daily_views,
             'total_applications': ParticipantApplication.objects.filter(position__research=project).count(),
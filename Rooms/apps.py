@@ -8,3 +8,7 @@ class RoomsConfig(AppConfig):
     def ready(self):
         # Import signals to register them
         import Rooms.auto_creation
+        
+        from comrade.media import register
+        from Rooms.models import RoomChatFile
+        register(RoomChatFile, 'file', is_image=lambda attachment, file: attachment.file_type == 'image')
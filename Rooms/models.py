@@ -217,6 +217,9 @@ class RoomChatFile(models.Model):
     file_size = models.PositiveIntegerField(default=0)
     uploaded_at = models.DateTimeField(default=datetime.now)
     uploaded_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    # For images: WebP sizes and blur-up placeholder (see comrade/media.py)
+    derivatives = models.JSONField(default=dict, blank=True)
+    placeholder = models.TextField(blank=True)
     
     def __str__(self):
         return self.file_name
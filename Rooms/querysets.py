@@ -0,0 +1,71 @@
+"""
+Hydration plans for the Rooms list and chat serializers.
+
+Each function takes a queryset and returns it with everything the matching
+serializer reads per row fetched up front:
+
+- counts come from correlated ``COUNT`` subqueries (not JOIN + GROUP BY,
+  which would multiply rows when several many-to-many counts are combined)
+- the viewer's membership is an ``EXISTS`` on the members through table
+- related rows the serializer dereferences are pulled in with
+  ``select_related`` / ``prefetch_related``
+
+Serializers read the annotations when present and fall back to their
+per-row queries otherwise, so unhydrated querysets stay correct.
+"""
+
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from Rooms.models import Room, RoomChat
+
+
+def _m2m_count(through, owner_field):
+    """Number of through-table rows pointing at the outer row."""
+    rows = (
+        through.objects.filter(**{owner_field: OuterRef('pk')})
+        .order_by()
+        .values(owner_field)
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def hydrate_rooms(queryset, user=None):
+    """
+    Rooms for RoomListSerializer / RoomRecommendationSerializer.
+
+    Adds ``member_total`` and, for an authenticated ``user``,
+    ``viewer_is_member``.
+    """
+    members = Room.members.through
+    queryset = queryset.annotate(member_total=_m2m_count(members, 'room'))
+    if user is not None and user.is_authenticated:
+        queryset = queryset.annotate(
+            viewer_is_member=Exists(members.objects.filter(room=OuterRef('pk'), customuser=user.pk))
+        )
+    return queryset
+
+
+def hydrate_chats(queryset):
+    """
+    Chat messages for RoomChatSerializer.
+
+    Adds ``read_total`` / ``delivered_total`` and loads the sender (with
+    profile), the replied-to message and its sender, the forwarding source
+    room and the attached files.
+    """
+    return (
+        queryset
+        .select_related(
+            'sender__user_profile',
+            'reply_to__sender',
+            'forwarded_from_room',
+        )
+        .prefetch_related('files')
+        .annotate(
+            read_total=_m2m_count(RoomChat.read_by.through, 'roomchat'),
+            delivered_total=_m2m_count(RoomChat.delivered_to.through, 'roomchat'),
+        )
+    )
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from comrade.media import srcset
 from Rooms.models import Room, DefaultRoom, DirectMessage, DirectMessageRoom, ForwadingLog
 from Authentication.models import CustomUser
 
@@ -72,11 +73,16 @@ class RoomListSerializer(serializers.ModelSerializer):
                   'is_member', 'created_on', 'invitation_code']
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        # Annotated by Rooms.querysets.hydrate_rooms
+        count = getattr(obj, 'member_total', None)
+        return count if count is not None else obj.members.count()
     
     def get_is_member(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            is_member = getattr(obj, 'viewer_is_member', None)
+            if is_member is not None:
+                return is_member
             return obj.members.filter(id=request.user.id).exists()
         return False
 
@@ -92,7 +98,8 @@ class RoomRecommendationSerializer(serializers.ModelSerializer):
                   'match_reason', 'created_on']
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        count = getattr(obj, 'member_total', None)
+        return count if count is not None else obj.members.count()
     
     def get_match_reason(self, obj):
         # This will be set in the view based on why it's recommended
@@ -247,16 +254,24 @@ from Rooms.models import RoomSettings, RoomChat, RoomChatFile
 
 class RoomChatFileSerializer(serializers.ModelSerializer):
     """Serializer for chat file attachments"""
+    srcset = serializers.SerializerMethodField()
+    
     class Meta:
         model = RoomChatFile
-        fields = ['id', 'file', 'file_name', 'file_type', 'file_size', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_at']
+        fields = ['id', 'file', 'srcset', 'placeholder', 'file_name', 'file_type', 'file_size', 'uploaded_at']
+        read_only_fields = ['id', 'placeholder', 'uploaded_at']
+    
+    def get_srcset(self, obj):
+        if obj.file_type != 'image':
+            return None
+        return srcset(obj.file, obj.derivatives, self.context.get('request'))
 
 
 class RoomChatSerializer(serializers.ModelSerializer):
     """Serializer for room chat messages with WhatsApp-like features"""
     sender_info = UserMinimalSerializer(source='sender', read_only=True)
     sender_avatar = serializers.SerializerMethodField()
+    sender_avatar_srcset = serializers.SerializerMethodField()
     files = RoomChatFileSerializer(many=True, read_only=True)
     is_own = serializers.SerializerMethodField()
     read_count = serializers.SerializerMethodField()
@@ -267,7 +282,7 @@ class RoomChatSerializer(serializers.ModelSerializer):
     class Meta:
         model = RoomChat
         fields = [
-            'id', 'room', 'sender', 'sender_info', 'sender_avatar', 'content',
+            'id', 'room', 'sender', 'sender_info', 'sender_avatar', 'sender_avatar_srcset', 'content',
             'message_type', 'status', 'files', 'event', 'task', 'resource', 'announcement',
             'is_forwarded', 'forwarded_from_room', 'forwarded_from_room_name',
             'forwarded_from_user', 'reply_to', 'reply_to_preview',
@@ -285,6 +300,12 @@ class RoomChatSerializer(serializers.ModelSerializer):
             return obj.sender.user_profile.avatar.url
         return None
     
+    def get_sender_avatar_srcset(self, obj):
+        profile = getattr(obj.sender, 'user_profile', None)
+        if profile is None:
+            return None
+        return srcset(profile.avatar, profile.avatar_derivatives, self.context.get('request'))
+    
     def get_is_own(self, obj):
         """Check if message is from current user (for alignment/styling)"""
         request = self.context.get('request')
@@ -294,11 +315,14 @@ class RoomChatSerializer(serializers.ModelSerializer):
     
     def get_read_count(self, obj):
         """Count of users who have read this message"""
-        return obj.read_by.count()
+        # Annotated by Rooms.querysets.hydrate_chats
+        count = getattr(obj, 'read_total', None)
+        return count if count is not None else obj.read_by.count()
     
     def get_delivered_count(self, obj):
         """Count of users who received this message"""
-        return obj.delivered_to.count()
+        count = getattr(obj, 'delivered_total', None)
+        return count if count is not None else obj.delivered_to.count()
     
     def get_forwarded_from_room_name(self, obj):
         """Get the name of room message was forwarded from (for display)"""
@@ -1,3 +1,79 @@
 from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
 
-# Create your tests here.
+from Rooms.models import Room, RoomChat
+
+User = get_user_model()
+
+
+class RoomQueryCountTests(TestCase):
+    """Room list/chat endpoints must not issue queries per serialized row"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='member@test.com', password='testpass123',
+            first_name='Room', last_name='Member'
+        )
+        self.other = User.objects.create_user(
+            email='other@test.com', password='testpass123',
+            first_name='Other', last_name='Member'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.room = self._make_room('General')
+
+    def _make_room(self, name):
+        room = Room.objects.create(name=name, description='', operation_state='active', created_by=self.user)
+        room.members.add(self.user, self.other)
+        return room
+
+    def _add_chats(self, count):
+        previous = RoomChat.objects.filter(room=self.room).last()
+        for i in range(count):
+            chat = RoomChat.objects.create(
+                room=self.room, sender=self.other if i % 2 else self.user,
+                content=f'message {i}', reply_to=previous,
+            )
+            chat.read_by.add(self.user)
+            chat.delivered_to.add(self.user, self.other)
+            previous = chat
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), resp
+
+    def test_my_rooms_query_count_is_constant(self):
+        url = '/api/rooms/rooms/my_rooms/'
+        small, _ = self._count_queries(url)
+        for i in range(10):
+            self._make_room(f'Room {i}')
+        large, resp = self._count_queries(url)
+        self.assertEqual(small, large)
+        self.assertEqual(len(resp.data), 11)
+        self.assertTrue(all(r['is_member'] and r['member_count'] == 2 for r in resp.data))
+
+    def test_room_list_query_count_is_constant(self):
+        url = '/api/rooms/rooms/'
+        small, _ = self._count_queries(url)
+        for i in range(10):
+            self._make_room(f'Room {i}')
+        large, _ = self._count_queries(url)
+        self.assertEqual(small, large)
+
+    def test_chats_query_count_is_constant(self):
+        url = f'/api/rooms/rooms/{self.room.pk}/chats/'
+        self._add_chats(3)
+        small, _ = self._count_queries(url)
+        self._add_chats(15)
+        large, resp = self._count_queries(url)
+        self.assertEqual(small, large)
+        message = resp.data['results'][-1]
+        self.assertEqual(message['read_count'], 1)
+        self.assertEqual(message['delivered_count'], 2)
+        self.assertEqual(message['reply_to_preview']['sender_name'], 'Other Member')
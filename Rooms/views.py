@@ -16,6 +16,7 @@ from Rooms.serializers import (
     RoomChatSerializer, RoomChatCreateSerializer, RoomSettingsSerializer,
     RoomDetailSerializer, MemberDetailSerializer, RoomChatFileSerializer
 )
+from Rooms.querysets import hydrate_rooms, hydrate_chats
 from Opinions.models import Follow
 from Announcements.models import AnnouncementsRequest, Announcements, Task, Text, CompletedTask, Pin, Reposts, Reply, QuestionResponse, Question, SubQuestion, Choice, FileResponse, TaskResponse, Reaction, Comment
 from Announcements.serializers import AnnouncementsRequestSerializer, AnnouncementsSerializer, TaskSerializer, TextSerializer, CompletedTaskSerializer, PinSerializer, RepostsSerializer, ReplySerializer, QuestionResponseSerializer, QuestionSerializer, SubQuestionSerializer, ChoiceSerializer, FileResponseSerializer, TaskResponseSerializer, ReactionSerializer, CommentSerializer
@@ -99,6 +100,8 @@ class RoomViewSet(ModelViewSet):
         if institution:
             queryset = queryset.filter(institutions__id=institution)
         
+        if self.action == 'list':
+            queryset = hydrate_rooms(queryset, self.request.user)
         return queryset.order_by('-created_on')
     
     def perform_create(self, serializer):
@@ -111,10 +114,10 @@ class RoomViewSet(ModelViewSet):
     def my_rooms(self, request):
         """Get rooms the user is a member of, sorted by latest message"""
         from django.db.models import Max
-        rooms = Room.objects.filter(
+        rooms = hydrate_rooms(Room.objects.filter(
             members=request.user,
             operation_state='active'
-        ).annotate(
+        ), request.user).annotate(
             latest_message_at=Max('chats__created_at')
         ).order_by('-latest_message_at', '-created_on')
         serializer = RoomListSerializer(rooms, many=True, context={'request': request})
@@ -129,9 +132,9 @@ class RoomViewSet(ModelViewSet):
         user_room_ids = Room.objects.filter(members=user).values_list('id', flat=True)
         
         # Start with active rooms
-        queryset = Room.objects.filter(
+        queryset = hydrate_rooms(Room.objects.filter(
             operation_state='active'
-        ).exclude(id__in=user_room_ids)
+        ).exclude(id__in=user_room_ids))
         
         # Try to find institution-based recommendations
         institution_rooms = queryset.none()
@@ -564,13 +567,13 @@ class RoomViewSet(ModelViewSet):
         room = self.get_object()
         
         # Check if user is member
-        if request.user not in room.members.all():
+        if not room.members.filter(pk=request.user.pk).exists():
             return Response({'error': 'You are not a member of this room'}, 
                             status=status.HTTP_403_FORBIDDEN)
         
         if request.method == 'GET':
             # Get chats with optional filters
-            chats = RoomChat.objects.filter(room=room, is_deleted=False).select_related('sender')
+            chats = hydrate_chats(RoomChat.objects.filter(room=room, is_deleted=False))
             
             # Filter by message type
             msg_type = request.query_params.get('type')
@@ -0,0 +1,168 @@
+"""
+Versioned, cached hierarchy documents.
+
+A Hierarchy describes the unit models hanging off an owner (an organisation
+or an institution). Its document is every section serialized in one pass:
+one query per unit model, with many-to-many fields prefetched.
+
+- Each owner has a version counter in the cache. post_save/post_delete on
+  any unit model (and m2m_changed on its many-to-many fields) bump the
+  owner's version once the transaction commits (both owners when a unit
+  moves).
+- Documents are cached under (owner, version), so a bump simply makes the
+  old document unreachable.
+- respond() sends the document with an ETag derived from the version and
+  answers a matching If-None-Match with 304 before any document is built.
+
+A missing version counter (evicted or never set) starts at the current time
+in nanoseconds, so versions never repeat and old ETags cannot match again.
+"""
+
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from rest_framework import status
+from rest_framework.response import Response
+
+DOCUMENT_TTL = 24 * 60 * 60
+
+Section = namedtuple('Section', 'model serializer_class filters')
+
+
+class Hierarchy:
+
+    def __init__(self, kind, owner_field, sections):
+        """
+        ``sections`` maps a document key to ``Section(model,
+        serializer_class, filters)``; ``owner_field`` is the unit models'
+        foreign key to the owner.
+        """
+        self.kind = kind
+        self.owner_field = owner_field
+        self.sections = sections
+
+    def owner_key(self, owner_id):
+        """
+        Canonical string form of an owner id (URL strings and model values
+        agree). Raises ValidationError for a malformed id.
+        """
+        model = next(iter(self.sections.values())).model
+        return str(model._meta.get_field(self.owner_field).target_field.to_python(owner_id))
+
+    # ── Versions ────────────────────────────────────────────────────────
+
+    def _version_key(self, owner_id):
+        return f'hierarchy:{self.kind}:{self.owner_key(owner_id)}:version'
+
+    def version(self, owner_id):
+        key = self._version_key(owner_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        return version
+
+    def bump(self, owner_id):
+        key = self._version_key(owner_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    def etag(self, owner_id):
+        return f'"{self.kind}-{self.owner_key(owner_id)}-{self.version(owner_id)}"'
+
+    # ── Documents ───────────────────────────────────────────────────────
+
+    def section_for(self, model):
+        """Document key holding ``model``'s units, or None."""
+        return next((key for key, section in self.sections.items() if section.model is model), None)
+
+    def build(self, owner_id):
+        document = {}
+        for key, section in self.sections.items():
+            m2m = [field.name for field in section.model._meta.many_to_many]
+            queryset = section.model.objects.filter(**{self.owner_field: owner_id}, **section.filters)
+            document[key] = section.serializer_class(queryset.prefetch_related(*m2m), many=True).data
+        return document
+
+    def document(self, owner_id):
+        """(document, etag) for ``owner_id``, built on a cache miss."""
+        owner_key = self.owner_key(owner_id)
+        version = self.version(owner_id)
+        key = f'hierarchy:{self.kind}:{owner_key}:{version}'
+        document = cache.get(key)
+        if document is None:
+            document = self.build(owner_id)
+            cache.set(key, document, DOCUMENT_TTL)
+        return document, f'"{self.kind}-{owner_key}-{version}"'
+
+    def not_modified(self, request, owner_id):
+        """A 304 response if the client's If-None-Match is current, else None."""
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return None
+        etag = self.etag(owner_id)
+        if header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]:
+            return self._headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+        return None
+
+    def respond(self, request, owner_id, section=None, view=None):
+        """
+        The document (or one ``section`` of it) with ETag/304 support.
+        Pass the ``view`` to paginate a section like its list endpoint.
+        """
+        response = self.not_modified(request, owner_id)
+        if response is not None:
+            return response
+        document, etag = self.document(owner_id)
+        data = document if section is None else document[section]
+        if view is not None and section is not None:
+            page = view.paginate_queryset(data)
+            if page is not None:
+                return self._headers(view.get_paginated_response(page), etag)
+        return self._headers(Response(data), etag)
+
+    @staticmethod
+    def _headers(response, etag):
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    # ── Invalidation ────────────────────────────────────────────────────
+
+    def connect(self):
+        attname = f'{self.owner_field}_id'
+
+        def bump_on_commit(owners):
+            for owner_id in set(owners) - {None}:
+                transaction.on_commit(lambda owner_id=owner_id: self.bump(owner_id))
+
+        def remember_owner(sender, instance, **kwargs):
+            # __dict__ so a deferred owner field is not fetched
+            instance._hierarchy_owner_id = instance.__dict__.get(attname)
+
+        def invalidate(sender, instance, **kwargs):
+            bump_on_commit([getattr(instance, attname, None), getattr(instance, '_hierarchy_owner_id', None)])
+            instance._hierarchy_owner_id = getattr(instance, attname, None)
+
+        def invalidate_m2m(sender, instance, action, reverse, model, pk_set, **kwargs):
+            if not action.startswith('post_'):
+                return
+            if not reverse:
+                bump_on_commit([getattr(instance, attname, None)])
+            elif pk_set:
+                # ``instance`` is the other side (e.g. a user); pk_set holds units
+                bump_on_commit(model.objects.filter(pk__in=pk_set).values_list(attname, flat=True))
+
+        for section in self.sections.values():
+            uid = f'hierarchy-{self.kind}-{section.model._meta.label}'
+            post_init.connect(remember_owner, sender=section.model, weak=False, dispatch_uid=f'{uid}-init')
+            post_save.connect(invalidate, sender=section.model, weak=False, dispatch_uid=f'{uid}-save')
+            post_delete.connect(invalidate, sender=section.model, weak=False, dispatch_uid=f'{uid}-delete')
+            for field in section.model._meta.many_to_many:
+                m2m_changed.connect(invalidate_m2m, sender=field.remote_field.through, weak=False,
+                                    dispatch_uid=f'{uid}-{field.name}')
@@ -0,0 +1,236 @@
+"""
+Image derivatives for uploaded media.
+
+Models opt in with register(). When a row whose image changed is committed,
+a background worker:
+
+- re-saves the original without EXIF/XMP metadata (orientation applied first)
+- writes WebP copies at DERIVATIVE_WIDTHS (never upscaled)
+- builds a tiny base64 WebP placeholder (LQIP) for blur-up rendering
+
+The derivative paths and the placeholder are written onto the row with a
+queryset update, so no further post_save fires. Serializers call srcset() to
+emit ``{'64': url, '320': url, '1080': url, 'original': url}``; widths that
+have no derivative (yet, or because the original is smaller) point at the
+original.
+"""
+
+import base64
+import logging
+import os
+import queue
+import threading
+from collections import namedtuple
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps, ImageSequence
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (64, 320, 1080)
+DERIVATIVE_DIR = 'derivatives'
+WEBP_QUALITY = 80
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_QUALITY = 30
+JPEG_QUALITY = 90
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment')
+# Originals are re-encoded in their own format, except these
+SAVE_FORMATS = {'MPO': 'JPEG'}
+
+Spec = namedtuple('Spec', 'field derivatives_field placeholder_field is_image')
+Rendered = namedtuple('Rendered', 'original derivatives placeholder')
+
+_registry = {}
+
+
+# ── Rendering (storage independent) ──────────────────────────────────────
+
+def _has_metadata(image):
+    return any(key in image.info for key in METADATA_KEYS) or bool(image.getexif())
+
+
+def _clean(frame):
+    """``frame`` with its EXIF orientation applied and metadata dropped."""
+    frame = ImageOps.exif_transpose(frame)
+    for key in METADATA_KEYS:
+        frame.info.pop(key, None)
+    return frame
+
+
+def _webp(image, width, quality):
+    copy = image.copy()
+    copy.thumbnail((width, width * 100), Image.LANCZOS)
+    buf = BytesIO()
+    copy.save(buf, format='WEBP', quality=quality, method=4)
+    return buf.getvalue()
+
+
+def render(source):
+    """
+    Derivatives for an image file object.
+
+    ``original`` is the metadata-free re-encoding of the source (every frame
+    of an animation, in the source format where Pillow can write it, PNG
+    otherwise), or None when it has no metadata to strip; ``derivatives``
+    maps width to WebP bytes for every width smaller than the source.
+    """
+    with Image.open(source) as opened:
+        opened.load()
+        fmt = SAVE_FORMATS.get(opened.format, opened.format)
+        had_metadata = _has_metadata(opened)
+        if getattr(opened, 'is_animated', False):
+            frames = [_clean(frame) for frame in ImageSequence.Iterator(opened)]
+        else:
+            frames = [_clean(opened)]
+    image = frames[0]
+
+    original = None
+    if had_metadata:
+        buf = BytesIO()
+        options = {'quality': JPEG_QUALITY} if fmt == 'JPEG' else {}
+        if len(frames) > 1:
+            options.update(save_all=True, append_images=frames[1:])
+        image.save(buf, format=fmt if fmt in Image.SAVE else 'PNG', exif=b'', **options)
+        original = buf.getvalue()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    derivatives = {width: _webp(image, width, WEBP_QUALITY) for width in DERIVATIVE_WIDTHS if width < image.width}
+    placeholder = 'data:image/webp;base64,' + base64.b64encode(
+        _webp(image, PLACEHOLDER_WIDTH, PLACEHOLDER_QUALITY)).decode()
+    return Rendered(original, derivatives, placeholder)
+
+
+# ── Registration ─────────────────────────────────────────────────────────
+
+def _default_is_image(instance, file):
+    return os.path.splitext(file.name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def register(model, field, derivatives_field='derivatives', placeholder_field='placeholder', is_image=None):
+    """
+    Generate derivatives for ``model.<field>``. ``is_image(instance, file)``
+    decides which uploads are images (file extension by default).
+    """
+    label = model._meta.label
+    _registry[label] = Spec(field, derivatives_field, placeholder_field, is_image or _default_is_image)
+    post_save.connect(_on_save, sender=model, weak=False, dispatch_uid=f'media-derivatives-{label}')
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    label = sender._meta.label
+    spec = _registry[label]
+    file = getattr(instance, spec.field)
+    if not file or (getattr(instance, spec.derivatives_field) or {}).get('source') == file.name:
+        return
+    if not spec.is_image(instance, file):
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: worker.enqueue(label, pk))
+
+
+# ── Generation ───────────────────────────────────────────────────────────
+
+def _replace(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def generate_derivatives(label, pk):
+    """Render and store derivatives for one row; returns the stored mapping (or None)."""
+    spec = _registry[label]
+    model = apps.get_model(label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+    file = getattr(instance, spec.field)
+    if not file:
+        return None
+
+    storage, name = file.storage, file.name
+    try:
+        with storage.open(name, 'rb') as source:
+            rendered = render(source)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Cannot derive images for {label} {pk} ({name}): {e}")
+        return None
+
+    updates = {}
+    if rendered.original is not None:
+        stored = _replace(storage, name, rendered.original)
+        if stored != name:
+            updates[spec.field] = name = stored
+
+    base = os.path.splitext(name)[0]
+    widths = {
+        str(width): _replace(storage, f'{DERIVATIVE_DIR}/{base}_{width}.webp', content)
+        for width, content in rendered.derivatives.items()
+    }
+    derivatives = {'source': name, 'widths': widths}
+    updates[spec.derivatives_field] = derivatives
+    updates[spec.placeholder_field] = rendered.placeholder
+    model.objects.filter(pk=pk).update(**updates)
+    return derivatives
+
+
+class DerivativeWorker:
+    """Daemon thread draining a queue of (model label, pk) to generate."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='media-derivatives', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, label, pk):
+        self.start()
+        self._queue.put((label, pk))
+
+    def _run(self):
+        while True:
+            label, pk = self._queue.get()
+            close_old_connections()
+            try:
+                generate_derivatives(label, pk)
+            except Exception:
+                logger.exception(f"Derivative generation failed for {label} {pk}")
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+
+worker = DerivativeWorker()
+
+
+# ── Serialization ────────────────────────────────────────────────────────
+
+def srcset(file, derivatives, request=None):
+    """``{'<width>': url, ..., 'original': url}`` for a file field, or None without a file."""
+    if not file:
+        return None
+
+    def absolute(url):
+        return request.build_absolute_uri(url) if request else url
+
+    original = absolute(file.url)
+    derivatives = derivatives or {}
+    widths = derivatives.get('widths', {}) if derivatives.get('source') == file.name else {}
+    result = {
+        str(width): absolute(file.storage.url(widths[str(width)])) if str(width) in widths else original
+        for width in DERIVATIVE_WIDTHS
+    }
+    result['original'] = original
+    return result